@@ -0,0 +1,111 @@
+"""
+The DisputeService shared by the API routes, built lazily.
+
+Building it loads the whole transaction dataset and imports the OpenAI SDK, so it is kept
+off the import path of app.main. It is built in a worker thread by the optional warm-up
+that the app's lifespan starts, by the first request that needs it, or by a /ready probe,
+whichever comes first; the event loop keeps answering /health meanwhile, and requests
+arriving during the build wait for that same build.
+"""
+import asyncio
+import logging
+import os
+import time
+from fastapi import HTTPException
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_service = None
+_build = None  # asyncio.Task building the service, kept until shutdown
+status = {"state": "not_started", "build_seconds": None, "error": None}
+
+def ensure_data_file():
+    """Generate the demo transaction data if DATA_FILE does not exist yet."""
+    data_file = os.path.join(REPOSITORY_ROOT, Config.DATA_FILE)
+    if not os.path.exists(data_file):
+        logger.info("Generating synthetic transaction data")
+        from app.utils.data_generator import generate_data
+        generate_data()
+    else:
+        logger.info(f"Using existing data file: {data_file}")
+
+def _build_service():
+    ensure_data_file()
+    from app.services.dispute_service import DisputeService  # imports the OpenAI SDK
+    return DisputeService()
+
+async def _start():
+    global _service
+    started = time.perf_counter()
+    try:
+        service = await asyncio.to_thread(_build_service)
+        if Config.DISPUTE_ANALYSIS_MODE == "queue":
+            await service.analysis_queue.start()
+        await service.ingestor.start()
+    except Exception as e:
+        logger.error(f"Error starting the dispute service: {str(e)}")
+        status.update(state="failed", error=str(e))
+        raise
+    _service = service
+    status.update(state="ready", build_seconds=round(time.perf_counter() - started, 3))
+    logger.info(f"Dispute service ready in {status['build_seconds']:.2f}s")
+    return service
+
+def _ensure_build():
+    """The build task, starting one if none has run or the last one failed."""
+    global _build
+    if _build is None or (_build.done() and _service is None):
+        status.update(state="starting", error=None)
+        _build = asyncio.ensure_future(_start())
+        _build.add_done_callback(lambda task: task.cancelled() or task.exception())  # logged in _start
+    return _build
+
+def start_warm_up():
+    """Start building the service in the background; called from the app's lifespan."""
+    _ensure_build()
+
+def current_dispute_service():
+    """The DisputeService if it has been built, else None; never starts a build."""
+    return _service
+
+async def get_dispute_service():
+    """
+    FastAPI dependency returning the shared DisputeService, building it on first use.
+
+    Raises HTTPException 503 if the service cannot be built; the next request tries again.
+    """
+    if _service is not None:
+        return _service
+    try:
+        return await asyncio.shield(_ensure_build())
+    except Exception:
+        raise HTTPException(status_code=503, detail="Service is unavailable, please retry shortly",
+                            headers={"Retry-After": "5"})
+
+def readiness():
+    """
+    Readiness of the dispute service, starting its build if nothing has yet.
+
+    Returns:
+        tuple: (True once the service is built, status dict)
+    """
+    if _service is None:
+        _ensure_build()
+    return _service is not None, dict(status)
+
+async def shutdown():
+    """Stop the service's background workers and release its clients and store."""
+    global _service, _build
+    if _build is not None and not _build.done():
+        await asyncio.wait([_build])  # the build thread cannot be interrupted
+    service, _service, _build = _service, None, None
+    status.update(state="stopped", build_seconds=None, error=None)
+    if service is None:
+        return
+    await service.ingestor.stop()
+    await service.analysis_queue.stop()
+    await service.openai_service.close()
+    service.disputes.close()
@@ -0,0 +1,44 @@
+import json
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder is used without it
+    orjson = None
+
+def dumps(content):
+    """Encode content as compact JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+class TrustedJSONResponse(Response):
+    """
+    JSON response for records read from our own stores.
+
+    Routes keep their response_model for the OpenAPI schema but return this response,
+    so FastAPI skips re-validating and copying every row through the Pydantic model.
+    Records must already have the model's shape; project() drops any extra fields.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps(content)
+
+def model_fields(model):
+    """Field names of a response model, in declaration order."""
+    return tuple(model.__fields__)
+
+def project(record, fields):
+    """The record restricted to fields (missing optional fields become None)."""
+    return {field: record.get(field) for field in fields}
+
+def ndjson_chunks(rows, fields, chunk_size=500):
+    """Encode records as JSON Lines, a few hundred per chunk to keep writes efficient."""
+    rows = iter(rows)
+    while True:
+        chunk = b"".join(dumps(project(row, fields)) + b"\n" for _, row in zip(range(chunk_size), rows))
+        if not chunk:
+            return
+        yield chunk
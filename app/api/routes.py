@@ -1,14 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi import APIRouter, HTTPException, Depends, Header, Response, Query
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from app.models.transaction import Transaction, DisputeRequest, DisputeResponse
-from app.services.dispute_service import DisputeService
+from app.models.transaction import Transaction, DisputeRequest, DisputeResponse, DisputeBatchRequest, DisputeBatchResponse
+from app.services.transaction_query import TransactionQuery
+from app.api.dependencies import current_dispute_service, get_dispute_service
+from app.api.responses import TrustedJSONResponse, model_fields, project, ndjson_chunks
+from app.config import Config
+from app.utils import metrics
+import asyncio
+import itertools
 import logging
 
 router = APIRouter()
-dispute_service = DisputeService()
 logger = logging.getLogger(__name__)
 
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+TRANSACTION_FIELDS = model_fields(Transaction)
+DISPUTE_RESPONSE_FIELDS = model_fields(DisputeResponse)
+
 # Simple auth check (would be more robust in production)
+@metrics.timed("auth")
 def verify_customer(customer_id: str, x_customer_id: Optional[str] = Header(None)):
     if not x_customer_id:
         raise HTTPException(status_code=401, detail="Authentication required")
@@ -16,42 +28,210 @@ def verify_customer(customer_id: str, x_customer_id: Optional[str] = Header(None
         raise HTTPException(status_code=403, detail="Not authorized to access this resource")
     return customer_id
 
+# Operational endpoints are guarded by a shared key rather than a customer identity
+def verify_admin(x_admin_key: Optional[str] = Header(None)):
+    if not Config.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if x_admin_key != Config.ADMIN_API_KEY:
+        raise HTTPException(status_code=401, detail="Admin authentication required")
+
 @router.get("/transactions/{customer_id}", response_model=List[Transaction])
-async def get_customer_transactions(customer_id: str, _: str = Depends(verify_customer)):
-    """Get all transactions for a customer."""
-    transactions = dispute_service.get_customer_transactions(customer_id)
-    return transactions
+async def get_customer_transactions(
+    customer_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=Config.TRANSACTION_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    merchant: Optional[str] = None,
+    category: Optional[str] = None,
+    is_fraudulent: Optional[bool] = None,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    _: str = Depends(verify_customer),
+    dispute_service=Depends(get_dispute_service)
+):
+    """
+    Get a customer's transactions, oldest first.
+    
+    Filters are applied server-side. With limit, a page is returned and the X-Next-Cursor
+    header carries the cursor for the following page (absent on the last page). format=ndjson
+    streams every matching transaction as JSON Lines, for exports.
+    """
+    try:
+        query = TransactionQuery(start_date=start_date, end_date=end_date, min_amount=min_amount,
+                                 max_amount=max_amount, merchant=merchant, category=category,
+                                 is_fraudulent=is_fraudulent)
+        if response_format == "ndjson":
+            rows = dispute_service.query_customer_transactions(customer_id, query, cursor)
+            if limit is not None:
+                rows = itertools.islice(rows, limit)
+            return StreamingResponse(ndjson_chunks(rows, TRANSACTION_FIELDS), media_type="application/x-ndjson")
+        transactions, next_cursor = dispute_service.list_customer_transactions(customer_id, query, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return TrustedJSONResponse([project(t, TRANSACTION_FIELDS) for t in transactions], headers=headers)
 
 @router.get("/transactions/{customer_id}/{transaction_id}", response_model=Transaction)
-async def get_transaction(customer_id: str, transaction_id: str, _: str = Depends(verify_customer)):
+async def get_transaction(customer_id: str, transaction_id: str, _: str = Depends(verify_customer),
+                          dispute_service=Depends(get_dispute_service)):
     """Get a specific transaction."""
     transaction = dispute_service.get_transaction(transaction_id)
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     if transaction['customer_id'] != customer_id:
         raise HTTPException(status_code=403, detail="Not authorized to access this transaction")
-    return transaction
+    return TrustedJSONResponse(project(transaction, TRANSACTION_FIELDS))
 
-@router.post("/disputes", response_model=DisputeResponse)
-async def create_dispute(dispute_request: DisputeRequest, _: str = Depends(verify_customer)):
-    """Create a new dispute for a transaction."""
-    result = dispute_service.create_dispute(dispute_request)
+@router.post("/disputes", response_model=DisputeResponse, responses={202: {"model": DisputeResponse}})
+async def create_dispute(
+    dispute_request: DisputeRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    _: str = Depends(verify_customer),
+    dispute_service=Depends(get_dispute_service)
+):
+    """
+    Create a new dispute for a transaction.
+    
+    In queue mode the dispute is accepted (202) with status PENDING_ANALYSIS and the
+    AI assessment is filled in later; poll GET /disputes/{customer_id}/{dispute_id}.
+    
+    Submissions are idempotent: retrying with the same Idempotency-Key, or submitting a
+    transaction that already has an open dispute, returns the existing dispute (200, with
+    an Idempotent-Replayed: true header) without analysing it again.
+    """
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(status_code=400,
+                            detail=f"Idempotency-Key must be 1-{MAX_IDEMPOTENCY_KEY_LENGTH} characters")
+    if Config.DISPUTE_ANALYSIS_MODE == "queue":
+        try:
+            result = dispute_service.submit_dispute(dispute_request, idempotency_key)
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Dispute intake is busy, please retry shortly",
+                                headers={"Retry-After": "5"})
+        response.status_code = 202
+    else:
+        result = await dispute_service.create_dispute_async(dispute_request, idempotency_key)
     if "error" in result:
-        raise HTTPException(status_code=400, detail=result["error"])
+        raise HTTPException(status_code=result.get("status_code", 400), detail=result["error"])
+    if result.pop("replayed", False):
+        response.status_code = 200
+        response.headers["Idempotent-Replayed"] = "true"
     return result
 
+@router.post("/disputes/batch", response_model=DisputeBatchResponse)
+async def create_disputes(batch: DisputeBatchRequest, x_customer_id: Optional[str] = Header(None),
+                          dispute_service=Depends(get_dispute_service)):
+    """
+    Create several disputes in one request.
+    
+    Every dispute must belong to the authenticated customer. Disputes that fail validation
+    are reported by index in the results and do not affect the others.
+    """
+    if not x_customer_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    if any(d.customer_id != x_customer_id for d in batch.disputes):
+        raise HTTPException(status_code=403, detail="Not authorized to access this resource")
+    if not batch.disputes:
+        raise HTTPException(status_code=400, detail="Batch contains no disputes")
+    if len(batch.disputes) > Config.DISPUTE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413,
+                            detail=f"Batch exceeds the maximum of {Config.DISPUTE_BATCH_MAX_ITEMS} disputes")
+    return {"results": await dispute_service.create_disputes(batch.disputes)}
+
 @router.get("/disputes/{customer_id}", response_model=List[DisputeResponse])
-async def get_customer_disputes(customer_id: str, _: str = Depends(verify_customer)):
+async def get_customer_disputes(customer_id: str, _: str = Depends(verify_customer),
+                                dispute_service=Depends(get_dispute_service)):
     """Get all disputes for a customer."""
     disputes = dispute_service.get_customer_disputes(customer_id)
-    return disputes
+    return TrustedJSONResponse([project(d, DISPUTE_RESPONSE_FIELDS) for d in disputes])
 
 @router.get("/disputes/{customer_id}/{dispute_id}", response_model=DisputeResponse)
-async def get_dispute(customer_id: str, dispute_id: str, _: str = Depends(verify_customer)):
+async def get_dispute(customer_id: str, dispute_id: str, _: str = Depends(verify_customer),
+                      dispute_service=Depends(get_dispute_service)):
     """Get a specific dispute."""
     dispute = dispute_service.get_dispute(dispute_id)
     if not dispute:
         raise HTTPException(status_code=404, detail="Dispute not found")
     if dispute['customer_id'] != customer_id:
         raise HTTPException(status_code=403, detail="Not authorized to access this dispute")
-    return dispute
\ No newline at end of file
+    return TrustedJSONResponse(project(dispute, DISPUTE_RESPONSE_FIELDS))
+
+@router.get("/admin/llm-cache", dependencies=[Depends(verify_admin)])
+async def get_llm_cache_stats(dispute_service=Depends(get_dispute_service)):
+    """Hit/miss counters and estimated token and latency savings of the LLM assessment cache."""
+    cache = dispute_service.openai_service.cache
+    return cache.stats() if cache is not None else {"backend": None}
+
+
+@router.get("/admin/llm-client", dependencies=[Depends(verify_admin)])
+async def get_llm_client_status(dispute_service=Depends(get_dispute_service)):
+    """Circuit breaker state and retry, hedging and deadline counters of the LLM client."""
+    return dispute_service.openai_service.llm_client.status()
+
+@router.get("/admin/triage", dependencies=[Depends(verify_admin)])
+async def get_triage_stats(dispute_service=Depends(get_dispute_service)):
+    """How many disputes rule-based triage settled without calling the LLM."""
+    return dispute_service.triage.stats()
+
+@router.get("/admin/ingestion", dependencies=[Depends(verify_admin)])
+async def get_ingestion_status(dispute_service=Depends(get_dispute_service)):
+    """Rows merged from the transaction delta, merge lag and the unread backlog."""
+    return dispute_service.ingestor.status()
+
+def _service_metrics():
+    """Counters the services already keep, reported on each /metrics scrape (none before the service is built)."""
+    samples = []
+    dispute_service = current_dispute_service()
+    if dispute_service is None:
+        return samples
+    cache = dispute_service.openai_service.cache
+    if cache is not None:
+        cache_stats = cache.stats()
+        samples += [
+            ("llm_cache_lookups_total", "counter", "LLM assessment cache lookups",
+             [({"result": "hit"}, cache_stats["hits"]), ({"result": "miss"}, cache_stats["misses"])]),
+            ("llm_cache_hit_ratio", "gauge", "Share of LLM assessment cache lookups that hit",
+             [({}, cache_stats["hit_rate"])]),
+            ("llm_cache_entries", "gauge", "Assessments held in the LLM cache", [({}, cache_stats["entries"])]),
+        ]
+    client_stats = dispute_service.openai_service.llm_client.status()
+    samples += [
+        ("llm_circuit_open", "gauge", "1 while the LLM circuit breaker refuses calls",
+         [({}, int(client_stats["circuit"] != "closed"))]),
+        ("llm_client_events_total", "counter", "LLM client retries, hedges, deadline expiries and refused calls",
+         [({"event": event}, client_stats[event])
+          for event in ("retries", "retries_denied", "hedges", "hedges_won", "deadline_exceeded", "rejected_open")]),
+    ]
+    samples.append(("dispute_duplicates_total", "counter",
+                    "Repeated dispute submissions answered without a new analysis, by how they were caught",
+                    [({"kind": kind}, count) for kind, count in dispute_service.duplicate_stats.items()]))
+    triage_stats = dispute_service.triage.stats()
+    samples.append(("triage_disputes_total", "counter", "Disputes seen by rule-based triage, by outcome",
+                    [({"outcome": "high"}, triage_stats["short_circuited_high"]),
+                     ({"outcome": "low"}, triage_stats["short_circuited_low"]),
+                     ({"outcome": "escalated"}, triage_stats["escalated_to_llm"])]))
+    similar_stats = dispute_service.similar_disputes.stats()
+    samples += [
+        ("similar_dispute_searches_total", "counter",
+         "Escalated disputes looked up in the similar-dispute index, by outcome",
+         [({"outcome": "reused"}, similar_stats["reused"]),
+          ({"outcome": "with_context"}, similar_stats["with_context"]),
+          ({"outcome": "none"}, similar_stats["searches"] - similar_stats["reused"] - similar_stats["with_context"])]),
+        ("similar_disputes_indexed", "gauge", "Past disputes in the similar-dispute index",
+         [({}, similar_stats["indexed"])]),
+    ]
+    queue = dispute_service.analysis_queue
+    samples += [
+        ("dispute_analysis_queue_depth", "gauge", "Disputes waiting for background analysis", [({}, queue.depth())]),
+        ("dispute_analysis_jobs_total", "counter", "Background analysis jobs, by outcome",
+         [({"outcome": outcome}, count) for outcome, count in queue.stats.items()]),
+    ]
+    ingestion = dispute_service.ingestor.stats
+    samples.append(("transaction_delta_rows_merged_total", "counter", "Rows merged from the transaction delta",
+                    [({}, ingestion["rows_merged"])]))
+    return samples
+
+metrics.REGISTRY.add_collector(_service_metrics)
@@ -13,19 +13,94 @@ class Config:
     # OpenAI settings
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # e.g. a local stub server for load tests
+    OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "32"))  # in-flight LLM calls per worker
+    OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "30"))  # per attempt
+    OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))  # retries of transient failures (connection, timeout, 429, 5xx)
+    LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "45"))  # per analysis, across retries
+    LLM_RETRY_BACKOFF_SECONDS = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "0.5"))  # first retry waits up to this, doubling
+    LLM_RETRY_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_RETRY_BACKOFF_MAX_SECONDS", "8"))
+    LLM_RETRY_BUDGET_RATIO = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))  # retries + hedges as a share of recent calls
+    LLM_RETRY_BUDGET_MIN_PER_SECOND = float(os.getenv("LLM_RETRY_BUDGET_MIN_PER_SECOND", "1"))
+    LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))  # failing share of recent calls that opens the breaker
+    LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "20"))
+    LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "50"))  # recent calls considered
+    LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))  # before a probe call is let through
+    LLM_HEDGE_AFTER_MS = float(os.getenv("LLM_HEDGE_AFTER_MS", "0"))  # duplicate a slow call after this long; 0 disables
+    LLM_PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "300"))  # per dispute; long descriptions are shortened to fit, 0 disables
+    LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "10"))  # disputes per batched prompt in bulk intake; 1 = parallel single calls
+    LLM_INPUT_COST_PER_MILLION_TOKENS = float(os.getenv("LLM_INPUT_COST_PER_MILLION_TOKENS", "2.50"))  # USD, for cost estimates
+    LLM_OUTPUT_COST_PER_MILLION_TOKENS = float(os.getenv("LLM_OUTPUT_COST_PER_MILLION_TOKENS", "10.00"))
+    
+    # Cache of LLM assessments keyed on a PII-free hash of the analysis prompt
+    LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")  # "memory", "disk" or "none"
+    LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite3")
+    
+    # Dispute analysis: "sync" waits for the LLM before responding; "queue" returns
+    # 202 Accepted with status PENDING_ANALYSIS and analyses in background workers
+    DISPUTE_ANALYSIS_MODE = os.getenv("DISPUTE_ANALYSIS_MODE", "sync")
+    DISPUTE_QUEUE_MAX_DEPTH = int(os.getenv("DISPUTE_QUEUE_MAX_DEPTH", "1000"))
+    DISPUTE_ANALYSIS_WORKERS = int(os.getenv("DISPUTE_ANALYSIS_WORKERS", "8"))
+    DISPUTE_ANALYSIS_MAX_RETRIES = int(os.getenv("DISPUTE_ANALYSIS_MAX_RETRIES", "3"))
+    DISPUTE_ANALYSIS_RETRY_BACKOFF_SECONDS = float(os.getenv("DISPUTE_ANALYSIS_RETRY_BACKOFF_SECONDS", "1.0"))
+    DISPUTE_BATCH_MAX_ITEMS = int(os.getenv("DISPUTE_BATCH_MAX_ITEMS", "100"))  # per POST /api/disputes/batch
+    
+    # Dispute store: "memory" (per process, lost on restart) or "sqlite" (durable, shared by workers)
+    DISPUTE_STORE = os.getenv("DISPUTE_STORE", "memory")
+    DISPUTE_DB_PATH = os.getenv("DISPUTE_DB_PATH", "data/disputes.sqlite3")
+    DISPUTE_STORE_COMMIT_INTERVAL_MS = float(os.getenv("DISPUTE_STORE_COMMIT_INTERVAL_MS", "5"))  # group commit window; 0 commits every write
+    DISPUTE_STORE_BATCH_SIZE = int(os.getenv("DISPUTE_STORE_BATCH_SIZE", "256"))  # commit early once this many writes are queued
+    
+    # Rule-based triage settles clear-cut disputes without calling the LLM
+    TRIAGE_ENABLED = os.getenv("TRIAGE_ENABLED", "true").lower() == "true"
+    TRIAGE_HIGH_MIN_SIGNALS = int(os.getenv("TRIAGE_HIGH_MIN_SIGNALS", "2"))  # risk signals needed for HIGH
+    TRIAGE_AMOUNT_ZSCORE = float(os.getenv("TRIAGE_AMOUNT_ZSCORE", "3.0"))  # amount deviation counted as a risk signal
+    TRIAGE_FAMILIAR_MERCHANT_MIN = int(os.getenv("TRIAGE_FAMILIAR_MERCHANT_MIN", "3"))  # earlier visits for LOW
+    
+    # Nearest-neighbour index of past disputes: similar prior assessments are added to the
+    # prompt, and optionally a near-identical one is reused instead of calling the LLM
+    SIMILAR_DISPUTES_ENABLED = os.getenv("SIMILAR_DISPUTES_ENABLED", "true").lower() == "true"
+    SIMILAR_DISPUTES_STATUSES = os.getenv("SIMILAR_DISPUTES_STATUSES", "RESOLVED,UNDER_REVIEW")  # stored disputes indexed at startup
+    SIMILAR_DISPUTES_TOP_K = int(os.getenv("SIMILAR_DISPUTES_TOP_K", "3"))  # similar cases in the prompt; 0 leaves them out
+    SIMILAR_DISPUTES_MIN_SIMILARITY = float(os.getenv("SIMILAR_DISPUTES_MIN_SIMILARITY", "0.8"))  # share of matching signature bits
+    SIMILAR_DISPUTES_REUSE_SIMILARITY = float(os.getenv("SIMILAR_DISPUTES_REUSE_SIMILARITY", "0"))  # e.g. 0.97; 0 never reuses
+    SIMILAR_DISPUTES_TABLES = int(os.getenv("SIMILAR_DISPUTES_TABLES", "16"))  # LSH tables; more find more, use more memory
+    SIMILAR_DISPUTES_TABLE_BITS = int(os.getenv("SIMILAR_DISPUTES_TABLE_BITS", "16"))  # signature bits per table key; fewer find more, slower
+    SIMILAR_DISPUTES_MAX_CANDIDATES = int(os.getenv("SIMILAR_DISPUTES_MAX_CANDIDATES", "2048"))  # scored per search
+    
+    # Build the dispute service in the background at startup; false defers it to the first
+    # request or /ready probe (e.g. AWS Lambda, where background work is frozen between calls)
+    SERVICE_WARMUP = os.getenv("SERVICE_WARMUP", "true").lower() == "true"
     
     # Data settings
     DATA_FILE = os.getenv("DATA_FILE", "data/synthetic_transactions.json")
+    TRANSACTION_STORE = os.getenv("TRANSACTION_STORE", "columnar")  # "columnar" (compact) or "memory" (dicts)
+    TRANSACTION_PAGE_MAX_LIMIT = int(os.getenv("TRANSACTION_PAGE_MAX_LIMIT", "1000"))  # largest ?limit= for transaction listing
+    TRANSACTION_DELTA_PATH = os.getenv("TRANSACTION_DELTA_PATH", "")  # append-only JSON Lines file or directory to tail; empty disables
+    TRANSACTION_DELTA_POLL_SECONDS = float(os.getenv("TRANSACTION_DELTA_POLL_SECONDS", "1.0"))
+    TRANSACTION_DELTA_MAX_BATCH_ROWS = int(os.getenv("TRANSACTION_DELTA_MAX_BATCH_ROWS", "10000"))  # rows merged per swap
+    TRANSACTION_DELTA_COMPACT_ROWS = int(os.getenv("TRANSACTION_DELTA_COMPACT_ROWS", "50000"))  # fold the delta into the compacted layer past this size
+    
+    # Sharded deployment (python -m app.sharded): each worker serves the customers whose
+    # CRC-32 of customer_id modulo SHARD_COUNT is its SHARD_INDEX; set by the launcher
+    SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+    SHARD_INDEX = int(os.getenv("SHARD_INDEX", "0"))
+    SHARD_SOCKET_DIR = os.getenv("SHARD_SOCKET_DIR", "")  # where shard workers listen; empty uses a temporary directory
+    SHARD_PROXY_TIMEOUT_SECONDS = float(os.getenv("SHARD_PROXY_TIMEOUT_SECONDS", "60"))  # router -> shard request timeout
     
     # Security settings
     JWT_SECRET = os.getenv("JWT_SECRET", "super-secret-key-change-in-production")
     JWT_ALGORITHM = "HS256"
     JWT_EXPIRATION = 3600  # 1 hour
+    ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")  # required in X-Admin-Key for /api/admin endpoints; unset disables them
     
     # Australian Banking Regulations
     # These would be more comprehensive in a real system
     MAX_DISPUTE_AMOUNT = 10000.0  # Maximum amount that can be disputed through this system
     DISPUTE_TIME_LIMIT_DAYS = 60  # Number of days after transaction to allow disputes
     
-    # Logging
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
\ No newline at end of file
+    # Logging and metrics
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"  # request timing middleware and GET /metrics
\ No newline at end of file
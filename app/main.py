@@ -1,10 +1,11 @@
-from fastapi import FastAPI, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
 import logging
-import os
+from app.api import dependencies
 from app.api.routes import router
 from app.config import Config
-from app.utils.data_generator import generate_data
+from app.utils import metrics
 
 # Configure logging
 logging.basicConfig(
@@ -13,11 +14,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app):
+    # The dispute service (dataset, OpenAI SDK) is built lazily; warming it up here lets the
+    # app accept connections straight away while it loads
+    if Config.SERVICE_WARMUP:
+        dependencies.start_warm_up()
+    yield
+    await dependencies.shutdown()
+
 # Create FastAPI app
 app = FastAPI(
     title=Config.API_TITLE,
     description=Config.API_DESCRIPTION,
     version=Config.API_VERSION,
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -29,23 +40,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Time every request; added last so it also covers the CORS middleware
+if Config.METRICS_ENABLED:
+    app.add_middleware(metrics.RequestTimingMiddleware)
+
 # Include API routes
 app.include_router(router, prefix="/api")
 
-# Generate synthetic data if it doesn't exist
-@app.on_event("startup")
-async def startup_event():
-    data_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), Config.DATA_FILE)
-    if not os.path.exists(data_file):
-        logger.info("Generating synthetic transaction data")
-        generate_data()
-    else:
-        logger.info(f"Using existing data file: {data_file}")
-
 @app.get("/")
 async def root():
-    return {
+    info = {
         "message": "Gen AI Disputes System API",
         "version": Config.API_VERSION,
         "docs_url": "/docs"
-    }
\ No newline at end of file
+    }
+    if Config.SHARD_COUNT > 1:
+        info["shard"] = {"index": Config.SHARD_INDEX, "count": Config.SHARD_COUNT}
+    return info
+
+@app.get("/health", include_in_schema=False)
+async def health():
+    """Liveness: the process is up and answering, whether or not the dispute service is built."""
+    return {"status": "ok"}
+
+@app.get("/ready", include_in_schema=False)
+async def ready(response: Response):
+    """Readiness: 200 once the dispute service is built, 503 while it is starting or if it failed."""
+    is_ready, status = dependencies.readiness()
+    if not is_ready:
+        response.status_code = 503
+    return status
+
+if Config.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics():
+        """Request latency, span timings, LLM usage and service counters for Prometheus to scrape."""
+        return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
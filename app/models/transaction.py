@@ -20,7 +20,7 @@ class DisputeRequest(BaseModel):
     customer_id: str
     transaction_id: str
     reason: str
-    description: str
+    description: str = Field(..., max_length=5000)
     contact_phone: Optional[str] = None
     contact_email: Optional[str] = None
 
@@ -33,4 +33,16 @@ class DisputeResponse(BaseModel):
     estimated_resolution_time: str
     next_steps: List[str]
     reference_number: str
-    ai_assessment: str
\ No newline at end of file
+    ai_assessment: str
+    fraud_likelihood: Optional[str] = None
+
+class DisputeBatchRequest(BaseModel):
+    disputes: List[DisputeRequest]
+
+class DisputeBatchItem(BaseModel):
+    index: int
+    dispute: Optional[DisputeResponse] = None
+    error: Optional[str] = None
+
+class DisputeBatchResponse(BaseModel):
+    results: List[DisputeBatchItem]
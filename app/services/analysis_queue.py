@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+class DisputeAnalysisQueue:
+    """
+    Bounded queue of disputes awaiting AI analysis, drained by a pool of asyncio workers.
+
+    Each job is analysed with OpenAIService.analyze_dispute_async. Failed analyses are
+    retried with exponential backoff, and the result is written back to the stored
+    dispute through DisputeService.complete_analysis.
+
+    The queue itself lives in memory only. On start, and whenever it drains while stored
+    disputes are still waiting, it refills from the store's PENDING_ANALYSIS disputes
+    (DisputeService.resume_pending_analyses), so analyses queued before a restart are
+    not lost.
+    """
+
+    def __init__(self, dispute_service, max_depth=None, workers=None, max_retries=None, retry_backoff_seconds=None):
+        self.dispute_service = dispute_service
+        self.max_depth = max_depth or Config.DISPUTE_QUEUE_MAX_DEPTH
+        self.workers = workers or Config.DISPUTE_ANALYSIS_WORKERS
+        self.max_retries = Config.DISPUTE_ANALYSIS_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff_seconds = (
+            Config.DISPUTE_ANALYSIS_RETRY_BACKOFF_SECONDS if retry_backoff_seconds is None else retry_backoff_seconds
+        )
+        self.stats = {"submitted": 0, "completed": 0, "retried": 0, "failed": 0, "resumed": 0}
+        self._queue = None
+        self._tasks = []
+        self._queued_ids = set()  # disputes in the queue or being analysed
+        self._more_pending = False  # stored disputes left waiting by the last refill
+
+    @property
+    def running(self):
+        return bool(self._tasks)
+
+    def depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def full(self):
+        return self._queue is None or self._queue.full()
+
+    async def start(self):
+        """Create the queue and start the worker tasks on the running event loop."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_depth)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Started {self.workers} dispute analysis workers (queue depth {self.max_depth})")
+        self._refill()
+
+    async def stop(self):
+        """Cancel the workers; disputes still queued stay in PENDING_ANALYSIS until the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queued_ids.clear()
+
+    def is_queued(self, dispute_id):
+        return dispute_id in self._queued_ids
+
+    async def join(self):
+        """Wait until every queued dispute has been analysed."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def submit(self, dispute_id, transaction, dispute_request):
+        """Enqueue a dispute for analysis; raises asyncio.QueueFull when at capacity."""
+        if self._queue is None:
+            raise asyncio.QueueFull("Dispute analysis queue is not running")
+        self._queue.put_nowait((dispute_id, transaction, dispute_request))
+        self._queued_ids.add(dispute_id)
+        self.stats["submitted"] += 1
+
+    async def _worker(self, number):
+        while True:
+            dispute_id, transaction, dispute_request = await self._queue.get()
+            try:
+                ai_analysis = await self._analyze_with_retries(transaction, dispute_request)
+                self.dispute_service.complete_analysis(dispute_id, ai_analysis)
+                self.stats["completed"] += 1
+            except Exception as e:
+                logger.error(f"Analysis worker {number} failed on dispute {dispute_id}: {str(e)}")
+            finally:
+                self._queued_ids.discard(dispute_id)
+                if self._more_pending and self._queue.empty():
+                    self._refill()
+                self._queue.task_done()
+
+    def _refill(self):
+        """Queue stored PENDING_ANALYSIS disputes, up to the free capacity."""
+        try:
+            resumed, self._more_pending = self.dispute_service.resume_pending_analyses(
+                self.max_depth - self._queue.qsize())
+        except Exception as e:
+            logger.error(f"Error resuming pending dispute analyses: {str(e)}")
+            return
+        if resumed:
+            self.stats["resumed"] += resumed
+            logger.info(f"Resumed {resumed} stored disputes awaiting analysis"
+                        + (", more left for the next drain" if self._more_pending else ""))
+
+    async def _analyze_with_retries(self, transaction, dispute_request):
+        openai_service = self.dispute_service.openai_service
+        for attempt in range(self.max_retries + 1):
+            ai_analysis = await openai_service.analyze_dispute_async(transaction, dispute_request)
+            if ai_analysis.get("fraud_likelihood") != "ERROR":
+                return ai_analysis
+            if attempt < self.max_retries:
+                self.stats["retried"] += 1
+                await asyncio.sleep(self.retry_backoff_seconds * 2 ** attempt)
+
+        self.stats["failed"] += 1
+        return {
+            "analysis": "Automated analysis unavailable",
+            "fraud_likelihood": "UNKNOWN",
+            "recommended_actions": ["Your dispute has been referred to our team for manual review"]
+        }
@@ -0,0 +1,225 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the amount bands used in cache keys; exact amounts would defeat the cache
+AMOUNT_BANDS = [10, 50, 100, 250, 500, 1000, 2000, 5000, 10000]
+REDACTED = "[redacted]"
+
+def amount_band(amount):
+    """Label for the band containing amount, e.g. "100-250"."""
+    lower = 0
+    for upper in AMOUNT_BANDS:
+        if amount < upper:
+            return f"{lower}-{upper}"
+        lower = upper
+    return f"{lower}+"
+
+def normalise_text(text):
+    """Lowercase, drop digits (phone, card and reference numbers) and punctuation, collapse whitespace."""
+    text = re.sub(r"[\d\W_]+", " ", (text or "").lower())
+    return " ".join(text.split())
+
+class _RedactedRequest:
+    """Stand-in for a DisputeRequest with identifying fields removed and free text normalised."""
+
+    def __init__(self, dispute_request):
+        self.customer_id = REDACTED
+        self.transaction_id = REDACTED
+        self.reason = normalise_text(dispute_request.reason)
+        self.description = normalise_text(dispute_request.description)
+        self.contact_phone = None
+        self.contact_email = None
+
+def cache_key(build_prompt, transaction, dispute_request, model, system_prompt):
+    """
+    Content hash of the analysis prompt with PII excluded.
+
+    The prompt is rebuilt with transaction ID, date, customer ID and card/account details
+    redacted and the amount replaced by its band. The model and system prompt are part of
+    the key, so changing either invalidates earlier entries. Similar past cases added to the
+    prompt are left out, so the key does not change as the similar-dispute index grows.
+    """
+    redacted = dict(transaction, transaction_id=REDACTED, customer_id=REDACTED, date=REDACTED,
+                    card_number=None, account_details=None, amount=amount_band(transaction['amount']),
+                    similar_cases=None)
+    prompt = build_prompt(redacted, _RedactedRequest(dispute_request))
+    material = "\n".join([model, " ".join(system_prompt.split()), " ".join(prompt.split()).lower()])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+def scrub_analysis(ai_analysis, transaction, dispute_request):
+    """Remove the identifiers of the dispute that produced an analysis before it is shared."""
+    replacements = [
+        (transaction['transaction_id'], "this transaction"),
+        (dispute_request.customer_id, "the customer"),
+        (transaction['date'], "the transaction date"),
+    ]
+
+    def scrub(value):
+        if isinstance(value, str):
+            for identifier, replacement in replacements:
+                if identifier:
+                    value = value.replace(identifier, replacement)
+            return value
+        if isinstance(value, list):
+            return [scrub(v) for v in value]
+        if isinstance(value, dict):
+            return {k: scrub(v) for k, v in value.items()}
+        return value
+
+    return scrub(ai_analysis)
+
+class MemoryCacheBackend:
+    """In-process LRU store of (value, expires_at) pairs."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        """Store value and return the number of entries evicted to make room."""
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def __len__(self):
+        return len(self._entries)
+
+class DiskCacheBackend:
+    """SQLite-backed store that survives restarts and is shared by workers on one host."""
+
+    TRIM_EVERY = 64  # writes between size checks, since COUNT(*) scans the table
+
+    def __init__(self, path, max_entries):
+        self.max_entries = max_entries
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS assessments ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS assessments_last_access ON assessments (last_access)")
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM assessments WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._connection.execute("DELETE FROM assessments WHERE key = ?", (key,))
+                return None
+            self._connection.execute("UPDATE assessments SET last_access = ? WHERE key = ?", (now, key))
+            return json.loads(row[0])
+
+    def set(self, key, value, expires_at):
+        """Store value and return the number of entries evicted to make room."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO assessments (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, time.time())
+            )
+            self._writes += 1
+            if self._writes % self.TRIM_EVERY:
+                return 0
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                self._connection.execute(
+                    "DELETE FROM assessments WHERE key IN "
+                    "(SELECT key FROM assessments ORDER BY last_access LIMIT ?)", (excess,)
+                )
+            return max(0, excess)
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM assessments").fetchone()[0]
+
+class AssessmentCache:
+    """
+    TTL cache of LLM dispute assessments with hit/miss accounting.
+
+    Entries remember the tokens and latency the original call cost, so every hit adds
+    to tokens_saved and seconds_saved.
+    """
+
+    def __init__(self, backend, ttl_seconds):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.tokens_saved = 0
+        self.seconds_saved = 0.0
+
+    def get(self, key):
+        entry = self.backend.get(key, time.time())
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.tokens_saved += entry.get("tokens", 0)
+        self.seconds_saved += entry.get("seconds", 0.0)
+        return copy.deepcopy(entry["analysis"])  # callers may mutate what they get back
+
+    def put(self, key, ai_analysis, tokens=0, seconds=0.0):
+        entry = {"analysis": ai_analysis, "tokens": tokens, "seconds": seconds}
+        self.evictions += self.backend.set(key, entry, time.time() + self.ttl_seconds)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "tokens_saved": self.tokens_saved,
+            "seconds_saved": round(self.seconds_saved, 3)
+        }
+
+def create_assessment_cache(backend=None):
+    """Build the cache configured by LLM_CACHE_BACKEND ("memory", "disk" or "none")."""
+    backend = backend or Config.LLM_CACHE_BACKEND
+    if backend == "none":
+        return None
+    if backend == "memory":
+        store = MemoryCacheBackend(Config.LLM_CACHE_MAX_ENTRIES)
+    elif backend == "disk":
+        store = DiskCacheBackend(Config.LLM_CACHE_PATH, Config.LLM_CACHE_MAX_ENTRIES)
+    else:
+        raise ValueError(f"Unknown LLM cache backend: {backend}")
+    return AssessmentCache(store, Config.LLM_CACHE_TTL_SECONDS)
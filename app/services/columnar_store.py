@@ -0,0 +1,530 @@
+import array
+import collections
+import heapq
+import json
+import mmap
+import os
+import sys
+import threading
+import zlib
+from app.utils.dates import to_timestamp, from_timestamp
+from app.services.transaction_query import TransactionQuery
+
+class CategoricalColumn:
+    """Dictionary-encoded column: each distinct value is stored once and rows hold integer codes."""
+
+    def __init__(self, typecode='B', values=(), codes=None):
+        self.values = list(values)  # code -> value
+        self._lookup = {value: code for code, value in enumerate(self.values)}
+        self.codes = codes if codes is not None else array.array(typecode)
+
+    def encode(self, value):
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._lookup[value] = code
+            if code >= 1 << (8 * self.codes.itemsize):
+                self._widen()
+        return code
+
+    def code_of(self, value):
+        """Code for value, or None if it never occurs in the column."""
+        return self._lookup.get(value)
+
+    def append(self, value):
+        code = self.encode(value)  # may widen self.codes, so encode before looking it up
+        self.codes.append(code)
+
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+
+    def nbytes(self):
+        return len(self.codes) * self.codes.itemsize + sum(sys.getsizeof(v) for v in self.values)
+
+    def _widen(self):
+        wider = {'B': 'H', 'H': 'I', 'I': 'Q'}[self.codes.typecode]
+        self.codes = array.array(wider, self.codes)
+
+class StringColumn:
+    """Variable-length UTF-8 strings packed into one buffer, addressed through an offsets array."""
+
+    def __init__(self, nullable=False, data=None, offsets=None, nulls=None):
+        self.data = data if data is not None else bytearray()
+        self.offsets = offsets if offsets is not None else array.array('Q', [0])
+        self.nulls = nulls if nulls is not None else (array.array('B') if nullable else None)
+
+    def append(self, value):
+        if self.nulls is not None:
+            self.nulls.append(value is None)
+        if value:
+            self.data += value.encode('utf-8')
+        self.offsets.append(len(self.data))
+
+    def raw(self, row):
+        """Encoded bytes for a row, without decoding."""
+        return bytes(self.data[self.offsets[row]:self.offsets[row + 1]])
+
+    def __getitem__(self, row):
+        if self.nulls is not None and self.nulls[row]:
+            return None
+        return self.raw(row).decode('utf-8')
+
+    def nbytes(self):
+        nulls = len(self.nulls) if self.nulls is not None else 0
+        return len(self.data) + len(self.offsets) * self.offsets.itemsize + nulls
+
+class IdIndex:
+    """
+    Open-addressing (linear probing) hash table from transaction ID to row number.
+
+    Slots hold 4-byte row numbers and keys are compared against the packed ID column,
+    so the index costs a few bytes per row instead of a dict entry plus a str object.
+    CRC-32 is used rather than hash() so the layout is stable across processes.
+    """
+
+    EMPTY = -1
+
+    def __init__(self, ids, slots=None, size=0):
+        self._ids = ids
+        self.slots = slots if slots is not None else array.array('i', [self.EMPTY]) * 16
+        self.size = size
+
+    def _probe(self, key):
+        slots = self.slots
+        mask = len(slots) - 1
+        slot = zlib.crc32(key) & mask
+        while True:
+            row = slots[slot]
+            if row == self.EMPTY or self._ids.raw(row) == key:
+                return slot
+            slot = (slot + 1) & mask
+
+    def get(self, key):
+        """Row number for key, or EMPTY."""
+        return self.slots[self._probe(key)]
+
+    def put(self, key, row):
+        """Point key at row and return the row it previously pointed at (or EMPTY)."""
+        slot = self._probe(key)
+        previous = self.slots[slot]
+        self.slots[slot] = row
+        if previous == self.EMPTY:
+            self.size += 1
+            if self.size * 2 > len(self.slots):
+                self._resize(len(self.slots) * 2)
+        return previous
+
+    def _resize(self, capacity):
+        old = self.slots
+        slots = array.array('i', [self.EMPTY]) * capacity
+        mask = capacity - 1
+        for row in old:
+            if row != self.EMPTY:
+                slot = zlib.crc32(self._ids.raw(row)) & mask
+                while slots[slot] != self.EMPTY:
+                    slot = (slot + 1) & mask
+                slots[slot] = row
+        self.slots = slots
+
+    def nbytes(self):
+        return len(self.slots) * self.slots.itemsize
+
+class CustomerRows:
+    """Read-only per-customer row lists stored as one flat array plus offsets (CSR layout)."""
+
+    def __init__(self, offsets, row_ids):
+        self.offsets = offsets
+        self.row_ids = row_ids
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, code):
+        return self.row_ids[self.offsets[code]:self.offsets[code + 1]]
+
+    def __iter__(self):
+        for code in range(len(self)):
+            yield self[code]
+
+POSTINGS_MIN_ROWS = 64  # customers with fewer rows are filtered by a scan
+POSTINGS_CACHE_CUSTOMERS = 1024
+
+SNAPSHOT_MAGIC = b"TXNSNAP1"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_EXTENSION = ".snap"
+
+def _align(offset, alignment=8):
+    return (offset + alignment - 1) // alignment * alignment
+
+class ColumnarTransactionRepository:
+    """
+    Compact, column-oriented transaction store with the same interface as TransactionRepository.
+
+    Categorical fields (customer, merchant, category, type, payment method, location) are
+    dictionary-encoded, amounts and epoch timestamps live in typed arrays, and free-text
+    fields are packed into UTF-8 buffers. Transactions are only materialised as dicts when
+    read, so the API edge is the only place full records exist. Fields outside the
+    Transaction model are not stored.
+    """
+
+    def __init__(self, transactions=()):
+        self._ids = StringColumn()
+        self._timestamps = array.array('q')
+        self._amounts = array.array('d')
+        self._fraud = array.array('B')
+        self._customers = CategoricalColumn('I')
+        self._merchants = CategoricalColumn('H')
+        self._categories = CategoricalColumn('B')
+        self._transaction_types = CategoricalColumn('B')
+        self._payment_methods = CategoricalColumn('B')
+        self._locations = CategoricalColumn('H')
+        self._card_numbers = StringColumn(nullable=True)
+        self._account_details = StringColumn(nullable=True)
+        self._index = IdIndex(self._ids)
+        self._customer_rows = []  # customer code -> row numbers ordered by (timestamp, transaction_id)
+        self._postings = collections.OrderedDict()  # customer code -> (rows, posting lists), see _customer_postings
+        self._postings_lock = threading.Lock()
+        self.read_only = False
+        self.add_many(transactions)
+
+    def __len__(self):
+        return self._index.size
+
+    def __contains__(self, transaction_id):
+        return self._index.get(transaction_id.encode('utf-8')) != IdIndex.EMPTY
+
+    def add(self, transaction):
+        """Add (or replace) a single transaction."""
+        self.add_many([transaction])
+
+    def add_many(self, transactions):
+        """
+        Add transactions in bulk, merging them into each touched customer's rows at the end.
+
+        A customer's row array is replaced rather than changed in place, so a reader iterating
+        it while rows are added (e.g. a delta being compacted in another thread) sees either
+        the old or the new history.
+        """
+        self._check_writable()
+        added = {}  # customer code -> new rows
+        replaced = set()
+        count = 0
+        for transaction in transactions:
+            row, customer_code, previous = self._append(transaction)
+            added.setdefault(customer_code, array.array('I')).append(row)
+            if previous != IdIndex.EMPTY:
+                # Replaced rows stay in the columns but drop out of every index
+                replaced.add(previous)
+                added.setdefault(self._customers.codes[previous], array.array('I'))
+            count += 1
+
+        for customer_code, rows in added.items():
+            current = self._customer_rows[customer_code]
+            if replaced:
+                current = [row for row in current if row not in replaced]
+                rows = [row for row in rows if row not in replaced]
+            rows = sorted(rows, key=self._sort_key)
+            if len(current):
+                rows = heapq.merge(current, rows, key=self._sort_key)
+            self._customer_rows[customer_code] = array.array('I', rows)
+        return count
+
+    def get(self, transaction_id):
+        """Get a transaction by ID, or None if it is unknown."""
+        row = self._index.get(transaction_id.encode('utf-8'))
+        return None if row == IdIndex.EMPTY else self._materialise(row)
+
+    def get_customer_transactions(self, customer_id):
+        """Get all transactions for a customer, oldest first."""
+        code = self._customers.code_of(customer_id)
+        if code is None:
+            return []
+        return [self._materialise(row) for row in self._customer_rows[code]]
+
+    def query_customer_transactions(self, customer_id, query=None, after=None):
+        """
+        Yield a customer's transactions in (date, ID) order that pass query.
+
+        The cursor position (after, a (date, transaction_id) pair) and the date range are
+        found by binary search on the customer's sorted rows. For customers with at least
+        POSTINGS_MIN_ROWS rows, merchant, category and fraud filters first narrow those rows
+        to the shortest posting list (see _customer_postings), which is sorted the same way
+        and seeked the same way. The remaining filters compare codes and typed values in
+        the columns, so only matching rows are materialised.
+        """
+        code = self._customers.code_of(customer_id)
+        if code is None:
+            return
+        query = query or TransactionQuery()
+        rows = self._customer_rows[code]
+
+        predicates = []
+        for name, column, value in (("merchant", self._merchants, query.merchant),
+                                    ("category", self._categories, query.category)):
+            if value is not None:
+                value_code = column.code_of(value)
+                if value_code is None:
+                    return
+                predicates.append((name, column.codes, value_code))
+        if query.is_fraudulent is not None:
+            predicates.append(("fraud", self._fraud, int(query.is_fraudulent)))
+        if predicates and len(rows) >= POSTINGS_MIN_ROWS:
+            # Walk the shortest matching posting list instead of the whole history
+            postings = self._customer_postings(code, rows)
+            rows = min((postings.get((name, value_code), ()) for name, _, value_code in predicates), key=len)
+
+        start, end = 0, len(rows)
+        if after is not None:
+            start = self._seek(rows, (to_timestamp(after[0]), after[1].encode('utf-8')))
+        if query.start_date is not None:
+            start = max(start, self._seek(rows, (to_timestamp(query.start_date), b"")))
+        if query.end_date is not None:
+            end = self._seek(rows, (to_timestamp(query.end_date) + 1, b""))
+
+        amounts, min_amount, max_amount = self._amounts, query.min_amount, query.max_amount
+        for position in range(start, end):
+            row = rows[position]
+            if min_amount is not None and amounts[row] < min_amount:
+                continue
+            if max_amount is not None and amounts[row] > max_amount:
+                continue
+            if all(codes[row] == value_code for _, codes, value_code in predicates):
+                yield self._materialise(row)
+
+    def __iter__(self):
+        for rows in self._customer_rows:
+            for row in rows:
+                yield self._materialise(row)
+
+    def customer_columns(self):
+        """
+        Yield (customer_id, amounts, merchants, locations, timestamps) for each customer.
+
+        Values are gathered straight from the columns in the customer's row order, so
+        whole-table aggregates never materialise a transaction dict.
+        """
+        amounts, timestamps = self._amounts, self._timestamps
+        merchant_codes, merchant_values = self._merchants.codes, self._merchants.values
+        location_codes, location_values = self._locations.codes, self._locations.values
+        for code, rows in enumerate(self._customer_rows):
+            if not len(rows):
+                continue
+            yield (
+                self._customers.values[code],
+                [amounts[row] for row in rows],
+                [merchant_values[merchant_codes[row]] for row in rows],
+                [location_values[location_codes[row]] for row in rows],
+                [timestamps[row] for row in rows]
+            )
+
+    def nbytes(self):
+        """Approximate bytes held by columns and indexes."""
+        columns = (
+            self._ids, self._customers, self._merchants, self._categories, self._transaction_types,
+            self._payment_methods, self._locations, self._card_numbers, self._account_details, self._index
+        )
+        arrays = (self._timestamps, self._amounts, self._fraud, *self._customer_rows)
+        return sum(c.nbytes() for c in columns) + sum(memoryview(a).nbytes for a in arrays)
+
+    def save_snapshot(self, path):
+        """
+        Write the store to path in the memory-mappable snapshot format.
+
+        Layout: magic, little-endian uint64 header length, JSON header (dictionaries and
+        buffer offsets), then each column buffer 8-byte aligned. The file is written to a
+        temporary name and renamed so readers never see a partial snapshot.
+        """
+        customer_offsets = array.array('Q', [0])
+        customer_row_ids = array.array('I')
+        for rows in self._customer_rows:
+            customer_row_ids.extend(rows)
+            customer_offsets.append(len(customer_row_ids))
+
+        buffers = {
+            "ids.data": self._ids.data, "ids.offsets": self._ids.offsets,
+            "timestamps": self._timestamps, "amounts": self._amounts, "fraud": self._fraud,
+            "card_numbers.data": self._card_numbers.data, "card_numbers.offsets": self._card_numbers.offsets,
+            "card_numbers.nulls": self._card_numbers.nulls,
+            "account_details.data": self._account_details.data,
+            "account_details.offsets": self._account_details.offsets,
+            "account_details.nulls": self._account_details.nulls,
+            "index.slots": self._index.slots,
+            "customer_offsets": customer_offsets, "customer_row_ids": customer_row_ids
+        }
+        for name, column in self._categorical_columns().items():
+            buffers[f"{name}.codes"] = column.codes
+
+        layout = {}
+        offset = 0
+        for name, buffer in buffers.items():
+            view = memoryview(buffer)
+            layout[name] = {"offset": offset, "nbytes": view.nbytes, "format": view.format}
+            offset = _align(offset + view.nbytes)
+        header = json.dumps({
+            "version": SNAPSHOT_VERSION,
+            "byteorder": sys.byteorder,
+            "size": self._index.size,
+            "dictionaries": {name: column.values for name, column in self._categorical_columns().items()},
+            "buffers": layout
+        }).encode('utf-8')
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(len(header).to_bytes(8, 'little'))
+            f.write(header)
+            data_start = _align(f.tell())
+            f.write(b"\0" * (data_start - f.tell()))
+            for name, buffer in buffers.items():
+                f.write(buffer)
+                f.write(b"\0" * (data_start + _align(layout[name]["offset"] + layout[name]["nbytes"]) - f.tell()))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def open_snapshot(cls, path):
+        """
+        Open a snapshot read-only via mmap.
+
+        Columns are memoryviews over the mapped file, so opening is O(dictionary size)
+        rather than O(rows) and pages are shared between processes through the page cache.
+        """
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        if bytes(view[:8]) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a transaction snapshot")
+        header_length = int.from_bytes(view[8:16], 'little')
+        header = json.loads(bytes(view[16:16 + header_length]))
+        if header["version"] != SNAPSHOT_VERSION or header["byteorder"] != sys.byteorder:
+            raise ValueError(f"Unsupported snapshot version or byte order in {path}")
+        data_start = _align(16 + header_length)
+
+        def buffer(name):
+            spec = header["buffers"][name]
+            start = data_start + spec["offset"]
+            return view[start:start + spec["nbytes"]].cast(spec["format"])
+
+        store = cls.__new__(cls)
+        store._ids = StringColumn(data=buffer("ids.data"), offsets=buffer("ids.offsets"))
+        store._timestamps = buffer("timestamps")
+        store._amounts = buffer("amounts")
+        store._fraud = buffer("fraud")
+        for name, values in header["dictionaries"].items():
+            setattr(store, f"_{name}", CategoricalColumn(values=values, codes=buffer(f"{name}.codes")))
+        store._card_numbers = StringColumn(
+            data=buffer("card_numbers.data"), offsets=buffer("card_numbers.offsets"), nulls=buffer("card_numbers.nulls")
+        )
+        store._account_details = StringColumn(
+            data=buffer("account_details.data"), offsets=buffer("account_details.offsets"),
+            nulls=buffer("account_details.nulls")
+        )
+        store._index = IdIndex(store._ids, slots=buffer("index.slots"), size=header["size"])
+        store._customer_rows = CustomerRows(buffer("customer_offsets"), buffer("customer_row_ids"))
+        store._postings = collections.OrderedDict()
+        store._postings_lock = threading.Lock()
+        store._mapped = mapped  # keep the mapping alive for the memoryviews
+        store.read_only = True
+        return store
+
+    def _categorical_columns(self):
+        return {
+            "customers": self._customers, "merchants": self._merchants, "categories": self._categories,
+            "transaction_types": self._transaction_types, "payment_methods": self._payment_methods,
+            "locations": self._locations
+        }
+
+    def _check_writable(self):
+        if self.read_only:
+            raise TypeError("Snapshot-backed transaction repositories are read-only")
+
+    def _append(self, transaction):
+        # Read every field before writing so a malformed row cannot leave the columns misaligned
+        transaction_id = transaction['transaction_id']
+        key = transaction_id.encode('utf-8')
+        timestamp = to_timestamp(transaction['date'])
+        amount = float(transaction['amount'])
+        customer_id = transaction['customer_id']
+        new_customer = self._customers.code_of(customer_id) is None
+        categorical = (
+            (self._merchants, transaction['merchant']),
+            (self._categories, transaction['category']),
+            (self._transaction_types, transaction['transaction_type']),
+            (self._payment_methods, transaction['payment_method']),
+            (self._locations, transaction['location'])
+        )
+
+        row = len(self._timestamps)
+        self._ids.append(transaction_id)
+        self._timestamps.append(timestamp)
+        self._amounts.append(amount)
+        self._fraud.append(bool(transaction.get('is_fraudulent', False)))
+        if new_customer:
+            self._customer_rows.append(array.array('I'))  # before readers can look the customer up
+        customer_code = self._customers.encode(customer_id)
+        self._customers.codes.append(customer_code)
+        for column, value in categorical:
+            column.append(value)
+        self._card_numbers.append(transaction.get('card_number'))
+        self._account_details.append(transaction.get('account_details'))
+        return row, customer_code, self._index.put(key, row)
+
+    def _customer_postings(self, code, rows):
+        """
+        Secondary indexes of one customer's rows: {(column, value code): rows in (date, ID) order}.
+
+        Built on first use and cached for the POSTINGS_CACHE_CUSTOMERS most recently queried
+        customers. add_many replaces a customer's row array rather than editing it, so a
+        cached entry is valid while it was built from the customer's current array.
+        """
+        with self._postings_lock:
+            cached = self._postings.get(code)
+            if cached is not None and (self.read_only or cached[0] is rows):
+                self._postings.move_to_end(code)
+                return cached[1]
+
+        postings = {}
+        merchants, categories, fraud = self._merchants.codes, self._categories.codes, self._fraud
+        for row in rows:
+            for key in (("merchant", merchants[row]), ("category", categories[row]), ("fraud", fraud[row])):
+                posting = postings.get(key)
+                if posting is None:
+                    postings[key] = posting = array.array('I')
+                posting.append(row)
+
+        with self._postings_lock:
+            self._postings[code] = (rows, postings)
+            self._postings.move_to_end(code)
+            while len(self._postings) > POSTINGS_CACHE_CUSTOMERS:
+                self._postings.popitem(last=False)
+        return postings
+
+    def _sort_key(self, row):
+        return (self._timestamps[row], self._ids.raw(row))
+
+    def _seek(self, rows, key):
+        """Position of the first row in rows (sorted by _sort_key) whose key is greater than key."""
+        low, high = 0, len(rows)
+        while low < high:
+            middle = (low + high) // 2
+            if self._sort_key(rows[middle]) <= key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _materialise(self, row):
+        return {
+            "transaction_id": self._ids[row],
+            "customer_id": self._customers[row],
+            "date": from_timestamp(self._timestamps[row]),
+            "merchant": self._merchants[row],
+            "amount": self._amounts[row],
+            "category": self._categories[row],
+            "transaction_type": self._transaction_types[row],
+            "payment_method": self._payment_methods[row],
+            "card_number": self._card_numbers[row],
+            "account_details": self._account_details[row],
+            "location": self._locations[row],
+            "is_fraudulent": bool(self._fraud[row])
+        }
@@ -0,0 +1,221 @@
+import logging
+import math
+import time
+from collections import Counter
+from app.utils.dates import to_timestamp
+
+logger = logging.getLogger(__name__)
+
+MIN_HISTORY = 5  # earlier transactions needed before amount deviation is meaningful
+MIN_AMOUNT_STD = 1.0  # floor so customers who always spend the same amount do not get huge z-scores
+UNUSUAL_HOUR_SHARE = 0.05
+
+def hour_of(timestamp):
+    """Hour of day (0-23) of a naive epoch timestamp."""
+    return timestamp // 3600 % 24
+
+class CustomerProfile:
+    """
+    Spending profile of one customer, maintained incrementally.
+
+    Amount mean and variance use Welford's algorithm (and Chan's merge for bulk updates),
+    so adding or removing a transaction is O(1) and numerically stable.
+    """
+
+    __slots__ = ("count", "mean", "m2", "merchants", "locations", "merchant_locations", "hours")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.merchants = Counter()
+        self.locations = Counter()
+        self.merchant_locations = Counter()
+        self.hours = [0] * 24
+
+    def add(self, amount, merchant, location, timestamp):
+        self.count += 1
+        delta = amount - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (amount - self.mean)
+        self.merchants[merchant] += 1
+        self.locations[location] += 1
+        self.merchant_locations[merchant, location] += 1
+        self.hours[hour_of(timestamp)] += 1
+
+    def remove(self, amount, merchant, location, timestamp):
+        """Undo add for a transaction that was replaced."""
+        if self.count <= 1:
+            self.__init__()
+            return
+        delta = amount - self.mean
+        self.count -= 1
+        self.mean -= delta / self.count
+        self.m2 = max(0.0, self.m2 - delta * (amount - self.mean))
+        for counter, key in ((self.merchants, merchant), (self.locations, location),
+                             (self.merchant_locations, (merchant, location))):
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+        self.hours[hour_of(timestamp)] -= 1
+
+    def extend(self, amounts, merchants, locations, timestamps):
+        """Add a block of transactions at once; sums and counts run in C rather than per row."""
+        count = len(amounts)
+        if not count:
+            return
+        mean = math.fsum(amounts) / count
+        m2 = math.fsum((a - mean) ** 2 for a in amounts)
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+        self.merchants.update(merchants)
+        self.locations.update(locations)
+        self.merchant_locations.update(zip(merchants, locations))
+        for hour, hour_count in Counter(timestamp // 3600 % 24 for timestamp in timestamps).items():
+            self.hours[hour] += hour_count
+
+    def copy(self):
+        clone = CustomerProfile.__new__(CustomerProfile)
+        clone.count, clone.mean, clone.m2 = self.count, self.mean, self.m2
+        clone.merchants = Counter(self.merchants)
+        clone.locations = Counter(self.locations)
+        clone.merchant_locations = Counter(self.merchant_locations)
+        clone.hours = list(self.hours)
+        return clone
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def features(self, amount, merchant, location, timestamp, exclude=True):
+        """
+        Anomaly features of a transaction relative to this profile.
+
+        With exclude=True the transaction is assumed to be part of the profile and is left
+        out of every statistic, so a dispute is compared with the customer's other activity.
+        """
+        count, mean, m2 = self.count, self.mean, self.m2
+        hour = hour_of(timestamp)
+        own = 1 if exclude and count else 0
+        if own:
+            count -= 1
+            if count:
+                previous_mean = (mean * (count + 1) - amount) / count
+                m2 = max(0.0, m2 - (amount - mean) * (amount - previous_mean))
+                mean = previous_mean
+            else:
+                mean, m2 = 0.0, 0.0
+
+        std = math.sqrt(m2 / (count - 1)) if count > 1 else 0.0
+        return {
+            "history_transactions": count,
+            "amount_mean": round(mean, 2),
+            "amount_std": round(std, 2),
+            "amount_zscore": round((amount - mean) / max(std, MIN_AMOUNT_STD), 2) if count >= MIN_HISTORY else None,
+            "merchant_visits": self.merchants.get(merchant, 0) - own,
+            "location_visits": self.locations.get(location, 0) - own,
+            "merchant_location_visits": self.merchant_locations.get((merchant, location), 0) - own,
+            "hour": hour,
+            "hour_share": round((self.hours[hour] - own) / count, 3) if count else None
+        }
+
+class CustomerProfileIndex:
+    """Per-customer spending profiles, kept up to date as transactions are loaded or arrive."""
+
+    def __init__(self):
+        self._profiles = {}
+
+    @classmethod
+    def from_repository(cls, repository):
+        """Build profiles for every customer from a repository's per-customer columns."""
+        start = time.perf_counter()
+        index = cls()
+        for customer_id, amounts, merchants, locations, timestamps in repository.customer_columns():
+            index._profile(customer_id).extend(amounts, merchants, locations, timestamps)
+        logger.info(f"Built {len(index)} customer profiles in {time.perf_counter() - start:.2f}s")
+        return index
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def get(self, customer_id):
+        return self._profiles.get(customer_id)
+
+    def add(self, transaction):
+        self._profile(transaction['customer_id']).add(*self._values(transaction))
+
+    def remove(self, transaction):
+        profile = self._profiles.get(transaction['customer_id'])
+        if profile is not None:
+            profile.remove(*self._values(transaction))
+
+    def replace(self, removed, added):
+        """
+        Remove then add transactions, publishing every profile they touch at once.
+
+        The updates are applied to copies that replace the live profiles in a single
+        dict.update, so a reader on another thread sees each profile from before or after
+        the whole batch, never partway through it.
+        """
+        updated = {}
+
+        def profile(customer_id):
+            if customer_id not in updated:
+                current = self._profiles.get(customer_id)
+                updated[customer_id] = current.copy() if current is not None else CustomerProfile()
+            return updated[customer_id]
+
+        for transaction in removed:
+            profile(transaction['customer_id']).remove(*self._values(transaction))
+        for transaction in added:
+            profile(transaction['customer_id']).add(*self._values(transaction))
+        self._profiles.update(updated)
+
+    def features(self, transaction):
+        """Anomaly features of a stored transaction against the rest of its customer's history."""
+        profile = self._profiles.get(transaction['customer_id']) or CustomerProfile()
+        return profile.features(*self._values(transaction), exclude=profile.count > 0)
+
+    def _profile(self, customer_id):
+        profile = self._profiles.get(customer_id)
+        if profile is None:
+            profile = self._profiles[customer_id] = CustomerProfile()
+        return profile
+
+    def _values(self, transaction):
+        return (float(transaction['amount']), transaction['merchant'], transaction['location'],
+                to_timestamp(transaction['date']))
+
+def describe_profile(features):
+    """
+    Banded, PII-free summary lines of anomaly features for the LLM prompt.
+
+    Bands rather than raw numbers keep prompts for equivalent disputes identical, so
+    they still share assessment cache entries.
+    """
+    count = features["history_transactions"]
+    if count == 0:
+        return ["No earlier transactions on record for this customer"]
+    lines = [f"Earlier transactions on record: {'fewer than 5' if count < MIN_HISTORY else '5-20' if count <= 20 else 'more than 20'}"]
+
+    zscore = features["amount_zscore"]
+    if zscore is None:
+        lines.append("Amount versus usual spend: not enough history to judge")
+    elif zscore >= 3:
+        lines.append("Amount versus usual spend: far above the usual range")
+    elif zscore >= 2:
+        lines.append("Amount versus usual spend: above the usual range")
+    else:
+        lines.append("Amount versus usual spend: within the usual range")
+
+    lines.append("Merchant history: " + ("used before by this customer" if features["merchant_visits"] > 0
+                                 else "first transaction with this merchant"))
+    lines.append("Location history: " + ("used before by this customer" if features["location_visits"] > 0
+                                 else "first transaction from this location"))
+    if count >= MIN_HISTORY:
+        lines.append("Time of day: " + ("unusual for this customer" if features["hour_share"] < UNUSUAL_HOUR_SHARE
+                                        else "typical for this customer"))
+    return lines
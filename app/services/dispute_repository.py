@@ -0,0 +1,337 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# A transaction with a dispute in any other status is already under dispute
+CLOSED_STATUSES = ("RESOLVED", "REJECTED", "WITHDRAWN")
+
+class InMemoryDisputeRepository:
+    """
+    Dispute store held in process memory (lost on restart, not shared between workers).
+
+    Disputes are indexed by ID and by customer, so a customer's disputes are read in O(k),
+    and by open transaction and idempotency key for O(1) duplicate checks.
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_customer = {}  # customer_id -> dispute IDs in creation order
+        self._by_transaction = {}  # transaction_id -> dispute IDs in creation order
+        self._open_by_transaction = {}  # transaction_id -> ID of its open dispute
+        self._by_idempotency_key = {}  # (customer_id, Idempotency-Key) -> dispute ID
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, dispute_id):
+        return dispute_id in self._by_id
+
+    def save(self, dispute):
+        """Insert or update a dispute."""
+        dispute_id = dispute["dispute_id"]
+        if dispute_id not in self._by_id:
+            self._by_customer.setdefault(dispute["customer_id"], []).append(dispute_id)
+            self._by_transaction.setdefault(dispute["transaction_id"], []).append(dispute_id)
+            if dispute.get("idempotency_key"):
+                self._by_idempotency_key[(dispute["customer_id"], dispute["idempotency_key"])] = dispute_id
+        if dispute["status"] not in CLOSED_STATUSES:
+            self._open_by_transaction[dispute["transaction_id"]] = dispute_id
+        elif self._open_by_transaction.get(dispute["transaction_id"]) == dispute_id:
+            del self._open_by_transaction[dispute["transaction_id"]]
+        self._by_id[dispute_id] = dispute
+
+    def get(self, dispute_id):
+        """Get a dispute by ID, or None if it is unknown."""
+        return self._by_id.get(dispute_id)
+
+    def get_customer_disputes(self, customer_id):
+        """Get all disputes for a customer, oldest first."""
+        return [self._by_id[i] for i in self._by_customer.get(customer_id, ())]
+
+    def get_transaction_disputes(self, transaction_id):
+        """Get all disputes raised against a transaction, oldest first."""
+        return [self._by_id[i] for i in self._by_transaction.get(transaction_id, ())]
+
+    def get_open_dispute(self, transaction_id):
+        """The dispute currently open against a transaction, or None."""
+        dispute_id = self._open_by_transaction.get(transaction_id)
+        return self._by_id[dispute_id] if dispute_id else None
+
+    def get_by_idempotency_key(self, customer_id, idempotency_key):
+        """The dispute a customer created with an Idempotency-Key, or None."""
+        dispute_id = self._by_idempotency_key.get((customer_id, idempotency_key))
+        return self._by_id[dispute_id] if dispute_id else None
+
+    def save_many(self, disputes):
+        """Insert or update several disputes."""
+        for dispute in disputes:
+            self.save(dispute)
+
+    def iter_disputes(self, after=None, statuses=None, page_size=500):
+        """Yield disputes in dispute_id order, starting after the given ID, optionally only some statuses."""
+        for dispute_id in sorted(self._by_id):
+            if after is not None and dispute_id <= after:
+                continue
+            dispute = self._by_id[dispute_id]
+            if statuses is None or dispute["status"] in statuses:
+                yield dispute
+
+    def count_by_status(self):
+        counts = {}
+        for dispute in self._by_id.values():
+            counts[dispute["status"]] = counts.get(dispute["status"], 0) + 1
+        return counts
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class SQLiteDisputeRepository:
+    """
+    Durable dispute store in an embedded SQLite database (WAL mode), shared by every
+    worker process on the host.
+
+    Each thread gets its own pooled connection. Writes are group-committed: save() queues
+    the dispute, and a writer thread commits everything queued in one transaction every
+    commit_interval_ms (or sooner once batch_size disputes are waiting). Reads in the same
+    process see queued disputes straight away; other workers see them once committed. A
+    crash can lose at most the last commit interval; commit_interval_ms=0 commits on every
+    save instead.
+    """
+
+    COLUMNS = "dispute_id, customer_id, transaction_id, status, created_at, data"
+
+    def __init__(self, path, commit_interval_ms=None, batch_size=None):
+        self.path = path
+        self.commit_interval_ms = (Config.DISPUTE_STORE_COMMIT_INTERVAL_MS
+                                   if commit_interval_ms is None else commit_interval_ms)
+        self.batch_size = batch_size or Config.DISPUTE_STORE_BATCH_SIZE
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}  # dispute_id -> row queued for the next commit
+        self._committing = {}  # rows being committed, still visible to readers
+        self._wake = threading.Event()
+        self._closed = False
+        self._create_schema()
+        self._writer = None
+        if self.commit_interval_ms > 0:
+            self._writer = threading.Thread(target=self._write_loop, name="dispute-writer", daemon=True)
+            self._writer.start()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; fsync at checkpoints
+            connection.execute("PRAGMA busy_timeout=5000")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _create_schema(self):
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS disputes ("
+            "dispute_id TEXT PRIMARY KEY, customer_id TEXT NOT NULL, transaction_id TEXT NOT NULL, "
+            "status TEXT NOT NULL, created_at TEXT NOT NULL, data TEXT NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS disputes_customer ON disputes (customer_id, created_at)")
+        connection.execute("CREATE INDEX IF NOT EXISTS disputes_transaction ON disputes (transaction_id)")
+        connection.execute("CREATE INDEX IF NOT EXISTS disputes_status ON disputes (status)")
+        connection.execute("CREATE INDEX IF NOT EXISTS disputes_idempotency_key "
+                           "ON disputes (customer_id, json_extract(data, '$.idempotency_key'))")
+
+    def __len__(self):
+        self.flush()
+        return self._connection().execute("SELECT COUNT(*) FROM disputes").fetchone()[0]
+
+    def __contains__(self, dispute_id):
+        return self.get(dispute_id) is not None
+
+    def save(self, dispute):
+        """Insert or update a dispute (queued for the next group commit)."""
+        row = (dispute["dispute_id"], dispute["customer_id"], dispute["transaction_id"],
+               dispute["status"], dispute["created_at"], json.dumps(dispute))
+        if self._writer is None:
+            self._write([row])
+            return
+        with self._lock:
+            self._pending[row[0]] = row
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def get(self, dispute_id):
+        """Get a dispute by ID, or None if it is unknown."""
+        with self._lock:
+            row = self._pending.get(dispute_id) or self._committing.get(dispute_id)
+        if row:
+            return json.loads(row[5])
+        row = self._connection().execute(
+            "SELECT data FROM disputes WHERE dispute_id = ?", (dispute_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_customer_disputes(self, customer_id):
+        """Get all disputes for a customer, oldest first."""
+        return self._select("customer_id", customer_id)
+
+    def get_transaction_disputes(self, transaction_id):
+        """Get all disputes raised against a transaction, oldest first."""
+        return self._select("transaction_id", transaction_id)
+
+    def get_open_dispute(self, transaction_id):
+        """The dispute currently open against a transaction, or None."""
+        queued = {row[0]: row for row in self._queued(lambda r: r[2] == transaction_id)}
+        placeholders = ", ".join("?" * len(CLOSED_STATUSES))
+        row = self._connection().execute(
+            f"SELECT {self.COLUMNS} FROM disputes WHERE transaction_id = ? AND status NOT IN ({placeholders}) "
+            "ORDER BY created_at DESC, rowid DESC LIMIT 1", (transaction_id, *CLOSED_STATUSES)
+        ).fetchone()
+        # Queued rows are newer versions of (or additions to) what is committed
+        candidates = [r for r in queued.values() if r[3] not in CLOSED_STATUSES]
+        if row and row[0] not in queued:
+            candidates.append(row)
+        return json.loads(max(candidates, key=lambda r: r[4])[5]) if candidates else None
+
+    def get_by_idempotency_key(self, customer_id, idempotency_key):
+        """The dispute a customer created with an Idempotency-Key, or None."""
+        for row in self._queued(lambda r: r[1] == customer_id):
+            dispute = json.loads(row[5])
+            if dispute.get("idempotency_key") == idempotency_key:
+                return dispute
+        row = self._connection().execute(
+            "SELECT data FROM disputes WHERE customer_id = ? AND json_extract(data, '$.idempotency_key') = ?",
+            (customer_id, idempotency_key)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_many(self, disputes):
+        """Insert or update several disputes and commit them together."""
+        rows = [(d["dispute_id"], d["customer_id"], d["transaction_id"], d["status"], d["created_at"], json.dumps(d))
+                for d in disputes]
+        with self._lock:
+            for row in rows:
+                self._pending[row[0]] = row
+        self.flush()
+
+    def iter_disputes(self, after=None, statuses=None, page_size=500):
+        """
+        Yield disputes in dispute_id order, starting after the given ID, optionally only some statuses.
+
+        Pages through the primary key, so only page_size disputes are held at a time and
+        a scan can resume from the last ID it saw.
+        """
+        self.flush()
+        condition, parameters = "", []
+        if statuses is not None:
+            condition = f" AND status IN ({', '.join('?' * len(statuses))})"
+            parameters = list(statuses)
+        after = "" if after is None else after
+        while True:
+            rows = self._connection().execute(
+                f"SELECT dispute_id, data FROM disputes WHERE dispute_id > ?{condition} ORDER BY dispute_id LIMIT ?",
+                (after, *parameters, page_size)
+            ).fetchall()
+            for _, data in rows:
+                yield json.loads(data)
+            if len(rows) < page_size:
+                return
+            after = rows[-1][0]
+
+    def count_by_status(self):
+        self.flush()
+        return dict(self._connection().execute("SELECT status, COUNT(*) FROM disputes GROUP BY status"))
+
+    def flush(self):
+        """Commit every queued dispute now."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                self._committing, self._pending = self._pending, {}
+            try:
+                self._write(list(self._committing.values()))
+            except Exception:
+                with self._lock:
+                    # Keep the rows queued (newer saves win) so the next flush retries them
+                    self._pending = {**self._committing, **self._pending}
+                raise
+            finally:
+                with self._lock:
+                    self._committing = {}
+
+    def close(self):
+        """Stop the writer, commit what is queued and close every pooled connection."""
+        self._closed = True
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join()
+        self.flush()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def _write(self, rows):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # An upsert keeps the row's rowid, the tie-breaker for disputes created in the same second
+            connection.executemany(
+                f"INSERT INTO disputes ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(dispute_id) DO UPDATE SET "
+                "customer_id = excluded.customer_id, transaction_id = excluded.transaction_id, "
+                "status = excluded.status, created_at = excluded.created_at, data = excluded.data", rows)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _write_loop(self):
+        while not self._closed:
+            self._wake.wait(self.commit_interval_ms / 1000.0)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error committing disputes: {str(e)}")
+
+    def _queued(self, predicate):
+        """Rows saved in this process but not yet committed, newest version of each."""
+        with self._lock:
+            rows = {**self._committing, **self._pending}
+        return [row for row in rows.values() if predicate(row)]
+
+    def _select(self, column, value):
+        field = {"customer_id": 1, "transaction_id": 2}[column]
+        queued = {row[0]: row for row in self._queued(lambda r: r[field] == value)}
+        rows = self._connection().execute(
+            f"SELECT {self.COLUMNS} FROM disputes WHERE {column} = ? ORDER BY created_at, rowid", (value,)
+        ).fetchall()
+        if queued:
+            rows = [queued.pop(row[0], row) for row in rows] + sorted(queued.values(), key=lambda r: r[4])
+        return [json.loads(row[5]) for row in rows]
+
+def create_dispute_repository(store=None):
+    """Create the dispute store configured by DISPUTE_STORE ("memory" or "sqlite")."""
+    store = store or Config.DISPUTE_STORE
+    if store == "memory":
+        return InMemoryDisputeRepository()
+    if store == "sqlite":
+        return SQLiteDisputeRepository(Config.DISPUTE_DB_PATH)
+    raise ValueError(f"Unknown dispute store: {store}")
@@ -1,83 +1,505 @@
-import json
+import asyncio
+import itertools
 import uuid
 from datetime import datetime, timedelta
 import os
 import logging
+import time
+from types import SimpleNamespace
+from app.models.transaction import DisputeRequest
 from app.services.openai_service import OpenAIService
+from app.services.analysis_queue import DisputeAnalysisQueue
+from app.services.assessment_cache import scrub_analysis
+from app.services.triage import DisputeTriage
+from app.services.customer_profiles import CustomerProfileIndex
+from app.services.dispute_repository import create_dispute_repository
+from app.services.sharding import ShardAssignment
+from app.services.similar_disputes import SimilarDisputeIndex, compact_case, dispute_signature
+from app.services.transaction_query import encode_cursor, decode_cursor
+from app.services.transaction_repository import (
+    LayeredTransactionRepository, create_transaction_repository, load_transaction_repository
+)
+from app.services.transaction_ingestion import TransactionDeltaIngestor
+from app.utils.dates import parse_transaction_date
+from app.utils import metrics
 from app.config import Config
 
 logger = logging.getLogger(__name__)
 
+def analysis_fields(ai_analysis):
+    """Dispute fields derived from an AI analysis."""
+    # Determine estimated resolution time based on AI analysis
+    if ai_analysis.get("fraud_likelihood") == "HIGH":
+        estimated_days = 5
+    elif ai_analysis.get("fraud_likelihood") == "MEDIUM":
+        estimated_days = 10
+    else:
+        estimated_days = 21
+        
+    estimated_resolution = (datetime.now() + timedelta(days=estimated_days)).strftime("%Y-%m-%d")
+    return {
+        "estimated_resolution_time": estimated_resolution,
+        "fraud_likelihood": ai_analysis.get("fraud_likelihood"),
+        "next_steps": ai_analysis.get("recommended_actions", ["Your dispute is being reviewed"]),
+        "ai_assessment": ai_analysis.get("analysis", "Analysis in progress"),
+        "ai_analysis": ai_analysis
+    }
+
 class DisputeService:
     def __init__(self):
-        self.openai_service = OpenAIService()
+        self.triage = DisputeTriage()
+        self.openai_service = OpenAIService(fallback=self.triage.fallback_analysis)
+        self.shard = ShardAssignment()
         self.transactions = self._load_transactions()
-        self.disputes = {}  # In-memory storage for disputes (would be a database in production)
+        self.profiles = CustomerProfileIndex.from_repository(self.transactions)
+        self.disputes = create_dispute_repository()
+        self.similar_disputes = SimilarDisputeIndex()
+        self._load_similar_disputes()
+        self.analysis_queue = DisputeAnalysisQueue(self)
+        self.duplicate_stats = {"replayed": 0, "coalesced": 0}
+        self._in_flight = {}  # (customer_id, transaction_id) -> future of the dispute being created
+        self.ingestor = TransactionDeltaIngestor(self, shard=self.shard)
         
     def _load_transactions(self):
-        """Load transactions from the data file."""
+        """
+        Load transactions from the data file (JSON, JSON Lines or a .snap snapshot) into an indexed repository.
+        
+        The loaded repository becomes the base layer; transactions added later go into a small
+        delta layer on top, so they never have to be written into a read-only snapshot.
+        In sharded mode only this shard's customers are loaded.
+        """
         try:
-            with open(Config.DATA_FILE, 'r') as f:
-                return json.load(f)
+            base = load_transaction_repository(Config.DATA_FILE, self.shard)
         except Exception as e:
             logger.error(f"Error loading transactions: {str(e)}")
-            return []
+            base = create_transaction_repository()
+        return LayeredTransactionRepository(base)
     
     def get_customer_transactions(self, customer_id):
         """Get all transactions for a specific customer."""
-        return [t for t in self.transactions if t['customer_id'] == customer_id]
+        return self.transactions.get_customer_transactions(customer_id)
+    
+    def query_customer_transactions(self, customer_id, query=None, cursor=None):
+        """
+        Iterate a customer's transactions, oldest first, that pass a TransactionQuery.
+        
+        Resumes after the transaction a cursor points at; raises ValueError for a bad cursor.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        return self.transactions.query_customer_transactions(customer_id, query, after)
+    
+    def list_customer_transactions(self, customer_id, query=None, cursor=None, limit=None):
+        """
+        One page of a customer's transactions.
+        
+        Returns:
+            tuple: (transactions, cursor for the next page or None if this is the last page)
+        """
+        rows = self.query_customer_transactions(customer_id, query, cursor)
+        if limit is None:
+            return list(rows), None
+        page = list(itertools.islice(rows, limit + 1))
+        if len(page) > limit:
+            return page[:limit], encode_cursor(page[limit - 1])
+        return page, None
     
     def get_transaction(self, transaction_id):
         """Get a specific transaction by ID."""
-        for transaction in self.transactions:
-            if transaction['transaction_id'] == transaction_id:
-                return transaction
+        return self.transactions.get(transaction_id)
+    
+    def add_transactions(self, transactions):
+        """
+        Add (or replace) transactions, keeping customer profiles in step; returns the count added.
+        
+        Called from the ingestor's worker thread. The transactions become visible in one
+        layer swap and the updated profiles right after in one dict update, so readers may
+        briefly see the previous profiles but never a partly updated one.
+        """
+        transactions = list(transactions)
+        latest = list({t['transaction_id']: t for t in transactions}.values())  # the last copy of an ID wins
+        replaced = [existing for existing in map(self.transactions.get, (t['transaction_id'] for t in latest))
+                    if existing is not None]
+        count = self.transactions.add_many(transactions)
+        self.profiles.replace(replaced, latest)
+        return count
+    
+    def create_dispute(self, dispute_request, idempotency_key=None):
+        """Create a new dispute for a transaction, or return the one this request repeats."""
+        existing = self.find_existing_dispute(dispute_request, idempotency_key)
+        if existing is not None:
+            return existing
+        transaction, error = self._validate_dispute(dispute_request)
+        if error:
+            return error
+        
+        # Clear-cut disputes are settled by triage; use OpenAI to analyze the rest
+        transaction, ai_analysis = self._triage(transaction)
+        if ai_analysis is None:
+            transaction, ai_analysis = self._similar(transaction, dispute_request)
+        if ai_analysis is None:
+            ai_analysis = self.openai_service.analyze_dispute(transaction, dispute_request)
+        return self._record_dispute(dispute_request, ai_analysis, idempotency_key=idempotency_key)
+    
+    async def create_dispute_async(self, dispute_request, idempotency_key=None):
+        """
+        Create a new dispute, awaiting the AI analysis without blocking the event loop.
+        
+        A repeat of a stored dispute is answered from the store, and a duplicate arriving
+        while the original is still being analysed waits for that analysis instead of
+        starting its own. Either way the result carries "replayed": True. If the original
+        request is cancelled, a waiting duplicate runs the analysis itself.
+        """
+        flight_key = (dispute_request.customer_id, dispute_request.transaction_id)
+        while True:
+            existing = self.find_existing_dispute(dispute_request, idempotency_key)
+            if existing is not None:
+                return existing
+            in_flight = self._in_flight.get(flight_key)
+            if in_flight is None:
+                break
+            try:
+                result = await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                if not in_flight.cancelled():
+                    raise  # this request was cancelled, not the one it waited for
+                continue  # the original was abandoned; look again and take over from it
+            self.duplicate_stats["coalesced"] += 1
+            return result if "error" in result else dict(result, replayed=True)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[flight_key] = future
+        try:
+            result = await self._create_dispute_async(dispute_request, idempotency_key)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved here, so an unawaited future does not log a warning
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            del self._in_flight[flight_key]
+    
+    async def _create_dispute_async(self, dispute_request, idempotency_key):
+        transaction, error = self._validate_dispute(dispute_request)
+        if error:
+            return error
+        
+        transaction, ai_analysis = self._triage(transaction)
+        if ai_analysis is None:
+            transaction, ai_analysis = self._similar(transaction, dispute_request)
+        if ai_analysis is None:
+            ai_analysis = await self.openai_service.analyze_dispute_async(transaction, dispute_request)
+        return self._record_dispute(dispute_request, ai_analysis, idempotency_key=idempotency_key)
+    
+    def find_existing_dispute(self, dispute_request, idempotency_key=None):
+        """
+        The stored dispute a submission repeats, looked up in O(1).
+        
+        A submission repeats a dispute when the customer already used its Idempotency-Key,
+        or when its transaction already has an open dispute.
+        
+        Returns:
+            dict: The existing dispute's response fields with "replayed": True, an error dict
+            if the Idempotency-Key was used for a different transaction, or None
+        """
+        if idempotency_key:
+            dispute = self.disputes.get_by_idempotency_key(dispute_request.customer_id, idempotency_key)
+            if dispute is not None:
+                if dispute["transaction_id"] != dispute_request.transaction_id:
+                    return {"error": "Idempotency-Key was already used for a different transaction",
+                            "status_code": 422}
+                return self._replay(dispute)
+        dispute = self.disputes.get_open_dispute(dispute_request.transaction_id)
+        if dispute is not None and dispute["customer_id"] == dispute_request.customer_id:
+            return self._replay(dispute)
         return None
     
-    def create_dispute(self, dispute_request):
-        """Create a new dispute for a transaction."""
+    def _replay(self, dispute):
+        self.duplicate_stats["replayed"] += 1
+        return dict(self._to_response(dispute), replayed=True)
+    
+    async def create_disputes(self, dispute_requests):
+        """
+        Create several disputes at once, e.g. after a card compromise.
+        
+        Every request is validated and triaged first; the AI analysis of the remaining ones
+        is then grouped into batched prompts by OpenAIService.analyze_disputes_async. Like
+        create_dispute_async, a request for a dispute already being created elsewhere waits
+        for that, and requests analysed here are registered in flight so duplicates arriving
+        meanwhile wait for this batch.
+        
+        Returns:
+            list: One {"index", "dispute"} or {"index", "error"} entry per request, in order
+        """
+        results = [None] * len(dispute_requests)
+        accepted = []
+        waiting = []
+        flights = {}  # flight key -> future, for the requests this batch analyses
+        seen = set()
+        for index, dispute_request in enumerate(dispute_requests):
+            if dispute_request.transaction_id in seen:
+                results[index] = {"index": index, "error": "Duplicate transaction in batch"}
+                continue
+            seen.add(dispute_request.transaction_id)
+            existing = self.find_existing_dispute(dispute_request)
+            if existing is not None:
+                existing.pop("replayed")
+                results[index] = {"index": index, "dispute": existing}
+                continue
+            flight_key = (dispute_request.customer_id, dispute_request.transaction_id)
+            if flight_key in self._in_flight:
+                waiting.append((index, dispute_request))
+                continue
+            transaction, error = self._validate_dispute(dispute_request)
+            if error:
+                results[index] = {"index": index, "error": error["error"]}
+                continue
+            transaction, ai_analysis = self._triage(transaction)
+            if ai_analysis is None:
+                transaction, ai_analysis = self._similar(transaction, dispute_request)
+            if ai_analysis is not None:
+                results[index] = {"index": index, "dispute": self._record_dispute(dispute_request, ai_analysis)}
+            else:
+                accepted.append((index, transaction, dispute_request))
+                flights[flight_key] = self._in_flight[flight_key] = asyncio.get_running_loop().create_future()
+        
+        async def wait_for_duplicate(index, dispute_request):
+            result = await self.create_dispute_async(dispute_request)
+            if "error" in result:
+                results[index] = {"index": index, "error": result["error"]}
+            else:
+                result.pop("replayed", None)
+                results[index] = {"index": index, "dispute": result}
+        
+        try:
+            analyses, *_ = await asyncio.gather(
+                self.openai_service.analyze_disputes_async(
+                    [(transaction, dispute_request) for _, transaction, dispute_request in accepted]),
+                *(wait_for_duplicate(index, dispute_request) for index, dispute_request in waiting)
+            )
+            for (index, _, dispute_request), ai_analysis in zip(accepted, analyses):
+                # Recorded elsewhere meanwhile (e.g. by the synchronous path)? Then keep that one
+                dispute = self.find_existing_dispute(dispute_request)
+                if dispute is None:
+                    dispute = self._record_dispute(dispute_request, ai_analysis)
+                else:
+                    dispute.pop("replayed")
+                flights[(dispute_request.customer_id, dispute_request.transaction_id)].set_result(dispute)
+                results[index] = {"index": index, "dispute": dispute}
+        except Exception as e:
+            for future in flights.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()  # retrieved here, so an unawaited future does not log a warning
+            raise
+        finally:
+            for flight_key, future in flights.items():
+                if not future.done():
+                    future.cancel()
+                del self._in_flight[flight_key]
+        return results
+    
+    def submit_dispute(self, dispute_request, idempotency_key=None):
+        """
+        Validate and store a dispute without waiting for the AI analysis.
+        
+        The dispute is stored with status PENDING_ANALYSIS and queued for the background
+        analysis workers, which update it in place. Raises asyncio.QueueFull if the
+        analysis queue is at capacity; nothing is stored in that case. Disputes settled by
+        triage or by reusing a past assessment skip the queue and are stored as UNDER_REVIEW
+        straight away. A repeated submission returns the existing dispute, as in
+        create_dispute_async.
+        """
+        existing = self.find_existing_dispute(dispute_request, idempotency_key)
+        if existing is not None:
+            return existing
+        transaction, error = self._validate_dispute(dispute_request)
+        if error:
+            return error
+        transaction, ai_analysis = self._triage(transaction)
+        if ai_analysis is None:
+            transaction, ai_analysis = self._similar(transaction, dispute_request)
+        if ai_analysis is not None:
+            return self._record_dispute(dispute_request, ai_analysis, idempotency_key=idempotency_key)
+        if self.analysis_queue.full():
+            raise asyncio.QueueFull("Dispute analysis queue is full")
+        
+        pending_analysis = {
+            "analysis": "Analysis in progress",
+            "fraud_likelihood": None,
+            "recommended_actions": ["Your dispute has been received and is awaiting assessment"]
+        }
+        response = self._record_dispute(dispute_request, pending_analysis, status="PENDING_ANALYSIS",
+                                        idempotency_key=idempotency_key)
+        self.analysis_queue.submit(response["dispute_id"], transaction, dispute_request)
+        return response
+    
+    def resume_pending_analyses(self, limit):
+        """
+        Queue stored PENDING_ANALYSIS disputes that are not already queued, e.g. after a restart.
+        
+        Each dispute's transaction and request are rebuilt from the stored record and triaged
+        again, so one that triage or a similar past dispute now settles is completed straight
+        away; one whose transaction is gone is referred to manual review.
+        
+        Returns:
+            tuple: (disputes queued or completed, True if more were left for lack of room)
+        """
+        resumed = queued = 0
+        for dispute in self.disputes.iter_disputes(statuses=["PENDING_ANALYSIS"]):
+            if self.analysis_queue.is_queued(dispute["dispute_id"]):
+                continue
+            transaction = self.transactions.get(dispute["transaction_id"])
+            if transaction is None:
+                self.complete_analysis(dispute["dispute_id"], {
+                    "analysis": "Transaction no longer available for automated analysis",
+                    "fraud_likelihood": "UNKNOWN",
+                    "recommended_actions": ["Your dispute has been referred to our team for manual review"]
+                })
+                resumed += 1
+                continue
+            dispute_request = DisputeRequest(**{field: dispute.get(field) for field in (
+                "customer_id", "transaction_id", "reason", "description", "contact_phone", "contact_email")})
+            transaction, ai_analysis = self._triage(transaction)
+            if ai_analysis is None:
+                transaction, ai_analysis = self._similar(transaction, dispute_request)
+            if ai_analysis is not None:
+                self.complete_analysis(dispute["dispute_id"], ai_analysis)
+            elif queued >= limit:
+                return resumed, True
+            else:
+                self.analysis_queue.submit(dispute["dispute_id"], transaction, dispute_request)
+                queued += 1
+            resumed += 1
+        return resumed, False
+    
+    def complete_analysis(self, dispute_id, ai_analysis):
+        """Apply a finished AI analysis to a stored dispute in place."""
+        dispute = self.disputes.get(dispute_id)
+        if dispute is None:
+            return None
+        dispute.update(analysis_fields(ai_analysis))
+        dispute["status"] = "UNDER_REVIEW"
+        self.disputes.save(dispute)
+        self._index_dispute(dispute)
+        return dispute
+    
+    @metrics.timed("triage")
+    def _triage(self, transaction):
+        """
+        Triage a validated dispute against the customer's profile.
+        
+        Returns:
+            tuple: (copy of the transaction annotated with its customer_profile features for
+            the LLM prompt, canned analysis or None if the dispute needs the LLM)
+        """
+        features = self.profiles.features(transaction)
+        return dict(transaction, customer_profile=features), self.triage.classify(transaction, features)
+    
+    @metrics.timed("similar_disputes")
+    def _similar(self, transaction, dispute_request):
+        """
+        Look a triaged dispute up in the index of past disputes.
+        
+        When SIMILAR_DISPUTES_REUSE_SIMILARITY is set, a past assessment at least that alike
+        is reused outright, with the other dispute's identifiers scrubbed; otherwise the
+        closest ones are attached to the transaction as compact similar_cases for the prompt.
+        
+        Returns:
+            tuple: (transaction, with similar_cases if any were found, reused analysis or
+            None if the dispute needs the LLM)
+        """
+        index = self.similar_disputes
+        if not index.enabled or not len(index):
+            return transaction, None
+        signature = dispute_signature(transaction, dispute_request.reason, dispute_request.description)
+        cases = []
+        for dispute_id, score in index.search(signature, k=max(1, index.top_k)):
+            dispute = self.disputes.get(dispute_id)
+            source = self.transactions.get(dispute["transaction_id"]) if dispute else None
+            if source is None or not dispute.get("ai_analysis"):
+                continue
+            ai_analysis = scrub_analysis(dispute["ai_analysis"], source,
+                                         SimpleNamespace(customer_id=dispute["customer_id"]))
+            if not cases and index.reuse_similarity and score >= index.reuse_similarity:
+                index.record("reused")
+                return transaction, dict(ai_analysis, reused_similarity=round(score, 2))
+            cases.append(compact_case(dispute, ai_analysis, score))
+        cases = cases[:index.top_k]
+        if not cases:
+            return transaction, None
+        index.record("with_context")
+        return dict(transaction, similar_cases=cases), None
+    
+    def _index_dispute(self, dispute):
+        """Add a dispute to the similar-dispute index if the LLM assessed it and its status is indexed."""
+        index = self.similar_disputes
+        ai_analysis = dispute.get("ai_analysis") or {}
+        if (not index.enabled or dispute["status"] not in index.statuses
+                or dispute["fraud_likelihood"] not in ("HIGH", "MEDIUM", "LOW")
+                or any(ai_analysis.get(k) for k in ("triage_signals", "fallback", "reused_similarity"))):
+            return
+        transaction = self.transactions.get(dispute["transaction_id"])
+        if transaction is None:
+            return
+        transaction = dict(transaction, customer_profile=self.profiles.features(transaction))
+        index.add(dispute["dispute_id"], dispute_signature(transaction, dispute["reason"], dispute["description"]))
+    
+    def _load_similar_disputes(self):
+        """Index the stored disputes the similar-dispute index covers."""
+        if not self.similar_disputes.enabled:
+            return
+        start = time.perf_counter()
+        for dispute in self.disputes.iter_disputes(statuses=self.similar_disputes.statuses):
+            self._index_dispute(dispute)
+        if len(self.similar_disputes):
+            logger.info(f"Indexed {len(self.similar_disputes)} past disputes for similarity search "
+                        f"in {time.perf_counter() - start:.1f}s")
+    
+    def _validate_dispute(self, dispute_request):
+        """Check a dispute request against the transaction and regulatory limits.
+        
+        Returns:
+            tuple: (transaction, None) if the dispute can proceed, otherwise (None, error dict)
+        """
         # Get the transaction
-        transaction = self.get_transaction(dispute_request.transaction_id)
+        with metrics.span("transaction_lookup"):
+            transaction = self.get_transaction(dispute_request.transaction_id)
         if not transaction:
-            return {"error": "Transaction not found"}
+            return None, {"error": "Transaction not found"}
         
         # Check if transaction belongs to customer
         if transaction['customer_id'] != dispute_request.customer_id:
-            return {"error": "Transaction does not belong to this customer"}
+            return None, {"error": "Transaction does not belong to this customer"}
         
         # Check if transaction is within dispute time limit
-        transaction_date = datetime.strptime(transaction['date'], "%Y-%m-%d %H:%M:%S")
+        with metrics.span("date_parse"):
+            transaction_date = parse_transaction_date(transaction['date'])
         days_since_transaction = (datetime.now() - transaction_date).days
         if days_since_transaction > Config.DISPUTE_TIME_LIMIT_DAYS:
-            return {
+            return None, {
                 "error": f"Transaction is outside the {Config.DISPUTE_TIME_LIMIT_DAYS}-day dispute window",
                 "days_since_transaction": days_since_transaction
             }
         
         # Check if amount is within limits
         if transaction['amount'] > Config.MAX_DISPUTE_AMOUNT:
-            return {
+            return None, {
                 "error": f"Transaction amount exceeds maximum dispute limit of ${Config.MAX_DISPUTE_AMOUNT}",
                 "transaction_amount": transaction['amount']
             }
         
-        # Use OpenAI to analyze the dispute
-        ai_analysis = self.openai_service.analyze_dispute(transaction, dispute_request)
-        
+        return transaction, None
+    
+    @metrics.timed("dispute_record")
+    def _record_dispute(self, dispute_request, ai_analysis, status="UNDER_REVIEW", idempotency_key=None):
+        """Store a dispute with its AI analysis and return the response payload."""
         # Create dispute record
         dispute_id = str(uuid.uuid4())
         created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        # Determine estimated resolution time based on AI analysis
-        if ai_analysis.get("fraud_likelihood") == "HIGH":
-            estimated_days = 5
-        elif ai_analysis.get("fraud_likelihood") == "MEDIUM":
-            estimated_days = 10
-        else:
-            estimated_days = 21
-            
-        estimated_resolution = (datetime.now() + timedelta(days=estimated_days)).strftime("%Y-%m-%d")
-        
         # Generate reference number
         reference_number = f"DSP-{dispute_id[:8].upper()}"
         
@@ -90,27 +512,34 @@ class DisputeService:
             "description": dispute_request.description,
             "contact_phone": dispute_request.contact_phone,
             "contact_email": dispute_request.contact_email,
-            "status": "UNDER_REVIEW",
+            "status": status,
             "created_at": created_at,
-            "estimated_resolution_time": estimated_resolution,
             "reference_number": reference_number,
-            "ai_analysis": ai_analysis
+            **analysis_fields(ai_analysis)
         }
+        if idempotency_key:
+            dispute["idempotency_key"] = idempotency_key
         
         # Store dispute
-        self.disputes[dispute_id] = dispute
+        self.disputes.save(dispute)
+        self._index_dispute(dispute)
         
         # Return response
+        return self._to_response(dispute)
+    
+    def _to_response(self, dispute):
+        """The DisputeResponse fields of a stored dispute."""
         return {
-            "dispute_id": dispute_id,
-            "transaction_id": dispute_request.transaction_id,
-            "customer_id": dispute_request.customer_id,
-            "status": "UNDER_REVIEW",
-            "created_at": created_at,
-            "estimated_resolution_time": estimated_resolution,
-            "next_steps": ai_analysis.get("recommended_actions", ["Your dispute is being reviewed"]),
-            "reference_number": reference_number,
-            "ai_assessment": ai_analysis.get("analysis", "Analysis in progress")
+            "dispute_id": dispute["dispute_id"],
+            "transaction_id": dispute["transaction_id"],
+            "customer_id": dispute["customer_id"],
+            "status": dispute["status"],
+            "created_at": dispute["created_at"],
+            "estimated_resolution_time": dispute["estimated_resolution_time"],
+            "next_steps": dispute["next_steps"],
+            "reference_number": dispute["reference_number"],
+            "ai_assessment": dispute["ai_assessment"],
+            "fraud_likelihood": dispute["fraud_likelihood"]
         }
     
     def get_dispute(self, dispute_id):
@@ -119,4 +548,4 @@ class DisputeService:
     
     def get_customer_disputes(self, customer_id):
         """Get all disputes for a specific customer."""
-        return [d for d in self.disputes.values() if d['customer_id'] == customer_id]
\ No newline at end of file
+        return self.disputes.get_customer_disputes(customer_id)
\ No newline at end of file
@@ -0,0 +1,251 @@
+import asyncio
+import collections
+import logging
+import random
+import threading
+import time
+import openai
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the circuit breaker is open."""
+
+def is_upstream_failure(error):
+    """Whether an error says the provider is unhealthy (and the call may be retried)."""
+    return isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError,
+                              asyncio.TimeoutError, TimeoutError))
+
+class RetryBudget:
+    """
+    Caps retries (and hedged requests) at a share of recent calls.
+
+    Retrying every failure multiplies load on a provider that is already struggling; with a
+    budget, retries stay at most `ratio` of the calls made in the last window_seconds, plus
+    min_per_second so a quiet service can still retry the odd failure.
+    """
+
+    def __init__(self, ratio=None, min_per_second=None, window_seconds=10.0, clock=time.monotonic):
+        self.ratio = Config.LLM_RETRY_BUDGET_RATIO if ratio is None else ratio
+        self.min_per_second = Config.LLM_RETRY_BUDGET_MIN_PER_SECOND if min_per_second is None else min_per_second
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self._calls = collections.deque()
+        self._retries = collections.deque()
+        self._lock = threading.Lock()
+
+    def record_call(self):
+        with self._lock:
+            self._calls.append(self.clock())
+
+    def try_spend(self):
+        """Take one retry from the budget; False when it is exhausted."""
+        with self._lock:
+            now = self.clock()
+            for events in (self._calls, self._retries):
+                while events and events[0] <= now - self.window_seconds:
+                    events.popleft()
+            if len(self._retries) >= self.min_per_second * self.window_seconds + self.ratio * len(self._calls):
+                return False
+            self._retries.append(now)
+            return True
+
+class CircuitBreaker:
+    """
+    Stops calling the LLM while it is failing.
+
+    The breaker opens when at least failure_rate of the last `window` calls (and min_calls
+    or more) were upstream failures. While open every call is refused; after open_seconds
+    one probe call is let through (half open), which closes the breaker on success and
+    reopens it on failure.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_rate=None, min_calls=None, window=None, open_seconds=None, clock=time.monotonic):
+        self.failure_rate = Config.LLM_BREAKER_FAILURE_RATE if failure_rate is None else failure_rate
+        self.min_calls = Config.LLM_BREAKER_MIN_CALLS if min_calls is None else min_calls
+        self.open_seconds = Config.LLM_BREAKER_OPEN_SECONDS if open_seconds is None else open_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self.times_opened = 0
+        self._outcomes = collections.deque(maxlen=window or Config.LLM_BREAKER_WINDOW)  # True = failure
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go ahead now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self._opened_at >= self.open_seconds:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def release_probe(self):
+        """Free the half-open probe slot after a probe that ended without an outcome, e.g. was cancelled."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                logger.info("LLM circuit breaker closed after a successful probe")
+                self.state = self.CLOSED
+                self._outcomes.clear()
+                self._probe_in_flight = False
+            self._outcomes.append(False)
+
+    def record_failure(self):
+        with self._lock:
+            self._outcomes.append(True)
+            if self.state == self.HALF_OPEN:
+                self._open()
+            elif self.state == self.CLOSED and len(self._outcomes) >= self.min_calls:
+                if sum(self._outcomes) >= self.failure_rate * len(self._outcomes):
+                    self._open()
+
+    def _open(self):
+        logger.warning(f"LLM circuit breaker opened for {self.open_seconds}s")
+        self.state = self.OPEN
+        self.times_opened += 1
+        self._opened_at = self.clock()
+        self._probe_in_flight = False
+
+class ResilientLLMClient:
+    """
+    Deadline, retry, circuit breaker and hedging policy around one LLM request.
+
+    Callers pass a `send(timeout)` function that makes a single attempt. Each call gets an
+    overall deadline; an attempt that fails with an upstream error (connection error,
+    timeout, 429 or 5xx) is retried with full-jitter exponential backoff while the deadline,
+    max_retries and the shared RetryBudget allow. Other errors (e.g. a 400) are raised at once.
+
+    With hedge_after_seconds set, an async attempt that has not answered by then is
+    duplicated and the first reply wins; hedges are paid for from the retry budget, so they
+    stop when the provider is degraded. While the circuit breaker is open calls fail fast
+    with CircuitOpenError.
+    """
+
+    def __init__(self, max_retries=2, attempt_timeout=30.0, deadline_seconds=None, backoff_base_seconds=None,
+                 backoff_max_seconds=None, hedge_after_seconds=None, budget=None, breaker=None, rng=None):
+        self.max_retries = max_retries
+        self.attempt_timeout = attempt_timeout
+        self.deadline_seconds = Config.LLM_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds
+        self.backoff_base_seconds = (
+            Config.LLM_RETRY_BACKOFF_SECONDS if backoff_base_seconds is None else backoff_base_seconds
+        )
+        self.backoff_max_seconds = (
+            Config.LLM_RETRY_BACKOFF_MAX_SECONDS if backoff_max_seconds is None else backoff_max_seconds
+        )
+        if hedge_after_seconds is None:
+            hedge_after_seconds = Config.LLM_HEDGE_AFTER_MS / 1000.0
+        self.hedge_after_seconds = hedge_after_seconds or None
+        self.budget = budget or RetryBudget()
+        self.breaker = breaker or CircuitBreaker()
+        self.rng = rng or random.Random()
+        self.stats = {"calls": 0, "retries": 0, "retries_denied": 0, "hedges": 0, "hedges_won": 0,
+                      "deadline_exceeded": 0, "rejected_open": 0}
+
+    async def call(self, send):
+        """Run `await send(timeout)` under the policy and return its result."""
+        deadline = self._start()
+        probe = self.breaker.state == CircuitBreaker.HALF_OPEN
+        try:
+            for attempt in range(self.max_retries + 1):
+                timeout = self._attempt_timeout(deadline)
+                try:
+                    result = await asyncio.wait_for(self._attempt(send, timeout), timeout)
+                except Exception as e:
+                    delay = self._after_failure(e, attempt, deadline)
+                    await asyncio.sleep(delay)
+                    continue
+                self.breaker.record_success()
+                return result
+        finally:
+            if probe:  # a cancelled probe records no outcome; let the next call probe instead
+                self.breaker.release_probe()
+
+    def call_sync(self, send):
+        """Blocking variant of call(): retries and the deadline, without hedging."""
+        deadline = self._start()
+        probe = self.breaker.state == CircuitBreaker.HALF_OPEN
+        try:
+            for attempt in range(self.max_retries + 1):
+                timeout = self._attempt_timeout(deadline)
+                try:
+                    result = send(timeout)
+                except Exception as e:
+                    time.sleep(self._after_failure(e, attempt, deadline))
+                    continue
+                self.breaker.record_success()
+                return result
+        finally:
+            if probe:
+                self.breaker.release_probe()
+
+    def status(self):
+        return {"circuit": self.breaker.state, "circuit_opened": self.breaker.times_opened, **self.stats}
+
+    def _start(self):
+        if not self.breaker.allow():
+            self.stats["rejected_open"] += 1
+            raise CircuitOpenError("LLM circuit breaker is open")
+        self.stats["calls"] += 1
+        self.budget.record_call()
+        return time.monotonic() + self.deadline_seconds
+
+    def _attempt_timeout(self, deadline):
+        return max(0.001, min(self.attempt_timeout, deadline - time.monotonic()))
+
+    def _after_failure(self, error, attempt, deadline):
+        """Record a failed attempt; returns the backoff before the next one, or re-raises the error."""
+        if not is_upstream_failure(error):
+            self.breaker.record_success()  # the provider answered; the request itself was bad
+            raise error
+        self.breaker.record_failure()
+        remaining = deadline - time.monotonic()
+        # Full jitter: spreads the retries of callers that failed together
+        delay = self.rng.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+        if remaining <= delay:
+            self.stats["deadline_exceeded"] += 1
+            raise error
+        if attempt >= self.max_retries or self.breaker.state != CircuitBreaker.CLOSED:
+            raise error
+        if not self.budget.try_spend():
+            self.stats["retries_denied"] += 1
+            raise error
+        self.stats["retries"] += 1
+        logger.info(f"Retrying LLM call in {delay:.2f}s after {type(error).__name__}")
+        return delay
+
+    async def _attempt(self, send, timeout):
+        if self.hedge_after_seconds is None or self.hedge_after_seconds >= timeout:
+            return await send(timeout)
+
+        primary = asyncio.ensure_future(send(timeout))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after_seconds)
+            if not done and self.budget.try_spend():
+                self.stats["hedges"] += 1
+                tasks.add(asyncio.ensure_future(send(timeout - self.hedge_after_seconds)))
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats["hedges_won"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -1,15 +1,37 @@
 import openai
+import httpx
+import asyncio
+import time
 from app.config import Config
+from app.services.assessment_cache import create_assessment_cache, cache_key, scrub_analysis
+from app.services.prompt_builder import SYSTEM_PROMPT, build_dispute_prompt, build_batch_prompt
+from app.services.llm_client import ResilientLLMClient, CircuitOpenError
+from app.utils import metrics
+from app.utils.structured_output import extract_json
 import logging
-import json
 
 logger = logging.getLogger(__name__)
 
 class OpenAIService:
-    def __init__(self):
+    def __init__(self, fallback=None):
+        """
+        Args:
+            fallback: Optional callable(transaction) returning a deterministic analysis,
+                used instead of the LLM while its circuit breaker is open
+        """
         self.api_key = Config.OPENAI_API_KEY
         self.model = Config.OPENAI_MODEL
         openai.api_key = self.api_key
+        openai.max_retries = 0  # retried by self.llm_client
+        if Config.OPENAI_BASE_URL:
+            openai.base_url = Config.OPENAI_BASE_URL
+        self.max_concurrency = Config.OPENAI_MAX_CONCURRENCY
+        self._async_client = None
+        self._semaphore = None
+        self.cache = create_assessment_cache()
+        self.fallback = fallback
+        self.llm_client = ResilientLLMClient(max_retries=Config.OPENAI_MAX_RETRIES,
+                                             attempt_timeout=Config.OPENAI_TIMEOUT_SECONDS)
         
     def analyze_dispute(self, transaction, dispute_request):
         """
@@ -22,98 +44,254 @@ class OpenAIService:
         Returns:
             dict: Analysis results including fraud likelihood and recommended actions
         """
+        key, cached = self._cached_analysis(transaction, dispute_request)
+        if cached is not None:
+            return cached
         try:
             # Create a prompt for the AI
             prompt = self._create_dispute_analysis_prompt(transaction, dispute_request)
             
-            # Call OpenAI API
-            response = openai.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,  # Low temperature for more deterministic responses
-                max_tokens=1000
-            )
+            # Call OpenAI API, retrying transient failures within the deadline
+            start = time.perf_counter()
+            response = self.llm_client.call_sync(lambda timeout: self._send(prompt, 1000, timeout))
             
             # Extract and parse the response
-            ai_response = response.choices[0].message.content
-            
-            try:
-                # Try to parse as JSON
-                return json.loads(ai_response)
-            except json.JSONDecodeError:
-                # If not valid JSON, return as text
-                logger.warning("AI response was not valid JSON, returning as text")
-                return {
-                    "analysis": ai_response,
-                    "fraud_likelihood": "UNKNOWN",
-                    "recommended_actions": ["Manual review required"]
-                }
-                
+            ai_analysis = self._parse_response(response.choices[0].message.content)
+            self._store_analysis(key, ai_analysis, transaction, dispute_request, response, start)
+            return ai_analysis
+        
+        except CircuitOpenError:
+            return self._fallback_analysis(transaction)
         except Exception as e:
             logger.error(f"Error calling OpenAI API: {str(e)}")
-            return {
-                "analysis": "Error analyzing dispute",
-                "fraud_likelihood": "ERROR",
-                "recommended_actions": ["System error, please try again or contact support"]
-            }
-    
-    def _get_system_prompt(self):
-        """Return the system prompt that guides the AI's behavior."""
-        return """
-        You are an AI assistant specialized in analyzing banking disputes for unauthorized transactions in Australia.
-        Your role is to analyze transaction details and customer dispute information to:
+            return self._error_analysis()
+
+    async def analyze_dispute_async(self, transaction, dispute_request):
+        """
+        Non-blocking variant of analyze_dispute for use from the event loop.
         
-        1. Assess the likelihood that the transaction was fraudulent
-        2. Recommend appropriate next steps based on Australian banking regulations
-        3. Provide a clear analysis that helps both the customer and bank staff
+        Requests share one pooled async HTTP client, and at most
+        Config.OPENAI_MAX_CONCURRENCY of them are in flight per process.
         
-        Your response should be in JSON format with the following structure:
-        {
-            "analysis": "Detailed analysis of the dispute",
-            "fraud_likelihood": "HIGH/MEDIUM/LOW",
-            "recommended_actions": ["Action 1", "Action 2", ...],
-            "estimated_resolution_time": "X business days",
-            "regulatory_considerations": "Relevant Australian banking regulations"
-        }
+        Returns:
+            dict: Analysis results including fraud likelihood and recommended actions
+        """
+        key, cached = self._cached_analysis(transaction, dispute_request)
+        if cached is not None:
+            return cached
+        try:
+            prompt = self._create_dispute_analysis_prompt(transaction, dispute_request)
+            start = time.perf_counter()
+            response = await self.llm_client.call(
+                lambda timeout: self._send_async("single", prompt, 1000, timeout))
+            ai_analysis = self._parse_response(response.choices[0].message.content)
+            self._store_analysis(key, ai_analysis, transaction, dispute_request, response, start)
+            return ai_analysis
+        except CircuitOpenError:
+            return self._fallback_analysis(transaction)
+        except Exception as e:
+            logger.error(f"Error calling OpenAI API: {str(e)}")
+            return self._error_analysis()
+
+    async def analyze_disputes_async(self, items):
+        """
+        Analyze several disputes, sharing one system prompt per group of Config.LLM_BATCH_SIZE.
         
-        Follow these Australian banking guidelines:
-        - Unauthorized transactions should be reported as soon as possible
-        - The ePayments Code provides protections for customers
-        - Banks must investigate and respond to disputes within 21 days for simple cases
-        - Complex cases may take up to 45 days to resolve
-        - Customers are generally not liable for unauthorized transactions unless they contributed to the loss
+        Cache hits are answered first; the remaining disputes are sent as batched prompts that
+        run concurrently under the same concurrency limit as single calls. Any dispute missing
+        from a batched reply is retried on its own.
         
-        Be factual, precise, and helpful while maintaining privacy and security.
+        Args:
+            items: List of (transaction, dispute_request) pairs
+            
+        Returns:
+            list: One analysis dict per item, in the same order
         """
-    
-    def _create_dispute_analysis_prompt(self, transaction, dispute_request):
-        """Create a detailed prompt for the AI based on transaction and dispute details."""
-        return f"""
-        Please analyze this disputed transaction and provide your assessment:
+        results = [None] * len(items)
+        keys = [None] * len(items)
+        pending = []
+        for position, (transaction, dispute_request) in enumerate(items):
+            keys[position], results[position] = self._cached_analysis(transaction, dispute_request)
+            if results[position] is None:
+                pending.append(position)
         
-        TRANSACTION DETAILS:
-        - Transaction ID: {transaction['transaction_id']}
-        - Date: {transaction['date']}
-        - Merchant: {transaction['merchant']}
-        - Amount: ${transaction['amount']}
-        - Category: {transaction['category']}
-        - Transaction Type: {transaction['transaction_type']}
-        - Payment Method: {transaction['payment_method']}
-        - Location: {transaction['location']}
+        batch_size = max(1, Config.LLM_BATCH_SIZE)
+        groups = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
         
-        CUSTOMER DISPUTE:
-        - Customer ID: {dispute_request.customer_id}
-        - Dispute Reason: {dispute_request.reason}
-        - Customer Description: {dispute_request.description}
+        async def analyze_group(group):
+            if len(group) == 1:
+                results[group[0]] = await self.analyze_dispute_async(*items[group[0]])
+                return
+            analyses = await self._analyze_batch_async([items[position] for position in group],
+                                                       [keys[position] for position in group])
+            for position, ai_analysis in zip(group, analyses):
+                results[position] = ai_analysis if ai_analysis is not None else await self.analyze_dispute_async(*items[position])
         
-        Based on the transaction details and customer's dispute information, please:
-        1. Analyze whether this transaction appears to be fraudulent
-        2. Recommend next steps for resolution
-        3. Provide estimated resolution timeframe
-        4. Note any relevant Australian banking regulations
+        await asyncio.gather(*(analyze_group(group) for group in groups))
+        return results
+
+    async def _analyze_batch_async(self, items, keys):
+        """Send one batched prompt; returns analyses aligned with items (None where unusable)."""
+        try:
+            prompt = self._create_batch_analysis_prompt(items)
+            start = time.perf_counter()
+            response = await self.llm_client.call(
+                lambda timeout: self._send_async("batch", prompt, min(4096, 800 * len(items)), timeout))
+            with metrics.span("llm_parse"):
+                reply = extract_json(response.choices[0].message.content) or {}
+            by_id = {entry.get("id"): entry for entry in reply.get("results", []) if isinstance(entry, dict)}
+        except Exception as e:
+            logger.error(f"Error calling OpenAI API for a batch of {len(items)} disputes: {str(e)}")
+            return [None] * len(items)
+        
+        analyses = []
+        for number, (key, (transaction, dispute_request)) in enumerate(zip(keys, items)):
+            ai_analysis = self._normalise_analysis(by_id.get(number))
+            if ai_analysis is None:
+                analyses.append(None)
+                continue
+            ai_analysis.pop("id", None)
+            # Each entry is credited with an even share of the batch's cost
+            self._store_analysis(key, ai_analysis, transaction, dispute_request, None, start,
+                                 tokens=self._total_tokens(response) // len(items))
+            analyses.append(ai_analysis)
+        return analyses
+
+    @metrics.timed("llm_cache_lookup")
+    def _cached_analysis(self, transaction, dispute_request):
+        """Look up a previous assessment of an equivalent dispute; returns (key, analysis or None)."""
+        if self.cache is None:
+            return None, None
+        key = cache_key(self._create_dispute_analysis_prompt, transaction, dispute_request,
+                        self.model, self._get_system_prompt())
+        return key, self.cache.get(key)
+
+    def _store_analysis(self, key, ai_analysis, transaction, dispute_request, response, start, tokens=None):
+        """Cache a usable assessment, remembering what it cost to produce."""
+        if key is None or ai_analysis.get("fraud_likelihood") not in ("HIGH", "MEDIUM", "LOW"):
+            return
+        self.cache.put(
+            key,
+            scrub_analysis(ai_analysis, transaction, dispute_request),
+            tokens=self._total_tokens(response) if tokens is None else tokens,
+            seconds=time.perf_counter() - start
+        )
+
+    def _send(self, prompt, max_tokens, timeout):
+        """One blocking chat completion attempt."""
+        with metrics.llm_call("single"):
+            response = openai.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self._get_system_prompt()},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.1,  # Low temperature for more deterministic responses
+                max_tokens=max_tokens,
+                timeout=timeout
+            )
+        metrics.record_llm_usage(response)
+        return response
+
+    async def _send_async(self, kind, prompt, max_tokens, timeout):
+        """One chat completion attempt on the pooled client, under the concurrency limit."""
+        async with self._get_semaphore():
+            with metrics.llm_call(kind):
+                response = await self._get_async_client().chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": self._get_system_prompt()},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.1,
+                    max_tokens=max_tokens,
+                    timeout=timeout
+                )
+        metrics.record_llm_usage(response)
+        return response
+
+    def _total_tokens(self, response):
+        usage = getattr(response, "usage", None)
+        return getattr(usage, "total_tokens", 0) or 0
+
+    async def close(self):
+        """Close the pooled async HTTP client."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
+    def _get_async_client(self):
+        """Create the async client on first use, with a connection pool sized to the concurrency limit."""
+        if self._async_client is None:
+            self._async_client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=Config.OPENAI_BASE_URL,
+                timeout=Config.OPENAI_TIMEOUT_SECONDS,
+                max_retries=0,  # retried by self.llm_client
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_concurrency,
+                        max_keepalive_connections=self.max_concurrency
+                    ),
+                    timeout=Config.OPENAI_TIMEOUT_SECONDS
+                )
+            )
+        return self._async_client
+
+    def _get_semaphore(self):
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _parse_response(self, ai_response):
+        """
+        Parse the model's reply, falling back to a manual-review result if no assessment can be recovered.
         
-        Respond in the JSON format specified in your instructions.
-        """
\ No newline at end of file
+        JSON wrapped in prose or a code fence, with trailing commas or cut off mid-object is
+        still recovered; the reply only needs to contain a fraud_likelihood.
+        """
+        with metrics.span("llm_parse"):
+            ai_analysis = self._normalise_analysis(extract_json(ai_response))
+        if ai_analysis is not None:
+            return ai_analysis
+        
+        # No usable JSON, return as text
+        logger.warning("AI response contained no JSON assessment, returning as text")
+        return {
+            "analysis": ai_response,
+            "fraud_likelihood": "UNKNOWN",
+            "recommended_actions": ["Manual review required"]
+        }
+
+    def _normalise_analysis(self, ai_analysis):
+        """A copy of a parsed assessment with fraud_likelihood upper-cased, or None if it has none."""
+        if ai_analysis is None or not isinstance(ai_analysis.get("fraud_likelihood"), str):
+            return None
+        return dict(ai_analysis, fraud_likelihood=ai_analysis["fraud_likelihood"].strip().upper())
+
+    def _fallback_analysis(self, transaction):
+        """Deterministic assessment used while the LLM circuit breaker is open."""
+        logger.warning("LLM circuit breaker is open; using the deterministic fallback assessment")
+        if self.fallback is None:
+            return self._error_analysis()
+        return self.fallback(transaction)
+
+    def _error_analysis(self):
+        return {
+            "analysis": "Error analyzing dispute",
+            "fraud_likelihood": "ERROR",
+            "recommended_actions": ["System error, please try again or contact support"]
+        }
+    
+    def _get_system_prompt(self):
+        """Return the system prompt that guides the AI's behavior."""
+        return SYSTEM_PROMPT
+    
+    def _create_dispute_analysis_prompt(self, transaction, dispute_request):
+        """Create a compact prompt for the AI based on transaction and dispute details."""
+        return build_dispute_prompt(transaction, dispute_request)
+    
+    def _create_batch_analysis_prompt(self, items):
+        """Create one prompt covering several disputes, each labelled with a numeric id."""
+        return build_batch_prompt(items)
@@ -0,0 +1,136 @@
+"""
+Compact dispute analysis prompts, measured against a token budget.
+
+Prompts are plain "label: value" lines with no indentation, so every token carries content.
+Token counts come from tiktoken's cl100k_base encoding when it is installed, and otherwise
+from a local approximation of its pre-tokenizer, which is close enough for budgeting.
+"""
+import functools
+import logging
+import re
+from app.config import Config
+from app.services.customer_profiles import describe_profile
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; count_tokens falls back to the local approximation
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = """You analyse unauthorised transaction disputes for an Australian bank.
+For each dispute: assess how likely the transaction is fraudulent, recommend next steps under Australian banking regulations, and explain your assessment clearly for the customer and bank staff.
+Reply with JSON only:
+{"analysis": "...", "fraud_likelihood": "HIGH|MEDIUM|LOW", "recommended_actions": ["..."], "estimated_resolution_time": "X business days", "regulatory_considerations": "..."}
+Australian guidelines:
+- Unauthorised transactions should be reported as soon as possible
+- The ePayments Code protects customers
+- Simple disputes must be answered within 21 days; complex cases may take up to 45 days
+- Customers are generally not liable for unauthorised transactions unless they contributed to the loss
+Be factual, precise and helpful while maintaining privacy and security."""
+
+# Pre-tokenizer in the style of cl100k_base: contractions, words with a leading space,
+# numbers in groups of up to three digits, punctuation runs, whitespace runs
+_PIECES = re.compile(r"'(?:s|t|re|ve|m|ll|d)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+")
+_CHARS_PER_WORD_TOKEN = 6  # longer words split into several BPE tokens
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    return tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text):
+    """Number of tokens in text, exact with tiktoken installed and approximate otherwise."""
+    if tiktoken is not None:
+        return len(_encoding().encode(text))
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        tokens += 1 + (len(piece) - 1) // _CHARS_PER_WORD_TOKEN
+    return tokens
+
+def _dispute_lines(transaction, dispute_request, description):
+    return [
+        f"Transaction: ID {transaction['transaction_id']}; date {transaction['date']}; "
+        f"merchant {transaction['merchant']}; amount ${transaction['amount']}; category {transaction['category']}; "
+        f"type {transaction['transaction_type']}; payment {transaction['payment_method']}; "
+        f"location {transaction['location']}",
+        f"Dispute: customer {dispute_request.customer_id}; reason {dispute_request.reason}",
+        f"Customer description: {description}",
+    ]
+
+def _profile_lines(transaction):
+    profile = transaction.get('customer_profile')
+    return [f"- {line}" for line in describe_profile(profile)] if profile else []
+
+def _similar_case_lines(transaction):
+    return [f"- {case['similarity']:.0%} similar, {case['status'].lower().replace('_', ' ')}: "
+            f"{case['fraud_likelihood']}; {case['summary']}" for case in transaction.get('similar_cases') or []]
+
+def dispute_section(transaction, dispute_request, budget):
+    """
+    Lines describing one dispute, fitted to `budget` tokens where possible.
+
+    Only the optional and free-text parts give way: similar past cases are dropped from the
+    end first, then the customer's description is shortened (it is the only unbounded
+    field), then customer profile lines are dropped from the end. The transaction facts
+    are always kept.
+    """
+    description_words = " ".join((dispute_request.description or "").split()).split(" ")
+    profile = _profile_lines(transaction)
+    similar = _similar_case_lines(transaction)
+
+    def render(words, profile_lines, similar_lines=()):
+        text = " ".join(words) + (" [...]" if len(words) < len(description_words) else "")
+        lines = _dispute_lines(transaction, dispute_request, text)
+        if profile_lines:
+            lines += ["Customer profile:", *profile_lines]
+        if similar_lines:
+            lines += ["Similar past cases:", *similar_lines]
+        return lines
+
+    lines = render(description_words, profile, similar)
+    if not budget or count_tokens("\n".join(lines)) <= budget:
+        return lines
+    while similar:
+        similar = similar[:-1]
+        lines = render(description_words, profile, similar)
+        if count_tokens("\n".join(lines)) <= budget:
+            return lines
+
+    # Longest description prefix that fits, by binary search over whole words; only the
+    # description is re-counted, with a final check for tokens merging across the join
+    available = budget - count_tokens("\n".join(render([], profile)))
+    low, high = 0, len(description_words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(" ".join(description_words[:middle]) + " [...]") <= available:
+            low = middle
+        else:
+            high = middle - 1
+    while low > 0 and count_tokens("\n".join(render(description_words[:low], profile))) > budget:
+        low -= 1
+    if low == 0:
+        while profile and count_tokens("\n".join(render([], profile))) > budget:
+            profile = profile[:-1]
+    lines = render(description_words[:low], profile)
+    logger.debug(f"Trimmed the prompt for transaction {transaction['transaction_id']} to {budget} tokens")
+    return lines
+
+def build_dispute_prompt(transaction, dispute_request, budget=None):
+    """The user prompt for analysing one dispute."""
+    budget = Config.LLM_PROMPT_TOKEN_BUDGET if budget is None else budget
+    lines = dispute_section(transaction, dispute_request, budget)
+    return "\n".join(["Assess this disputed transaction.", *lines, "Reply in the JSON format from your instructions."])
+
+def build_batch_prompt(items, budget=None):
+    """
+    One user prompt covering several (transaction, dispute_request) pairs, each labelled
+    "DISPUTE <n>:" and fitted to the per-dispute budget.
+    """
+    budget = Config.LLM_PROMPT_TOKEN_BUDGET if budget is None else budget
+    lines = [f"Assess each of these {len(items)} disputed transactions independently."]
+    for number, (transaction, dispute_request) in enumerate(items):
+        lines.append(f"DISPUTE {number}:")
+        lines.extend(dispute_section(transaction, dispute_request, budget))
+    lines.append('Reply with {"results": [...]}: one entry per dispute, each with an "id" field holding '
+                 'the dispute number and otherwise in the JSON format from your instructions.')
+    return "\n".join(lines)
@@ -0,0 +1,41 @@
+"""
+Partitioning of customers across worker processes.
+
+In sharded mode each worker owns the customers whose CRC-32 of customer_id falls on its
+shard index, and holds only their transactions, profiles and disputes. The router in
+app/shard_router.py computes the same function to forward each request to its owner.
+CRC-32 rather than hash() because it must agree across processes and restarts.
+"""
+import zlib
+from app.config import Config
+
+def shard_of(customer_id, shard_count):
+    """The shard (0 to shard_count - 1) that owns a customer."""
+    if shard_count <= 1:
+        return 0
+    return zlib.crc32(customer_id.encode("utf-8")) % shard_count
+
+class ShardAssignment:
+    """Which customers this process serves: all of them unless SHARD_COUNT > 1."""
+
+    def __init__(self, shard_count=None, shard_index=None):
+        self.shard_count = Config.SHARD_COUNT if shard_count is None else shard_count
+        self.shard_index = Config.SHARD_INDEX if shard_index is None else shard_index
+        if self.shard_count < 1 or not 0 <= self.shard_index < self.shard_count:
+            raise ValueError(f"Invalid shard {self.shard_index} of {self.shard_count}")
+
+    @property
+    def sharded(self):
+        return self.shard_count > 1
+
+    def owns(self, customer_id):
+        return not self.sharded or shard_of(customer_id, self.shard_count) == self.shard_index
+
+    def filter(self, transactions):
+        """The transactions of customers this shard owns (all of them when not sharded)."""
+        if not self.sharded:
+            return transactions
+        return (t for t in transactions if shard_of(t['customer_id'], self.shard_count) == self.shard_index)
+
+    def status(self):
+        return {"shard_count": self.shard_count, "shard_index": self.shard_index}
@@ -0,0 +1,195 @@
+"""
+In-process nearest-neighbour index of past disputes, for retrieval-augmented assessment.
+
+Each dispute is embedded locally as a 64-bit SimHash of weighted, hashed features: the
+transaction's merchant, category, location, type, payment method and amount band, the
+banded customer profile lines from the prompt, and word unigrams and bigrams of the
+dispute's reason and description. Disputes that share most features get signatures a few
+bits apart, so Hamming distance stands in for cosine distance without any network call.
+
+Signatures are bucketed by locality-sensitive hashing with bit sampling: each of several
+hash tables keys a dispute by a fixed random subset of its signature bits, so disputes a
+few bits apart are very likely to share a bucket in at least one table. A search only
+scores the disputes sharing a bucket with the query, newest first, so lookups stay around
+a millisecond at a million disputes and inserts are O(tables).
+"""
+import functools
+import hashlib
+import heapq
+import itertools
+import logging
+import random
+import sys
+import threading
+from array import array
+from app.config import Config
+from app.services.assessment_cache import amount_band, normalise_text
+from app.services.customer_profiles import describe_profile
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_BITS = 64
+_LANE_BITS = 16  # one counter per signature bit, packed into a single integer
+_FIELD_WEIGHT = 4  # a structured field counts as much as four description words
+_MAX_TEXT_FEATURES = 1024  # distinct description words and pairs counted, keeps weights below 2**15
+_SPREAD_BYTE = [sum(1 << (_LANE_BITS * bit) for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+def dispute_features(transaction, reason, description):
+    """
+    Weighted features of a dispute: {feature: weight}, free of identifiers.
+
+    Description words and pairs count once each however often they repeat, and only the
+    first _MAX_TEXT_FEATURES distinct ones count, so the total weight stays bounded.
+    """
+    features = {
+        f"merchant:{normalise_text(transaction['merchant'])}": _FIELD_WEIGHT,
+        f"category:{normalise_text(transaction['category'])}": _FIELD_WEIGHT,
+        f"location:{normalise_text(transaction['location'])}": _FIELD_WEIGHT,
+        f"type:{transaction['transaction_type']}": _FIELD_WEIGHT,
+        f"payment:{transaction['payment_method']}": _FIELD_WEIGHT,
+        f"amount:{amount_band(transaction['amount'])}": _FIELD_WEIGHT,
+        f"reason:{normalise_text(reason)}": _FIELD_WEIGHT,
+    }
+    profile = transaction.get('customer_profile')
+    for line in describe_profile(profile) if profile else []:
+        features[f"profile:{line}"] = _FIELD_WEIGHT
+    words = normalise_text(description).split()
+    text = dict.fromkeys(f"word:{word}" for word in words)
+    text.update(dict.fromkeys(f"pair:{first} {second}" for first, second in zip(words, words[1:])))
+    for feature in itertools.islice(text, _MAX_TEXT_FEATURES):
+        features[feature] = 1
+    return features
+
+@functools.lru_cache(maxsize=1 << 16)
+def _spread(feature):
+    """The feature's 64-bit hash with each bit moved into its own 16-bit lane."""
+    value = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+    return sum(_SPREAD_BYTE[value >> (8 * i) & 255] << (8 * _LANE_BITS * i) for i in range(8))
+
+def simhash(features):
+    """
+    64-bit SimHash of weighted features.
+
+    Bit i is set when features with bit i set in their hash carry more than half the total
+    weight. The per-bit sums are accumulated in one packed integer, so a feature costs one
+    multiply-add rather than 64, which needs the weights to stay below 2**15 in total.
+
+    Raises:
+        ValueError: if the total weight would overflow a lane
+    """
+    total = sum(features.values())
+    if total >= 1 << (_LANE_BITS - 1):
+        raise ValueError(f"Feature weights must total below {1 << (_LANE_BITS - 1)}, got {total}")
+    packed = 0
+    for feature, weight in features.items():
+        packed += _spread(feature) * weight
+    lanes = array('H', packed.to_bytes(SIGNATURE_BITS * _LANE_BITS // 8, 'little'))
+    if sys.byteorder == 'big':
+        lanes.byteswap()
+    signature = 0
+    for bit, count in enumerate(lanes):
+        if 2 * count > total:
+            signature |= 1 << bit
+    return signature
+
+def dispute_signature(transaction, reason, description):
+    """SimHash signature of a dispute, see dispute_features."""
+    return simhash(dispute_features(transaction, reason, description))
+
+def similarity(first, second):
+    """Share of matching bits between two signatures, from 0.0 to 1.0."""
+    return 1.0 - (first ^ second).bit_count() / SIGNATURE_BITS
+
+class SimilarDisputeIndex:
+    """
+    SimHash index mapping dispute IDs to signatures, with incremental insert and top-k search.
+
+    Rows are stored in flat arrays (8 bytes per signature, 4 bytes per bucket entry per
+    table) plus one list of dispute IDs, so a million disputes take a few hundred MB.
+    """
+
+    def __init__(self, tables=None, table_bits=None, max_candidates=None, top_k=None, min_similarity=None,
+                 reuse_similarity=None, statuses=None, enabled=None):
+        self.enabled = Config.SIMILAR_DISPUTES_ENABLED if enabled is None else enabled
+        self.tables = tables or Config.SIMILAR_DISPUTES_TABLES
+        self.table_bits = table_bits or Config.SIMILAR_DISPUTES_TABLE_BITS
+        if not 0 < self.table_bits <= SIGNATURE_BITS:
+            raise ValueError(f"Table bits must be between 1 and {SIGNATURE_BITS}, got {self.table_bits}")
+        self.max_candidates = max_candidates or Config.SIMILAR_DISPUTES_MAX_CANDIDATES
+        self.top_k = Config.SIMILAR_DISPUTES_TOP_K if top_k is None else top_k
+        self.min_similarity = Config.SIMILAR_DISPUTES_MIN_SIMILARITY if min_similarity is None else min_similarity
+        self.reuse_similarity = Config.SIMILAR_DISPUTES_REUSE_SIMILARITY if reuse_similarity is None else reuse_similarity
+        self.statuses = statuses or [s.strip() for s in Config.SIMILAR_DISPUTES_STATUSES.split(",") if s.strip()]
+        # Fixed seed: the same bits are sampled in every process and after every restart
+        rng = random.Random(0)
+        self._masks = [sum(1 << bit for bit in rng.sample(range(SIGNATURE_BITS), self.table_bits))
+                       for _ in range(self.tables)]
+        self._signatures = array('Q')
+        self._ids = []
+        self._buckets = [{} for _ in range(self.tables)]
+        self.counts = {"searches": 0, "with_context": 0, "reused": 0}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, dispute_id, signature):
+        """Index a dispute under its signature."""
+        with self._lock:
+            row = len(self._ids)
+            self._signatures.append(signature)
+            self._ids.append(dispute_id)
+            for buckets, mask in zip(self._buckets, self._masks):
+                bucket = buckets.get(signature & mask)
+                if bucket is None:
+                    buckets[signature & mask] = bucket = array('I')
+                bucket.append(row)
+
+    def search(self, signature, k=None, min_similarity=None):
+        """
+        The k most similar indexed disputes, best first.
+
+        Only disputes sharing a bucket with the signature are scored, at most
+        max_candidates / tables of the newest per table.
+
+        Returns:
+            list: (dispute_id, similarity) pairs with similarity >= min_similarity
+        """
+        k = self.top_k if k is None else k
+        min_similarity = self.min_similarity if min_similarity is None else min_similarity
+        max_distance = int((1.0 - min_similarity) * SIGNATURE_BITS)
+        per_table = max(1, self.max_candidates // self.tables)
+        signatures = self._signatures
+        with self._lock:
+            self.counts["searches"] += 1
+            distances = {}
+            for buckets, mask in zip(self._buckets, self._masks):
+                bucket = buckets.get(signature & mask)
+                if bucket is None:
+                    continue
+                for row in bucket[-per_table:]:
+                    if row not in distances:
+                        distances[row] = (signatures[row] ^ signature).bit_count()
+            best = heapq.nsmallest(k, ((d, -row) for row, d in distances.items() if d <= max_distance))
+            return [(self._ids[-row], 1.0 - d / SIGNATURE_BITS) for d, row in best]
+
+    def record(self, outcome):
+        """Count a search outcome: "with_context" or "reused"."""
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            buckets = sum(len(b) for b in self._buckets)
+            return {"indexed": len(self._ids), "buckets": buckets, **self.counts}
+
+def compact_case(dispute, ai_analysis, score):
+    """Compact summary of a past dispute's (scrubbed) assessment for the prompt's similar cases."""
+    summary = " ".join(str(ai_analysis.get("analysis", "")).split())
+    sentence = summary.split(". ")[0].rstrip(".")
+    return {
+        "similarity": round(score, 2),
+        "status": dispute["status"],
+        "fraud_likelihood": dispute["fraud_likelihood"],
+        "summary": sentence if len(sentence) <= 120 else sentence[:117].rsplit(" ", 1)[0] + "...",
+    }
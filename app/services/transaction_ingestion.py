@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import os
+import time
+from app.config import Config
+from app.services.sharding import ShardAssignment
+from app.utils.dates import parse_transaction_date
+from app.utils.transaction_loader import JSON_LINES_EXTENSIONS, parse_json_line
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ("transaction_id", "customer_id", "date", "merchant", "amount", "category",
+                   "transaction_type", "payment_method", "location")
+
+def validate_transaction(transaction):
+    """Reason a delta record cannot be merged, or None if it is a valid transaction."""
+    if not isinstance(transaction, dict):
+        return "not a JSON object"
+    missing = [field for field in REQUIRED_FIELDS if transaction.get(field) is None]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    if isinstance(transaction['amount'], bool) or not isinstance(transaction['amount'], (int, float)):
+        return "amount is not a number"
+    try:
+        parse_transaction_date(transaction['date'])
+    except (TypeError, ValueError):
+        return "invalid date"
+    return None
+
+class TransactionDeltaIngestor:
+    """
+    Tails an append-only JSON Lines delta and merges new transactions into the live service.
+
+    The delta is a single file or a directory whose .jsonl/.ndjson files are read in name
+    order. Each file is read from the byte offset where the previous poll stopped, and only
+    complete lines are consumed, so a writer may append at any time. A file that shrinks or
+    is replaced (new inode) is read again from the start.
+
+    Rows are merged through DisputeService.add_transactions, which swaps in a new delta
+    layer of the LayeredTransactionRepository; readers are never blocked. Once the delta
+    grows past compact_rows it is folded into the repository's compacted layer, off the
+    event loop and without touching the base.
+
+    In sharded mode every worker tails the same delta and keeps only its own customers' rows.
+    """
+
+    def __init__(self, dispute_service, path=None, poll_seconds=None, max_batch_rows=None, compact_rows=None,
+                 shard=None):
+        self.dispute_service = dispute_service
+        self.shard = shard or ShardAssignment()
+        self.path = Config.TRANSACTION_DELTA_PATH if path is None else path
+        self.poll_seconds = poll_seconds or Config.TRANSACTION_DELTA_POLL_SECONDS
+        self.max_batch_rows = max_batch_rows or Config.TRANSACTION_DELTA_MAX_BATCH_ROWS
+        self.compact_rows = compact_rows or Config.TRANSACTION_DELTA_COMPACT_ROWS
+        self.stats = {"rows_merged": 0, "rows_other_shards": 0, "invalid_rows": 0, "batches": 0, "compactions": 0,
+                      "last_merge_seconds": None, "last_merge_lag_seconds": None, "last_merge_at": None,
+                      "last_error": None}
+        self._offsets = {}  # file path -> (inode, byte offset of the first unread line)
+        self._task = None
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    @property
+    def running(self):
+        return self._task is not None
+
+    async def start(self):
+        """Start polling the delta on the running event loop."""
+        if self._task is not None or not self.enabled:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Watching {self.path} for new transactions every {self.poll_seconds}s")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def poll(self):
+        """Merge up to max_batch_rows new transactions from the delta; returns the number merged."""
+        started = time.perf_counter()
+        transactions, newest_write = self._read_new_rows()
+        if self.shard.sharded:
+            read = len(transactions)
+            transactions = list(self.shard.filter(transactions))
+            self.stats["rows_other_shards"] += read - len(transactions)
+        if not transactions:
+            return 0
+
+        self.dispute_service.add_transactions(transactions)
+        self.stats["rows_merged"] += len(transactions)
+        self.stats["batches"] += 1
+        self.stats["last_merge_seconds"] = round(time.perf_counter() - started, 4)
+        # Age of the newest merged bytes when they became visible to readers
+        self.stats["last_merge_lag_seconds"] = round(max(0.0, time.time() - newest_write), 3)
+        self.stats["last_merge_at"] = time.time()
+
+        repository = self.dispute_service.transactions
+        if len(getattr(repository, "delta", ())) >= self.compact_rows:
+            repository.compact()
+            self.stats["compactions"] += 1
+        return len(transactions)
+
+    def status(self):
+        """Ingestion counters, lag and backlog for the admin endpoint."""
+        repository = self.dispute_service.transactions
+        return {
+            "path": self.path or None,
+            "running": self.running,
+            **self.stats,
+            "pending_bytes": self._pending_bytes(),
+            "delta_rows": len(getattr(repository, "delta", ())),
+            "total_rows": len(repository),
+            "files": {path: offset for path, (_, offset) in self._offsets.items()}
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                merged = await asyncio.to_thread(self.poll)
+                self.stats["last_error"] = None
+            except Exception as e:
+                merged = 0
+                self.stats["last_error"] = str(e)
+                logger.error(f"Error ingesting transactions from {self.path}: {str(e)}")
+            if merged < self.max_batch_rows:  # a full batch means more is waiting; keep going
+                await asyncio.sleep(self.poll_seconds)
+
+    def _files(self):
+        if os.path.isdir(self.path):
+            return [os.path.join(self.path, name) for name in sorted(os.listdir(self.path))
+                    if name.endswith(JSON_LINES_EXTENSIONS)]
+        return [self.path] if os.path.exists(self.path) else []
+
+    def _read_new_rows(self):
+        transactions = []
+        newest_write = 0.0
+        for path in self._files():
+            budget = self.max_batch_rows - len(transactions)
+            if budget <= 0:
+                break
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            inode, offset = self._offsets.get(path, (stat.st_ino, 0))
+            if inode != stat.st_ino or stat.st_size < offset:
+                logger.info(f"{path} was replaced or truncated; reading it from the start")
+                offset = 0
+            if stat.st_size == offset:
+                self._offsets[path] = (stat.st_ino, offset)
+                continue
+
+            rows, offset = self._read_lines(path, offset, budget)
+            self._offsets[path] = (stat.st_ino, offset)
+            if rows:
+                transactions.extend(rows)
+                newest_write = max(newest_write, stat.st_mtime)
+        return transactions, newest_write
+
+    def _read_lines(self, path, offset, budget):
+        rows = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while len(rows) < budget:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break  # end of file, or a line the writer has not finished yet
+                line_start, offset = offset, offset + len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    transaction = parse_json_line(line)
+                except ValueError as e:  # JSONDecodeError or a bad UTF-8 sequence
+                    transaction, error = None, f"invalid JSON ({e})"
+                else:
+                    error = validate_transaction(transaction)
+                if error:
+                    self.stats["invalid_rows"] += 1
+                    logger.warning(f"Skipping transaction at byte {line_start} of {path}: {error}")
+                    continue
+                rows.append(transaction)
+        return rows, offset
+
+    def _pending_bytes(self):
+        pending = 0
+        for path in self._files():
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            offset = self._offsets.get(path, (None, 0))[1]
+            pending += size - offset if size >= offset else size
+        return pending
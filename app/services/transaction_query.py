@@ -0,0 +1,51 @@
+import base64
+import json
+from app.utils.dates import parse_transaction_date, TRANSACTION_DATE_FORMAT
+
+class TransactionQuery:
+    """
+    Server-side filters for listing a customer's transactions; None leaves a filter off.
+
+    Dates may be given as "YYYY-MM-DD" or "YYYY-MM-DD HH:MM:SS"; a bare end_date includes
+    the whole day. Raises ValueError for unparseable dates.
+    """
+
+    def __init__(self, start_date=None, end_date=None, min_amount=None, max_amount=None,
+                 merchant=None, category=None, is_fraudulent=None):
+        self.start_date = _normalise_date(start_date, end_of_day=False)
+        self.end_date = _normalise_date(end_date, end_of_day=True)
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.merchant = merchant
+        self.category = category
+        self.is_fraudulent = is_fraudulent
+
+    def matches(self, transaction):
+        """Whether a transaction passes the non-date filters (dates are handled by the index seek)."""
+        return ((self.min_amount is None or transaction['amount'] >= self.min_amount)
+                and (self.max_amount is None or transaction['amount'] <= self.max_amount)
+                and (self.merchant is None or transaction['merchant'] == self.merchant)
+                and (self.category is None or transaction['category'] == self.category)
+                and (self.is_fraudulent is None or bool(transaction.get('is_fraudulent')) == self.is_fraudulent))
+
+def _normalise_date(value, end_of_day):
+    if value is None:
+        return None
+    parsed = parse_transaction_date(value)
+    if end_of_day and len(value) == 10:
+        parsed = parsed.replace(hour=23, minute=59, second=59)
+    return parsed.strftime(TRANSACTION_DATE_FORMAT)
+
+def encode_cursor(transaction):
+    """Opaque cursor that resumes a listing after this transaction."""
+    key = json.dumps([transaction['date'], transaction['transaction_id']], separators=(",", ":"))
+    return base64.urlsafe_b64encode(key.encode('utf-8')).decode('ascii').rstrip("=")
+
+def decode_cursor(cursor):
+    """(date, transaction_id) encoded in a cursor; raises ValueError if it is malformed."""
+    try:
+        date, transaction_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        parse_transaction_date(date)
+        return date, str(transaction_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
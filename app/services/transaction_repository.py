@@ -0,0 +1,313 @@
+import bisect
+import heapq
+import logging
+import threading
+from app.config import Config
+from app.services.columnar_store import ColumnarTransactionRepository, SNAPSHOT_EXTENSION
+from app.utils.transaction_loader import load_transactions
+from app.utils.dates import to_timestamp
+from app.services.transaction_query import TransactionQuery
+
+logger = logging.getLogger(__name__)
+
+def transaction_sort_key(transaction):
+    """Key used to order a customer's transactions (date, then ID as a tie-breaker)."""
+    return (transaction['date'], transaction['transaction_id'])
+
+class TransactionRepository:
+    """
+    In-memory transaction store.
+
+    Keeps a hash index by transaction_id for O(1) point lookups and, per customer,
+    a list of transactions kept in date order so a customer's history is read in O(k).
+    """
+
+    def __init__(self, transactions=()):
+        self._by_id = {}
+        self._by_customer = {}  # customer_id -> transactions ordered by transaction_sort_key
+        self._customer_keys = {}  # customer_id -> sort keys, parallel to _by_customer
+        self.add_many(transactions)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, transaction_id):
+        return transaction_id in self._by_id
+
+    def add(self, transaction):
+        """Add (or replace) a single transaction."""
+        self._discard(transaction['transaction_id'])
+        self._by_id[transaction['transaction_id']] = transaction
+
+        customer_id = transaction['customer_id']
+        keys = self._customer_keys.setdefault(customer_id, [])
+        rows = self._by_customer.setdefault(customer_id, [])
+        key = transaction_sort_key(transaction)
+        position = bisect.bisect_right(keys, key)
+        keys.insert(position, key)
+        rows.insert(position, transaction)
+
+    def add_many(self, transactions):
+        """Add transactions in bulk, re-sorting each touched customer once at the end."""
+        touched = set()
+        count = 0
+        for transaction in transactions:
+            self._discard(transaction['transaction_id'])
+            self._by_id[transaction['transaction_id']] = transaction
+            customer_id = transaction['customer_id']
+            self._by_customer.setdefault(customer_id, []).append(transaction)
+            touched.add(customer_id)
+            count += 1
+
+        for customer_id in touched:
+            rows = self._by_customer[customer_id]
+            rows.sort(key=transaction_sort_key)
+            self._customer_keys[customer_id] = [transaction_sort_key(t) for t in rows]
+        return count
+
+    def get(self, transaction_id):
+        """Get a transaction by ID, or None if it is unknown."""
+        return self._by_id.get(transaction_id)
+
+    def get_customer_transactions(self, customer_id):
+        """Get all transactions for a customer, oldest first."""
+        return list(self._by_customer.get(customer_id, ()))
+
+    def query_customer_transactions(self, customer_id, query=None, after=None):
+        """
+        Yield a customer's transactions in (date, ID) order that pass query.
+
+        The cursor position (after, a (date, transaction_id) pair) and the date range are
+        found by binary search on the customer's sort keys before any row is filtered.
+        """
+        query = query or TransactionQuery()
+        keys = self._customer_keys.get(customer_id, [])
+        rows = self._by_customer.get(customer_id, [])
+        start, end = 0, len(keys)
+        if after is not None:
+            start = bisect.bisect_right(keys, tuple(after))
+        if query.start_date is not None:
+            start = max(start, bisect.bisect_left(keys, (query.start_date, "")))
+        if query.end_date is not None:
+            end = bisect.bisect_right(keys, (query.end_date, "\uffff"))
+        for position in range(start, end):
+            if query.matches(rows[position]):
+                yield rows[position]
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def copy(self, customer_ids=()):
+        """
+        A shallow copy that shares per-customer lists, except those of customer_ids.
+
+        Transactions may then be added to the copy for those customers without changing
+        this repository, in O(n) dict copies rather than a full rebuild.
+        """
+        clone = TransactionRepository()
+        clone._by_id = dict(self._by_id)
+        clone._by_customer = dict(self._by_customer)
+        clone._customer_keys = dict(self._customer_keys)
+        for customer_id in customer_ids:
+            if customer_id in clone._by_customer:
+                clone._by_customer[customer_id] = list(clone._by_customer[customer_id])
+                clone._customer_keys[customer_id] = list(clone._customer_keys[customer_id])
+        return clone
+
+    def customer_columns(self):
+        """Yield (customer_id, amounts, merchants, locations, timestamps) for each customer."""
+        for customer_id, rows in self._by_customer.items():
+            if not rows:
+                continue
+            yield (
+                customer_id,
+                [t['amount'] for t in rows],
+                [t['merchant'] for t in rows],
+                [t['location'] for t in rows],
+                [to_timestamp(t['date']) for t in rows]
+            )
+
+    def _discard(self, transaction_id):
+        existing = self._by_id.pop(transaction_id, None)
+        if existing is None:
+            return
+        customer_id = existing['customer_id']
+        rows = self._by_customer[customer_id]
+        # During add_many the keys only cover the already-sorted prefix of rows
+        keys = self._customer_keys.get(customer_id, [])
+        for position, row in enumerate(rows):
+            if row is existing:
+                del rows[position]
+                if position < len(keys):
+                    del keys[position]
+                break
+
+class LayeredTransactionRepository:
+    """
+    A base repository (possibly a read-only snapshot) with newer transactions layered on top,
+    behind the same interface as TransactionRepository.
+
+    New transactions go into a small delta. Writes are copy-on-write: add_many builds a new
+    delta and swaps it in with a single assignment, so readers take no locks and see either
+    the old or the new layers, never a half-merged state. compact() folds the delta into a
+    writable columnar layer between the two. Upper layers replace rows with the same ID in
+    lower ones, and the base itself is never rewritten.
+    """
+
+    def __init__(self, base, delta=None):
+        self._layers = (base, ColumnarTransactionRepository(),
+                        delta if delta is not None else TransactionRepository())
+        self._replaced = 0  # compacted rows that replace a base row
+        self._write_lock = threading.Lock()
+        self.read_only = False
+
+    @property
+    def base(self):
+        return self._layers[0]
+
+    @property
+    def compacted(self):
+        return self._layers[1]
+
+    @property
+    def delta(self):
+        return self._layers[2]
+
+    def __len__(self):
+        base, compacted, delta = self._layers
+        added = sum(1 for t in delta if t['transaction_id'] not in compacted and t['transaction_id'] not in base)
+        return len(base) + len(compacted) - self._replaced + added
+
+    def __contains__(self, transaction_id):
+        return any(transaction_id in layer for layer in self._layers)
+
+    def add(self, transaction):
+        """Add (or replace) a single transaction."""
+        self.add_many([transaction])
+
+    def add_many(self, transactions):
+        """Merge transactions into a copy of the delta and swap it in; returns the count added."""
+        transactions = list(transactions)
+        with self._write_lock:
+            base, compacted, delta = self._layers
+            touched = {t['customer_id'] for t in transactions}
+            for transaction in transactions:
+                replaced = delta.get(transaction['transaction_id'])
+                if replaced is not None:
+                    touched.add(replaced['customer_id'])
+            merged = delta.copy(touched)
+            merged.add_many(transactions)
+            self._layers = (base, compacted, merged)
+        return len(transactions)
+
+    def compact(self):
+        """
+        Fold the delta into the compacted layer, then swap in an empty delta.
+
+        Only the delta's rows are appended and only the histories of the customers they touch
+        are rewritten, so compaction is O(delta) and a memory-mapped base stays shared. Until
+        the swap readers still see each row through the delta, which shadows its compacted copy.
+        """
+        with self._write_lock:
+            base, compacted, delta = self._layers
+            if not len(delta):
+                return
+            replaced = sum(1 for t in delta if t['transaction_id'] not in compacted and t['transaction_id'] in base)
+            compacted.add_many(delta)
+            self._replaced += replaced
+            self._layers = (base, compacted, TransactionRepository())
+        logger.info(f"Compacted {len(delta)} delta transactions into a layer of {len(compacted)}")
+
+    def get(self, transaction_id):
+        """Get a transaction by ID, or None if it is unknown."""
+        for layer in reversed(self._layers):
+            transaction = layer.get(transaction_id)
+            if transaction is not None:
+                return transaction
+        return None
+
+    def get_customer_transactions(self, customer_id):
+        """Get all transactions for a customer, oldest first."""
+        base, compacted, delta = self._layers
+        if not len(compacted) and not len(delta):
+            return base.get_customer_transactions(customer_id)
+        return list(self.query_customer_transactions(customer_id))
+
+    def query_customer_transactions(self, customer_id, query=None, after=None):
+        """Yield a customer's transactions in (date, ID) order that pass query, merging the layers."""
+        layers = self._layers
+        streams = []
+        for position, layer in enumerate(layers):
+            above = [upper for upper in layers[position + 1:] if len(upper)]
+            if position and not len(layer):
+                continue
+            streams.append(_unshadowed(layer.query_customer_transactions(customer_id, query, after), above))
+        if len(streams) == 1:
+            yield from streams[0]
+            return
+        yield from heapq.merge(*streams, key=transaction_sort_key)
+
+    def customer_columns(self):
+        """Yield (customer_id, amounts, merchants, locations, timestamps) for each customer."""
+        base, compacted, delta = self._layers
+        if not len(compacted) and not len(delta):
+            yield from base.customer_columns()
+            return
+        touched = set()
+        for position, layer in ((1, compacted), (2, delta)):
+            for t in layer:
+                touched.add(t['customer_id'])
+                for lower in self._layers[:position]:
+                    shadowed = lower.get(t['transaction_id'])
+                    if shadowed is not None:
+                        touched.add(shadowed['customer_id'])
+        for columns in base.customer_columns():
+            if columns[0] not in touched:
+                yield columns
+        for customer_id in touched:
+            rows = self.get_customer_transactions(customer_id)
+            if rows:
+                yield (customer_id, [t['amount'] for t in rows], [t['merchant'] for t in rows],
+                       [t['location'] for t in rows], [to_timestamp(t['date']) for t in rows])
+
+    def __iter__(self):
+        layers = self._layers
+        for position, layer in enumerate(layers):
+            yield from _unshadowed(layer, [upper for upper in layers[position + 1:] if len(upper)])
+
+def _unshadowed(transactions, layers):
+    """Transactions whose IDs are in none of layers."""
+    if not layers:
+        return transactions
+    return (t for t in transactions if not any(t['transaction_id'] in layer for layer in layers))
+
+def create_transaction_repository(store=None):
+    """Create an empty repository for the configured store ("columnar" or "memory")."""
+    store = store or Config.TRANSACTION_STORE
+    if store == "columnar":
+        return ColumnarTransactionRepository()
+    if store == "memory":
+        return TransactionRepository()
+    raise ValueError(f"Unknown transaction store: {store}")
+
+def load_transaction_repository(path, shard=None):
+    """
+    Open a snapshot (memory-mapped, read-only) or stream a JSON/JSON Lines file into a new repository.
+
+    With a sharded ShardAssignment only the customers it owns are loaded. Their rows are
+    copied out of a snapshot, which is then unmapped, so the shard's profiles and memory
+    cover just its own customers.
+    """
+    sharded = shard is not None and shard.sharded
+    if path.endswith(SNAPSHOT_EXTENSION):
+        repository = ColumnarTransactionRepository.open_snapshot(path)
+        logger.info(f"Opened snapshot {path} with {len(repository)} transactions")
+        if not sharded:
+            return repository
+        snapshot, repository = repository, create_transaction_repository()
+        repository.add_many(shard.filter(snapshot))
+        logger.info(f"Kept {len(repository)} transactions for shard {shard.shard_index} of {shard.shard_count}")
+        return repository
+    repository = create_transaction_repository()
+    load_transactions(path, repository, select=shard.filter if sharded else None)
+    return repository
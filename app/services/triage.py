@@ -0,0 +1,158 @@
+import logging
+import threading
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Keywords that mark a merchant, location or category as high risk; these match the
+# patterns the data generator uses for fraudulent transactions
+HIGH_RISK_MERCHANT_KEYWORDS = ("unknown", "unrecognized", "crypto", "foreign exchange", "overseas",
+                               "international transfer", "gaming", "digital wallet")
+HIGH_RISK_LOCATION_KEYWORDS = ("unknown", "overseas", "foreign", "unusual", "different state")
+HIGH_RISK_CATEGORIES = ("unknown", "international", "digital")
+
+HIGH_RISK_ANALYSIS = {
+    "fraud_likelihood": "HIGH",
+    "recommended_actions": [
+        "Block the card and issue a replacement",
+        "Provisional credit while the bank investigates",
+        "Review other recent transactions for unauthorised activity"
+    ],
+    "estimated_resolution_time": "5 business days",
+    "regulatory_considerations": "Under the ePayments Code the customer is generally not liable for unauthorised transactions they did not contribute to"
+}
+
+LOW_RISK_ANALYSIS = {
+    "fraud_likelihood": "LOW",
+    "recommended_actions": [
+        "Check the transaction with the merchant",
+        "Our team will contact you if more information is needed"
+    ],
+    "estimated_resolution_time": "21 business days",
+    "regulatory_considerations": "Simple disputes must be investigated and answered within 21 days"
+}
+
+# Ambiguous disputes while the LLM is unavailable: referred to the team, on the MEDIUM timeline
+FALLBACK_ANALYSIS = {
+    "fraud_likelihood": "MEDIUM",
+    "recommended_actions": [
+        "Our team will review the transaction and contact you if more information is needed",
+        "Check the transaction with the merchant"
+    ],
+    "estimated_resolution_time": "10 business days",
+    "regulatory_considerations": "Disputes must be investigated and answered within 21 days, or 45 days for complex cases"
+}
+
+def _matches(value, keywords):
+    value = (value or "").lower()
+    return any(keyword in value for keyword in keywords)
+
+class DisputeTriage:
+    """
+    Deterministic pre-classifier that settles clear-cut disputes without calling the LLM.
+
+    A dispute is HIGH when at least TRIAGE_HIGH_MIN_SIGNALS risk signals fire (high-risk
+    merchant, location or category, or an amount far above the customer's usual spend).
+    It is LOW when the transaction is a refund, or when the customer has paid this merchant
+    at this location several times before for similar amounts and no risk signal fires.
+    Everything else is ambiguous and goes to the LLM.
+    """
+
+    def __init__(self, enabled=None, high_min_signals=None, amount_zscore=None, familiar_merchant_min=None):
+        self.enabled = Config.TRIAGE_ENABLED if enabled is None else enabled
+        self.high_min_signals = high_min_signals or Config.TRIAGE_HIGH_MIN_SIGNALS
+        self.amount_zscore = amount_zscore or Config.TRIAGE_AMOUNT_ZSCORE
+        self.familiar_merchant_min = familiar_merchant_min or Config.TRIAGE_FAMILIAR_MERCHANT_MIN
+        self.counts = {"HIGH": 0, "LOW": 0, "escalated": 0}
+        self._lock = threading.Lock()
+
+    def classify(self, transaction, features):
+        """
+        Triage a dispute from the transaction and its customer profile features.
+
+        Args:
+            transaction: The disputed transaction
+            features: CustomerProfileIndex.features for the transaction
+
+        Returns:
+            dict: A canned analysis in the LLM's format, or None if the dispute needs the LLM
+        """
+        ai_analysis = self._classify(transaction, features) if self.enabled else None
+        with self._lock:
+            self.counts[ai_analysis["fraud_likelihood"] if ai_analysis else "escalated"] += 1
+        return ai_analysis
+
+    def fallback_analysis(self, transaction):
+        """
+        Deterministic assessment for any dispute, used when the LLM is unavailable.
+
+        Clear-cut disputes get the same answer triage would give; the rest are MEDIUM and
+        referred to the team, listing whatever risk signal made them ambiguous. Works with or
+        without the customer_profile features added by DisputeService._triage.
+        """
+        features = transaction.get('customer_profile') or {"amount_zscore": None, "merchant_location_visits": 0}
+        ai_analysis = self._classify(transaction, features)
+        if ai_analysis is None:
+            signals = self._signals(transaction, features)
+            ai_analysis = self._analysis(
+                FALLBACK_ANALYSIS,
+                "Automated assessment (AI analysis unavailable): "
+                + ("; ".join(signals) if signals else "no clear risk or familiarity signals") + ".",
+                signals
+            )
+        return dict(ai_analysis, fallback=True)
+
+    def _signals(self, transaction, features):
+        zscore = features["amount_zscore"]
+        signals = []
+        if _matches(transaction['merchant'], HIGH_RISK_MERCHANT_KEYWORDS):
+            signals.append(f"high-risk merchant ({transaction['merchant']})")
+        if _matches(transaction['location'], HIGH_RISK_LOCATION_KEYWORDS):
+            signals.append(f"high-risk location ({transaction['location']})")
+        if _matches(transaction['category'], HIGH_RISK_CATEGORIES):
+            signals.append(f"high-risk category ({transaction['category']})")
+        if zscore is not None and zscore >= self.amount_zscore:
+            signals.append(f"amount {zscore:.1f} standard deviations above the customer's usual spend")
+        return signals
+
+    def _classify(self, transaction, features):
+        zscore = features["amount_zscore"]
+        signals = self._signals(transaction, features)
+
+        if len(signals) >= self.high_min_signals:
+            return self._analysis(HIGH_RISK_ANALYSIS, "Automated triage: " + "; ".join(signals) + ".", signals)
+        if signals:
+            return None
+
+        if transaction['transaction_type'] == "REFUND":
+            return self._analysis(LOW_RISK_ANALYSIS,
+                                  "Automated triage: the transaction is a refund credited to the customer.",
+                                  ["refund"])
+        familiar = features["merchant_location_visits"]
+        if familiar >= self.familiar_merchant_min and zscore is not None and zscore <= 1.0:
+            return self._analysis(
+                LOW_RISK_ANALYSIS,
+                f"Automated triage: the customer has {familiar} earlier transactions with this merchant "
+                f"at this location and the amount is in line with their usual spend.",
+                ["familiar merchant"]
+            )
+        return None
+
+    def _analysis(self, template, analysis, signals):
+        return dict(template, analysis=analysis, recommended_actions=list(template["recommended_actions"]),
+                    triage_signals=signals)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        short_circuited = counts["HIGH"] + counts["LOW"]
+        return {
+            "enabled": self.enabled,
+            "disputes": total,
+            "short_circuited": short_circuited,
+            "short_circuited_high": counts["HIGH"],
+            "short_circuited_low": counts["LOW"],
+            "escalated_to_llm": counts["escalated"],
+            "short_circuit_rate": short_circuited / total if total else 0.0
+        }
@@ -0,0 +1,111 @@
+"""
+Thin HTTP router in front of customer-sharded API workers.
+
+Each request is forwarded, unchanged, to the worker that owns its customer over that
+worker's Unix domain socket. The customer comes from the path
+(/api/transactions/{customer_id}..., /api/disputes/{customer_id}...), else the customer_id
+query parameter (POST /api/disputes), else the X-Customer-Id header (POST
+/api/disputes/batch). Requests naming no customer (/, /docs, /metrics, /api/admin/...) go
+to shard 0, or to the shard named in an X-Shard header. Responses carry X-Shard so the
+serving worker is visible.
+"""
+import contextlib
+import logging
+import re
+from urllib.parse import unquote
+import httpx
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from app.config import Config
+from app.services.sharding import shard_of
+
+logger = logging.getLogger(__name__)
+
+CUSTOMER_PATH = re.compile(r"^/api/(?:transactions|disputes)/([^/]+)")
+BATCH_PATH = "/api/disputes/batch"
+METHODS = ["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+# Connection-level headers are not forwarded in either direction; httpx and the ASGI
+# server frame the body themselves (content-length is passed back on responses)
+HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailers",
+                      "transfer-encoding", "upgrade", "host", "content-length"}
+
+class ShardRouter:
+    """Forwards requests to shard workers listening on socket_paths[shard_index]."""
+
+    def __init__(self, socket_paths, timeout=None):
+        self.socket_paths = list(socket_paths)
+        timeout = Config.SHARD_PROXY_TIMEOUT_SECONDS if timeout is None else timeout
+        self.clients = [
+            httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(uds=path), base_url=f"http://shard-{index}",
+                              timeout=timeout)
+            for index, path in enumerate(self.socket_paths)
+        ]
+        self.app = Starlette(routes=[Route("/{path:path}", self.proxy, methods=METHODS)], lifespan=self._lifespan)
+
+    @contextlib.asynccontextmanager
+    async def _lifespan(self, app):
+        yield
+        await self.close()
+
+    @property
+    def shard_count(self):
+        return len(self.socket_paths)
+
+    def customer_of(self, request):
+        """The customer a request is about, or None."""
+        path = request.url.path
+        if not (request.method == "POST" and path == BATCH_PATH):
+            match = CUSTOMER_PATH.match(path)
+            if match:
+                return unquote(match.group(1))
+        return request.query_params.get("customer_id") or request.headers.get("x-customer-id")
+
+    def shard_for(self, request):
+        """The shard to forward to; raises ValueError for a bad X-Shard header."""
+        customer_id = self.customer_of(request)
+        if customer_id:
+            return shard_of(customer_id, self.shard_count)
+        requested = request.headers.get("x-shard")
+        if requested is None:
+            return 0
+        shard = int(requested)
+        if not 0 <= shard < self.shard_count:
+            raise ValueError(f"No shard {shard}")
+        return shard
+
+    async def proxy(self, request):
+        try:
+            shard = self.shard_for(request)
+        except ValueError:
+            return JSONResponse({"detail": f"X-Shard must be between 0 and {self.shard_count - 1}"}, status_code=400)
+
+        headers = [(name, value) for name, value in request.headers.items() if name not in HOP_BY_HOP_HEADERS]
+        upstream = self.clients[shard].build_request(
+            request.method, httpx.URL(path=request.url.path, query=request.url.query.encode("utf-8")),
+            headers=headers, content=await request.body()
+        )
+        try:
+            response = await self.clients[shard].send(upstream, stream=True)
+        except httpx.TimeoutException:
+            logger.warning(f"Shard {shard} timed out on {request.method} {request.url.path}")
+            return JSONResponse({"detail": f"Shard {shard} timed out"}, status_code=504, headers={"X-Shard": str(shard)})
+        except httpx.TransportError as e:
+            logger.error(f"Shard {shard} unreachable: {str(e)}")
+            return JSONResponse({"detail": f"Shard {shard} unavailable"}, status_code=503, headers={"X-Shard": str(shard)})
+
+        forwarded = StreamingResponse(response.aiter_raw(), status_code=response.status_code,
+                                      background=BackgroundTask(response.aclose))
+        forwarded.raw_headers = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in response.headers.multi_items() if name.lower() not in HOP_BY_HOP_HEADERS
+        ]
+        if "content-length" in response.headers:  # aiter_raw passes the body through byte for byte
+            forwarded.raw_headers.append((b"content-length", response.headers["content-length"].encode("latin-1")))
+        forwarded.raw_headers.append((b"x-shard", str(shard).encode("latin-1")))
+        return forwarded
+
+    async def close(self):
+        for client in self.clients:
+            await client.aclose()
@@ -0,0 +1,102 @@
+"""
+Run the API as customer shards behind a router.
+
+    python -m app.sharded --shards 4 --host 0.0.0.0 --port 8000
+
+Starts --shards uvicorn worker processes, each serving app.main:app on a Unix domain socket
+with SHARD_COUNT/SHARD_INDEX set so it loads only its own customers' transactions and keeps
+only their disputes. A ShardRouter on --host/--port forwards each request to the owning
+worker. Memory per worker is then roughly dataset / shards instead of the whole dataset.
+
+DISPUTE_STORE=sqlite works as in a multi-worker deployment: the shards share the database
+file, each writing only its own customers' disputes.
+"""
+import argparse
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+import uvicorn
+from app.config import Config
+from app.shard_router import ShardRouter
+from app.utils.data_generator import generate_data
+
+logger = logging.getLogger(__name__)
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def socket_path(directory, shard_index):
+    return os.path.join(directory, f"shard-{shard_index}.sock")
+
+def start_shards(shard_count, directory, log_level="warning", env=None):
+    """Start one uvicorn process per shard; returns the processes, in shard order."""
+    processes = []
+    for shard_index in range(shard_count):
+        shard_env = dict(env if env is not None else os.environ, SHARD_COUNT=str(shard_count),
+                         SHARD_INDEX=str(shard_index))
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--uds", socket_path(directory, shard_index),
+                   "--log-level", log_level, "--no-access-log"]
+        processes.append(subprocess.Popen(command, cwd=REPOSITORY_ROOT, env=shard_env))
+    return processes
+
+def wait_until_ready(directory, processes, timeout=600):
+    """Block until every shard answers GET /ready; raises RuntimeError if one exits or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    for shard_index, process in enumerate(processes):
+        transport = httpx.HTTPTransport(uds=socket_path(directory, shard_index))
+        with httpx.Client(transport=transport, base_url=f"http://shard-{shard_index}") as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"Shard {shard_index} exited during startup")
+                try:
+                    if client.get("/ready").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Shard {shard_index} did not start within {timeout}s")
+                time.sleep(0.1)
+
+def stop_shards(processes, timeout=30):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API as customer shards behind a router")
+    parser.add_argument("--shards", type=int, default=2)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--log-level", default=Config.LOG_LEVEL.lower())
+    args = parser.parse_args()
+    logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL),
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    # Generate the sample data once here rather than racing in every shard's startup
+    if not os.path.exists(os.path.join(REPOSITORY_ROOT, Config.DATA_FILE)):
+        logger.info("Generating synthetic transaction data")
+        generate_data()
+
+    directory = Config.SHARD_SOCKET_DIR or tempfile.mkdtemp(prefix="disputes-shards-")
+    os.makedirs(directory, exist_ok=True)
+    processes = start_shards(args.shards, directory, args.log_level)
+    try:
+        wait_until_ready(directory, processes)
+        logger.info(f"{args.shards} shards ready; routing on {args.host}:{args.port}")
+        router = ShardRouter([socket_path(directory, i) for i in range(args.shards)])
+        uvicorn.run(router.app, host=args.host, port=args.port, log_level=args.log_level)
+    finally:
+        stop_shards(processes)
+        if not Config.SHARD_SOCKET_DIR:
+            shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,12 @@
+import argparse
+import itertools
 import json
+import math
+import multiprocessing
 import random
+import shutil
+import tempfile
+import time
 import uuid
 from datetime import datetime, timedelta
 import os
@@ -28,56 +35,63 @@ TRANSACTION_TYPES = ["PURCHASE", "PAYMENT", "TRANSFER", "WITHDRAWAL", "REFUND"]
 # Payment methods
 PAYMENT_METHODS = ["CARD", "DIRECT_DEBIT", "BPAY", "OSKO", "PAYID", "CASH"]
 
-def generate_card_number():
+# Fraudulent transactions use unfamiliar merchants and locations
+FRAUD_MERCHANTS = [
+    "Unknown Online Store", "Foreign Exchange Service", "Crypto Trading Platform", "Unrecognized Merchant",
+    "International Transfer", "Gaming Platform", "Digital Wallet Top-up", "Overseas Subscription"
+]
+FRAUD_CATEGORIES = ["Unknown", "International", "Digital"]
+FRAUD_LOCATIONS = ["Unknown Location", "Overseas", "Foreign IP", "Different State", "Unusual Location"]
+
+LOCATIONS = [
+    "Sydney, NSW", "Melbourne, VIC", "Brisbane, QLD", "Perth, WA",
+    "Adelaide, SA", "Hobart, TAS", "Darwin, NT", "Canberra, ACT"
+]
+
+def generate_card_number(rng=random):
     """Generate a fake card number that follows Australian format."""
-    prefix = random.choice(["4", "5", "6"])  # Visa, Mastercard, or other
+    prefix = rng.choice(["4", "5", "6"])  # Visa, Mastercard, or other
     if prefix == "4":  # Visa
-        return f"4{random.randint(1000, 9999):04d} {random.randint(1000, 9999):04d} {random.randint(1000, 9999):04d} {random.randint(1000, 9999):04d}"
+        return f"4{rng.randint(1000, 9999):04d} {rng.randint(1000, 9999):04d} {rng.randint(1000, 9999):04d} {rng.randint(1000, 9999):04d}"
     elif prefix == "5":  # Mastercard
-        return f"5{random.randint(100, 999):03d} {random.randint(1000, 9999):04d} {random.randint(1000, 9999):04d} {random.randint(1000, 9999):04d}"
+        return f"5{rng.randint(100, 999):03d} {rng.randint(1000, 9999):04d} {rng.randint(1000, 9999):04d} {rng.randint(1000, 9999):04d}"
     else:  # Other
-        return f"6{random.randint(100, 999):03d} {random.randint(1000, 9999):04d} {random.randint(1000, 9999):04d} {random.randint(1000, 9999):04d}"
+        return f"6{rng.randint(100, 999):03d} {rng.randint(1000, 9999):04d} {rng.randint(1000, 9999):04d} {rng.randint(1000, 9999):04d}"
 
-def generate_bsb_account():
+def generate_bsb_account(rng=random):
     """Generate a fake BSB and account number."""
-    bsb = f"{random.randint(100, 999):03d}-{random.randint(100, 999):03d}"
-    account = f"{random.randint(10000000, 99999999):08d}"
+    bsb = f"{rng.randint(100, 999):03d}-{rng.randint(100, 999):03d}"
+    account = f"{rng.randint(10000000, 99999999):08d}"
     return f"BSB: {bsb}, Account: {account}"
 
-def generate_transaction(customer_id, is_fraudulent=False):
-    """Generate a single transaction record."""
-    transaction_date = datetime.now() - timedelta(days=random.randint(1, 30))
+def generate_transaction(customer_id, is_fraudulent=False, rng=random, transaction_date=None, merchant=None):
+    """
+    Generate a single transaction record.
+
+    Draws from rng (a random.Random for reproducible output). transaction_date defaults to
+    1-30 days ago; merchant overrides the merchant of a genuine transaction.
+    """
+    if transaction_date is None:
+        transaction_date = datetime.now() - timedelta(days=rng.randint(1, 30))
     
     # For fraudulent transactions, use different patterns
     if is_fraudulent:
-        merchant = random.choice([
-            "Unknown Online Store", "Foreign Exchange Service",
-            "Crypto Trading Platform", "Unrecognized Merchant",
-            "International Transfer", "Gaming Platform",
-            "Digital Wallet Top-up", "Overseas Subscription"
-        ])
-        amount = random.uniform(100, 2000)
-        category = random.choice(["Unknown", "International", "Digital"])
-        transaction_type = random.choice(["PURCHASE", "TRANSFER"])
-        payment_method = random.choice(["CARD", "DIRECT_DEBIT"])
-        location = random.choice([
-            "Unknown Location", "Overseas", "Foreign IP",
-            "Different State", "Unusual Location"
-        ])
+        merchant = rng.choice(FRAUD_MERCHANTS)
+        amount = rng.uniform(100, 2000)
+        category = rng.choice(FRAUD_CATEGORIES)
+        transaction_type = rng.choice(["PURCHASE", "TRANSFER"])
+        payment_method = rng.choice(["CARD", "DIRECT_DEBIT"])
+        location = rng.choice(FRAUD_LOCATIONS)
     else:
-        merchant = random.choice(MERCHANTS)
-        amount = random.uniform(5, 500)
-        category = random.choice(CATEGORIES)
-        transaction_type = random.choice(TRANSACTION_TYPES)
-        payment_method = random.choice(PAYMENT_METHODS)
-        location = random.choice([
-            "Sydney, NSW", "Melbourne, VIC", "Brisbane, QLD",
-            "Perth, WA", "Adelaide, SA", "Hobart, TAS",
-            "Darwin, NT", "Canberra, ACT"
-        ])
+        merchant = merchant or rng.choice(MERCHANTS)
+        amount = rng.uniform(5, 500)
+        category = rng.choice(CATEGORIES)
+        transaction_type = rng.choice(TRANSACTION_TYPES)
+        payment_method = rng.choice(PAYMENT_METHODS)
+        location = rng.choice(LOCATIONS)
     
     return {
-        "transaction_id": str(uuid.uuid4()),
+        "transaction_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
         "customer_id": customer_id,
         "date": transaction_date.strftime("%Y-%m-%d %H:%M:%S"),
         "merchant": merchant,
@@ -85,25 +99,156 @@ def generate_transaction(customer_id, is_fraudulent=False):
         "category": category,
         "transaction_type": transaction_type,
         "payment_method": payment_method,
-        "card_number": generate_card_number() if payment_method == "CARD" else None,
-        "account_details": generate_bsb_account() if payment_method in ["DIRECT_DEBIT", "TRANSFER"] else None,
+        "card_number": generate_card_number(rng) if payment_method == "CARD" else None,
+        "account_details": generate_bsb_account(rng) if payment_method in ["DIRECT_DEBIT", "TRANSFER"] else None,
         "location": location,
         "is_fraudulent": is_fraudulent
     }
 
-def generate_customer_transactions(num_customers=10, transactions_per_customer=20, fraud_probability=0.1):
-    """Generate transactions for multiple customers with some fraudulent transactions."""
+class ActivityPatterns:
+    """
+    Structure of generated customer activity.
+
+    The defaults draw every transaction independently, as the demo data always has.
+    REALISTIC_PATTERNS adds what indexes, caches and triage see in production: a few hot
+    customers, recurring merchants, a daily rhythm per customer and fraud in bursts.
+
+    activity_skew: Zipf exponent of transactions per customer by activity rank (0 = equal counts)
+    habit_merchants, habit_share: regular merchants per customer and their share of genuine spend
+    hour_spread: hours of spread around each customer's peak hour (None = any time of day)
+    fraud_burst_size, fraud_burst_hours: fraudulent transactions per compromise and their time window
+    """
+
+    RANK_STRIDE = 2654435761  # prime, so (number * stride) % n permutes customers into activity ranks
+
+    def __init__(self, activity_skew=0.0, habit_merchants=0, habit_share=0.8, hour_spread=None,
+                 fraud_burst_size=1, fraud_burst_hours=6.0, max_activity_multiple=100):
+        self.activity_skew = activity_skew
+        self.habit_merchants = habit_merchants
+        self.habit_share = habit_share
+        self.hour_spread = hour_spread
+        self.fraud_burst_size = max(1, fraud_burst_size)
+        self.fraud_burst_hours = fraud_burst_hours
+        self.max_activity_multiple = max_activity_multiple  # caps the hottest customer at this many times the mean
+        self._zipf_scales = {}  # (num_customers, mean) -> Zipf scale
+
+    def transaction_count(self, number, num_customers, mean):
+        """Transactions for customer `number` (1-based) of num_customers; about mean on average."""
+        if not self.activity_skew:
+            return mean
+        rank = (number - 1) * self.RANK_STRIDE % num_customers + 1
+        cap = mean * self.max_activity_multiple
+        scale = self._zipf_scales.get((num_customers, mean))
+        if scale is None:
+            scale = self._zipf_scales[num_customers, mean] = _zipf_scale(num_customers, mean, self.activity_skew, cap)
+        return min(cap, max(1, round(scale * rank ** -self.activity_skew)))
+
+    def merchant_weights(self, rng, merchant_count):
+        """Cumulative weights over merchants favouring this customer's regulars, or None for uniform."""
+        habits = min(self.habit_merchants, merchant_count - 1)
+        if habits <= 0:
+            return None
+        regulars = set(rng.sample(range(merchant_count), habits))
+        other = (1 - self.habit_share) / (merchant_count - habits)
+        return list(itertools.accumulate(self.habit_share / habits if i in regulars else other
+                                         for i in range(merchant_count)))
+
+    def schedule(self, rng, count, start_second, window_seconds, fraud_rate):
+        """
+        (seconds since midnight of the first day, fraudulent) for each of a customer's transactions.
+
+        Times fall in [start_second, start_second + window_seconds). A compromise is followed
+        by the rest of its burst within fraud_burst_hours; compromises start just often enough
+        that about fraud_rate of transactions are fraudulent whatever the burst size.
+        """
+        end = start_second + window_seconds - 1
+        peak = rng.randrange(24) if self.hour_spread else None
+        burst_seconds = max(1, int(self.fraud_burst_hours * 3600))
+        # Burst rows never start a burst themselves, so solve b*q / (1 + (b-1)*q) = fraud_rate for q
+        size = self.fraud_burst_size
+        burst_probability = fraud_rate / (size - (size - 1) * fraud_rate) if fraud_rate < 1 else 1.0
+        events, remaining, burst_start = [], 0, 0
+        for _ in range(count):
+            if remaining:
+                remaining -= 1
+                events.append((min(end, burst_start + rng.randrange(burst_seconds)), True))
+            elif rng.random() < burst_probability:
+                burst_start = start_second + rng.randrange(window_seconds)
+                remaining = self.fraud_burst_size - 1
+                events.append((burst_start, True))
+            elif peak is None:
+                events.append((start_second + rng.randrange(window_seconds), False))
+            else:
+                day = (start_second + rng.randrange(window_seconds)) // 86400
+                hour = round(rng.gauss(peak, self.hour_spread)) % 24
+                second = day * 86400 + hour * 3600 + rng.randrange(3600)
+                events.append((min(end, max(start_second, second)), False))
+        return events
+
+REALISTIC_PATTERNS = ActivityPatterns(activity_skew=1.1, habit_merchants=5, habit_share=0.8, hour_spread=3.0,
+                                      fraud_burst_size=4)
+
+def _zipf_scale(n, mean, exponent, cap):
+    """
+    Scale c such that counts min(cap, max(1, c * rank ** -exponent)) over n ranks total about n * mean.
+
+    Ranks are treated as continuous (0.5 to n + 0.5) so the total has a closed form, and c
+    is found by bisection on a log scale.
+    """
+    low_rank, high_rank = 0.5, n + 0.5
+
+    def integral(start, end):
+        if exponent == 1:
+            return math.log(end / start)
+        return (end ** (1 - exponent) - start ** (1 - exponent)) / (1 - exponent)
+
+    def total(scale):
+        capped = min(high_rank, max(low_rank, (scale / cap) ** (1 / exponent)))
+        floored = min(high_rank, max(capped, scale ** (1 / exponent)))
+        return cap * (capped - low_rank) + scale * integral(capped, floored) + (high_rank - floored)
+
+    low, high = 0.0, math.log(cap) + 40
+    for _ in range(100):
+        middle = (low + high) / 2
+        low, high = (middle, high) if total(math.exp(middle)) < n * mean else (low, middle)
+    return math.exp(low)
+
+def generate_customer_transactions(num_customers=10, transactions_per_customer=20, fraud_probability=0.1,
+                                   seed=None, patterns=None, end_date=None):
+    """
+    Generate transactions for multiple customers with some fraudulent transactions.
+
+    With a seed and an end_date the output is identical on every run and machine.
+    patterns (an ActivityPatterns, e.g. REALISTIC_PATTERNS) shapes activity per customer;
+    without it every transaction is drawn independently from the last 30 days.
+    """
+    rng = random.Random(seed) if seed is not None else random
+    end_date = (end_date or datetime.now()).replace(microsecond=0)
     all_transactions = []
-    
+
+    if patterns is None:
+        for i in range(1, num_customers + 1):
+            customer_id = f"CUST{i:06d}"
+            
+            # Generate regular transactions
+            for _ in range(transactions_per_customer):
+                is_fraudulent = rng.random() < fraud_probability
+                transaction_date = end_date - timedelta(days=rng.randint(1, 30))
+                transaction = generate_transaction(customer_id, is_fraudulent, rng, transaction_date)
+                all_transactions.append(transaction)
+        return all_transactions
+
+    start = end_date - timedelta(days=30)
+    midnight = start.replace(hour=0, minute=0, second=0)
+    start_second = (start - midnight).seconds
     for i in range(1, num_customers + 1):
         customer_id = f"CUST{i:06d}"
-        
-        # Generate regular transactions
-        for _ in range(transactions_per_customer):
-            is_fraudulent = random.random() < fraud_probability
-            transaction = generate_transaction(customer_id, is_fraudulent)
-            all_transactions.append(transaction)
-    
+        count = patterns.transaction_count(i, num_customers, transactions_per_customer)
+        weights = patterns.merchant_weights(rng, len(MERCHANTS))
+        for second, is_fraudulent in patterns.schedule(rng, count, start_second, 30 * 86400, fraud_probability):
+            merchant = rng.choices(MERCHANTS, cum_weights=weights)[0] if weights else None
+            transaction_date = midnight + timedelta(seconds=second)
+            all_transactions.append(generate_transaction(customer_id, is_fraudulent, rng, transaction_date, merchant))
     return all_transactions
 
 def save_transactions_to_file(transactions, filename="synthetic_transactions.json"):
@@ -127,5 +272,240 @@ def generate_data():
     )
     return save_transactions_to_file(transactions)
 
+# Scalable generation for load and capacity tests (10-100M rows).
+#
+# Customers are split into fixed-size shards, each generated by its own seeded RNG, so the
+# output for a seed is identical whatever the number of worker processes. Rows are drawn
+# per customer in batches (random.choices runs in C) and rendered straight into JSON Lines
+# from pre-encoded value pools, skipping uuid4, strftime and json.dumps per row.
+
+DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+HOME_LOCATION_SHARE = 0.8  # share of a customer's genuine transactions made in their home city
+SHARD_CUSTOMERS = 10_000
+
+ROW_TEMPLATE = (
+    '{"transaction_id":"%s","customer_id":"%s","date":"%s","merchant":%s,"amount":%.2f,"category":%s,'
+    '"transaction_type":%s,"payment_method":%s,"card_number":%s,"account_details":%s,"location":%s,'
+    '"is_fraudulent":%s}\n'
+)
+
+def _encoded(values):
+    return [json.dumps(value) for value in values]
+
+_TIMES_OF_DAY = None
+
+def _times_of_day():
+    """All 86400 "HH:MM:SS" strings, built once per process."""
+    global _TIMES_OF_DAY
+    if _TIMES_OF_DAY is None:
+        _TIMES_OF_DAY = [f"{h:02d}:{m:02d}:{s:02d}" for h in range(24) for m in range(60) for s in range(60)]
+    return _TIMES_OF_DAY
+
+class GenerationStats:
+    """Throughput of a bulk generation run."""
+
+    def __init__(self, path, rows, fraud_rows, seconds, cpu_seconds, workers):
+        self.path = path
+        self.rows = rows
+        self.fraud_rows = fraud_rows
+        self.seconds = seconds
+        self.cpu_seconds = cpu_seconds
+        self.workers = workers
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else float(self.rows)
+
+    @property
+    def rows_per_core_second(self):
+        """Rows per second of CPU time spent generating, i.e. what one core sustains."""
+        return self.rows / self.cpu_seconds if self.cpu_seconds > 0 else float(self.rows)
+
+    def __str__(self):
+        return (
+            f"{self.rows} transactions ({self.fraud_rows} fraudulent) to {self.path} in {self.seconds:.2f}s "
+            f"with {self.workers} workers ({self.rows_per_second:,.0f} rows/sec, "
+            f"{self.rows_per_core_second:,.0f} rows/sec per core)"
+        )
+
+def _customer_count(rng, number, num_customers, transactions_per_customer, distribution, patterns):
+    if patterns.activity_skew:
+        return patterns.transaction_count(number, num_customers, transactions_per_customer)
+    if distribution == "fixed":
+        return transactions_per_customer
+    if distribution == "uniform":
+        return rng.randint(1, 2 * transactions_per_customer - 1)
+    # Heavy-tailed: most customers transact a little, a few a lot (median about 60% of the mean)
+    return max(1, round(rng.lognormvariate(0, 1) * transactions_per_customer / 1.6487))
+
+def generate_shard_lines(first_customer, last_customer, transactions_per_customer=20, distribution="fixed",
+                         fraud_rate=0.1, seed=0, days=30, end_date=None, patterns=None, num_customers=None,
+                         chunk_rows=10_000):
+    """
+    Yield (JSON Lines text, rows, fraudulent rows) chunks for customers first_customer..last_customer.
+
+    Transactions fall in the `days` days before end_date, shaped by patterns (an
+    ActivityPatterns; Zipf activity skew overrides distribution and needs num_customers,
+    the size of the whole dataset). Each customer has one card, one bank account and a
+    home city; fraudulent rows use the same unusual merchants, categories and locations
+    as generate_transaction.
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution: {distribution}")
+    rng = random.Random(f"{seed}:{first_customer}")
+    patterns = patterns or ActivityPatterns()
+    num_customers = num_customers or last_customer
+    end_date = (end_date or datetime.now()).replace(microsecond=0)
+    start = end_date - timedelta(days=days)
+    midnight = start.replace(hour=0, minute=0, second=0)
+    day_prefixes = [(midnight + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(days + 2)]
+    start_second = (start - midnight).seconds
+    window = days * 86400
+    times = _times_of_day()
+
+    merchants, categories = _encoded(MERCHANTS), _encoded(CATEGORIES)
+    transaction_types, payment_methods = _encoded(TRANSACTION_TYPES), _encoded(PAYMENT_METHODS)
+    fraud_merchants, fraud_categories = _encoded(FRAUD_MERCHANTS), _encoded(FRAUD_CATEGORIES)
+    fraud_types, fraud_methods = _encoded(["PURCHASE", "TRANSFER"]), _encoded(["CARD", "DIRECT_DEBIT"])
+    fraud_locations, locations = _encoded(FRAUD_LOCATIONS), _encoded(LOCATIONS)
+    card, direct_debit = json.dumps("CARD"), json.dumps("DIRECT_DEBIT")
+
+    lines, fraud_rows = [], 0
+    for number in range(first_customer, last_customer + 1):
+        customer_id = f"CUST{number:06d}"
+        count = _customer_count(rng, number, num_customers, transactions_per_customer, distribution, patterns)
+        card_number = json.dumps(f"4{rng.randrange(1000):03d} {rng.randrange(10 ** 4):04d} "
+                                 f"{rng.randrange(10 ** 4):04d} {rng.randrange(10 ** 4):04d}")
+        account = json.dumps(f"BSB: {rng.randrange(100, 1000):03d}-{rng.randrange(100, 1000):03d}, "
+                             f"Account: {rng.randrange(10 ** 7, 10 ** 8):08d}")
+        home = rng.randrange(len(locations))
+        home_weights = [HOME_LOCATION_SHARE if i == home else (1 - HOME_LOCATION_SHARE) / (len(locations) - 1)
+                        for i in range(len(locations))]
+
+        customer_merchants = rng.choices(merchants, cum_weights=patterns.merchant_weights(rng, len(merchants)), k=count)
+        customer_categories = rng.choices(categories, k=count)
+        customer_types = rng.choices(transaction_types, k=count)
+        customer_methods = rng.choices(payment_methods, k=count)
+        customer_locations = rng.choices(locations, weights=home_weights, k=count)
+        random_value, getrandbits = rng.random, rng.getrandbits
+        for i, (second, fraudulent) in enumerate(patterns.schedule(rng, count, start_second, window, fraud_rate)):
+            if fraudulent:
+                merchant, category = rng.choice(fraud_merchants), rng.choice(fraud_categories)
+                transaction_type, payment_method = rng.choice(fraud_types), rng.choice(fraud_methods)
+                location, amount = rng.choice(fraud_locations), 100 + random_value() * 1900
+                fraud_rows += 1
+            else:
+                merchant, category = customer_merchants[i], customer_categories[i]
+                transaction_type, payment_method = customer_types[i], customer_methods[i]
+                location, amount = customer_locations[i], 5 + random_value() * 495
+            identifier = f"{getrandbits(128):032x}"
+            lines.append(ROW_TEMPLATE % (
+                f"{identifier[:8]}-{identifier[8:12]}-{identifier[12:16]}-{identifier[16:20]}-{identifier[20:]}",
+                customer_id,
+                f"{day_prefixes[second // 86400]} {times[second % 86400]}",
+                merchant, amount, category, transaction_type, payment_method,
+                card_number if payment_method == card else "null",
+                account if payment_method == direct_debit else "null",
+                location, "true" if fraudulent else "false"
+            ))
+        if len(lines) >= chunk_rows:
+            yield "".join(lines), len(lines), fraud_rows
+            lines, fraud_rows = [], 0
+    if lines:
+        yield "".join(lines), len(lines), fraud_rows
+
+def _write_shard(job):
+    path, first_customer, last_customer, options = job
+    cpu_start = time.process_time()
+    rows = fraud_rows = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for text, chunk_rows, chunk_fraud in generate_shard_lines(first_customer, last_customer, **options):
+            f.write(text)
+            rows += chunk_rows
+            fraud_rows += chunk_fraud
+    return path, rows, fraud_rows, time.process_time() - cpu_start
+
+def generate_dataset(path, num_customers, transactions_per_customer=20, distribution="fixed", fraud_rate=0.1,
+                     seed=0, days=30, end_date=None, workers=None, shard_customers=SHARD_CUSTOMERS, patterns=None):
+    """
+    Generate a large dataset as JSON Lines (.jsonl/.ndjson) or a columnar snapshot (.snap).
+
+    Shards of shard_customers customers are written by a pool of worker processes to part
+    files, which are appended to the output in shard order as they finish. A .snap output
+    is generated as JSON Lines first and then converted. patterns is an ActivityPatterns
+    (e.g. REALISTIC_PATTERNS). Returns GenerationStats.
+    """
+    from app.services.columnar_store import SNAPSHOT_EXTENSION
+    from app.utils.transaction_loader import JSON_LINES_EXTENSIONS
+    if not path.endswith(JSON_LINES_EXTENSIONS + (SNAPSHOT_EXTENSION,)):
+        raise ValueError(f"Output must be JSON Lines ({', '.join(JSON_LINES_EXTENSIONS)}) or a {SNAPSHOT_EXTENSION} snapshot")
+    workers = workers or os.cpu_count() or 1
+    options = {"transactions_per_customer": transactions_per_customer, "distribution": distribution,
+               "fraud_rate": fraud_rate, "seed": seed, "days": days,
+               "end_date": (end_date or datetime.now()).replace(microsecond=0),
+               "patterns": patterns, "num_customers": num_customers}
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    lines_path = path + ".tmp.jsonl" if path.endswith(SNAPSHOT_EXTENSION) else path
+
+    start = time.perf_counter()
+    rows = fraud_rows = 0
+    cpu_seconds = 0.0
+    with tempfile.TemporaryDirectory(dir=directory) as parts:
+        jobs = [
+            (os.path.join(parts, f"part-{i:06d}.jsonl"), first, min(first + shard_customers - 1, num_customers), options)
+            for i, first in enumerate(range(1, num_customers + 1, shard_customers))
+        ]
+        pool = multiprocessing.Pool(workers) if workers > 1 else None
+        try:
+            results = pool.imap(_write_shard, jobs) if pool else map(_write_shard, jobs)
+            with open(lines_path, "wb") as output:
+                for part, part_rows, part_fraud, part_cpu in results:
+                    rows, fraud_rows, cpu_seconds = rows + part_rows, fraud_rows + part_fraud, cpu_seconds + part_cpu
+                    with open(part, "rb") as f:
+                        shutil.copyfileobj(f, output, 1 << 20)
+                    os.remove(part)
+        finally:
+            if pool:
+                pool.terminate()
+    stats = GenerationStats(path, rows, fraud_rows, time.perf_counter() - start, cpu_seconds, workers)
+
+    if lines_path != path:
+        from app.utils.snapshot import convert_to_snapshot
+        try:
+            convert_to_snapshot(lines_path, path)
+        finally:
+            os.remove(lines_path)
+        stats.seconds = time.perf_counter() - start
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic transactions. Without --output, writes the small demo dataset "
+                    "to data/synthetic_transactions.json."
+    )
+    parser.add_argument("--output", help="JSON Lines (.jsonl/.ndjson) or snapshot (.snap) file for a bulk dataset")
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--transactions-per-customer", type=int, default=20, help="mean transactions per customer")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="fixed",
+                        help="per-customer transaction count: fixed, uniform (1 to 2x mean) or lognormal (heavy tail)")
+    parser.add_argument("--fraud-rate", type=float, default=0.1)
+    parser.add_argument("--days", type=int, default=30, help="transactions fall in the last N days")
+    parser.add_argument("--end-date", type=datetime.fromisoformat, default=None,
+                        help="latest transaction time, e.g. 2024-06-30 (default: now); fix it for reproducible output")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--realistic", action="store_true",
+                        help="Zipf-skewed customer activity, regular merchants, daily rhythms and fraud bursts")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    if not args.output:
+        generate_data()
+        return
+    stats = generate_dataset(args.output, args.customers, args.transactions_per_customer, args.distribution,
+                             args.fraud_rate, args.seed, args.days, args.end_date, args.workers,
+                             patterns=REALISTIC_PATTERNS if args.realistic else None)
+    print(f"Generated {stats}")
+
 if __name__ == "__main__":
-    generate_data()
\ No newline at end of file
+    main()
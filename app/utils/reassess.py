@@ -0,0 +1,347 @@
+"""
+Re-assess the dispute backlog offline, e.g. after OPENAI_MODEL or the analysis prompt changes.
+
+    python -m app.utils.reassess --processes 4 --max-rate 20
+
+Disputes are streamed from the SQLite dispute store in dispute_id order and joined to their
+transactions from DATA_FILE. Each is triaged as at intake. The rest go, in chunks, to a pool
+of worker processes, each analysing a chunk with OpenAIService.analyze_disputes_async
+(batched prompts, up to OPENAI_MAX_CONCURRENCY calls in flight per process). A token bucket
+in the parent caps the disputes sent for analysis per second across the whole pool, and at
+most two chunks per process are outstanding.
+
+Finished chunks are written back with one commit each. After every write the checkpoint
+file records the dispute_id up to which every chunk has been written, so a run that is
+interrupted resumes from there (chunks that had finished beyond it are redone). A dispute
+whose analysis fails keeps its previous assessment and is listed at the end.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime
+from app.config import Config
+from app.models.transaction import DisputeRequest
+from app.services.customer_profiles import CustomerProfileIndex
+from app.services.dispute_repository import CLOSED_STATUSES, SQLiteDisputeRepository
+from app.services.dispute_service import analysis_fields
+from app.services.openai_service import OpenAIService
+from app.services.prompt_builder import SYSTEM_PROMPT
+from app.services.transaction_repository import load_transaction_repository
+from app.services.triage import DisputeTriage
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+ASSESSED = ("HIGH", "MEDIUM", "LOW")
+REQUEST_FIELDS = ("customer_id", "transaction_id", "reason", "description", "contact_phone", "contact_email")
+
+class RateLimiter:
+    """
+    Token bucket releasing `rate` units per second, with bursts of up to one second's worth.
+
+    acquire() may overdraw the bucket by one large request and then sleeps off the debt,
+    so the long-run rate holds for any request size. rate 0 disables limiting.
+    """
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = rate
+        self.updated = clock()
+
+    def acquire(self, amount=1):
+        """Take `amount` units, sleeping as long as needed; returns the seconds slept."""
+        if not self.rate:
+            return 0.0
+        now = self.clock()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate) - amount
+        self.updated = now
+        if self.tokens >= 0:
+            return 0.0
+        wait = -self.tokens / self.rate
+        self.sleep(wait)
+        return wait
+
+def run_signature():
+    """What the assessments of a run depend on; a checkpoint only resumes a run with the same signature."""
+    prompt = f"{SYSTEM_PROMPT}\n{Config.LLM_PROMPT_TOKEN_BUDGET}".encode("utf-8")
+    return {"model": Config.OPENAI_MODEL, "prompt": hashlib.sha256(prompt).hexdigest()[:16]}
+
+def estimate_cost(prompt_tokens, completion_tokens):
+    """Estimated spend in USD at the configured per-million-token prices."""
+    return (prompt_tokens * Config.LLM_INPUT_COST_PER_MILLION_TOKENS
+            + completion_tokens * Config.LLM_OUTPUT_COST_PER_MILLION_TOKENS) / 1_000_000
+
+# Worker processes keep one OpenAIService and event loop for their lifetime, so the pooled
+# HTTP client and its connections are reused from chunk to chunk
+_worker = None
+
+def analyse_chunk(items):
+    """
+    Analyse (transaction, dispute request fields) pairs in a worker.
+
+    Returns:
+        tuple: (analyses in item order, prompt tokens used, completion tokens used)
+    """
+    global _worker
+    if _worker is None:
+        service = OpenAIService()
+        service.cache = None  # re-assessment must not be answered with earlier assessments
+        _worker = (service, asyncio.new_event_loop())
+    service, loop = _worker
+    prompt_before, completion_before = metrics.LLM_TOKENS.value("prompt"), metrics.LLM_TOKENS.value("completion")
+    analyses = loop.run_until_complete(
+        service.analyze_disputes_async([(transaction, DisputeRequest(**fields)) for transaction, fields in items]))
+    return (analyses, metrics.LLM_TOKENS.value("prompt") - prompt_before,
+            metrics.LLM_TOKENS.value("completion") - completion_before)
+
+class InlineExecutor(concurrent.futures.Executor):
+    """Runs each task on submit, in this process (--processes 0)."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+class Reassessment:
+    """
+    One re-assessment run over a dispute store.
+
+    Args:
+        disputes: Dispute repository to read from and write back to
+        transactions: Transaction repository holding the disputed transactions
+        checkpoint_path: JSON file recording progress, or None to always start from the beginning
+        chunk_size: Disputes per task sent to a worker
+        statuses: Statuses to re-assess, or None for every open (not closed) dispute
+        max_rate: Disputes sent for LLM analysis per second across the pool; 0 for no limit
+        triage: DisputeTriage settling clear-cut disputes without the LLM, or None
+        limit: Stop after this many disputes (the checkpoint lets the next run continue)
+    """
+
+    def __init__(self, disputes, transactions, checkpoint_path=None, chunk_size=50, statuses=None, max_rate=0,
+                 triage=None, limit=None):
+        self.disputes = disputes
+        self.transactions = transactions
+        self.profiles = CustomerProfileIndex.from_repository(transactions)
+        self.checkpoint_path = checkpoint_path
+        self.chunk_size = chunk_size
+        self.statuses = statuses
+        self.limiter = RateLimiter(max_rate)
+        self.triage = triage
+        self.limit = limit
+        self.signature = run_signature()
+        self.stats = self._empty_stats()
+        self.failed = []  # dispute IDs whose analysis failed
+        self.resumed_disputes = 0  # re-assessed by earlier, interrupted runs
+        self.seconds = 0.0
+
+    @staticmethod
+    def _empty_stats():
+        return {"disputes": 0, "triaged": 0, "analysed": 0, "failed": 0, "missing_transaction": 0, "written": 0,
+                "prompt_tokens": 0, "completion_tokens": 0}
+
+    def load_checkpoint(self, restart=False):
+        """The dispute_id to resume after, restoring the stats of the interrupted run."""
+        if restart or not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as f:
+            state = json.load(f)
+        if state["signature"] != self.signature:
+            raise ValueError(f"{self.checkpoint_path} belongs to a run with a different model or prompt "
+                             f"({state['signature']}); pass --restart to start over")
+        self.stats.update(state["stats"])
+        self.failed = state.get("failed", [])
+        logger.info(f"Resuming after dispute {state['after']} ({self.stats['disputes']} already re-assessed)")
+        return state["after"]
+
+    def save_checkpoint(self, after):
+        if not self.checkpoint_path:
+            return
+        state = {"signature": self.signature, "after": after, "stats": self.stats,
+                 "failed": self.failed, "updated_at": datetime.now().isoformat(timespec="seconds")}
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.checkpoint_path)  # readers never see a partial checkpoint
+
+    def run(self, executor, max_in_flight, restart=False):
+        """Re-assess every selected dispute after the checkpoint; returns the run's stats."""
+        started = time.perf_counter()
+        after = self.load_checkpoint(restart)
+        self.resumed_disputes = self.stats["disputes"]
+        statuses = self.statuses or self._open_statuses()
+        in_flight = {}  # future -> chunk
+        finished = {}  # chunk number -> chunk, waiting for every earlier chunk to be written
+        next_to_commit = 0
+
+        def collect(done):
+            nonlocal after, next_to_commit
+            for future in done:
+                chunk = in_flight.pop(future)
+                chunk["stats"] = self._write_back(chunk, future.result())
+                finished[chunk["number"]] = chunk
+            while next_to_commit in finished:
+                chunk = finished.pop(next_to_commit)
+                for key, value in chunk["stats"].items():
+                    self.stats[key] += value
+                self.failed += chunk["failed"]
+                after = chunk["last_id"]
+                next_to_commit += 1
+                self.save_checkpoint(after)
+
+        try:
+            for number, chunk in enumerate(self._chunks(self.disputes.iter_disputes(after, statuses))):
+                chunk["number"] = number
+                if chunk["items"]:
+                    self.limiter.acquire(len(chunk["items"]))
+                    future = executor.submit(analyse_chunk, chunk["items"])
+                else:
+                    future = concurrent.futures.Future()  # settled by triage alone
+                    future.set_result(([], 0, 0))
+                in_flight[future] = chunk
+                if len(in_flight) >= max_in_flight:
+                    done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                    collect(done)
+            collect(concurrent.futures.wait(in_flight).done)
+        finally:
+            self.seconds = time.perf_counter() - started
+        return self.stats
+
+    def report(self):
+        """Throughput and cost figures for the run so far."""
+        stats = self.stats
+        cost = estimate_cost(stats["prompt_tokens"], stats["completion_tokens"])
+        this_run = stats["disputes"] - self.resumed_disputes
+        return {
+            **stats,
+            "seconds": round(self.seconds, 2),
+            "disputes_per_second": round(this_run / self.seconds, 1) if self.seconds else None,
+            "estimated_cost_usd": round(cost, 4),
+            "estimated_cost_per_1000_analysed_usd": round(cost / stats["analysed"] * 1000, 4) if stats["analysed"] else None,
+            "model": self.signature["model"]
+        }
+
+    def _open_statuses(self):
+        statuses = set(self.disputes.count_by_status()) - set(CLOSED_STATUSES)
+        return sorted(statuses)
+
+    def _chunks(self, disputes):
+        """Group streamed disputes into chunks, triaging each and joining it to its transaction."""
+        chunk = self._new_chunk()
+        for count, dispute in enumerate(disputes):
+            if self.limit is not None and count >= self.limit:
+                break
+            chunk["last_id"] = dispute["dispute_id"]
+            chunk["size"] += 1
+            transaction = self.transactions.get(dispute["transaction_id"])
+            if transaction is None:
+                chunk["missing"] += 1
+            else:
+                features = self.profiles.features(transaction)
+                ai_analysis = self.triage.classify(transaction, features) if self.triage else None
+                if ai_analysis is not None:
+                    chunk["triaged"].append((dispute["dispute_id"], ai_analysis))
+                else:
+                    chunk["dispute_ids"].append(dispute["dispute_id"])
+                    chunk["items"].append((dict(transaction, customer_profile=features),
+                                           {field: dispute.get(field) for field in REQUEST_FIELDS}))
+            if chunk["size"] >= self.chunk_size:
+                yield chunk
+                chunk = self._new_chunk()
+        if chunk["size"]:
+            yield chunk
+
+    @staticmethod
+    def _new_chunk():
+        return {"size": 0, "missing": 0, "triaged": [], "dispute_ids": [], "items": [], "failed": []}
+
+    def _write_back(self, chunk, result):
+        """Apply a finished chunk's assessments to the stored disputes in one commit; returns its stats."""
+        analyses, prompt_tokens, completion_tokens = result
+        stats = self._empty_stats()
+        stats.update(disputes=chunk["size"], missing_transaction=chunk["missing"], triaged=len(chunk["triaged"]),
+                     prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        reassessed_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        updates = []
+        for source, pairs in (("triage", chunk["triaged"]), (self.signature["model"], zip(chunk["dispute_ids"], analyses))):
+            for dispute_id, ai_analysis in pairs:
+                if ai_analysis.get("fraud_likelihood") not in ASSESSED or ai_analysis.get("fallback"):
+                    chunk["failed"].append(dispute_id)
+                    continue
+                dispute = self.disputes.get(dispute_id)  # the latest version, in case the API changed it meanwhile
+                if dispute is None:
+                    continue
+                dispute.update(analysis_fields(ai_analysis))
+                dispute["reassessed_at"] = reassessed_at
+                dispute["assessed_by"] = source
+                updates.append(dispute)
+        stats["analysed"] = len(chunk["items"])
+        stats["failed"] = len(chunk["failed"])
+        stats["written"] = len(updates)
+        self.disputes.save_many(updates)
+        return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-assess stored disputes with the current model and prompt")
+    parser.add_argument("--db", default=Config.DISPUTE_DB_PATH, help="SQLite dispute store (DISPUTE_DB_PATH)")
+    parser.add_argument("--data-file", default=Config.DATA_FILE, help="transactions (DATA_FILE)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="worker processes; 0 analyses in this process")
+    parser.add_argument("--chunk-size", type=int, default=50, help="disputes per worker task")
+    parser.add_argument("--max-rate", type=float, default=0, help="disputes sent for analysis per second; 0 = no limit")
+    parser.add_argument("--statuses", help="comma-separated statuses to re-assess (default: every open dispute)")
+    parser.add_argument("--limit", type=int, help="stop after this many disputes; run again to continue")
+    parser.add_argument("--no-triage", action="store_true", help="send clear-cut disputes to the LLM as well")
+    parser.add_argument("--checkpoint", default="data/reassess_checkpoint.json")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the beginning")
+    args = parser.parse_args()
+    logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL),
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    if not os.path.exists(args.db):
+        sys.exit(f"No dispute store at {args.db}; re-assessment reads the SQLite store (DISPUTE_STORE=sqlite)")
+    disputes = SQLiteDisputeRepository(args.db)
+    transactions = load_transaction_repository(args.data_file)
+    reassessment = Reassessment(
+        disputes, transactions, checkpoint_path=args.checkpoint, chunk_size=args.chunk_size,
+        statuses=args.statuses.split(",") if args.statuses else None, max_rate=args.max_rate,
+        triage=None if args.no_triage else DisputeTriage(), limit=args.limit
+    )
+    if args.processes > 0:
+        # Spawned rather than forked: this process already runs the store's writer thread
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=args.processes,
+                                                          mp_context=multiprocessing.get_context("spawn"))
+    else:
+        executor = InlineExecutor()
+    try:
+        reassessment.run(executor, max_in_flight=max(1, args.processes) * 2, restart=args.restart)
+    except ValueError as e:
+        sys.exit(str(e))
+    except KeyboardInterrupt:
+        logger.warning(f"Interrupted; run again to resume from {args.checkpoint}")
+    finally:
+        executor.shutdown(cancel_futures=True)
+        disputes.close()
+
+    report = reassessment.report()
+    print(json.dumps(report, indent=2))
+    if reassessment.failed:
+        print(f"{len(reassessment.failed)} disputes kept their previous assessment: "
+              f"{', '.join(reassessment.failed[:20])}{' ...' if len(reassessment.failed) > 20 else ''}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import argparse
+import logging
+import time
+from app.services.columnar_store import ColumnarTransactionRepository
+from app.utils.transaction_loader import load_transactions
+
+logger = logging.getLogger(__name__)
+
+def convert_to_snapshot(source, target):
+    """Convert a JSON or JSON Lines transaction file into a memory-mappable .snap snapshot."""
+    repository = ColumnarTransactionRepository()
+    stats = load_transactions(source, repository)
+    start = time.perf_counter()
+    repository.save_snapshot(target)
+    logger.info(f"Wrote {stats.rows} transactions to {target} in {time.perf_counter() - start:.2f}s")
+    return target
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a transaction data file into a .snap snapshot")
+    parser.add_argument("source", help="JSON array or JSON Lines transaction file")
+    parser.add_argument("target", help="snapshot file to write, e.g. data/synthetic_transactions.snap")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    convert_to_snapshot(args.source, args.target)
@@ -0,0 +1,111 @@
+"""
+Recover JSON objects from LLM replies.
+
+Models asked for JSON still sometimes wrap it in prose or a ```json fence, leave a trailing
+comma, or stop mid-object when they hit max_tokens. JSONStreamExtractor scans the reply (or a
+stream of chunks) for top-level objects with a small bracket/string state machine, so any of
+those still yields the object; a truncated object is closed at its last complete member.
+"""
+import json
+import re
+
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+def _loads(text):
+    """Parse a candidate object, tolerating trailing commas; None if it is not a JSON object."""
+    for candidate in (text, _TRAILING_COMMA.sub(r"\1", text)):
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            continue
+        return value if isinstance(value, dict) else None
+    return None
+
+class JSONStreamExtractor:
+    """
+    Incrementally extracts top-level JSON objects from text fed in chunks.
+
+        extractor = JSONStreamExtractor()
+        for chunk in stream:
+            for obj in extractor.feed(chunk):
+                ...
+        partial = extractor.close()  # a truncated trailing object, repaired, or None
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._buffer = []
+        self._stack = []  # closing brackets still expected
+        self._in_string = False
+        self._escape = False
+        self._safe = None  # (buffer length, stack) just before the last member separator
+
+    def feed(self, chunk):
+        """Consume a chunk; returns the objects completed by it."""
+        completed = []
+        for char in chunk:
+            stack = self._stack
+            if not stack:
+                if char == "{":
+                    self._buffer.append(char)
+                    stack.append("}")
+                continue
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                stack.append("}")
+            elif char == "[":
+                stack.append("]")
+            elif char == ",":
+                self._safe = (len(self._buffer) - 1, list(stack))
+            elif char in "}]":
+                if char != stack[-1]:
+                    self._reset()  # not JSON after all; look for the next "{"
+                    continue
+                stack.pop()
+                if not stack:
+                    value = _loads("".join(self._buffer))
+                    self._reset()
+                    if value is not None:
+                        completed.append(value)
+        return completed
+
+    def close(self):
+        """Finish the stream, repairing a trailing object cut off mid-way; returns it or None."""
+        if not self._stack:
+            return None
+        text = "".join(self._buffer)
+        candidates = [text + ('"' if self._in_string else "") + "".join(reversed(self._stack))]
+        if self._safe is not None:
+            # Drop the incomplete last member (a half-written key, number or literal)
+            length, stack = self._safe
+            candidates.append(text[:length] + "".join(reversed(stack)))
+        self._reset()
+        for candidate in candidates:
+            value = _loads(candidate)
+            if value is not None:
+                return value
+        return None
+
+def extract_json(text):
+    """The first non-empty JSON object in a model reply, recovered where possible; None if there is none."""
+    if not text:
+        return None
+    value = _loads(text.strip())  # well-formed replies skip the scan
+    if value is not None:
+        return value
+    extractor = JSONStreamExtractor()
+    for value in extractor.feed(text):
+        if value:  # skip stray "{}" in surrounding prose
+            return value
+    return extractor.close()
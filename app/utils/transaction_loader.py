@@ -0,0 +1,137 @@
+import json
+import logging
+import re
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+CHUNK_SIZE = 1 << 20  # 1 MiB reads keep the parse buffer small regardless of file size
+ARRAY_SEPARATOR = re.compile(r'[\s,]*')
+
+# Low-cardinality string fields that repeat across millions of rows
+INTERNED_FIELDS = ("customer_id", "merchant", "category", "transaction_type", "payment_method", "location")
+
+class LoadStats:
+    """Throughput and memory figures for a single load."""
+
+    def __init__(self, path, rows, seconds, peak_rss_mb):
+        self.path = path
+        self.rows = rows
+        self.seconds = seconds
+        self.peak_rss_mb = peak_rss_mb
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else float(self.rows)
+
+    def __str__(self):
+        return (
+            f"{self.rows} transactions from {self.path} in {self.seconds:.2f}s "
+            f"({self.rows_per_second:,.0f} rows/sec, peak RSS {self.peak_rss_mb:.1f} MB)"
+        )
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or 0.0 where unsupported."""
+    try:
+        # Linux: VmHWM is per address space, unlike ru_maxrss which survives fork/exec
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _compact(row):
+    """Share key and repeated value strings between rows instead of one copy per row."""
+    transaction = {sys.intern(key): value for key, value in row.items()}
+    for field in INTERNED_FIELDS:
+        value = transaction.get(field)
+        if isinstance(value, str):
+            transaction[field] = sys.intern(value)
+    return transaction
+
+def parse_json_line(line):
+    """Decode one JSON Lines record into a compact transaction dict; raises json.JSONDecodeError."""
+    row = json.loads(line)
+    return _compact(row) if isinstance(row, dict) else row
+
+def _iter_json_lines(f):
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield parse_json_line(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e.msg}") from e
+
+def _iter_json_array(f, chunk_size):
+    """Incrementally decode the elements of a top-level JSON array."""
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_size).lstrip()
+    position = 0
+    eof = not buffer
+
+    if buffer[position:position + 1] != "[":
+        raise ValueError("Expected a JSON array of transactions")
+    position += 1
+
+    while True:
+        position = ARRAY_SEPARATOR.match(buffer, position).end()
+        if position < len(buffer):
+            if buffer[position] == "]":
+                return
+            try:
+                row, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # A value that ends exactly at the buffer edge may be truncated (e.g. a number)
+                if end < len(buffer) or eof:
+                    yield _compact(row)
+                    position = end
+                    continue
+        elif eof:
+            raise ValueError("Unexpected end of file inside the transaction array")
+
+        # Need more data: drop what has been consumed and read the next chunk
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+def iter_transactions(path, chunk_size=CHUNK_SIZE):
+    """
+    Stream transactions from a JSON array or JSON Lines file one row at a time.
+
+    Only the current read chunk and the row being decoded are held in memory, so the
+    raw document is never materialised.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(JSON_LINES_EXTENSIONS):
+            yield from _iter_json_lines(f)
+        else:
+            yield from _iter_json_array(f, chunk_size)
+
+def load_transactions(path, repository, select=None):
+    """
+    Stream transactions from path into repository and return LoadStats.
+
+    select, if given, filters the row stream (e.g. to one shard's customers) before it is stored.
+    """
+    start = time.perf_counter()
+    rows = iter_transactions(path)
+    rows = repository.add_many(select(rows) if select else rows)
+    stats = LoadStats(path, rows, time.perf_counter() - start, peak_rss_mb())
+    logger.info(f"Loaded {stats}")
+    return stats
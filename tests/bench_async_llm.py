@@ -0,0 +1,76 @@
+"""
+Load test dispute creation against the local LLM stub: blocking calls versus the async path.
+
+Usage: python -m tests.bench_async_llm [--disputes 200] [--latency-ms 100] [--concurrency 1 8 32 64]
+
+The sync row is what a worker achieved before: one dispute in flight at a time.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from app.config import Config
+from app.models.transaction import DisputeRequest
+from tests.bench_common import synthetic_transactions, print_table
+from tests.llm_stub import start_stub_server
+
+def build_service(data_file, base_url, concurrency):
+    from app.services.dispute_service import DisputeService
+    Config.DATA_FILE = data_file
+    Config.OPENAI_BASE_URL = base_url
+    Config.OPENAI_API_KEY = Config.OPENAI_API_KEY or "stub"
+    Config.OPENAI_MAX_CONCURRENCY = concurrency
+    return DisputeService()
+
+def dispute_requests(transactions, count):
+    return [
+        DisputeRequest(customer_id=t["customer_id"], transaction_id=t["transaction_id"],
+                       reason="Unauthorized transaction", description="I did not make this purchase")
+        for t in transactions[:count]
+    ]
+
+async def run_async(service, requests):
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(service.create_dispute_async(r) for r in requests))
+        return time.perf_counter() - start, results
+    finally:
+        await service.openai_service.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--disputes", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    args = parser.parse_args()
+
+    server = start_stub_server(latency_ms=args.latency_ms)
+    transactions = [t for t in synthetic_transactions(args.disputes * 2) if t["amount"] <= Config.MAX_DISPUTE_AMOUNT]
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = os.path.join(directory, "transactions.jsonl")
+        with open(data_file, 'w') as f:
+            f.writelines(json.dumps(t) + "\n" for t in transactions)
+
+        results = []
+        sync_count = min(args.disputes, 20)  # sequential calls are slow; a small sample is enough
+        service = build_service(data_file, server.base_url, 1)
+        start = time.perf_counter()
+        for request in dispute_requests(transactions, sync_count):
+            assert "error" not in service.create_dispute(request)
+        seconds = time.perf_counter() - start
+        results.append(["sync (blocking)", 1, sync_count, f"{seconds:.2f}", f"{sync_count / seconds:,.1f}"])
+
+        for concurrency in args.concurrency:
+            service = build_service(data_file, server.base_url, concurrency)
+            seconds, outcomes = asyncio.run(run_async(service, dispute_requests(transactions, args.disputes)))
+            assert all("error" not in o and o["ai_assessment"] != "Error analyzing dispute" for o in outcomes)
+            results.append(["async", concurrency, args.disputes, f"{seconds:.2f}", f"{args.disputes / seconds:,.1f}"])
+    server.shutdown()
+
+    print(f"LLM stub latency: {args.latency_ms:.0f} ms")
+    print_table(["path", "concurrency", "disputes", "seconds", "disputes/sec"], results)
+
+if __name__ == "__main__":
+    main()
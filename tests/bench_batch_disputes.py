@@ -0,0 +1,89 @@
+"""
+Bulk dispute intake against the local LLM stub: one batch request versus N sequential calls.
+
+Usage: python -m tests.bench_batch_disputes [--sizes 10 30 100] [--latency-ms 300] [--per-item-ms 40]
+
+The stub charges --latency-ms per call plus --per-item-ms for every extra dispute in a
+batched prompt, so batching is not modelled as free. The assessment cache is disabled.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from app.config import Config
+from app.models.transaction import DisputeRequest
+from tests.bench_common import synthetic_transactions, print_table
+from tests.llm_stub import start_stub_server
+
+def build_service(data_file, base_url, batch_size):
+    from app.services.dispute_service import DisputeService
+    Config.DATA_FILE = data_file
+    Config.OPENAI_BASE_URL = base_url
+    Config.OPENAI_API_KEY = Config.OPENAI_API_KEY or "stub"
+    Config.LLM_CACHE_BACKEND = "none"
+    Config.LLM_BATCH_SIZE = batch_size
+    return DisputeService()
+
+def dispute_requests(transactions, count):
+    return [
+        DisputeRequest(customer_id=t["customer_id"], transaction_id=t["transaction_id"],
+                       reason="Unauthorized transaction", description="My card was compromised")
+        for t in transactions[:count]
+    ]
+
+async def run_sequential(service, requests):
+    try:
+        start = time.perf_counter()
+        for request in requests:
+            assert "error" not in await service.create_dispute_async(request)
+        return time.perf_counter() - start
+    finally:
+        await service.openai_service.close()
+
+async def run_batch(service, requests):
+    try:
+        start = time.perf_counter()
+        results = await service.create_disputes(requests)
+        seconds = time.perf_counter() - start
+        assert all("dispute" in r and r["dispute"]["fraud_likelihood"] in ("HIGH", "MEDIUM") for r in results)
+        return seconds
+    finally:
+        await service.openai_service.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 30, 100])
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--per-item-ms", type=float, default=40)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10])
+    args = parser.parse_args()
+
+    server = start_stub_server(latency_ms=args.latency_ms, per_item_ms=args.per_item_ms)
+    count = max(args.sizes)
+    transactions = [t for t in synthetic_transactions(count * 2) if t["amount"] <= Config.MAX_DISPUTE_AMOUNT]
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = os.path.join(directory, "transactions.jsonl")
+        with open(data_file, 'w') as f:
+            f.writelines(json.dumps(t) + "\n" for t in transactions)
+
+        for size in args.sizes:
+            requests = dispute_requests(transactions, size)
+            before = server.stats["requests"]
+            sequential = asyncio.run(run_sequential(build_service(data_file, server.base_url, 1), requests))
+            rows.append([size, "sequential", server.stats["requests"] - before, f"{sequential:.2f}", "1.0x"])
+            for batch_size in args.batch_sizes:
+                before = server.stats["requests"]
+                seconds = asyncio.run(run_batch(build_service(data_file, server.base_url, batch_size), requests))
+                label = "batch (parallel calls)" if batch_size == 1 else f"batch ({batch_size}/prompt)"
+                rows.append([size, label, server.stats["requests"] - before, f"{seconds:.2f}",
+                             f"{sequential / seconds:.1f}x"])
+    server.shutdown()
+
+    print(f"LLM stub latency: {args.latency_ms:.0f} ms per call + {args.per_item_ms:.0f} ms per extra batched dispute")
+    print_table(["disputes", "path", "LLM calls", "seconds", "speedup"], rows)
+
+if __name__ == "__main__":
+    main()
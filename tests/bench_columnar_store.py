@@ -0,0 +1,64 @@
+"""
+Benchmark memory per million rows: json.load list-of-dicts versus the indexed dict
+repository versus the columnar store.
+
+Usage: python -m tests.bench_columnar_store [--rows 1000000]
+
+Memory is measured with tracemalloc, which counts every Python allocation including
+array and bytearray buffers. Each representation is measured on its own and freed.
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from app.services.columnar_store import ColumnarTransactionRepository
+from app.services.transaction_repository import TransactionRepository
+from app.utils.transaction_loader import iter_transactions
+from tests.bench_common import synthetic_transactions, print_table
+
+def measure(build):
+    """Return (result size, bytes retained, seconds) for build()."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = len(result)
+    del result
+    return size, retained, seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10 ** 6)
+    parser.add_argument("--path", default="/tmp/bench_columnar_store.json")
+    args = parser.parse_args()
+
+    with open(args.path, 'w') as f:
+        json.dump(list(synthetic_transactions(args.rows)), f)
+
+    def list_of_dicts():
+        # What DisputeService held before: json.load of the whole file
+        with open(args.path) as f:
+            return json.load(f)
+
+    builders = [
+        ("list of dicts (json.load)", list_of_dicts),
+        ("TransactionRepository", lambda: TransactionRepository(iter_transactions(args.path))),
+        ("ColumnarTransactionRepository", lambda: ColumnarTransactionRepository(iter_transactions(args.path))),
+    ]
+    results = []
+    baseline = None
+    for name, build in builders:
+        rows, retained, seconds = measure(build)
+        baseline = baseline or retained
+        per_million = retained / rows * 10 ** 6 / 2 ** 20
+        results.append([name, f"{rows:,}", f"{retained / rows:,.0f}", f"{per_million:,.0f}",
+                        f"{baseline / retained:.1f}x", f"{seconds:.2f}"])
+    print_table(["representation", "rows", "bytes/row", "MB per 1M rows", "reduction", "build s"], results)
+
+if __name__ == "__main__":
+    main()
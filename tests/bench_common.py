@@ -0,0 +1,66 @@
+"""Shared helpers for the benchmark scripts in this package (not collected by pytest)."""
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from app.utils.data_generator import REALISTIC_PATTERNS, generate_shard_lines
+
+MERCHANTS = ["Woolworths", "Coles", "Bunnings", "Kmart", "JB Hi-Fi", "Aldi", "IGA", "Uber", "Netflix", "Telstra"]
+CATEGORIES = ["Groceries", "Retail", "Dining", "Entertainment", "Transport"]
+LOCATIONS = ["Sydney, NSW", "Melbourne, VIC", "Brisbane, QLD", "Perth, WA"]
+
+def synthetic_transactions(count, num_customers=None, seed=42, days=30):
+    """Yield cheap synthetic transactions shaped like the data generator's output, dated in the last `days` days."""
+    rng = random.Random(seed)
+    num_customers = num_customers or max(1, count // 20)
+    start = datetime.now().replace(microsecond=0) - timedelta(days=days)
+    for i in range(count):
+        payment_method = rng.choice(["CARD", "BPAY", "OSKO", "DIRECT_DEBIT"])
+        yield {
+            "transaction_id": f"{rng.getrandbits(128):032x}",
+            "customer_id": f"CUST{rng.randrange(num_customers) + 1:06d}",
+            "date": (start + timedelta(seconds=rng.randrange(days * 86400))).strftime("%Y-%m-%d %H:%M:%S"),
+            "merchant": rng.choice(MERCHANTS),
+            "amount": round(rng.uniform(5, 500), 2),
+            "category": rng.choice(CATEGORIES),
+            "transaction_type": "PURCHASE",
+            "payment_method": payment_method,
+            "card_number": f"4{rng.randrange(10 ** 15):015d}" if payment_method == "CARD" else None,
+            "account_details": f"BSB: 062-000, Account: {rng.randrange(10 ** 8):08d}" if payment_method == "DIRECT_DEBIT" else None,
+            "location": rng.choice(LOCATIONS),
+            "is_fraudulent": rng.random() < 0.05
+        }
+
+def realistic_transactions(count, num_customers=None, seed=42, days=30):
+    """
+    Yield about `count` transactions with REALISTIC_PATTERNS: Zipf-skewed customer activity,
+    regular merchants, daily rhythms and fraud bursts. Reproducible for a seed on a given day.
+    """
+    num_customers = num_customers or max(1, count // 20)
+    end_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    for text, _, _ in generate_shard_lines(1, num_customers, max(1, count // num_customers), seed=seed, days=days,
+                                           end_date=end_date, patterns=REALISTIC_PATTERNS, num_customers=num_customers):
+        for line in text.splitlines():
+            yield json.loads(line)
+
+def time_per_call(func, args_list):
+    """Call func once per argument tuple and return the mean latency in microseconds."""
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / max(1, len(args_list)) * 1e6
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def print_table(headers, rows):
+    """Print rows as a simple aligned text table."""
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(c).rjust(w) for c, w in zip(row, widths)))
@@ -0,0 +1,63 @@
+"""
+Build time of the per-customer profile index, and per-dispute feature cost versus a history scan.
+
+Usage: python -m tests.bench_customer_profiles [--sizes 100000 1000000 2000000] [--customers-per-million 50000]
+
+"incremental" adds transaction dicts one at a time (the arrival path); "bulk (columnar)"
+is CustomerProfileIndex.from_repository over a loaded ColumnarTransactionRepository,
+which reads the columns without materialising rows (the startup path).
+"""
+import argparse
+import random
+import statistics
+import time
+from app.services.columnar_store import ColumnarTransactionRepository
+from app.services.customer_profiles import CustomerProfileIndex
+from tests.bench_common import synthetic_transactions, time_per_call, print_table
+
+def scan_features(repository, transaction):
+    """What computing the same features per request costs without the index."""
+    others = [t for t in repository.get_customer_transactions(transaction['customer_id'])
+              if t['transaction_id'] != transaction['transaction_id']]
+    amounts = [t['amount'] for t in others]
+    mean = statistics.fmean(amounts) if amounts else 0.0
+    std = statistics.stdev(amounts) if len(amounts) > 1 else 0.0
+    merchant_visits = sum(1 for t in others if t['merchant'] == transaction['merchant'])
+    return mean, std, merchant_visits
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 2_000_000])
+    parser.add_argument("--customers-per-million", type=int, default=50_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        customers = max(1, size * args.customers_per_million // 1_000_000)
+        transactions = list(synthetic_transactions(size, num_customers=customers))
+
+        start = time.perf_counter()
+        incremental = CustomerProfileIndex()
+        for transaction in transactions:
+            incremental.add(transaction)
+        incremental_seconds = time.perf_counter() - start
+
+        repository = ColumnarTransactionRepository(transactions)
+        start = time.perf_counter()
+        bulk = CustomerProfileIndex.from_repository(repository)
+        bulk_seconds = time.perf_counter() - start
+        assert len(bulk) == len(incremental)
+
+        sample = [(repository.get(t['transaction_id']),) for t in random.Random(1).sample(transactions, args.lookups)]
+        index_us = time_per_call(bulk.features, sample)
+        scan_us = time_per_call(lambda t: scan_features(repository, t), sample)
+        rows.append([f"{size:,}", f"{customers:,}", f"{incremental_seconds:.2f}", f"{size / incremental_seconds:,.0f}",
+                     f"{bulk_seconds:.2f}", f"{size / bulk_seconds:,.0f}", f"{index_us:.1f}", f"{scan_us:.1f}"])
+        del transactions, repository, incremental, bulk
+
+    print_table(["transactions", "customers", "incremental s", "rows/s", "bulk (columnar) s", "rows/s",
+                 "features us", "scan us"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Synthetic data generation throughput: the per-row demo generator versus bulk mode.
+
+Usage: python -m tests.bench_data_generator [--customers 50000] [--transactions-per-customer 20]
+
+"per-row" is generate_customer_transactions followed by one indented json.dump, as used
+for the demo dataset. "bulk" is generate_dataset writing JSON Lines with one worker and
+then with one worker per CPU; rows/sec per core divides by the CPU time of the workers.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from app.utils.data_generator import generate_customer_transactions, generate_dataset
+from tests.bench_common import print_table
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=50_000)
+    parser.add_argument("--transactions-per-customer", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        start, cpu_start = time.perf_counter(), time.process_time()
+        transactions = generate_customer_transactions(args.customers, args.transactions_per_customer)
+        with open(os.path.join(directory, "demo.json"), "w") as f:
+            json.dump(transactions, f, indent=2)
+        seconds, cpu_seconds = time.perf_counter() - start, time.process_time() - cpu_start
+        rows.append(("per-row", 1, len(transactions), f"{seconds:.2f}", f"{len(transactions) / seconds:,.0f}",
+                     f"{len(transactions) / cpu_seconds:,.0f}"))
+        del transactions
+
+        for workers in sorted({1, args.workers}):
+            stats = generate_dataset(os.path.join(directory, f"bulk{workers}.jsonl"), args.customers,
+                                     args.transactions_per_customer, end_date=datetime(2024, 6, 30), workers=workers)
+            rows.append(("bulk", workers, stats.rows, f"{stats.seconds:.2f}", f"{stats.rows_per_second:,.0f}",
+                         f"{stats.rows_per_core_second:,.0f}"))
+
+    print_table(["mode", "workers", "rows", "seconds", "rows/sec", "rows/sec per core"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+LLM calls and disputes created when clients retry dispute submissions.
+
+Runs the FastAPI app in this process (httpx's ASGI transport) against tests/llm_stub.py and
+submits --disputes distinct disputes, --users at a time. Each submission is a retry storm:
+a --burst of identical requests sent at once (double clicks, a client retrying on its own
+timeout while the first request is still running), then --retries sequential retries after
+the first answer. All copies of a submission carry the same Idempotency-Key header.
+
+Reports HTTP statuses, disputes stored, and LLM calls (requests the stub saw) per distinct
+dispute. Triage is off and the assessment cache is --cache so every analysis is visible.
+
+    python -m tests.bench_dispute_dedup --disputes 200 --burst 3 --retries 2 --cache none
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+import httpx
+from app.utils.data_generator import generate_dataset
+from app.utils.transaction_loader import iter_transactions
+from tests.bench_common import print_table
+from tests.llm_stub import start_stub_server
+
+def disputable(data_file, config, count, seed):
+    """`count` transactions that pass dispute validation: recent enough and under the amount limit."""
+    cutoff = datetime.now() - timedelta(days=config.DISPUTE_TIME_LIMIT_DAYS - 1)
+    candidates = [t for t in iter_transactions(data_file)
+                  if t["amount"] <= config.MAX_DISPUTE_AMOUNT
+                  and datetime.strptime(t["date"], "%Y-%m-%d %H:%M:%S") >= cutoff]
+    return random.Random(seed).sample(candidates, min(count, len(candidates)))
+
+async def submit(client, transaction, number, burst, retries, statuses, dispute_ids):
+    customer_id = transaction["customer_id"]
+    headers = {"X-Customer-Id": customer_id, "Idempotency-Key": f"bench-{number}"}
+
+    def post():
+        return client.post("/api/disputes", headers=headers, params={"customer_id": customer_id}, json={
+            "customer_id": customer_id, "transaction_id": transaction["transaction_id"],
+            "reason": "Unauthorized transaction", "description": "I do not recognise this transaction"
+        })
+
+    responses = list(await asyncio.gather(*(post() for _ in range(burst))))
+    for _ in range(retries):
+        responses.append(await post())
+    for response in responses:
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code < 400:
+            dispute_ids.add(response.json()["dispute_id"])
+
+async def drive(app, transactions, args):
+    statuses, dispute_ids = {}, set()
+    numbered = iter(enumerate(transactions))
+
+    async def user(client):
+        for number, transaction in numbered:
+            await submit(client, transaction, number, args.burst, args.retries, statuses, dispute_ids)
+
+    from app.api.dependencies import get_dispute_service
+    async with app.router.lifespan_context(app):
+        service = await get_dispute_service()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(user(client) for _ in range(args.users)))
+            seconds = time.perf_counter() - start
+    return statuses, dispute_ids, seconds, service
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--disputes", type=int, default=200, help="distinct disputes submitted")
+    parser.add_argument("--burst", type=int, default=3, help="identical requests sent at once per dispute")
+    parser.add_argument("--retries", type=int, default=2, help="sequential retries after the first answer")
+    parser.add_argument("--users", type=int, default=16, help="disputes submitted concurrently")
+    parser.add_argument("--latency-ms", type=float, default=150, help="LLM stub latency")
+    parser.add_argument("--cache", choices=["none", "memory"], default="none", help="LLM assessment cache backend")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # one line per request otherwise
+
+    from app.config import Config
+    server = start_stub_server(latency_ms=args.latency_ms, seed=args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = os.path.join(directory, "transactions.jsonl")
+        end_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        generate_dataset(data_file, max(1, args.disputes // 2), 20, seed=args.seed, end_date=end_date, workers=1)
+        transactions = disputable(data_file, Config, args.disputes, args.seed)
+        Config.DATA_FILE = data_file
+        Config.OPENAI_BASE_URL = server.base_url
+        Config.OPENAI_API_KEY = "stub"
+        Config.LLM_CACHE_BACKEND = args.cache
+        Config.TRIAGE_ENABLED = False
+        Config.DISPUTE_STORE = "memory"
+        from app.main import app
+        statuses, dispute_ids, seconds, dispute_service = asyncio.run(drive(app, transactions, args))
+    server.shutdown()
+    server.server_close()
+
+    submissions = len(transactions) * (args.burst + args.retries)
+    stored = sum(len(dispute_service.get_customer_disputes(c)) for c in {t["customer_id"] for t in transactions})
+    llm_calls = server.stats["requests"]
+    print(f"{len(transactions)} disputes x ({args.burst} concurrent + {args.retries} retries) = {submissions} "
+          f"submissions in {seconds:.1f}s; stub {args.latency_ms:.0f}ms, cache {args.cache}")
+    print_table(["statuses", "disputes stored", "distinct ids returned", "LLM calls", "LLM calls/dispute"],
+                [[", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())), stored,
+                  len(dispute_ids), llm_calls, f"{llm_calls / len(transactions):.2f}"]])
+    duplicates = getattr(dispute_service, "duplicate_stats", None)
+    if duplicates is not None:
+        print(f"Duplicates answered without analysis: {duplicates}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Dispute store benchmark: write throughput and read latency at 10^6 disputes.
+
+Usage: python -m tests.bench_dispute_repository [--disputes 1000000] [--customers 50000]
+
+Writes are timed for the group-committed SQLite store, for SQLite committing every write
+(on a sample, since it is fsync-bound) and for the in-memory store. Reads are point lookups
+and per-customer listings against the filled store, next to the full-dict scan that
+get_customer_disputes used before.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import uuid
+from app.services.dispute_repository import InMemoryDisputeRepository, SQLiteDisputeRepository
+from tests.bench_common import percentile, print_table
+
+def synthetic_disputes(count, customers, seed=42):
+    rng = random.Random(seed)
+    for i in range(count):
+        dispute_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        yield {
+            "dispute_id": dispute_id,
+            "transaction_id": f"{rng.getrandbits(128):032x}",
+            "customer_id": f"CUST{rng.randrange(customers) + 1:06d}",
+            "reason": "Unauthorized transaction",
+            "description": "I did not make this purchase",
+            "contact_phone": None,
+            "contact_email": None,
+            "status": rng.choice(["UNDER_REVIEW", "UNDER_REVIEW", "PENDING_ANALYSIS", "RESOLVED"]),
+            "created_at": f"2024-{1 + i * 12 // count:02d}-01 12:00:00",
+            "reference_number": f"DSP-{dispute_id[:8].upper()}",
+            "estimated_resolution_time": "2024-02-01",
+            "fraud_likelihood": "HIGH",
+            "next_steps": ["Block the card", "Issue a provisional credit"],
+            "ai_assessment": "Stub assessment: fraud likelihood high based on merchant and location.",
+            "ai_analysis": {"fraud_likelihood": "HIGH", "recommended_actions": ["Block the card"]}
+        }
+
+def timed_writes(repository, disputes):
+    start = time.perf_counter()
+    for dispute in disputes:
+        repository.save(dispute)
+    repository.flush()
+    return time.perf_counter() - start
+
+def read_latencies(func, keys):
+    samples = []
+    for key in keys:
+        start = time.perf_counter()
+        func(key)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--disputes", type=int, default=1_000_000)
+    parser.add_argument("--customers", type=int, default=50_000)
+    parser.add_argument("--per-write-sample", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    disputes = list(synthetic_disputes(args.disputes, args.customers))
+    rng = random.Random(1)
+    sample = rng.sample(disputes, args.reads)
+    write_rows, read_rows = [], []
+    with tempfile.TemporaryDirectory() as directory:
+        per_write = SQLiteDisputeRepository(os.path.join(directory, "per_write.sqlite3"), commit_interval_ms=0)
+        seconds = timed_writes(per_write, disputes[:args.per_write_sample])
+        write_rows.append(["sqlite, commit per write", f"{args.per_write_sample:,}", f"{seconds:.2f}",
+                           f"{args.per_write_sample / seconds:,.0f}"])
+        per_write.close()
+
+        store = SQLiteDisputeRepository(os.path.join(directory, "disputes.sqlite3"))
+        seconds = timed_writes(store, disputes)
+        write_rows.append(["sqlite, group commit", f"{args.disputes:,}", f"{seconds:.2f}", f"{args.disputes / seconds:,.0f}"])
+
+        memory = InMemoryDisputeRepository()
+        seconds = timed_writes(memory, disputes)
+        write_rows.append(["memory", f"{args.disputes:,}", f"{seconds:.2f}", f"{args.disputes / seconds:,.0f}"])
+
+        as_dict = {d["dispute_id"]: d for d in disputes}
+        customers = [d["customer_id"] for d in sample]
+        scan_sample = customers[:20]  # a full scan per call is slow; a few are enough
+        reads = [
+            ("sqlite", "get", read_latencies(store.get, [d["dispute_id"] for d in sample])),
+            ("sqlite", "get_customer_disputes", read_latencies(store.get_customer_disputes, customers)),
+            ("memory", "get_customer_disputes", read_latencies(memory.get_customer_disputes, customers)),
+            ("dict scan (before)", "get_customer_disputes", read_latencies(
+                lambda c: [d for d in as_dict.values() if d['customer_id'] == c], scan_sample)),
+        ]
+        for name, operation, samples in reads:
+            read_rows.append([name, operation, len(samples), f"{percentile(samples, 50):,.1f}",
+                              f"{percentile(samples, 99):,.1f}"])
+        size_mb = os.path.getsize(store.path) / 1e6
+        store.close()
+
+    print(f"{args.disputes:,} disputes over {args.customers:,} customers (SQLite file {size_mb:,.0f} MB)")
+    print_table(["store", "writes", "seconds", "writes/sec"], write_rows)
+    print()
+    print_table(["store", "operation", "calls", "p50 us", "p99 us"], read_rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+End-to-end load test: the FastAPI app under a mixed read/dispute workload against the LLM stub.
+
+Usage: python -m tests.bench_e2e [--server inprocess|uvicorn] [--transactions 200000] [--users 32]
+                                 [--duration 20] [--read-ratio 0.8] [--latency-ms 150] [--error-rate 0.02]
+                                 [--output bench_results/e2e-<commit>.json] [--compare OLD.json]
+
+A realistic dataset (skewed customer activity, regular merchants, fraud bursts) is generated
+and served by the app, either in this process through httpx's ASGI transport or as a
+uvicorn subprocess over HTTP (--workers processes). OpenAIService talks to tests.llm_stub,
+which answers after --latency-ms and fails --error-rate of calls.
+
+--users virtual users each loop for --duration seconds: with probability --read-ratio they
+read (a page of a customer's transactions, or one transaction), otherwise they dispute one
+of the customer's transactions that has not been disputed yet. Customers are picked in
+proportion to their activity.
+
+Throughput, p50/p95/p99 latency and status codes per operation, peak memory, and the
+triage and LLM cache counters are printed and written as JSON to --output. With --compare,
+the run is diffed against an earlier result file so regressions show up between commits.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import httpx
+from app.utils.data_generator import REALISTIC_PATTERNS, generate_dataset
+from app.utils.transaction_loader import iter_transactions, peak_rss_mb
+from tests.bench_common import percentile, print_table
+from tests.llm_stub import start_stub_server
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Workload:
+    """What the virtual users draw from: customers weighted by activity and their undisputed transactions."""
+
+    def __init__(self, transactions, max_dispute_amount, seed):
+        self.rng = random.Random(seed)
+        self.activity = []  # one entry per transaction, so customers are drawn in proportion to activity
+        self.by_customer = {}
+        self.disputable = {}
+        for transaction in transactions:
+            customer_id = transaction["customer_id"]
+            self.activity.append(customer_id)
+            self.by_customer.setdefault(customer_id, []).append(transaction["transaction_id"])
+            if transaction["amount"] <= max_dispute_amount:
+                self.disputable.setdefault(customer_id, []).append(transaction["transaction_id"])
+        for transaction_ids in self.disputable.values():
+            self.rng.shuffle(transaction_ids)
+
+    def customer(self):
+        return self.rng.choice(self.activity)
+
+    def transaction(self, customer_id):
+        return self.rng.choice(self.by_customer[customer_id])
+
+    def next_dispute(self, customer_id):
+        """A transaction of this customer not disputed yet, or None once all have been."""
+        transaction_ids = self.disputable.get(customer_id)
+        return transaction_ids.pop() if transaction_ids else None
+
+async def virtual_user(client, workload, read_ratio, deadline, samples):
+    rng = workload.rng
+    while time.perf_counter() < deadline:
+        customer_id = workload.customer()
+        headers = {"X-Customer-Id": customer_id}
+        transaction_id = None if rng.random() < read_ratio else workload.next_dispute(customer_id)
+        if transaction_id is not None:
+            operation = "dispute"
+            # verify_customer reads the customer from the query string on this route
+            request = client.post("/api/disputes", headers=headers, params={"customer_id": customer_id}, json={
+                "customer_id": customer_id, "transaction_id": transaction_id,
+                "reason": "Unauthorized transaction", "description": "I do not recognise this transaction"
+            })
+        elif rng.random() < 0.5:
+            operation = "list_transactions"
+            request = client.get(f"/api/transactions/{customer_id}", headers=headers, params={"limit": 100})
+        else:
+            operation = "get_transaction"
+            request = client.get(f"/api/transactions/{customer_id}/{workload.transaction(customer_id)}",
+                                 headers=headers)
+
+        start = time.perf_counter()
+        try:
+            status = (await request).status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        samples.append((operation, (time.perf_counter() - start) * 1000, status))
+
+def summarise(samples, seconds):
+    results = {}
+    for operation in sorted({s[0] for s in samples}):
+        latencies = [s[1] for s in samples if s[0] == operation]
+        statuses = {}
+        for s in samples:
+            if s[0] == operation:
+                statuses[str(s[2])] = statuses.get(str(s[2]), 0) + 1
+        ok = sum(count for status, count in statuses.items() if status.isdigit() and int(status) < 400)
+        results[operation] = {
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / seconds, 1),
+            "error_rate": round(1 - ok / len(latencies), 4),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "statuses": statuses
+        }
+    return results
+
+async def drive(client, workload, args):
+    samples = []
+    deadline = time.perf_counter() + args.warmup
+    await asyncio.gather(*(virtual_user(client, workload, args.read_ratio, deadline, []) for _ in range(args.users)))
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(virtual_user(client, workload, args.read_ratio, deadline, samples)
+                           for _ in range(args.users)))
+    seconds = time.perf_counter() - start
+
+    counters = {}
+    for name in ("triage", "llm-cache"):
+        response = await client.get(f"/api/admin/{name}", headers={"X-Admin-Key": args.admin_key})
+        counters[name] = response.json() if response.status_code == 200 else None
+    return samples, seconds, counters
+
+async def run_inprocess(args, data_file, base_url):
+    from app.config import Config
+    Config.DATA_FILE = data_file
+    Config.OPENAI_BASE_URL = base_url
+    Config.OPENAI_API_KEY = "stub"
+    Config.ADMIN_API_KEY = args.admin_key
+    from app.api.dependencies import get_dispute_service
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        await get_dispute_service()  # loads DATA_FILE
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            results = await drive(client, args.workload, args)
+    return results, {"peak_rss_mb": round(peak_rss_mb(), 1), "note": "load generator and app share this process"}
+
+def process_tree_rss_mb(pid):
+    """Current resident memory of a process and its children (e.g. uvicorn workers), in MB."""
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+        except (OSError, StopIteration):
+            continue
+    return total / 1024
+
+async def run_uvicorn(args, data_file, base_url):
+    env = dict(os.environ, DATA_FILE=data_file, OPENAI_BASE_URL=base_url, OPENAI_API_KEY="stub",
+               ADMIN_API_KEY=args.admin_key, LOG_LEVEL="WARNING")
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port),
+               "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"]
+    process = subprocess.Popen(command, cwd=REPOSITORY_ROOT, env=env)
+    peak = 0.0
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=60,
+                                     limits=httpx.Limits(max_connections=args.users)) as client:
+            for _ in range(600):
+                try:
+                    if (await client.get("/ready")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if process.poll() is not None:
+                    raise RuntimeError("uvicorn exited during startup")
+                await asyncio.sleep(0.1)
+
+            async def sample_memory():
+                nonlocal peak
+                while True:
+                    peak = max(peak, process_tree_rss_mb(process.pid))
+                    await asyncio.sleep(0.25)
+
+            sampler = asyncio.create_task(sample_memory())
+            try:
+                results = await drive(client, args.workload, args)
+            finally:
+                sampler.cancel()
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return results, {"peak_rss_mb": round(peak, 1), "note": f"uvicorn with {args.workers} workers, sampled every 250 ms"}
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPOSITORY_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(previous, current):
+    rows = []
+    for operation, result in current["operations"].items():
+        before = previous.get("operations", {}).get(operation)
+        if not before:
+            continue
+        for metric in ("throughput_rps", "p50_ms", "p99_ms"):
+            change = (result[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+            rows.append([operation, metric, before[metric], result[metric], f"{change:+.1f}%"])
+    if rows:
+        print(f"\nVersus {previous.get('commit')} ({previous.get('timestamp')}):")
+        print_table(["operation", "metric", "before", "after", "change"], rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--transactions", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=32, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds first")
+    parser.add_argument("--read-ratio", type=float, default=0.8)
+    parser.add_argument("--latency-ms", type=float, default=150, help="LLM stub latency")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="share of LLM stub calls that fail")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="result file (default: bench_results/e2e-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to diff against")
+    args = parser.parse_args()
+    args.admin_key = secrets.token_hex(16)
+
+    from app.config import Config
+    commit = git_commit()
+    server = start_stub_server(latency_ms=args.latency_ms, error_rate=args.error_rate, seed=args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = os.path.join(directory, "transactions.jsonl")
+        end_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        generate_dataset(data_file, max(1, args.transactions // 20), 20, seed=args.seed, end_date=end_date,
+                         workers=1, patterns=REALISTIC_PATTERNS)
+        args.workload = Workload(iter_transactions(data_file), Config.MAX_DISPUTE_AMOUNT, args.seed)
+        runner = run_uvicorn if args.server == "uvicorn" else run_inprocess
+        (samples, seconds, counters), memory = asyncio.run(runner(args, data_file, server.base_url))
+    server.shutdown()
+
+    result = {
+        "benchmark": "e2e",
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: getattr(args, key) for key in ("server", "workers", "transactions", "users", "duration",
+                                                       "read_ratio", "latency_ms", "error_rate", "seed")},
+        "total_rps": round(len(samples) / seconds, 1),
+        "operations": summarise(samples, seconds),
+        "memory": memory,
+        "llm_stub": dict(server.stats),
+        "counters": counters
+    }
+
+    print(f"{len(samples)} requests in {seconds:.1f}s ({result['total_rps']} req/s), "
+          f"{args.users} users, peak RSS {memory['peak_rss_mb']} MB")
+    print_table(
+        ["operation", "requests", "req/s", "errors", "p50 ms", "p95 ms", "p99 ms"],
+        [[name, r["requests"], r["throughput_rps"], f"{r['error_rate']:.1%}", r["p50_ms"], r["p95_ms"], r["p99_ms"]]
+         for name, r in result["operations"].items()]
+    )
+
+    output = args.output or os.path.join("bench_results", f"e2e-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), result)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Latency of LLM dispute analysis against a degraded provider, with and without the resilience policy.
+
+Runs OpenAIService.analyze_dispute_async against tests/llm_stub.py configured with a slow
+tail (--slow-rate of calls take --slow-ms) and, optionally, errors. Each policy gets a fresh
+stub with the same seed; the assessment cache is off so every dispute reaches the stub.
+A final scenario takes the provider down entirely to show the circuit breaker's fallback.
+
+    python -m tests.bench_llm_resilience --calls 400 --users 16 --slow-rate 0.05 --slow-ms 3000
+"""
+import argparse
+import asyncio
+import logging
+import time
+from app.config import Config
+from app.models.transaction import DisputeRequest
+from app.services.llm_client import CircuitBreaker, ResilientLLMClient, RetryBudget
+from app.services.openai_service import OpenAIService
+from app.services.triage import DisputeTriage
+from tests.bench_common import percentile, print_table
+from tests.llm_stub import start_stub_server
+from tests.test_transaction_repository import make_transaction
+
+def make_service(base_url, client):
+    Config.OPENAI_BASE_URL = base_url
+    Config.OPENAI_API_KEY = Config.OPENAI_API_KEY or "bench-key"
+    service = OpenAIService(fallback=DisputeTriage().fallback_analysis)
+    service.cache = None
+    service.llm_client = client
+    return service
+
+async def drive(service, calls, users):
+    request = DisputeRequest(customer_id="CUST000001", transaction_id="t0", reason="Unauthorized transaction",
+                             description="I did not make this purchase")
+    latencies, outcomes = [], {}
+    counter = iter(range(calls))
+
+    async def user():
+        for i in counter:
+            transaction = make_transaction(f"t{i}", merchant=f"Merchant {i}")
+            start = time.perf_counter()
+            result = await service.analyze_dispute_async(transaction, request)
+            latencies.append((time.perf_counter() - start) * 1000)
+            outcome = "fallback" if result.get("fallback") else result["fraud_likelihood"]
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    try:
+        await asyncio.gather(*(user() for _ in range(users)))
+    finally:
+        await service.close()
+    return latencies, outcomes
+
+def run(name, args, client, error_rate=None):
+    server = start_stub_server(latency_ms=args.latency_ms, error_rate=args.error_rate if error_rate is None else error_rate,
+                               slow_rate=args.slow_rate, slow_ms=args.slow_ms, seed=args.seed)
+    try:
+        service = make_service(server.base_url, client)
+        latencies, outcomes = asyncio.run(drive(service, args.calls, args.users))
+    finally:
+        server.shutdown()
+        server.server_close()
+    failed = outcomes.get("ERROR", 0)
+    return [name, f"{percentile(latencies, 50):.0f}", f"{percentile(latencies, 95):.0f}",
+            f"{percentile(latencies, 99):.0f}", f"{failed / args.calls:.1%}", outcomes.get("fallback", 0),
+            f"{server.stats['requests'] / args.calls:.2f}", client.breaker.state]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--users", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-ms", type=float, default=3000)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--hedge-after-ms", type=float, default=250)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.CRITICAL)  # every injected failure is logged otherwise
+
+    def breaker():
+        return CircuitBreaker(failure_rate=0.5, min_calls=20, window=50, open_seconds=30)
+
+    rows = [
+        run("no retries, 30s timeout", args, ResilientLLMClient(
+            max_retries=0, attempt_timeout=30, deadline_seconds=30, hedge_after_seconds=0, breaker=breaker())),
+        run("retries + 0.5s attempt timeout", args, ResilientLLMClient(
+            max_retries=2, attempt_timeout=0.5, deadline_seconds=2, backoff_base_seconds=0.05,
+            hedge_after_seconds=0, breaker=breaker())),
+        run(f"+ hedge after {args.hedge_after_ms:.0f}ms", args, ResilientLLMClient(
+            max_retries=2, attempt_timeout=0.5, deadline_seconds=2, backoff_base_seconds=0.05,
+            hedge_after_seconds=args.hedge_after_ms / 1000.0, budget=RetryBudget(ratio=0.2, min_per_second=1),
+            breaker=breaker())),
+        run("provider down, breaker", args, ResilientLLMClient(
+            max_retries=2, attempt_timeout=0.5, deadline_seconds=2, backoff_base_seconds=0.05,
+            hedge_after_seconds=0, breaker=breaker()), error_rate=1.0),
+    ]
+    print(f"{args.calls} analyses, {args.users} concurrent; stub {args.latency_ms:.0f}ms, "
+          f"{args.slow_rate:.0%} of calls {args.slow_ms:.0f}ms, {args.error_rate:.0%} errors")
+    print_table(["policy", "p50 ms", "p95 ms", "p99 ms", "errors", "fallbacks", "upstream calls/analysis",
+                 "circuit"], rows)
+
+if __name__ == "__main__":
+    main()
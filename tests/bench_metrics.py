@@ -0,0 +1,71 @@
+"""
+Overhead of the metrics instrumentation.
+
+Times a bare histogram observation and a span, then the same FastAPI route called
+in-process with and without RequestTimingMiddleware.
+
+    python -m tests.bench_metrics --requests 5000
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from fastapi import FastAPI
+from app.utils import metrics
+from tests.bench_common import print_table
+
+def build_app(instrumented):
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(metrics.RequestTimingMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"item_id": item_id}
+    return app
+
+async def request_latency_us(app, requests):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for i in range(200):
+            await client.get(f"/items/{i}")
+        start = time.perf_counter()
+        for i in range(requests):
+            await client.get(f"/items/{i}")
+        return (time.perf_counter() - start) / requests * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    histogram = metrics.MetricsRegistry().histogram("bench_seconds", "Bench", ("span",))
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        histogram.observe(0.003, "bench")
+    observe_us = (time.perf_counter() - start) / args.calls * 1e6
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        with metrics.span("bench"):
+            pass
+    span_us = (time.perf_counter() - start) / args.calls * 1e6
+
+    # Alternate the two apps and keep the best round of each to damp scheduling noise
+    plain_app, timed_app = build_app(False), build_app(True)
+    plain = timed = float("inf")
+    for _ in range(args.rounds):
+        plain = min(plain, asyncio.run(request_latency_us(plain_app, args.requests)))
+        timed = min(timed, asyncio.run(request_latency_us(timed_app, args.requests)))
+
+    print_table(["measurement", "us"], [
+        ["histogram.observe", f"{observe_us:.2f}"],
+        ["span (enter + exit)", f"{span_us:.2f}"],
+        ["request, no middleware", f"{plain:.1f}"],
+        ["request, timing middleware", f"{timed:.1f}"],
+        ["middleware overhead", f"{timed - plain:.1f} ({(timed - plain) / plain:.1%})"],
+    ])
+
+if __name__ == "__main__":
+    main()
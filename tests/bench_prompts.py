@@ -0,0 +1,84 @@
+"""
+Prompt size per dispute and how often replies fail to parse.
+
+Builds analysis prompts for realistic generated transactions with short and long customer
+descriptions, and counts system + user tokens with and without the prompt budget. Then
+parses stub replies, a --malformed-rate share of them broken the ways real models break
+JSON, with plain json.loads and with extract_json.
+
+    python -m tests.bench_prompts --disputes 2000 --malformed-rate 0.1
+"""
+import argparse
+import json
+import random
+import time
+from app.models.transaction import DisputeRequest
+from app.services.customer_profiles import CustomerProfileIndex
+from app.services.prompt_builder import SYSTEM_PROMPT, build_dispute_prompt, count_tokens
+from app.services.transaction_repository import create_transaction_repository
+from app.utils.structured_output import extract_json
+from tests.bench_common import percentile, print_table, realistic_transactions
+from tests.llm_stub import MALFORMATIONS, assess
+
+DESCRIPTIONS = [
+    "I did not make this purchase",
+    "I don't recognise this merchant and my card has been with me the whole time.",
+    "My wallet was stolen on the train last week. I reported it to police and have a report number. "
+    "Since then I have seen several charges I did not make, including this one, and I'm worried more "
+    "will follow. I have never been to this shop and I was at work at the time of the transaction. " * 3,
+]
+
+def json_loads_or_none(text):
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--disputes", type=int, default=2000)
+    parser.add_argument("--malformed-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    repository = create_transaction_repository()
+    repository.add_many(realistic_transactions(args.disputes * 5, seed=args.seed))
+    profiles = CustomerProfileIndex.from_repository(repository)
+    sample = rng.sample(list(repository), args.disputes)
+    disputes = []
+    for transaction in sample:
+        request = DisputeRequest(customer_id=transaction['customer_id'], transaction_id=transaction['transaction_id'],
+                                 reason="Unauthorized transaction", description=rng.choice(DESCRIPTIONS))
+        disputes.append((dict(transaction, customer_profile=profiles.features(transaction)), request))
+
+    system_tokens = count_tokens(SYSTEM_PROMPT)
+    rows = []
+    for label, budget in (("no budget", 0), ("default budget", None)):
+        start = time.perf_counter()
+        tokens = [system_tokens + count_tokens(build_dispute_prompt(t, r, budget=budget)) for t, r in disputes]
+        build_us = (time.perf_counter() - start) / len(disputes) * 1e6
+        rows.append([label, f"{sum(tokens) / len(tokens):.0f}", percentile(tokens, 95), max(tokens), f"{build_us:.0f}"])
+    print(f"{args.disputes} disputes; system prompt {system_tokens} tokens")
+    print_table(["prompt", "mean tokens", "p95 tokens", "max tokens", "build+count us"], rows)
+
+    replies = []
+    for transaction, request in disputes:
+        content = json.dumps(assess(build_dispute_prompt(transaction, request)))
+        if rng.random() < args.malformed_rate:
+            content = MALFORMATIONS[rng.choice(sorted(MALFORMATIONS))](content)
+        replies.append(content)
+    rows = []
+    for label, parse in (("json.loads", json_loads_or_none), ("extract_json", extract_json)):
+        start = time.perf_counter()
+        parsed = [parse(reply) for reply in replies]
+        parse_us = (time.perf_counter() - start) / len(replies) * 1e6
+        failures = sum(1 for value in parsed
+                       if value is None or str(value.get("fraud_likelihood", "")).upper() not in ("HIGH", "MEDIUM", "LOW"))
+        rows.append([label, f"{failures / len(replies):.2%}", f"{parse_us:.1f}"])
+    print(f"\n{len(replies)} replies, {args.malformed_rate:.0%} malformed")
+    print_table(["parser", "parse failures (manual review)", "us per reply"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Throughput and cost of the bulk re-assessment CLI as the worker pool grows.
+
+Builds a SQLite dispute store with --disputes open disputes over a generated dataset, then
+runs `python -m app.utils.reassess --restart` against tests/llm_stub.py for each --processes
+count (and once with --max-rate to show the limiter holding), reading the JSON report it
+prints. Triage is off so every dispute is analysed by the stub. For comparison, --baseline
+disputes are first analysed one analyze_dispute call at a time, as through the API.
+
+    python -m tests.bench_reassess --disputes 2000 --processes 0,1,2,4 --latency-ms 150
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from app.services.dispute_repository import SQLiteDisputeRepository
+from app.utils.data_generator import generate_dataset
+from app.utils.transaction_loader import iter_transactions
+from tests.bench_common import print_table
+from tests.bench_e2e import REPOSITORY_ROOT
+from tests.llm_stub import start_stub_server
+
+def build_store(path, data_file, count, seed):
+    transactions = random.Random(seed).sample(list(iter_transactions(data_file)), count)
+    store = SQLiteDisputeRepository(path)
+    store.save_many([{
+        "dispute_id": f"{i:08d}", "customer_id": t["customer_id"], "transaction_id": t["transaction_id"],
+        "reason": "Unauthorized transaction", "description": "I do not recognise this transaction",
+        "status": "UNDER_REVIEW", "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "fraud_likelihood": "UNKNOWN"
+    } for i, t in enumerate(transactions)])
+    store.close()
+
+def sequential_rate(data_file, count, base_url):
+    """Disputes per second analysed one blocking analyze_dispute call at a time."""
+    from app.config import Config
+    from app.models.transaction import DisputeRequest
+    from app.services.openai_service import OpenAIService
+    Config.OPENAI_BASE_URL = base_url
+    Config.OPENAI_API_KEY = "stub"
+    service = OpenAIService()
+    service.cache = None
+    transactions = list(itertools.islice(iter_transactions(data_file), count))
+    started = time.perf_counter()
+    for transaction in transactions:
+        service.analyze_dispute(transaction, DisputeRequest(
+            customer_id=transaction["customer_id"], transaction_id=transaction["transaction_id"],
+            reason="Unauthorized transaction", description="I do not recognise this transaction"))
+    return count / (time.perf_counter() - started)
+
+def run_cli(args, env, processes, max_rate=0):
+    command = [sys.executable, "-m", "app.utils.reassess", "--restart", "--no-triage", "--processes", str(processes),
+               "--chunk-size", str(args.chunk_size), "--max-rate", str(max_rate), "--checkpoint", args.checkpoint]
+    started = time.perf_counter()
+    output = subprocess.run(command, cwd=REPOSITORY_ROOT, env=env, stdout=subprocess.PIPE, text=True, check=True).stdout
+    wall = time.perf_counter() - started
+    return json.loads(output[:output.rindex("}") + 1]), wall
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--disputes", type=int, default=2000)
+    parser.add_argument("--processes", default="0,1,2,4")
+    parser.add_argument("--chunk-size", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--max-rate", type=float, default=100, help="rate for the limited run")
+    parser.add_argument("--baseline", type=int, default=50, help="disputes analysed sequentially for comparison")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    server = start_stub_server(latency_ms=args.latency_ms, seed=args.seed)
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = os.path.join(directory, "transactions.jsonl")
+        generate_dataset(data_file, max(1, args.disputes // 4), 20, seed=args.seed, workers=1)
+        db_path = os.path.join(directory, "disputes.sqlite3")
+        build_store(db_path, data_file, args.disputes, args.seed)
+        args.checkpoint = os.path.join(directory, "checkpoint.json")
+        baseline = sequential_rate(data_file, args.baseline, server.base_url) if args.baseline else None
+        env = dict(os.environ, DATA_FILE=data_file, DISPUTE_DB_PATH=db_path, OPENAI_BASE_URL=server.base_url,
+                   OPENAI_API_KEY="stub", LOG_LEVEL="WARNING", LLM_CACHE_BACKEND="none")
+        runs = [(int(n), 0) for n in args.processes.split(",")] + [(max(1, int(args.processes.split(",")[-1])),
+                                                                     args.max_rate)]
+        for processes, max_rate in runs:
+            before = server.stats["requests"]
+            report, wall = run_cli(args, env, processes, max_rate)
+            rows.append([processes, max_rate or "-", report["disputes"], report["written"],
+                         server.stats["requests"] - before, f"{report['seconds']:.1f}", f"{wall:.1f}",
+                         report["disputes_per_second"], report["prompt_tokens"] + report["completion_tokens"],
+                         f"{report['estimated_cost_usd']:.2f}", report["estimated_cost_per_1000_analysed_usd"]])
+            print(f"processes={processes} max_rate={max_rate} done", file=sys.stderr)
+    server.shutdown()
+    server.server_close()
+
+    print(f"{args.disputes} disputes, chunks of {args.chunk_size}, stub {args.latency_ms:.0f}ms, "
+          f"{os.cpu_count()} CPUs")
+    if baseline:
+        print(f"One analyze_dispute call at a time: {baseline:.1f} disputes/s")
+    print_table(["processes", "max rate/s", "disputes", "written", "LLM calls", "run s", "wall s", "disputes/s",
+                 "tokens", "est. cost $", "$ per 1000"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Micro-benchmark: response serialisation per 10k rows, FastAPI's response_model path versus
+TrustedJSONResponse.
+
+Usage: python -m tests.bench_serialisation [--rows 10000] [--repeats 5]
+
+"response_model" runs what FastAPI does for a route declaring List[Transaction] or
+List[DisputeResponse]: validate every row into the model, convert it back with
+jsonable_encoder, and encode with JSONResponse. The trusted rows project the stored
+dicts onto the model's fields and encode them directly.
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.api import responses
+from app.api.responses import TrustedJSONResponse, model_fields, project
+from app.models.transaction import Transaction, DisputeResponse
+from tests.bench_common import synthetic_transactions, print_table
+
+def synthetic_disputes(transactions):
+    return [{
+        "dispute_id": f"d{i}", "transaction_id": t["transaction_id"], "customer_id": t["customer_id"],
+        "status": "UNDER_REVIEW", "created_at": t["date"], "estimated_resolution_time": "2024-02-01",
+        "next_steps": ["Block the card", "Issue a provisional credit"], "reference_number": f"DSP-{i:08d}",
+        "ai_assessment": "Stub assessment: fraud likelihood high based on merchant and location.",
+        "fraud_likelihood": "HIGH", "reason": "Unauthorized transaction", "description": "Not me",
+        "contact_phone": None, "contact_email": None, "ai_analysis": {"fraud_likelihood": "HIGH"}
+    } for i, t in enumerate(transactions)]
+
+def best_of(repeats, func):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        body = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(body)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    transactions = list(synthetic_transactions(args.rows))
+    datasets = [("Transaction", Transaction, transactions), ("DisputeResponse", DisputeResponse, synthetic_disputes(transactions))]
+    rows = []
+    for name, model, records in datasets:
+        field = create_response_field(name=f"Response_{name}", type_=List[model])
+        fields = model_fields(model)
+
+        def response_model_path():
+            content = asyncio.run(serialize_response(field=field, response_content=records))
+            return JSONResponse(content).body
+
+        def trusted(encoder):
+            def run():
+                with_orjson = responses.orjson
+                responses.orjson = encoder
+                try:
+                    return TrustedJSONResponse([project(r, fields) for r in records]).body
+                finally:
+                    responses.orjson = with_orjson
+            return run
+
+        baseline, size = best_of(args.repeats, response_model_path)
+        rows.append([name, "response_model", f"{baseline * 1000:,.1f}", "1.0x", f"{size / 1e6:.2f}"])
+        for label, encoder in (("trusted, json", None), ("trusted, orjson", responses.orjson)):
+            if label.endswith("orjson") and encoder is None:
+                continue
+            seconds, size = best_of(args.repeats, trusted(encoder))
+            rows.append([name, label, f"{seconds * 1000:,.1f}", f"{baseline / seconds:.1f}x", f"{size / 1e6:.2f}"])
+
+    print(f"Serialising {args.rows:,} rows (best of {args.repeats})")
+    print_table(["model", "path", "ms", "speedup", "MB"], rows)
+
+if __name__ == "__main__":
+    main()
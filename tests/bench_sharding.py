@@ -0,0 +1,140 @@
+"""
+Memory per worker and throughput as the API is spread over more processes, sharded or not.
+
+For each count in --shards, runs the e2e workload from tests/bench_e2e.py (mixed reads and
+disputes against the LLM stub) over HTTP against:
+
+  workers  uvicorn --workers N: every worker loads the whole dataset
+  shards   python -m app.sharded --shards N: each worker loads 1/N of the customers, behind
+           the router, which forwards over Unix sockets
+
+Resident memory of every process is sampled during the run; "per worker" is the largest
+worker process and "total" the whole process tree (including the router for shards).
+
+    python -m tests.bench_sharding --transactions 200000 --shards 1,2,4 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import httpx
+from app.config import Config
+from app.utils.data_generator import REALISTIC_PATTERNS, generate_dataset
+from app.utils.transaction_loader import iter_transactions
+from tests.bench_common import print_table
+from tests.bench_e2e import REPOSITORY_ROOT, Workload, drive, summarise
+from tests.llm_stub import start_stub_server
+
+def process_tree_rss_mb(pid):
+    """{pid: resident MB} for a process and all its descendants."""
+    sizes, pending = {}, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                sizes[current] = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:")) / 1024
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+        except (OSError, StopIteration):
+            continue
+    return sizes
+
+def start_server(mode, count, args, env):
+    if mode == "workers":
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port),
+                   "--workers", str(count), "--log-level", "warning", "--no-access-log"]
+    else:
+        command = [sys.executable, "-m", "app.sharded", "--shards", str(count), "--host", "127.0.0.1",
+                   "--port", str(args.port), "--log-level", "warning"]
+    return subprocess.Popen(command, cwd=REPOSITORY_ROOT, env=env)
+
+async def run(mode, count, args, env, transactions):
+    process = start_server(mode, count, args, env)
+    peak_worker, peak_total = 0.0, 0.0
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=60,
+                                     limits=httpx.Limits(max_connections=args.users)) as client:
+            started = time.perf_counter()
+            while True:
+                try:
+                    if (await client.get("/ready")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if process.poll() is not None:
+                    raise RuntimeError(f"{mode} server exited during startup")
+                await asyncio.sleep(0.1)
+            startup = time.perf_counter() - started
+
+            async def sample_memory():
+                nonlocal peak_worker, peak_total
+                while True:
+                    sizes = process_tree_rss_mb(process.pid)
+                    workers = [size for pid, size in sizes.items() if pid != process.pid] or list(sizes.values())
+                    peak_worker = max(peak_worker, max(workers, default=0.0))
+                    peak_total = max(peak_total, sum(sizes.values()))
+                    await asyncio.sleep(0.25)
+
+            sampler = asyncio.create_task(sample_memory())
+            try:
+                workload = Workload(transactions, Config.MAX_DISPUTE_AMOUNT, args.seed)
+                samples, seconds, _ = await drive(client, workload, args)
+            finally:
+                sampler.cancel()
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+    operations = summarise(samples, seconds)
+    errors = sum(r["requests"] * r["error_rate"] for r in operations.values()) / max(1, len(samples))
+    reads = [r for name, r in operations.items() if name != "dispute"]
+    read_p99 = max((r["p99_ms"] for r in reads), default=0.0)
+    return [mode, count, f"{peak_worker:.0f}", f"{peak_total:.0f}", f"{startup:.1f}",
+            f"{len(samples) / seconds:.0f}", f"{read_p99:.1f}", f"{operations.get('dispute', {}).get('p99_ms', 0):.0f}",
+            f"{errors:.1%}"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=200_000)
+    parser.add_argument("--shards", default="1,2,4", help="comma-separated process counts")
+    parser.add_argument("--modes", default="workers,shards")
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--read-ratio", type=float, default=0.9)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    args.admin_key = secrets.token_hex(16)
+
+    server = start_stub_server(latency_ms=args.latency_ms, seed=args.seed)
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = os.path.join(directory, "transactions.jsonl")
+        end_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        generate_dataset(data_file, max(1, args.transactions // 20), 20, seed=args.seed, end_date=end_date,
+                         workers=1, patterns=REALISTIC_PATTERNS)
+        transactions = list(iter_transactions(data_file))
+        env = dict(os.environ, DATA_FILE=data_file, OPENAI_BASE_URL=server.base_url, OPENAI_API_KEY="stub",
+                   ADMIN_API_KEY=args.admin_key, LOG_LEVEL="WARNING", DISPUTE_STORE="memory",
+                   SHARD_SOCKET_DIR="")
+        for count in (int(n) for n in args.shards.split(",")):
+            for mode in args.modes.split(","):
+                rows.append(asyncio.run(run(mode, count, args, env, transactions)))
+                print(f"{mode} x{count} done", file=sys.stderr)
+    server.shutdown()
+    server.server_close()
+
+    print(f"{args.transactions} transactions, {args.users} users, {args.duration:.0f}s, "
+          f"{args.read_ratio:.0%} reads, {os.cpu_count()} CPUs")
+    print_table(["mode", "processes", "MB per worker", "MB total", "startup s", "req/s", "read p99 ms",
+                 "dispute p99 ms", "errors"], rows)
+
+if __name__ == "__main__":
+    main()
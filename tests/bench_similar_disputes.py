@@ -0,0 +1,134 @@
+"""
+Similar-dispute index: signature cost, build time, memory, query latency and recall at scale.
+
+Usage: python -m tests.bench_similar_disputes [--disputes 1000000] [--tables 8x8,16x16] [--queries 1000]
+
+Disputes pair synthetic transactions (bench_common.synthetic_transactions) with reasons and
+descriptions drawn from templates plus optional clauses, and a random banded customer
+profile, so most disputes have close but not identical neighbours. Signatures are computed
+once; then for each tables x bits layout the index is built by incremental add() calls
+and searched for --queries unseen disputes (top 3, similarity >= 0.8). Recall is measured
+against an exhaustive scan of every signature for --recall-queries of them: "top-1" is the
+share of queries whose best match is as close as the true nearest neighbour, "recall@3"
+the share of the true top-3 distances found.
+"""
+import argparse
+import heapq
+import random
+import sys
+import time
+import uuid
+from array import array
+from app.services.similar_disputes import SIGNATURE_BITS, SimilarDisputeIndex, dispute_signature
+from tests.bench_common import percentile, print_table, synthetic_transactions
+
+REASONS = ["Unauthorized transaction", "Card stolen", "Merchant dispute", "Billing error", "Duplicate charge"]
+DESCRIPTIONS = [
+    "I did not make this purchase",
+    "My card was stolen and this transaction is not mine",
+    "I was charged twice for the same order",
+    "I never received the goods I paid for",
+    "I cancelled this subscription but was still charged",
+    "I do not recognise this merchant",
+    "Someone used my card details online",
+    "The amount charged is higher than the price I agreed to",
+]
+CLAUSES = ["", "", "while I was travelling", "after I lost my wallet", "please refund me",
+           "I have contacted the merchant without success", "my card was with me the whole time",
+           "this happened last weekend", "I reported it to the police"]
+PROFILES = [
+    None,
+    {"history_transactions": 3, "amount_zscore": None, "merchant_visits": 0, "location_visits": 1, "hour_share": None},
+    {"history_transactions": 40, "amount_zscore": 0.4, "merchant_visits": 6, "location_visits": 20, "hour_share": 0.2},
+    {"history_transactions": 40, "amount_zscore": 3.5, "merchant_visits": 0, "location_visits": 0, "hour_share": 0.01},
+    {"history_transactions": 12, "amount_zscore": 2.2, "merchant_visits": 1, "location_visits": 3, "hour_share": 0.1},
+]
+
+def disputes(count, seed):
+    """Yield (transaction, reason, description) for synthetic disputes."""
+    rng = random.Random(seed)
+    for transaction in synthetic_transactions(count, seed=seed):
+        profile = rng.choice(PROFILES)
+        if profile is not None:
+            transaction["customer_profile"] = profile
+        description = " ".join(filter(None, [rng.choice(DESCRIPTIONS), rng.choice(CLAUSES), rng.choice(CLAUSES)]))
+        yield transaction, rng.choice(REASONS), description
+
+def index_megabytes(index):
+    size = sys.getsizeof(index._signatures) + sys.getsizeof(index._ids) + sum(map(sys.getsizeof, index._ids))
+    for buckets in index._buckets:
+        size += sys.getsizeof(buckets) + sum(map(sys.getsizeof, buckets.values()))
+    return size / 2 ** 20
+
+def exhaustive(signatures, signature, k, max_distance):
+    """Exact top-k by scanning every signature."""
+    best = heapq.nsmallest(k, ((d, row) for row, d in enumerate((s ^ signature).bit_count() for s in signatures)
+                               if d <= max_distance))
+    return [d for d, _ in best]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--disputes", type=int, default=1_000_000)
+    parser.add_argument("--tables", default="8x8,4x16,16x16,32x16", help="comma-separated tables x bits per key")
+    parser.add_argument("--max-candidates", type=int, default=2048)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--recall-queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    signatures, ids = array('Q'), []
+    for transaction, reason, description in disputes(args.disputes, args.seed):
+        signatures.append(dispute_signature(transaction, reason, description))
+        ids.append(str(uuid.uuid4()))
+    signing = time.perf_counter() - started
+    queries = [dispute_signature(*dispute) for dispute in disputes(args.queries, args.seed + 1)]
+    print(f"signatures: {args.disputes} in {signing:.1f}s ({signing / args.disputes * 1e6:.1f} us each), "
+          f"{len(set(signatures))} distinct", file=sys.stderr)
+
+    k, min_similarity = 3, 0.8
+    max_distance = int((1.0 - min_similarity) * SIGNATURE_BITS)
+    truth = []
+    scan_started = time.perf_counter()
+    for signature in queries[:args.recall_queries]:
+        truth.append(exhaustive(signatures, signature, k, max_distance))
+    scan_ms = (time.perf_counter() - scan_started) / max(1, args.recall_queries) * 1000
+
+    rows = [["exhaustive scan", "-", "-", "-", f"{scan_ms:.1f}", f"{scan_ms:.1f}", "100%", "100%", "-"]]
+    for layout in args.tables.split(","):
+        tables, bits = (int(n) for n in layout.split("x"))
+        index = SimilarDisputeIndex(tables=tables, table_bits=bits, max_candidates=args.max_candidates, top_k=k,
+                                    min_similarity=min_similarity, enabled=True)
+        started = time.perf_counter()
+        for dispute_id, signature in zip(ids, signatures):
+            index.add(dispute_id, signature)
+        build = time.perf_counter() - started
+
+        latencies, results = [], []
+        for signature in queries:
+            started = time.perf_counter()
+            results.append(index.search(signature))
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        top1 = found = expected = 0
+        for result, exact in zip(results, truth):
+            distances = [round((1.0 - score) * SIGNATURE_BITS) for _, score in result]
+            top1 += (distances[:1] == exact[:1])
+            expected += len(exact)
+            found += sum(1 for d in distances if exact and d <= exact[-1])
+        answered = sum(1 for result in results if result)
+        rows.append([f"{tables} tables x {bits} bits", f"{build:.1f}",
+                     f"{args.disputes / build / 1000:.0f}k", f"{index_megabytes(index):.0f}",
+                     f"{percentile(latencies, 50):.2f}", f"{percentile(latencies, 99):.2f}",
+                     f"{top1 / max(1, len(truth)):.0%}", f"{min(found, expected) / max(1, expected):.0%}",
+                     f"{answered / len(queries):.0%}"])
+        print(f"{layout} done", file=sys.stderr)
+        del index
+
+    print(f"{args.disputes} disputes, {args.queries} queries (top {k}, similarity >= {min_similarity}), "
+          f"max {args.max_candidates} candidates scored, signatures {signing / args.disputes * 1e6:.1f} us each")
+    print_table(["index", "build s", "inserts/s", "MB", "query p50 ms", "query p99 ms", "top-1", "recall@3",
+                 "with match"], rows)
+
+if __name__ == "__main__":
+    main()
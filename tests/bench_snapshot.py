@@ -0,0 +1,62 @@
+"""
+Benchmark worker startup: loading the JSON data file versus opening a memory-mapped snapshot.
+
+Usage: python -m tests.bench_snapshot [--rows 1000000]
+
+Each startup runs in a fresh subprocess and includes one point lookup and one customer
+read, so lazily touched snapshot pages are part of the measurement.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from tests.bench_common import synthetic_transactions, print_table
+
+def measure(path, transaction_id, customer_id):
+    """Run in the child process: open the repository, do one lookup of each kind, print timings."""
+    from app.services.transaction_repository import load_transaction_repository
+    from app.utils.transaction_loader import peak_rss_mb
+    start = time.perf_counter()
+    repository = load_transaction_repository(path)
+    opened = time.perf_counter() - start
+    assert repository.get(transaction_id) is not None
+    repository.get_customer_transactions(customer_id)
+    print(json.dumps({"open": opened, "first_read": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb()}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10 ** 6)
+    parser.add_argument("--measure", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    from app.utils.snapshot import convert_to_snapshot
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "transactions.json")
+        snapshot_path = os.path.join(directory, "transactions.snap")
+        with open(json_path, 'w') as f:
+            transactions = list(synthetic_transactions(args.rows))
+            json.dump(transactions, f)
+        probe = transactions[len(transactions) // 2]
+        del transactions
+        convert_to_snapshot(json_path, snapshot_path)
+
+        results = []
+        for label, path in (("JSON load", json_path), ("mmap snapshot", snapshot_path)):
+            output = subprocess.run(
+                [sys.executable, "-m", "tests.bench_snapshot", "--measure", path,
+                 probe["transaction_id"], probe["customer_id"]],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append([label, f"{os.path.getsize(path) / 1e6:.1f}", f"{result['open'] * 1000:,.1f}",
+                            f"{result['first_read'] * 1000:,.1f}", f"{result['peak_rss_mb']:.1f}"])
+    print_table(["startup", "file MB", "open ms", "open + first reads ms", "peak RSS MB"], results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Cold start of the API process: import time, time until it answers, and first-request latency.
+
+Usage: python -m tests.bench_startup [--transactions 200000] [--runs 3] [--tree PATH]
+
+Every measurement starts a fresh process. "import ms" is `import app.main` in a clean
+interpreter. For the server, uvicorn is launched and polled every 10 ms: "listening s" is
+when GET / first answers, "first request ms" the latency of a customer's transaction page
+requested at that moment (it waits for the dispute service when that is built lazily), and
+"first response s" when that page arrived, counted from the launch. "ready s" is when GET
+/ready first answers 200; trees without /ready are ready once listening. Results are the
+median of --runs, with SERVICE_WARMUP on and off.
+
+--tree measures another checkout the same way, e.g. a git worktree of an earlier commit,
+for before/after numbers.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from app.utils.data_generator import generate_dataset
+from tests.bench_common import print_table
+from tests.bench_e2e import REPOSITORY_ROOT
+from tests.bench_sharding import process_tree_rss_mb
+
+IMPORT_SCRIPT = ("import sys, time; started = time.perf_counter(); import app.main; "
+                 "print((time.perf_counter() - started) * 1000, 'openai' in sys.modules)")
+
+def import_ms(tree, env):
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=tree, env=env, stdout=subprocess.PIPE,
+                            text=True, check=True).stdout.split()
+    return float(output[0]), output[1] == "True"
+
+def poll(client, path, process, deadline=120):
+    """Seconds until GET path answers anything other than 503; returns (time, status)."""
+    while True:
+        try:
+            status = client.get(path).status_code
+            if status != 503:
+                return time.perf_counter(), status
+        except httpx.TransportError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f"GET {path} did not answer in time")
+        time.sleep(0.01)
+
+def cold_start(tree, env, port):
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning", "--no-access-log"]
+    launched = time.perf_counter()
+    process = subprocess.Popen(command, cwd=tree, env=env)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=120) as client:
+            listening, _ = poll(client, "/", process, launched + 120)
+            rss = sum(process_tree_rss_mb(process.pid).values())
+            started = time.perf_counter()
+            response = client.get("/api/transactions/CUST000001", params={"limit": 50},
+                                  headers={"X-Customer-Id": "CUST000001"})
+            first = time.perf_counter()
+            assert response.status_code == 200, response.text
+            ready, status = poll(client, "/ready", process, launched + 120)
+            ready = listening if status == 404 else ready
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+    return listening - launched, (first - started) * 1000, first - launched, ready - launched, rss
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=200_000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--tree", action="append", default=[], help="another checkout to measure (repeatable)")
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = os.path.join(directory, "transactions.jsonl")
+        generate_dataset(data_file, max(1, args.transactions // 20), 20, seed=1, workers=1)
+        base_env = dict(os.environ, DATA_FILE=data_file, OPENAI_API_KEY="stub", LOG_LEVEL="WARNING",
+                        DISPUTE_STORE="memory")
+        for tree in [REPOSITORY_ROOT] + args.tree:
+            label = "this tree" if tree == REPOSITORY_ROOT else os.path.basename(os.path.normpath(tree))
+            imports = [import_ms(tree, base_env) for _ in range(args.runs)]
+            import_median = statistics.median(ms for ms, _ in imports)
+            for warmup in ("true", "false"):
+                env = dict(base_env, SERVICE_WARMUP=warmup)
+                runs = [cold_start(tree, env, args.port) for _ in range(args.runs)]
+                medians = [statistics.median(column) for column in zip(*runs)]
+                rows.append([label, warmup, f"{import_median:.0f}", "yes" if imports[0][1] else "no",
+                             f"{medians[0]:.2f}", f"{medians[1]:.0f}", f"{medians[2]:.2f}", f"{medians[3]:.2f}",
+                             f"{medians[4]:.0f}"])
+                print(f"{label} warmup={warmup} done", file=sys.stderr)
+
+    print(f"{args.transactions} transactions, median of {args.runs} cold starts, {os.cpu_count()} CPUs")
+    print_table(["tree", "warm-up", "import ms", "imports openai", "listening s", "first request ms",
+                 "first response s", "ready s", "RSS at listen MB"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Picking up new transactions: full reload versus merging an appended delta.
+
+Usage: python -m tests.bench_transaction_ingestion [--transactions 500000] [--batches 20] [--batch-rows 1000]
+
+"full reload" is what a restart costs today: parse DATA_FILE and rebuild the repository
+and customer profiles. The delta rows append --batch-rows transactions to a JSON Lines
+file and time one TransactionDeltaIngestor.poll(), reporting merge time and the lag from
+the end of the write until the rows are visible. A reader thread meanwhile lists
+customers' transactions to show merges never block reads.
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from app.services.customer_profiles import CustomerProfileIndex
+from app.services.dispute_service import DisputeService
+from app.services.transaction_ingestion import TransactionDeltaIngestor
+from app.services.transaction_repository import LayeredTransactionRepository, load_transaction_repository
+from tests.bench_common import synthetic_transactions, percentile, print_table
+
+def load_service(path):
+    service = DisputeService.__new__(DisputeService)  # only the transaction indexes are needed
+    service.transactions = LayeredTransactionRepository(load_transaction_repository(path))
+    service.profiles = CustomerProfileIndex.from_repository(service.transactions)
+    return service
+
+def read_latencies(service, customers, stop):
+    samples = []
+    while not stop.is_set():
+        for customer_id in customers:
+            start = time.perf_counter()
+            service.get_customer_transactions(customer_id)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=500_000)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--batch-rows", type=int, default=1000)
+    parser.add_argument("--compact-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        base_path = os.path.join(directory, "transactions.jsonl")
+        delta_path = os.path.join(directory, "delta.jsonl")
+        num_customers = max(1, args.transactions // 20)
+        with open(base_path, "w") as f:
+            for transaction in synthetic_transactions(args.transactions, num_customers=num_customers):
+                f.write(json.dumps(transaction) + "\n")
+
+        start = time.perf_counter()
+        service = load_service(base_path)
+        reload_seconds = time.perf_counter() - start
+
+        ingestor = TransactionDeltaIngestor(service, path=delta_path, max_batch_rows=args.batch_rows,
+                                            compact_rows=args.compact_rows)
+        delta = synthetic_transactions(args.batches * args.batch_rows, num_customers=num_customers, seed=7)
+        customers = [f"CUST{i:06d}" for i in range(1, 101)]
+        stop = threading.Event()
+        reads = []
+        reader = threading.Thread(target=lambda: reads.extend(read_latencies(service, customers, stop)))
+        reader.start()
+
+        merges, lags = [], []
+        for _ in range(args.batches):
+            with open(delta_path, "a") as f:
+                for _, transaction in zip(range(args.batch_rows), delta):
+                    f.write(json.dumps(transaction) + "\n")
+            written = time.perf_counter()
+            assert ingestor.poll() == args.batch_rows
+            lags.append((time.perf_counter() - written) * 1000)
+            merges.append(ingestor.stats["last_merge_seconds"] * 1000)
+        stop.set()
+        reader.join()
+
+    print(f"{args.transactions} base transactions, {args.batches} batches of {args.batch_rows}, "
+          f"{ingestor.stats['compactions']} compactions\n")
+    print_table(
+        ["", "p50 ms", "p99 ms", "max ms"],
+        [
+            ("full reload", f"{reload_seconds * 1000:.0f}", "", ""),
+            ("delta merge", f"{percentile(merges, 50):.1f}", f"{percentile(merges, 99):.1f}", f"{max(merges):.1f}"),
+            ("write-to-visible lag", f"{percentile(lags, 50):.1f}", f"{percentile(lags, 99):.1f}", f"{max(lags):.1f}"),
+            ("concurrent read", f"{percentile(reads, 50):.3f}", f"{percentile(reads, 99):.3f}", f"{max(reads):.1f}"),
+        ]
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Transaction listing for a heavy customer: response time and bytes per mode.
+
+Usage: python -m tests.bench_transaction_listing [--transactions 100000] [--store columnar]
+
+"before" reproduces the old endpoint (the full list validated through List[Transaction]).
+The other rows go through the current route: the full list as JSON, one page with a
+cursor, a filtered page, and the NDJSON export. Requests are made in-process with
+FastAPI's TestClient, so times include routing and serialisation but no network.
+"""
+import argparse
+import time
+from typing import List
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.models.transaction import Transaction
+from app.services.transaction_repository import create_transaction_repository
+from tests.bench_common import synthetic_transactions, print_table
+
+CUSTOMER_ID = "CUST000001"
+
+def build_app(transactions):
+    from app.api import routes
+    from app.api.dependencies import get_dispute_service
+    from app.services.dispute_service import DisputeService
+    service = DisputeService()
+    service.transactions = transactions
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api")
+    app.dependency_overrides[get_dispute_service] = lambda: service
+
+    @app.get("/before/transactions/{customer_id}", response_model=List[Transaction])
+    async def before(customer_id: str):
+        return service.get_customer_transactions(customer_id)
+
+    return app
+
+def measure(client, path, params, repeats):
+    best, size = None, 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        response = client.get(path, params=params, headers={"X-Customer-Id": CUSTOMER_ID})
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200, response.text
+        size = len(response.content)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--store", default="columnar", choices=["columnar", "memory"])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    repository = create_transaction_repository(args.store)
+    repository.add_many(synthetic_transactions(args.transactions, num_customers=1, days=365))
+    client = TestClient(build_app(repository))
+    path = f"/api/transactions/{CUSTOMER_ID}"
+    cursor = client.get(path, params={"limit": 1000}, headers={"X-Customer-Id": CUSTOMER_ID}).headers["x-next-cursor"]
+
+    cases = [
+        ("before: full list, model-validated", f"/before{path[4:]}", {}),
+        ("full list", path, {}),
+        ("page (limit=100)", path, {"limit": 100}),
+        ("page after cursor (limit=100)", path, {"limit": 100, "cursor": cursor}),
+        ("filtered page (one month, >= $400)", path,
+         {"limit": 100, "start_date": repository.get_customer_transactions(CUSTOMER_ID)[-1]["date"][:7] + "-01",
+          "min_amount": 400}),
+        ("ndjson export", path, {"format": "ndjson"}),
+    ]
+    rows = []
+    for label, case_path, params in cases:
+        seconds, size = measure(client, case_path, params, args.repeats)
+        rows.append([label, f"{seconds * 1000:,.1f}", f"{size / 1e6:,.2f}"])
+
+    print(f"{args.transactions:,} transactions for one customer ({args.store} store)")
+    print_table(["mode", "ms", "MB"], rows)
+
+if __name__ == "__main__":
+    main()
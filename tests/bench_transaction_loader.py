@@ -0,0 +1,77 @@
+"""
+Benchmark transaction loading: json.load of the whole file versus the streaming loader.
+
+Usage: python -m tests.bench_transaction_loader [--rows 1000000]
+
+Each loader runs in a fresh subprocess so peak RSS is measured in isolation.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from tests.bench_common import synthetic_transactions, print_table
+
+def load_with_json(path):
+    from app.services.transaction_repository import TransactionRepository
+    with open(path, 'r') as f:
+        return len(TransactionRepository(json.load(f)))
+
+def load_streaming(path):
+    from app.services.transaction_repository import TransactionRepository
+    from app.utils.transaction_loader import load_transactions
+    return load_transactions(path, TransactionRepository()).rows
+
+LOADERS = {"json.load": load_with_json, "streaming": load_streaming}
+
+def measure(loader, path):
+    """Run in the child process: load and print rows, seconds and peak RSS as JSON."""
+    from app.utils.transaction_loader import peak_rss_mb
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    rows = LOADERS[loader](path)
+    seconds = time.perf_counter() - start
+    print(json.dumps({"rows": rows, "seconds": seconds, "peak_rss_mb": peak_rss_mb(), "baseline_mb": baseline}))
+
+def write_files(directory, rows):
+    array_path = os.path.join(directory, "transactions.json")
+    lines_path = os.path.join(directory, "transactions.jsonl")
+    with open(array_path, 'w') as array_file, open(lines_path, 'w') as lines_file:
+        array_file.write("[\n")
+        for i, transaction in enumerate(synthetic_transactions(rows)):
+            line = json.dumps(transaction)
+            array_file.write(("  " if i == 0 else ",\n  ") + line)
+            lines_file.write(line + "\n")
+        array_file.write("\n]\n")
+    return array_path, lines_path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10 ** 6)
+    parser.add_argument("--measure", nargs=2, metavar=("LOADER", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        array_path, lines_path = write_files(directory, args.rows)
+        results = []
+        for loader, path in (("json.load", array_path), ("streaming", array_path), ("streaming", lines_path)):
+            output = subprocess.run(
+                [sys.executable, "-m", "tests.bench_transaction_loader", "--measure", loader, path],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append([
+                loader, os.path.basename(path), f"{os.path.getsize(path) / 1e6:.1f}",
+                f"{result['rows']:,}", f"{result['seconds']:.2f}",
+                f"{result['rows'] / result['seconds']:,.0f}",
+                f"{result['peak_rss_mb'] - result['baseline_mb']:.1f}"
+            ])
+    print_table(["loader", "file", "file MB", "rows", "seconds", "rows/sec", "peak RSS growth MB"], results)
+
+if __name__ == "__main__":
+    main()
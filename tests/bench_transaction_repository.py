@@ -0,0 +1,61 @@
+"""
+Benchmark transaction lookups: linear list scans versus the indexed TransactionRepository.
+
+Usage: python -m tests.bench_transaction_repository [--sizes 10000 1000000 10000000] [--realistic]
+
+Lookups pick random stored transactions, so with --realistic (Zipf-skewed activity) hot
+customers are looked up as often as they transact.
+
+The 10^7 row case needs several GB of RAM for the list-of-dicts representation.
+"""
+import argparse
+import random
+import time
+from app.services.transaction_repository import TransactionRepository
+from tests.bench_common import synthetic_transactions, realistic_transactions, time_per_call, print_table
+
+def linear_get(transactions, transaction_id):
+    for transaction in transactions:
+        if transaction['transaction_id'] == transaction_id:
+            return transaction
+    return None
+
+def linear_customer(transactions, customer_id):
+    return [t for t in transactions if t['customer_id'] == customer_id]
+
+def run(size, lookups, scan_lookups, realistic=False):
+    transactions = list((realistic_transactions if realistic else synthetic_transactions)(size))
+    start = time.perf_counter()
+    repository = TransactionRepository(transactions)
+    build_seconds = time.perf_counter() - start
+
+    rng = random.Random(1)
+    ids = [(rng.choice(transactions)['transaction_id'],) for _ in range(lookups)]
+    customers = [(rng.choice(transactions)['customer_id'],) for _ in range(lookups)]
+
+    indexed_get = time_per_call(repository.get, ids)
+    indexed_customer = time_per_call(repository.get_customer_transactions, customers)
+    scan_get = time_per_call(lambda i: linear_get(transactions, i), ids[:scan_lookups])
+    scan_customer = time_per_call(lambda c: linear_customer(transactions, c), customers[:scan_lookups])
+    return [
+        f"{size:,}", f"{build_seconds:.2f}",
+        f"{scan_get:,.1f}", f"{indexed_get:,.2f}",
+        f"{scan_customer:,.1f}", f"{indexed_customer:,.2f}"
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10 ** 4, 10 ** 6, 10 ** 7])
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--scan-lookups", type=int, default=5, help="lookups to time on the O(N) scan path")
+    parser.add_argument("--realistic", action="store_true", help="skewed customer activity instead of uniform")
+    args = parser.parse_args()
+
+    rows = [run(size, args.lookups, args.scan_lookups, args.realistic) for size in args.sizes]
+    print_table(
+        ["rows", "build s", "scan get us", "index get us", "scan customer us", "index customer us"],
+        rows
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Rule-based triage: fraction of disputes settled without the LLM and latency of each path.
+
+Usage: python -m tests.bench_triage [--disputes 200] [--latency-ms 100] [--realistic]
+
+Transactions come from app.utils.data_generator (10% fraudulent), so the mix of clear-cut
+and ambiguous disputes resembles the demo data; --realistic adds skewed activity, regular
+merchants and fraud bursts. Disputes run one at a time against the
+local LLM stub, with the assessment cache disabled.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from app.config import Config
+from app.models.transaction import DisputeRequest
+from app.utils.data_generator import REALISTIC_PATTERNS, generate_customer_transactions
+from tests.bench_common import percentile, print_table
+from tests.llm_stub import start_stub_server
+
+def build_service(data_file, base_url, triage_enabled):
+    from app.services.dispute_service import DisputeService
+    Config.DATA_FILE = data_file
+    Config.OPENAI_BASE_URL = base_url
+    Config.OPENAI_API_KEY = Config.OPENAI_API_KEY or "stub"
+    Config.LLM_CACHE_BACKEND = "none"
+    Config.TRIAGE_ENABLED = triage_enabled
+    return DisputeService()
+
+async def run(service, requests):
+    """Create each dispute in turn; returns {path: [latency ms]}."""
+    latencies = {"triage": [], "llm": []}
+    try:
+        for request in requests:
+            before = sum(service.triage.counts.values()) - service.triage.counts["escalated"]
+            start = time.perf_counter()
+            result = await service.create_dispute_async(request)
+            elapsed = (time.perf_counter() - start) * 1000
+            assert "error" not in result
+            triaged = sum(service.triage.counts.values()) - service.triage.counts["escalated"] > before
+            latencies["triage" if triaged else "llm"].append(elapsed)
+        return latencies
+    finally:
+        await service.openai_service.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--disputes", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--realistic", action="store_true")
+    args = parser.parse_args()
+
+    random.seed(7)
+    transactions = generate_customer_transactions(num_customers=50, transactions_per_customer=40, seed=7,
+                                                  patterns=REALISTIC_PATTERNS if args.realistic else None)
+    sample = random.sample(transactions, args.disputes)
+    requests = [
+        DisputeRequest(customer_id=t["customer_id"], transaction_id=t["transaction_id"],
+                       reason="Unauthorized transaction", description="I do not recognise this transaction")
+        for t in sample
+    ]
+    server = start_stub_server(latency_ms=args.latency_ms)
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = os.path.join(directory, "transactions.json")
+        with open(data_file, 'w') as f:
+            json.dump(transactions, f)
+
+        for enabled in (False, True):
+            service = build_service(data_file, server.base_url, enabled)
+            start = time.perf_counter()
+            latencies = asyncio.run(run(service, requests))
+            total = time.perf_counter() - start
+            stats = service.triage.stats()
+            for path, samples in latencies.items():
+                if not samples:
+                    continue
+                rows.append([
+                    "on" if enabled else "off", path, len(samples),
+                    f"{percentile(samples, 50):.3f}", f"{percentile(samples, 95):.3f}", f"{percentile(samples, 99):.3f}"
+                ])
+            if enabled:
+                summary = (f"short-circuited {stats['short_circuited']}/{stats['disputes']} "
+                           f"({stats['short_circuit_rate']:.0%}: {stats['short_circuited_high']} HIGH, "
+                           f"{stats['short_circuited_low']} LOW); total {total:.2f}s")
+            else:
+                baseline = total
+    server.shutdown()
+
+    print(f"LLM stub latency: {args.latency_ms:.0f} ms; {args.disputes} disputes")
+    print_table(["triage", "path", "disputes", "p50 ms", "p95 ms", "p99 ms"], rows)
+    print(f"Triage {summary} versus {baseline:.2f}s without triage")
+
+if __name__ == "__main__":
+    main()
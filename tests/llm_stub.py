@@ -0,0 +1,161 @@
+"""
+Local stand-in for the OpenAI chat completions API, for load tests and benchmarks.
+
+Usage: python -m tests.llm_stub [--port 8001] [--latency-ms 200] [--error-rate 0.0] [--slow-rate 0.0 --slow-ms 5000]
+                                [--malformed-rate 0.0]
+Then point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8001/v1 and any OPENAI_API_KEY.
+
+Replies are deterministic JSON assessments derived from keywords in the prompt. Batched
+prompts ("DISPUTE <n>:" sections) get one assessment per section, and each extra section
+adds --per-item-ms of latency, roughly as generating a longer reply would. A seeded
+--error-rate share of requests fail with 500 after the same latency, like an overloaded
+provider, and a --slow-rate share take --slow-ms instead of --latency-ms, like a provider
+with a heavy latency tail. A --malformed-rate share of replies come back the ways real models
+break JSON: wrapped in prose or a code fence, with a trailing comma, or cut off.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DISPUTE_SECTION = re.compile(r"DISPUTE (\d+):")
+HIGH_RISK_KEYWORDS = ("Unknown", "Overseas", "Foreign", "Crypto", "Unrecognized", "International")
+
+def assess(prompt):
+    """Deterministic assessment for a dispute prompt."""
+    likelihood = "HIGH" if any(keyword in prompt for keyword in HIGH_RISK_KEYWORDS) else "MEDIUM"
+    return {
+        "analysis": f"Stub assessment: fraud likelihood {likelihood.lower()} based on merchant and location.",
+        "fraud_likelihood": likelihood,
+        "recommended_actions": ["Block the card", "Issue a provisional credit"] if likelihood == "HIGH"
+        else ["Request merchant records", "Contact the customer"],
+        "estimated_resolution_time": "5 business days" if likelihood == "HIGH" else "10 business days",
+        "regulatory_considerations": "ePayments Code"
+    }
+
+def _with_prose(content):
+    return f"Here is my assessment of the dispute:\n{content}\nLet me know if you need anything else."
+
+def _with_trailing_comma(content):
+    return content[:-1] + ",}"
+
+def _truncated(content):
+    # Cut off mid-way through the reply, after the fraud likelihood
+    payload = json.loads(content)
+    return content[:content.index('"recommended_actions"') + 30] if "fraud_likelihood" in payload else content[:-10]
+
+MALFORMATIONS = {
+    "prose": _with_prose,
+    "code_fence": lambda content: f"```json\n{content}\n```",
+    "trailing_comma": _with_trailing_comma,
+    "truncated": _truncated,
+    "lowercase": lambda content: content.replace('"HIGH"', '"high"').replace('"MEDIUM"', '"Medium"'),
+}
+
+def assess_batch(prompt):
+    """Assessments for each "DISPUTE <n>:" section of a batched prompt, or None if it is not batched."""
+    parts = DISPUTE_SECTION.split(prompt)
+    if len(parts) < 3:
+        return None
+    return {"results": [dict(assess(section), id=int(number)) for number, section in zip(parts[1::2], parts[2::2])]}
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client connection pools are exercised
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.server.lock:
+            self.server.stats["requests"] += 1
+            failed = self.server.rng.random() < self.server.error_rate
+            slow = self.server.rng.random() < self.server.slow_rate
+            if failed:
+                self.server.stats["errors"] += 1
+            if slow:
+                self.server.stats["slow"] += 1
+            malformation = (self.server.rng.choice(sorted(MALFORMATIONS))
+                            if self.server.rng.random() < self.server.malformed_rate else None)
+            if malformation:
+                self.server.stats["malformed"] += 1
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+        batch = assess_batch(prompt)
+        extra_items = len(batch["results"]) - 1 if batch else 0
+        latency_ms = self.server.slow_ms if slow else self.server.latency_ms
+        time.sleep((latency_ms + extra_items * self.server.per_item_ms) / 1000.0)
+        if failed:
+            self._send(500, {"error": {"message": "Stub server error", "type": "server_error", "code": None}})
+            return
+        content = json.dumps(batch if batch else assess(prompt))
+        if malformation:
+            content = MALFORMATIONS[malformation](content)
+        self._send(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4}
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, latency_ms=0, per_item_ms=0, error_rate=0.0, seed=0, slow_rate=0.0, slow_ms=0,
+                 malformed_rate=0.0):
+        super().__init__(address, StubHandler)
+        self.latency_ms = latency_ms
+        self.per_item_ms = per_item_ms
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.malformed_rate = malformed_rate
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "errors": 0, "slow": 0, "malformed": 0}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+def start_stub_server(latency_ms=0, port=0, per_item_ms=0, error_rate=0.0, seed=0, slow_rate=0.0, slow_ms=0,
+                      malformed_rate=0.0):
+    """Start a stub server on a background thread and return it (stop with server.shutdown())."""
+    server = StubServer(("127.0.0.1", port), latency_ms=latency_ms, per_item_ms=per_item_ms,
+                        error_rate=error_rate, seed=seed, slow_rate=slow_rate, slow_ms=slow_ms,
+                        malformed_rate=malformed_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--per-item-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a 500")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests that take --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=5000)
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of replies with broken JSON")
+    args = parser.parse_args()
+    server = StubServer(("127.0.0.1", args.port), latency_ms=args.latency_ms, per_item_ms=args.per_item_ms,
+                        error_rate=args.error_rate, slow_rate=args.slow_rate, slow_ms=args.slow_ms,
+                        malformed_rate=args.malformed_rate)
+    print(f"LLM stub listening on {server.base_url} ({args.latency_ms} ms latency)")
+    server.serve_forever()
@@ -0,0 +1,130 @@
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch, AsyncMock
+from app.services.dispute_service import DisputeService
+from app.services.dispute_repository import SQLiteDisputeRepository
+from app.models.transaction import DisputeRequest
+from tests.test_transaction_repository import make_transaction
+
+class TestDisputeAnalysisQueue(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.openai_patcher = patch('app.services.dispute_service.OpenAIService')
+        self.mock_openai = self.openai_patcher.start()
+        self.analysis = {
+            "analysis": "This appears to be a fraudulent transaction",
+            "fraud_likelihood": "HIGH",
+            "recommended_actions": ["Block card", "Contact customer"]
+        }
+        self.mock_openai.return_value.analyze_dispute_async = AsyncMock(return_value=self.analysis)
+
+        recent = (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d %H:%M:%S")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        data_file = os.path.join(self.temp_dir.name, "transactions.json")
+        with open(data_file, 'w') as f:
+            json.dump([make_transaction(f"t{i}", date=recent) for i in range(3)], f)
+
+        self.config_patcher = patch('app.services.dispute_service.Config')
+        self.mock_config = self.config_patcher.start()
+        self.mock_config.DATA_FILE = data_file
+        self.mock_config.DISPUTE_TIME_LIMIT_DAYS = 60
+        self.mock_config.MAX_DISPUTE_AMOUNT = 10000.0
+
+        self.dispute_service = DisputeService()
+        self.queue = self.dispute_service.analysis_queue
+        self.queue.max_depth = 2
+        self.queue.workers = 1
+        self.queue.retry_backoff_seconds = 0
+
+    async def asyncTearDown(self):
+        await self.queue.stop()
+
+    def tearDown(self):
+        self.openai_patcher.stop()
+        self.config_patcher.stop()
+        self.temp_dir.cleanup()
+
+    def _request(self, transaction_id):
+        return DisputeRequest(
+            customer_id="CUST000001",
+            transaction_id=transaction_id,
+            reason="Unauthorized transaction",
+            description="I did not make this purchase"
+        )
+
+    async def test_submit_then_analyse_in_place(self):
+        """Test that a queued dispute is stored as pending and updated once analysed."""
+        await self.queue.start()
+        result = self.dispute_service.submit_dispute(self._request("t0"))
+        self.assertEqual(result["status"], "PENDING_ANALYSIS")
+        self.assertIsNone(result["fraud_likelihood"])
+
+        await self.queue.join()
+        dispute = self.dispute_service.get_dispute(result["dispute_id"])
+        self.assertEqual(dispute["status"], "UNDER_REVIEW")
+        self.assertEqual(dispute["fraud_likelihood"], "HIGH")
+        self.assertEqual(dispute["next_steps"], ["Block card", "Contact customer"])
+        self.assertEqual(self.queue.stats["completed"], 1)
+
+    async def test_retries_failed_analysis(self):
+        """Test that errored analyses are retried and fall back to manual review when retries run out."""
+        error = {"analysis": "Error analyzing dispute", "fraud_likelihood": "ERROR", "recommended_actions": []}
+        self.mock_openai.return_value.analyze_dispute_async.side_effect = [error, self.analysis, error, error, error, error]
+        self.queue.max_retries = 3
+        await self.queue.start()
+        first = self.dispute_service.submit_dispute(self._request("t0"))
+        await self.queue.join()
+        second = self.dispute_service.submit_dispute(self._request("t1"))
+        await self.queue.join()
+
+        self.assertEqual(self.dispute_service.get_dispute(first["dispute_id"])["fraud_likelihood"], "HIGH")
+        failed = self.dispute_service.get_dispute(second["dispute_id"])
+        self.assertEqual(failed["fraud_likelihood"], "UNKNOWN")
+        self.assertEqual(failed["status"], "UNDER_REVIEW")
+        self.assertEqual(self.queue.stats["retried"], 4)
+        self.assertEqual(self.queue.stats["failed"], 1)
+
+    async def test_queue_full(self):
+        """Test that submissions beyond the queue depth are rejected without storing a dispute."""
+        self.queue.workers = 0  # nothing drains the queue
+        await self.queue.start()
+        self.dispute_service.submit_dispute(self._request("t0"))
+        self.dispute_service.submit_dispute(self._request("t1"))
+        with self.assertRaises(asyncio.QueueFull):
+            self.dispute_service.submit_dispute(self._request("t2"))
+        self.assertEqual(len(self.dispute_service.get_customer_disputes("CUST000001")), 2)
+
+    async def test_resumes_pending_disputes_after_restart(self):
+        """Test that disputes queued before a restart are analysed from the store, a queue depth at a time."""
+        path = os.path.join(self.temp_dir.name, "disputes.sqlite3")
+        with patch('app.services.dispute_service.create_dispute_repository',
+                   side_effect=lambda: SQLiteDisputeRepository(path, commit_interval_ms=0)):
+            first = DisputeService()
+            first.analysis_queue.max_depth = 3
+            first.analysis_queue.workers = 0  # stopped before anything is analysed
+            await first.analysis_queue.start()
+            submitted = [first.submit_dispute(self._request(f"t{i}")) for i in range(3)]
+            await first.analysis_queue.stop()
+            first.disputes.close()
+
+            restarted = DisputeService()
+        self.queue = restarted.analysis_queue
+        self.queue.max_depth = 2
+        self.queue.workers = 1
+        await self.queue.start()
+        await self.queue.join()
+
+        for result in submitted:
+            dispute = restarted.get_dispute(result["dispute_id"])
+            self.assertEqual(dispute["status"], "UNDER_REVIEW")
+            self.assertEqual(dispute["fraud_likelihood"], "HIGH")
+        self.assertEqual(self.queue.stats["resumed"], 3)
+        self.assertEqual(self.queue.stats["completed"], 3)
+        restarted.disputes.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+from app.services.assessment_cache import (
+    AssessmentCache, MemoryCacheBackend, DiskCacheBackend, cache_key, scrub_analysis, amount_band
+)
+from app.services.openai_service import OpenAIService
+from app.models.transaction import DisputeRequest
+from tests.test_transaction_repository import make_transaction
+
+class TestAssessmentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.build_prompt = lambda t, r: OpenAIService._create_dispute_analysis_prompt(None, t, r)
+        self.request = DisputeRequest(
+            customer_id="CUST000001", transaction_id="t1", reason="Unauthorized transaction",
+            description="I did not make this purchase, call me on 0400 000 000", contact_phone="0400 000 000"
+        )
+
+    def _key(self, transaction, request):
+        return cache_key(self.build_prompt, transaction, request, "gpt-4o", "system prompt")
+
+    def test_key_excludes_pii_and_exact_amount(self):
+        """Test that identifiers, dates, contact details and amounts within a band do not change the key."""
+        other_request = self.request.copy(update={
+            "customer_id": "CUST000002", "transaction_id": "t2", "contact_phone": None,
+            "description": "I did NOT make this purchase... call me on 0411 111 111"
+        })
+        first = self._key(make_transaction("t1", amount=120.0), self.request)
+        second = self._key(make_transaction("t2", customer_id="CUST000002", amount=199.99,
+                                            date="2024-05-05 05:05:05", card_number="5555"), other_request)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, self._key(make_transaction("t1", amount=300.0), self.request))
+        self.assertNotEqual(first, self._key(make_transaction("t1", amount=120.0, merchant="Other"), self.request))
+        self.assertEqual(amount_band(120.0), "100-250")
+
+    def test_scrub_analysis(self):
+        """Test that the source dispute's identifiers are removed from a shared assessment."""
+        analysis = {"analysis": "Transaction t1 by CUST000001 on 2024-01-01 12:00:00 looks fraudulent",
+                    "recommended_actions": ["Block card for CUST000001"], "fraud_likelihood": "HIGH"}
+        scrubbed = scrub_analysis(analysis, make_transaction("t1"), self.request)
+        self.assertNotIn("CUST000001", str(scrubbed))
+        self.assertNotIn("2024-01-01", scrubbed["analysis"])
+        self.assertEqual(scrubbed["fraud_likelihood"], "HIGH")
+
+    def test_memory_backend_lru_and_ttl(self):
+        """Test least-recently-used eviction and expiry in the in-process backend."""
+        cache = AssessmentCache(MemoryCacheBackend(max_entries=2), ttl_seconds=60)
+        cache.put("a", {"v": 1}, tokens=100)
+        cache.put("b", {"v": 2})
+        self.assertEqual(cache.get("a"), {"v": 1})  # "a" is now most recently used
+        cache.put("c", {"v": 3})
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["tokens_saved"], 100)
+
+        with patch('app.services.assessment_cache.time.time', return_value=10 ** 12):
+            self.assertIsNone(cache.get("a"))
+
+    def test_disk_backend_persists(self):
+        """Test that the SQLite backend survives reopening and honours its size limit."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache.sqlite3")
+            backend = DiskCacheBackend(path, max_entries=DiskCacheBackend.TRIM_EVERY)
+            cache = AssessmentCache(backend, ttl_seconds=60)
+            for i in range(DiskCacheBackend.TRIM_EVERY * 2):
+                cache.put(f"key{i}", {"v": i})
+            self.assertEqual(len(backend), DiskCacheBackend.TRIM_EVERY)
+            reopened = AssessmentCache(DiskCacheBackend(path, max_entries=10), ttl_seconds=60)
+            self.assertEqual(reopened.get(f"key{DiskCacheBackend.TRIM_EVERY * 2 - 1}"), {"v": DiskCacheBackend.TRIM_EVERY * 2 - 1})
+            self.assertIsNone(reopened.get("key0"))
+
+if __name__ == '__main__':
+    unittest.main()
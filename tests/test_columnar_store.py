@@ -0,0 +1,127 @@
+import unittest
+import os
+import tempfile
+import tests.test_transaction_repository as repository_tests
+from app.services.columnar_store import ColumnarTransactionRepository, CategoricalColumn
+from app.services.transaction_query import TransactionQuery
+from app.services.transaction_repository import TransactionRepository, load_transaction_repository
+from tests.test_transaction_repository import make_transaction
+
+class TestColumnarTransactionRepository(repository_tests.TestTransactionRepository):
+    repository_class = ColumnarTransactionRepository
+
+    def test_round_trip_matches_dict_repository(self):
+        """Test that materialised rows are identical to the stored dicts, including nulls."""
+        transactions = [
+            make_transaction(f"t{i}", customer_id=f"CUST{i % 7:06d}", date=f"2024-02-{i % 28 + 1:02d} 0{i % 10}:15:00",
+                             amount=i * 1.25, merchant=f"Merchant {i % 5}", is_fraudulent=i % 4 == 0,
+                             card_number=None if i % 3 else f"4111 {i:04d}", account_details="BSB: 062-000" if i % 3 else None)
+            for i in range(300)
+        ]
+        columnar = ColumnarTransactionRepository(transactions)
+        expected = TransactionRepository(transactions)
+        self.assertEqual(len(columnar), 300)
+        self.assertEqual(columnar.get("t42"), expected.get("t42"))
+        for customer in range(7):
+            customer_id = f"CUST{customer:06d}"
+            self.assertEqual(columnar.get_customer_transactions(customer_id), expected.get_customer_transactions(customer_id))
+        self.assertIn("t299", columnar)
+        self.assertNotIn("t300", columnar)
+
+    def test_malformed_row_leaves_store_consistent(self):
+        """Test that a row missing a field is rejected without misaligning the columns."""
+        bad = make_transaction("bad")
+        del bad["merchant"]
+        with self.assertRaises(KeyError):
+            self.repository.add(bad)
+        self.repository.add(make_transaction("t5", date="2024-01-04 09:00:00"))
+        self.assertEqual(self.repository.get("t5")["merchant"], "Test Merchant")
+        self.assertIsNone(self.repository.get("bad"))
+
+    def test_filters_use_posting_lists_for_long_histories(self):
+        """Test that indexed filters on a long history match a scan, and follow later additions."""
+        transactions = [
+            make_transaction(f"t{i:03d}", date=f"2024-0{i % 9 + 1}-{i % 28 + 1:02d} 10:00:00", amount=float(i),
+                             merchant=f"Merchant {i % 5}", category="Dining" if i % 2 else "Groceries",
+                             is_fraudulent=i % 11 == 0)
+            for i in range(200)
+        ]
+        columnar = ColumnarTransactionRepository(transactions)
+        expected = TransactionRepository(transactions)
+        queries = [
+            TransactionQuery(merchant="Merchant 3"),
+            TransactionQuery(merchant="Merchant 3", category="Dining", start_date="2024-03-01", end_date="2024-06-30"),
+            TransactionQuery(is_fraudulent=True, min_amount=50.0),
+            TransactionQuery(merchant="Nowhere"),
+        ]
+
+        def ids(repository, query, after=None):
+            return [t["transaction_id"] for t in repository.query_customer_transactions("CUST000001", query, after)]
+
+        for query in queries:
+            self.assertEqual(ids(columnar, query), ids(expected, query))
+        page = ids(columnar, queries[0])
+        after = (columnar.get(page[9])["date"], page[9])
+        self.assertEqual(ids(columnar, queries[0], after), page[10:])
+        self.assertEqual(len(columnar._postings), 1)
+
+        late = make_transaction("t500", date="2024-04-01 10:00:00", merchant="Merchant 3", category="Dining")
+        columnar.add(late)
+        expected.add(late)
+        self.assertIn("t500", ids(columnar, queries[1]))
+        self.assertEqual(ids(columnar, queries[1]), ids(expected, queries[1]))
+
+    def test_categorical_column_widens(self):
+        """Test that codes are widened once a column outgrows its typecode."""
+        column = CategoricalColumn('B')
+        for i in range(300):
+            column.append(f"value {i}")
+        self.assertEqual(column.codes.typecode, 'H')
+        self.assertEqual(column[299], "value 299")
+        self.assertEqual(column.code_of("value 0"), 0)
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "transactions.snap")
+        self.transactions = [
+            make_transaction(f"t{i}", customer_id=f"CUST{i % 4:06d}", date=f"2024-03-{i % 30 + 1:02d} 10:00:00",
+                             amount=i / 3, card_number=None if i % 2 else "4111")
+            for i in range(100)
+        ]
+        self.repository = ColumnarTransactionRepository(self.transactions)
+        self.repository.add(make_transaction("t7", amount=1.5))  # leaves a replaced row in the columns
+        self.repository.save_snapshot(self.path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_snapshot_round_trip(self):
+        """Test that a memory-mapped snapshot reads back exactly what was saved."""
+        snapshot = load_transaction_repository(self.path)
+        self.assertTrue(snapshot.read_only)
+        self.assertEqual(len(snapshot), 100)
+        self.assertEqual(snapshot.get("t7"), self.repository.get("t7"))
+        self.assertIsNone(snapshot.get("missing"))
+        for customer in range(4):
+            customer_id = f"CUST{customer:06d}"
+            self.assertEqual(snapshot.get_customer_transactions(customer_id),
+                             self.repository.get_customer_transactions(customer_id))
+        self.assertEqual(snapshot.get_customer_transactions("CUST999999"), [])
+
+    def test_snapshot_is_read_only(self):
+        """Test that writes to a snapshot-backed store are rejected."""
+        snapshot = ColumnarTransactionRepository.open_snapshot(self.path)
+        with self.assertRaises(TypeError):
+            snapshot.add(make_transaction("new"))
+
+    def test_rejects_other_files(self):
+        """Test that a file without the snapshot header is refused."""
+        with open(self.path, 'wb') as f:
+            f.write(b"[]" * 20)
+        with self.assertRaises(ValueError):
+            ColumnarTransactionRepository.open_snapshot(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import statistics
+from app.services.customer_profiles import CustomerProfileIndex, describe_profile
+from app.services.columnar_store import ColumnarTransactionRepository
+from app.services.transaction_repository import TransactionRepository
+from tests.test_transaction_repository import make_transaction
+
+class TestCustomerProfileIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.transactions = [
+            make_transaction(f"t{i}", customer_id=f"CUST00000{i % 2}", amount=20.0 + i * 7.5,
+                             merchant="Coles" if i % 3 else "Aldi", date=f"2024-01-{i + 1:02d} {8 + i % 4:02d}:30:00")
+            for i in range(12)
+        ]
+
+    def test_bulk_build_matches_incremental(self):
+        """Test that building from either repository's columns matches adding transactions one by one."""
+        incremental = CustomerProfileIndex()
+        for transaction in self.transactions:
+            incremental.add(transaction)
+        for repository_class in (TransactionRepository, ColumnarTransactionRepository):
+            bulk = CustomerProfileIndex.from_repository(repository_class(self.transactions))
+            for customer_id in ("CUST000000", "CUST000001"):
+                expected, actual = incremental.get(customer_id), bulk.get(customer_id)
+                self.assertEqual(actual.count, expected.count)
+                self.assertAlmostEqual(actual.mean, expected.mean)
+                self.assertAlmostEqual(actual.variance, expected.variance)
+                self.assertEqual(actual.merchants, expected.merchants)
+                self.assertEqual(actual.hours, expected.hours)
+
+    def test_features_exclude_the_transaction(self):
+        """Test that features compare a transaction with the customer's other transactions only."""
+        index = CustomerProfileIndex()
+        for transaction in self.transactions:
+            index.add(transaction)
+        disputed = self.transactions[10]
+        others = [t['amount'] for t in self.transactions if t['customer_id'] == disputed['customer_id'] and t is not disputed]
+
+        features = index.features(disputed)
+        self.assertEqual(features["history_transactions"], len(others))
+        self.assertAlmostEqual(features["amount_mean"], statistics.mean(others), places=2)
+        self.assertAlmostEqual(features["amount_std"], statistics.stdev(others), places=2)
+        self.assertEqual(features["merchant_visits"], 3)  # the other Coles transactions of CUST000000
+        self.assertGreater(features["amount_zscore"], 1)
+
+    def test_remove(self):
+        """Test that removing a transaction undoes adding it."""
+        index = CustomerProfileIndex()
+        for transaction in self.transactions[:6]:
+            index.add(transaction)
+        before = index.features(self.transactions[0])
+        index.add(self.transactions[6])
+        index.remove(self.transactions[6])
+        self.assertEqual(index.features(self.transactions[0]), before)
+
+    def test_replace_publishes_copies(self):
+        """Test that replace matches remove then add, without changing the profile a reader holds."""
+        index, expected = CustomerProfileIndex(), CustomerProfileIndex()
+        for transaction in self.transactions[:6]:
+            index.add(transaction)
+            expected.add(transaction)
+        held = index.get("CUST000000")
+        count = held.count
+        changed = dict(self.transactions[0], amount=500.0)
+        index.replace([self.transactions[0]], [changed, self.transactions[6]])
+        expected.remove(self.transactions[0])
+        expected.add(changed)
+        expected.add(self.transactions[6])
+
+        self.assertEqual(held.count, count)
+        self.assertIsNot(index.get("CUST000000"), held)
+        for transaction in (changed, self.transactions[1]):
+            self.assertEqual(index.features(transaction), expected.features(transaction))
+
+    def test_describe_profile(self):
+        """Test that the prompt summary uses bands rather than raw figures."""
+        index = CustomerProfileIndex()
+        for transaction in self.transactions:
+            index.add(transaction)
+        unusual = make_transaction("x", customer_id="CUST000000", amount=5000.0, merchant="New Shop",
+                                   date="2024-01-20 03:00:00")
+        index.add(unusual)
+        lines = describe_profile(index.features(unusual))
+        self.assertIn("Amount versus usual spend: far above the usual range", lines)
+        self.assertIn("Merchant history: first transaction with this merchant", lines)
+        self.assertIn("Time of day: unusual for this customer", lines)
+        self.assertFalse(any(char.isdigit() for line in lines[1:] for char in line))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+from collections import Counter
+from datetime import datetime
+from app.services.transaction_ingestion import validate_transaction
+from app.services.transaction_repository import load_transaction_repository
+from app.utils.data_generator import (
+    ActivityPatterns, REALISTIC_PATTERNS, generate_customer_transactions, generate_dataset, generate_shard_lines
+)
+from app.utils.dates import to_timestamp
+from app.utils.transaction_loader import iter_transactions
+
+END_DATE = datetime(2024, 6, 30, 12, 0, 0)
+
+class TestBulkDataGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_rows_are_valid_transactions(self):
+        """Test that generated lines parse into valid transactions inside the date window."""
+        path = self._path("bulk.jsonl")
+        stats = generate_dataset(path, 30, transactions_per_customer=10, fraud_rate=0.2, days=7,
+                                 end_date=END_DATE, workers=1, shard_customers=7)
+        transactions = list(iter_transactions(path))
+        self.assertEqual(stats.rows, 300)
+        self.assertEqual(len(transactions), 300)
+        self.assertEqual(sum(t["is_fraudulent"] for t in transactions), stats.fraud_rows)
+        self.assertEqual(len({t["transaction_id"] for t in transactions}), 300)
+        self.assertEqual(len({t["customer_id"] for t in transactions}), 30)
+        for transaction in transactions:
+            self.assertIsNone(validate_transaction(transaction))
+            self.assertTrue("2024-06-23 12:00:00" <= transaction["date"] < "2024-06-30 12:00:00")
+            self.assertEqual(transaction["card_number"] is not None, transaction["payment_method"] == "CARD")
+
+    def test_output_independent_of_workers(self):
+        """Test that a seed gives the same file with one worker or several."""
+        paths = [self._path(f"bulk{workers}.jsonl") for workers in (1, 2)]
+        for workers, path in zip((1, 2), paths):
+            generate_dataset(path, 25, distribution="lognormal", seed=7, end_date=END_DATE,
+                             workers=workers, shard_customers=4, patterns=REALISTIC_PATTERNS)
+        with open(paths[0], "rb") as first, open(paths[1], "rb") as second:
+            self.assertEqual(first.read(), second.read())
+
+    def test_distributions_and_snapshot(self):
+        """Test per-customer count distributions and writing a columnar snapshot."""
+        def count(distribution):
+            return sum(rows for _, rows, _ in generate_shard_lines(1, 200, 10, distribution, end_date=END_DATE))
+        self.assertEqual(count("fixed"), 2000)
+        self.assertTrue(1000 < count("uniform") < 3000)
+        self.assertTrue(1000 < count("lognormal") < 3000)
+        with self.assertRaises(ValueError):
+            count("normal")
+
+        path = self._path("bulk.snap")
+        stats = generate_dataset(path, 5, end_date=END_DATE, workers=1)
+        self.assertEqual(len(load_transaction_repository(path)), stats.rows)
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["bulk.snap"])
+
+class TestActivityPatterns(unittest.TestCase):
+
+    def generate(self, patterns=REALISTIC_PATTERNS, seed=1, **kwargs):
+        options = {"num_customers": 100, "transactions_per_customer": 20, "fraud_probability": 0.1}
+        options.update(kwargs)
+        return generate_customer_transactions(seed=seed, patterns=patterns, end_date=END_DATE, **options)
+
+    def test_seeded_output_is_reproducible(self):
+        """Test that a seed and end date fix the output, with or without patterns."""
+        self.assertEqual(self.generate(), self.generate())
+        self.assertNotEqual(self.generate(), self.generate(seed=2))
+        self.assertEqual(self.generate(patterns=None), self.generate(patterns=None))
+        self.assertEqual(len(self.generate(patterns=None)), 2000)
+
+    def test_zipf_activity_skew(self):
+        """Test that a few customers are much more active while the mean stays close."""
+        counts = [REALISTIC_PATTERNS.transaction_count(number, 10000, 20) for number in range(1, 10001)]
+        self.assertAlmostEqual(sum(counts) / 10000, 20, delta=0.5)
+        self.assertEqual(max(counts), 20 * REALISTIC_PATTERNS.max_activity_multiple)
+        self.assertLessEqual(min(counts), 2)
+        self.assertEqual(ActivityPatterns().transaction_count(1, 10000, 20), 20)
+
+    def test_merchant_habits_and_fraud_bursts(self):
+        """Test that customers return to regular merchants and fraud arrives in short bursts."""
+        transactions = self.generate(patterns=ActivityPatterns(habit_merchants=3, habit_share=0.9, fraud_burst_size=4,
+                                                               fraud_burst_hours=2), fraud_probability=0.2)
+        genuine = Counter((t["customer_id"], t["merchant"]) for t in transactions if not t["is_fraudulent"])
+        for customer in ("CUST000001", "CUST000050"):
+            visits = sorted((n for (c, _), n in genuine.items() if c == customer), reverse=True)
+            self.assertGreaterEqual(sum(visits[:3]) / sum(visits), 0.7)
+
+        fraud = {}
+        for t in transactions:
+            if t["is_fraudulent"]:
+                fraud.setdefault(t["customer_id"], []).append(to_timestamp(t["date"]))
+        self.assertAlmostEqual(sum(map(len, fraud.values())) / len(transactions), 0.2, delta=0.05)
+        for timestamps in fraud.values():
+            # Every burst is a start followed by up to 3 rows in the next 2 hours
+            self.assertTrue(all(b - a < 2 * 3600 for a, b in zip(timestamps[::4], timestamps[1::4])))
+
+if __name__ == '__main__':
+    unittest.main()
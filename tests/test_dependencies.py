@@ -0,0 +1,91 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import httpx
+from app.api import dependencies
+from app.main import app
+from tests.bench_e2e import REPOSITORY_ROOT
+
+def fake_service():
+    service = MagicMock()
+    for component in (service.ingestor, service.analysis_queue, service.openai_service):
+        component.start, component.stop, component.close = AsyncMock(), AsyncMock(), AsyncMock()
+    service.get_customer_disputes.return_value = []
+    return service
+
+class TestLazyDisputeService(unittest.TestCase):
+    def test_importing_the_app_defers_heavy_modules(self):
+        """Test that importing app.main neither loads the dataset nor imports the OpenAI SDK."""
+        script = ("import sys, app.main; "
+                  "print('openai' in sys.modules, 'app.services.dispute_service' in sys.modules)")
+        output = subprocess.run([sys.executable, "-c", script], cwd=REPOSITORY_ROOT, stdout=subprocess.PIPE,
+                                text=True, check=True).stdout
+        self.assertEqual(output.split(), ["False", "False"])
+
+    def test_health_answers_while_the_service_builds_once(self):
+        release = threading.Event()
+        service = fake_service()
+        builds = []
+
+        def build():
+            builds.append(1)
+            release.wait(5)
+            return service
+
+        async def exercise():
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as client:
+                    health = await client.get("/health")
+                    starting = await client.get("/ready")
+                    headers = {"X-Customer-Id": "CUST000001"}
+                    pending = [asyncio.ensure_future(client.get("/api/disputes/CUST000001", headers=headers))
+                               for _ in range(3)]
+                    await asyncio.sleep(0.05)
+                    self.assertFalse(any(request.done() for request in pending))
+                    release.set()
+                    responses = await asyncio.gather(*pending)
+                    ready = await client.get("/ready")
+                    return health, starting, responses, ready
+
+        with patch('app.api.dependencies._build_service', build):
+            health, starting, responses, ready = asyncio.run(exercise())
+        self.assertEqual(health.status_code, 200)
+        self.assertEqual((starting.status_code, starting.json()["state"]), (503, "starting"))
+        self.assertEqual([r.status_code for r in responses], [200] * 3)
+        self.assertEqual((ready.status_code, ready.json()["state"]), (200, "ready"))
+        self.assertEqual(len(builds), 1)
+        service.ingestor.start.assert_awaited_once()
+        service.disputes.close.assert_called_once()  # shut down with the app
+        self.assertIsNone(dependencies.current_dispute_service())
+
+    def test_failed_build_is_retried_by_the_next_request(self):
+        attempts = []
+
+        def build():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OSError("data file unreadable")
+            return fake_service()
+
+        async def exercise():
+            try:
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as client:
+                    headers = {"X-Customer-Id": "CUST000001"}
+                    failed = await client.get("/api/disputes/CUST000001", headers=headers)
+                    status = dependencies.status["state"]
+                    retried = await client.get("/api/disputes/CUST000001", headers=headers)
+                    return failed, status, retried
+            finally:
+                await dependencies.shutdown()
+
+        with patch('app.api.dependencies._build_service', build):
+            failed, status, retried = asyncio.run(exercise())
+        self.assertEqual((failed.status_code, status), (503, "failed"))
+        self.assertEqual(retried.status_code, 200)
+        self.assertEqual(len(attempts), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import os
+import tempfile
+import threading
+from app.services.dispute_repository import InMemoryDisputeRepository, SQLiteDisputeRepository
+
+def make_dispute(dispute_id, customer_id="CUST000001", transaction_id="t1", status="UNDER_REVIEW",
+                 created_at="2024-01-01 12:00:00"):
+    return {
+        "dispute_id": dispute_id,
+        "customer_id": customer_id,
+        "transaction_id": transaction_id,
+        "status": status,
+        "created_at": created_at,
+        "ai_analysis": {"fraud_likelihood": "HIGH", "recommended_actions": ["Block card"]}
+    }
+
+class TestInMemoryDisputeRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.repository = self.create_repository()
+
+    def create_repository(self):
+        return InMemoryDisputeRepository()
+
+    def tearDown(self):
+        self.repository.close()
+
+    def test_save_and_get(self):
+        """Test point lookups, and that saving again updates the dispute in place."""
+        self.repository.save(make_dispute("d1", status="PENDING_ANALYSIS"))
+        self.assertEqual(self.repository.get("d1")["status"], "PENDING_ANALYSIS")
+        self.repository.save(make_dispute("d1"))
+        self.assertEqual(self.repository.get("d1")["status"], "UNDER_REVIEW")
+        self.assertEqual(self.repository.get("d1")["ai_analysis"]["recommended_actions"], ["Block card"])
+        self.assertIsNone(self.repository.get("missing"))
+        self.assertEqual(len(self.repository), 1)
+        self.assertIn("d1", self.repository)
+
+    def test_customer_and_transaction_disputes(self):
+        """Test the secondary lookups return only matching disputes, oldest first."""
+        self.repository.save(make_dispute("d1", transaction_id="t2"))
+        self.repository.save(make_dispute("d2", created_at="2024-01-02 12:00:00"))
+        self.repository.save(make_dispute("d3", customer_id="CUST000002", created_at="2024-01-03 12:00:00"))
+        self.assertEqual([d["dispute_id"] for d in self.repository.get_customer_disputes("CUST000001")], ["d1", "d2"])
+        self.assertEqual([d["dispute_id"] for d in self.repository.get_transaction_disputes("t1")], ["d2", "d3"])
+        self.assertEqual(self.repository.get_customer_disputes("CUST000009"), [])
+        self.assertEqual(self.repository.count_by_status(), {"UNDER_REVIEW": 3})
+
+    def test_update_keeps_order_within_the_same_second(self):
+        """Test that updating a dispute does not move it behind others created in the same second."""
+        self.repository.save(make_dispute("d1", status="PENDING_ANALYSIS"))
+        self.repository.save(make_dispute("d2", transaction_id="t2"))
+        self.repository.flush()
+        self.repository.save(make_dispute("d1"))
+        self.repository.flush()
+        disputes = self.repository.get_customer_disputes("CUST000001")
+        self.assertEqual([d["dispute_id"] for d in disputes], ["d1", "d2"])
+        self.assertEqual(disputes[0]["status"], "UNDER_REVIEW")
+
+    def test_open_dispute_and_idempotency_key_lookups(self):
+        """Test the duplicate-detection lookups, including a dispute closing."""
+        self.repository.save(dict(make_dispute("d1"), idempotency_key="key-1"))
+        self.repository.save(make_dispute("d2", transaction_id="t2", status="RESOLVED"))
+        self.assertEqual(self.repository.get_open_dispute("t1")["dispute_id"], "d1")
+        self.assertIsNone(self.repository.get_open_dispute("t2"))
+        self.assertEqual(self.repository.get_by_idempotency_key("CUST000001", "key-1")["dispute_id"], "d1")
+        self.assertIsNone(self.repository.get_by_idempotency_key("CUST000002", "key-1"))
+
+        self.repository.flush()
+        self.repository.save(dict(make_dispute("d1", status="WITHDRAWN"), idempotency_key="key-1"))
+        self.assertIsNone(self.repository.get_open_dispute("t1"))
+        self.repository.save(make_dispute("d3", created_at="2024-01-05 12:00:00"))
+        self.assertEqual(self.repository.get_open_dispute("t1")["dispute_id"], "d3")
+        self.repository.flush()
+        self.assertEqual(self.repository.get_open_dispute("t1")["dispute_id"], "d3")
+        self.assertEqual(self.repository.get_by_idempotency_key("CUST000001", "key-1")["status"], "WITHDRAWN")
+
+    def test_iter_disputes_resumes_after_an_id(self):
+        self.repository.save_many([make_dispute(f"d{i}", status="RESOLVED" if i == 2 else "UNDER_REVIEW")
+                                   for i in (3, 1, 2, 0)])
+        self.assertEqual([d["dispute_id"] for d in self.repository.iter_disputes(page_size=2)], ["d0", "d1", "d2", "d3"])
+        self.assertEqual([d["dispute_id"] for d in self.repository.iter_disputes(after="d0", statuses=["UNDER_REVIEW"],
+                                                                                 page_size=1)], ["d1", "d3"])
+
+class TestSQLiteDisputeRepository(TestInMemoryDisputeRepository):
+
+    def create_repository(self, commit_interval_ms=50):
+        self.temp_dir = getattr(self, "temp_dir", None) or tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "disputes.sqlite3")
+        return SQLiteDisputeRepository(self.path, commit_interval_ms=commit_interval_ms, batch_size=100)
+
+    def tearDown(self):
+        super().tearDown()
+        self.temp_dir.cleanup()
+
+    def test_durable_across_reopen(self):
+        """Test that queued writes are committed on close and visible to a new repository."""
+        self.repository.save(make_dispute("d1"))
+        other = SQLiteDisputeRepository(self.path, commit_interval_ms=0)
+        self.assertIsNone(other.get("d1"))  # not committed yet: the group commit window is still open
+        self.repository.close()
+        self.assertEqual(other.get("d1")["customer_id"], "CUST000001")
+        other.close()
+        self.repository = self.create_repository()
+        self.assertEqual(len(self.repository), 1)
+
+    def test_reads_merge_committed_and_queued(self):
+        """Test that reads combine committed rows with newer saves still waiting for a commit."""
+        self.repository.save(make_dispute("d1", status="PENDING_ANALYSIS"))
+        self.repository.save(make_dispute("d2", created_at="2024-01-02 12:00:00"))
+        self.repository.flush()
+        self.repository.save(make_dispute("d1"))
+        self.repository.save(make_dispute("d3", created_at="2024-01-03 12:00:00"))
+        disputes = self.repository.get_customer_disputes("CUST000001")
+        self.assertEqual([d["dispute_id"] for d in disputes], ["d1", "d2", "d3"])
+        self.assertEqual(disputes[0]["status"], "UNDER_REVIEW")
+
+    def test_concurrent_writers(self):
+        """Test that saves from many threads are all committed."""
+        def write(thread):
+            for i in range(50):
+                self.repository.save(make_dispute(f"d{thread}-{i}", customer_id=f"C{thread}"))
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.repository), 200)
+        self.assertEqual(len(self.repository.get_customer_disputes("C3")), 50)
+
+if __name__ == '__main__':
+    unittest.main()
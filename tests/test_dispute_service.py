@@ -1,7 +1,9 @@
 import unittest
+import asyncio
 import json
 import os
-from unittest.mock import patch, MagicMock
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock, AsyncMock
 from app.services.dispute_service import DisputeService
 from app.models.transaction import DisputeRequest
 
@@ -96,5 +98,175 @@ class TestDisputeService(unittest.TestCase):
         self.assertEqual(len(disputes), 1)
         self.assertEqual(disputes[0]["transaction_id"], "test-transaction-1")
 
+    def test_create_dispute_async(self):
+        """Test creating a dispute through the non-blocking analysis path."""
+        self.mock_openai.return_value.analyze_dispute_async = AsyncMock(
+            return_value=self.mock_openai.return_value.analyze_dispute.return_value
+        )
+        recent = dict(self.test_transactions[0], transaction_id="test-transaction-2",
+                      date=(datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d %H:%M:%S"))
+        self.dispute_service.transactions.add(recent)
+        dispute_request = DisputeRequest(
+            customer_id="CUST000001",
+            transaction_id="test-transaction-2",
+            reason="Unauthorized transaction",
+            description="I did not make this purchase"
+        )
+        
+        result = asyncio.run(self.dispute_service.create_dispute_async(dispute_request))
+        
+        self.assertEqual(result["status"], "UNDER_REVIEW")
+        self.assertEqual(result["next_steps"], ["Block card", "Contact customer"])
+        self.mock_openai.return_value.analyze_dispute_async.assert_awaited_once()
+        self.mock_openai.return_value.analyze_dispute.assert_not_called()
+
+    def test_create_dispute_triaged(self):
+        """Test that a clear-cut dispute is settled by triage without calling OpenAI."""
+        recent = dict(self.test_transactions[0], transaction_id="test-transaction-2",
+                      merchant="Crypto Trading Platform", location="Unknown Location",
+                      date=(datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d %H:%M:%S"))
+        self.dispute_service.transactions.add(recent)
+        dispute_request = DisputeRequest(
+            customer_id="CUST000001",
+            transaction_id="test-transaction-2",
+            reason="Unauthorized transaction",
+            description="I did not make this purchase"
+        )
+        
+        result = self.dispute_service.create_dispute(dispute_request)
+        
+        self.assertEqual(result["fraud_likelihood"], "HIGH")
+        self.assertTrue(result["ai_assessment"].startswith("Automated triage"))
+        self.mock_openai.return_value.analyze_dispute.assert_not_called()
+        self.assertEqual(self.dispute_service.triage.stats()["short_circuited_high"], 1)
+
+    def test_create_disputes(self):
+        """Test that a batch reports validation errors by index and analyses the valid disputes together."""
+        analysis = self.mock_openai.return_value.analyze_dispute.return_value
+        self.mock_openai.return_value.analyze_disputes_async = AsyncMock(return_value=[analysis, analysis])
+        recent = (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d %H:%M:%S")
+        for i in (2, 3):
+            self.dispute_service.transactions.add(
+                dict(self.test_transactions[0], transaction_id=f"test-transaction-{i}", date=recent))
+        requests = [
+            DisputeRequest(customer_id="CUST000001", transaction_id=transaction_id,
+                           reason="Unauthorized transaction", description="Card compromised")
+            for transaction_id in ["test-transaction-2", "missing", "test-transaction-3", "test-transaction-2"]
+        ]
+        
+        results = asyncio.run(self.dispute_service.create_disputes(requests))
+        
+        self.assertEqual([r["index"] for r in results], [0, 1, 2, 3])
+        self.assertEqual(results[0]["dispute"]["transaction_id"], "test-transaction-2")
+        self.assertEqual(results[1]["error"], "Transaction not found")
+        self.assertEqual(results[2]["dispute"]["transaction_id"], "test-transaction-3")
+        self.assertEqual(results[3]["error"], "Duplicate transaction in batch")
+        items = self.mock_openai.return_value.analyze_disputes_async.await_args.args[0]
+        self.assertEqual([t["transaction_id"] for t, _ in items], ["test-transaction-2", "test-transaction-3"])
+
+    def _recent_request(self, transaction_id="test-transaction-2"):
+        recent = dict(self.test_transactions[0], transaction_id=transaction_id,
+                      date=(datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d %H:%M:%S"))
+        self.dispute_service.transactions.add(recent)
+        return DisputeRequest(customer_id="CUST000001", transaction_id=transaction_id,
+                              reason="Unauthorized transaction", description="I did not make this purchase")
+
+    def test_repeated_submissions_return_the_existing_dispute(self):
+        """Test that retries, with or without an Idempotency-Key, do not create or analyse a new dispute."""
+        dispute_request = self._recent_request()
+        first = self.dispute_service.create_dispute(dispute_request, idempotency_key="key-1")
+        
+        retry = self.dispute_service.create_dispute(dispute_request, idempotency_key="key-1")
+        double_click = self.dispute_service.create_dispute(dispute_request)
+        
+        self.assertNotIn("replayed", first)
+        self.assertTrue(retry.pop("replayed"))
+        self.assertTrue(double_click.pop("replayed"))
+        self.assertEqual(retry, first)
+        self.assertEqual(double_click, first)
+        self.assertEqual(len(self.dispute_service.get_customer_disputes("CUST000001")), 1)
+        self.mock_openai.return_value.analyze_dispute.assert_called_once()
+        
+        other = self.dispute_service.create_dispute(self._recent_request("test-transaction-3"), idempotency_key="key-1")
+        self.assertEqual(other["status_code"], 422)
+
+    def test_concurrent_duplicates_share_one_analysis(self):
+        """Test that duplicates arriving while the first submission is being analysed wait for it."""
+        async def slow_analysis(transaction, dispute_request):
+            await asyncio.sleep(0.05)
+            return self.mock_openai.return_value.analyze_dispute.return_value
+        self.mock_openai.return_value.analyze_dispute_async = AsyncMock(side_effect=slow_analysis)
+        dispute_request = self._recent_request()
+        
+        async def submit_three():
+            return await asyncio.gather(*(self.dispute_service.create_dispute_async(dispute_request) for _ in range(3)))
+        
+        results = asyncio.run(submit_three())
+        
+        self.assertEqual(len({r["dispute_id"] for r in results}), 1)
+        self.assertEqual([bool(r.get("replayed")) for r in results], [False, True, True])
+        self.mock_openai.return_value.analyze_dispute_async.assert_awaited_once()
+        self.assertEqual(self.dispute_service.duplicate_stats["coalesced"], 2)
+        self.assertEqual(self.dispute_service._in_flight, {})
+
+    def test_batch_and_single_submissions_coalesce(self):
+        """Test that a batch and a single submission for the same transaction share one analysis, in either order."""
+        analysis = self.mock_openai.return_value.analyze_dispute.return_value
+        
+        async def slow_analysis(transaction, dispute_request):
+            await asyncio.sleep(0.05)
+            return analysis
+        
+        async def slow_batch(items):
+            await asyncio.sleep(0.05)
+            return [analysis] * len(items)
+        self.mock_openai.return_value.analyze_dispute_async = AsyncMock(side_effect=slow_analysis)
+        self.mock_openai.return_value.analyze_disputes_async = AsyncMock(side_effect=slow_batch)
+        
+        for number, single_first in ((2, True), (3, False)):
+            dispute_request = self._recent_request(f"test-transaction-{number}")
+            
+            async def submit_both():
+                single = self.dispute_service.create_dispute_async(dispute_request)
+                batch = self.dispute_service.create_disputes([dispute_request])
+                if single_first:
+                    return await asyncio.gather(single, batch)
+                batch_results, single_result = await asyncio.gather(batch, single)
+                return single_result, batch_results
+            
+            single, (item,) = asyncio.run(submit_both())
+            self.assertEqual(item["dispute"]["dispute_id"], single["dispute_id"])
+            self.assertEqual(len(self.dispute_service.disputes.get_transaction_disputes(f"test-transaction-{number}")), 1)
+            self.assertEqual(self.dispute_service._in_flight, {})
+        
+        self.assertEqual(self.mock_openai.return_value.analyze_dispute_async.await_count, 1)  # single first
+        self.assertEqual([len(call.args[0]) for call in self.mock_openai.return_value.analyze_disputes_async.await_args_list],
+                         [0, 1])  # batch first
+        self.assertEqual(self.dispute_service.duplicate_stats["coalesced"], 2)
+
+    def test_duplicate_takes_over_when_the_original_is_cancelled(self):
+        """Test that a waiting duplicate runs its own analysis if the request it waited for is cancelled."""
+        async def slow_analysis(transaction, dispute_request):
+            await asyncio.sleep(0.05)
+            return self.mock_openai.return_value.analyze_dispute.return_value
+        self.mock_openai.return_value.analyze_dispute_async = AsyncMock(side_effect=slow_analysis)
+        dispute_request = self._recent_request()
+        
+        async def cancel_the_first():
+            first = asyncio.ensure_future(self.dispute_service.create_dispute_async(dispute_request))
+            await asyncio.sleep(0.01)
+            duplicate = asyncio.ensure_future(self.dispute_service.create_dispute_async(dispute_request))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await duplicate
+        
+        result = asyncio.run(cancel_the_first())
+        
+        self.assertNotIn("replayed", result)
+        self.assertEqual(result["fraud_likelihood"], "HIGH")
+        self.assertEqual(self.mock_openai.return_value.analyze_dispute_async.await_count, 2)
+        self.assertEqual(self.dispute_service.duplicate_stats["coalesced"], 0)
+        self.assertEqual(self.dispute_service._in_flight, {})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,201 @@
+import asyncio
+import random
+import unittest
+import httpx
+import openai
+from app.services.llm_client import CircuitBreaker, CircuitOpenError, ResilientLLMClient, RetryBudget
+from app.services.triage import DisputeTriage
+from tests.test_transaction_repository import make_transaction
+
+def server_error():
+    request = httpx.Request("POST", "http://stub/v1/chat/completions")
+    return openai.InternalServerError("Stub server error", response=httpx.Response(500, request=request), body=None)
+
+def bad_request():
+    request = httpx.Request("POST", "http://stub/v1/chat/completions")
+    return openai.BadRequestError("Bad request", response=httpx.Response(400, request=request), body=None)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class ScriptedSend:
+    """send(timeout) that fails or succeeds in a scripted order, optionally after a delay."""
+
+    def __init__(self, *outcomes, delays=None):
+        self.outcomes = list(outcomes)
+        self.delays = list(delays or [])
+        self.calls = 0
+
+    async def __call__(self, timeout):
+        self.calls += 1
+        delay = self.delays.pop(0) if self.delays else 0
+        outcome = self.outcomes.pop(0)
+        if delay:
+            await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+def make_client(**kwargs):
+    options = dict(max_retries=2, attempt_timeout=1.0, deadline_seconds=5.0, backoff_base_seconds=0.001,
+                   backoff_max_seconds=0.01, hedge_after_seconds=0, rng=random.Random(1),
+                   budget=RetryBudget(ratio=1.0, min_per_second=10),
+                   breaker=CircuitBreaker(failure_rate=0.5, min_calls=4, window=10, open_seconds=30))
+    options.update(kwargs)
+    return ResilientLLMClient(**options)
+
+class TestRetryBudget(unittest.TestCase):
+    def test_retries_are_capped_by_share_of_recent_calls(self):
+        clock = FakeClock()
+        budget = RetryBudget(ratio=0.5, min_per_second=0, window_seconds=10, clock=clock)
+        for _ in range(4):
+            budget.record_call()
+        self.assertEqual([budget.try_spend() for _ in range(3)], [True, True, False])
+
+        clock.now = 11.0  # the window has moved on
+        budget.record_call()
+        budget.record_call()
+        self.assertTrue(budget.try_spend())
+        self.assertFalse(budget.try_spend())
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_on_failure_rate_and_recovers_after_probe(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_rate=0.5, min_calls=4, window=10, open_seconds=30, clock=clock)
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.record_failure()  # 2 of 4 failed
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+        clock.now = 31.0
+        self.assertTrue(breaker.allow())  # one probe
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        clock.now = 62.0
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.times_opened, 2)
+
+class TestResilientLLMClient(unittest.TestCase):
+    def test_retries_transient_failures(self):
+        client = make_client()
+        send = ScriptedSend(server_error(), server_error(), "reply")
+        self.assertEqual(asyncio.run(client.call(send)), "reply")
+        self.assertEqual(send.calls, 3)
+        self.assertEqual(client.stats["retries"], 2)
+
+    def test_gives_up_after_max_retries(self):
+        client = make_client(max_retries=1)
+        send = ScriptedSend(server_error(), server_error(), "reply")
+        with self.assertRaises(openai.InternalServerError):
+            asyncio.run(client.call(send))
+        self.assertEqual(send.calls, 2)
+
+    def test_does_not_retry_bad_requests(self):
+        client = make_client()
+        send = ScriptedSend(bad_request(), "reply")
+        with self.assertRaises(openai.BadRequestError):
+            asyncio.run(client.call(send))
+        self.assertEqual(send.calls, 1)
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_retries_stop_when_budget_is_spent(self):
+        client = make_client(budget=RetryBudget(ratio=0.0, min_per_second=0))
+        send = ScriptedSend(server_error(), "reply")
+        with self.assertRaises(openai.InternalServerError):
+            asyncio.run(client.call(send))
+        self.assertEqual(client.stats["retries_denied"], 1)
+
+    def test_slow_attempt_times_out_and_is_retried(self):
+        client = make_client(attempt_timeout=0.05)
+        send = ScriptedSend("slow reply", "reply", delays=[1.0, 0])
+        self.assertEqual(asyncio.run(client.call(send)), "reply")
+        self.assertEqual(send.calls, 2)
+
+    def test_deadline_bounds_the_whole_call(self):
+        client = make_client(attempt_timeout=1.0, deadline_seconds=0.1, max_retries=5)
+        send = ScriptedSend(*["reply"] * 6, delays=[1.0] * 6)
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(client.call(send))
+        self.assertEqual(send.calls, 1)
+        self.assertEqual(client.stats["deadline_exceeded"], 1)
+
+    def test_open_circuit_fails_fast(self):
+        client = make_client(max_retries=0)
+        for _ in range(4):
+            with self.assertRaises(openai.InternalServerError):
+                asyncio.run(client.call(ScriptedSend(server_error())))
+        send = ScriptedSend("reply")
+        with self.assertRaises(CircuitOpenError):
+            asyncio.run(client.call(send))
+        self.assertEqual(send.calls, 0)
+        self.assertEqual(client.status()["circuit"], "open")
+
+    def test_cancelled_probe_frees_the_half_open_slot(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_rate=0.5, min_calls=4, window=10, open_seconds=30, clock=clock)
+        client = make_client(max_retries=0, breaker=breaker)
+        for _ in range(4):
+            breaker.record_failure()
+        clock.now += 30
+
+        async def cancel_probe():
+            probe = asyncio.ensure_future(client.call(ScriptedSend("slow reply", delays=[5])))
+            await asyncio.sleep(0.01)
+            probe.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await probe
+
+        asyncio.run(cancel_probe())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(asyncio.run(client.call(ScriptedSend("reply"))), "reply")  # the next call probes
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_hedged_request_wins_over_slow_attempt(self):
+        client = make_client(hedge_after_seconds=0.02)
+        send = ScriptedSend("slow reply", "fast reply", delays=[0.5, 0])
+        self.assertEqual(asyncio.run(client.call(send)), "fast reply")
+        self.assertEqual((client.stats["hedges"], client.stats["hedges_won"]), (1, 1))
+
+    def test_no_hedge_when_first_attempt_is_fast(self):
+        client = make_client(hedge_after_seconds=0.2)
+        send = ScriptedSend("reply", "unused")
+        self.assertEqual(asyncio.run(client.call(send)), "reply")
+        self.assertEqual(send.calls, 1)
+
+    def test_call_sync(self):
+        client = make_client()
+        outcomes = [server_error(), "reply"]
+
+        def send(timeout):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        self.assertEqual(client.call_sync(send), "reply")
+
+class TestFallbackAnalysis(unittest.TestCase):
+    def test_fallback_is_deterministic_for_ambiguous_disputes(self):
+        triage = DisputeTriage(enabled=True, high_min_signals=2, amount_zscore=3.0, familiar_merchant_min=3)
+        transaction = make_transaction("t1", location="Overseas")
+        first = triage.fallback_analysis(transaction)
+        self.assertEqual(first, triage.fallback_analysis(transaction))
+        self.assertEqual(first["fraud_likelihood"], "MEDIUM")
+        self.assertTrue(first["fallback"])
+        self.assertIn("high-risk location", first["analysis"])
+        self.assertEqual(triage.stats()["disputes"], 0)  # not counted as triage decisions
+
+if __name__ == '__main__':
+    unittest.main()
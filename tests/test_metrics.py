@@ -0,0 +1,104 @@
+import asyncio
+import unittest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.utils import metrics
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = metrics.MetricsRegistry()
+
+    def test_counter_and_gauge_render(self):
+        counter = self.registry.counter("jobs_total", "Jobs", ("outcome",))
+        counter.inc(2, "ok")
+        counter.inc(1, "failed")
+        gauge = self.registry.gauge("depth", "Queue depth")
+        gauge.inc(3)
+        gauge.dec()
+
+        text = self.registry.render()
+        self.assertIn("# TYPE jobs_total counter", text)
+        self.assertIn('jobs_total{outcome="ok"} 2', text)
+        self.assertIn('jobs_total{outcome="failed"} 1', text)
+        self.assertIn("depth 2", text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, "/a")
+
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{route="/a",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{route="/a",le="1.0"} 3', text)
+        self.assertIn('latency_seconds_bucket{route="/a",le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_sum{route="/a"} 6.05', text)
+        self.assertIn('latency_seconds_count{route="/a"} 4', text)
+
+    def test_same_name_returns_same_metric(self):
+        self.assertIs(self.registry.counter("a_total", "A"), self.registry.counter("a_total", "A"))
+        with self.assertRaises(ValueError):
+            self.registry.gauge("a_total", "A")
+
+    def test_collectors_run_on_render(self):
+        calls = []
+        self.registry.add_collector(lambda: calls.append(1) or [("queue_depth", "gauge", "Depth", [({}, len(calls))])])
+        self.assertIn("queue_depth 1", self.registry.render())
+        self.assertIn("queue_depth 2", self.registry.render())
+
+    def test_label_values_are_escaped(self):
+        self.registry.counter("odd_total", "Odd", ("name",)).inc(1, 'say "hi"\n')
+        self.assertIn('odd_total{name="say \\"hi\\"\\n"} 1', self.registry.render())
+
+class TestSpans(unittest.TestCase):
+    def test_timed_records_sync_and_async_calls(self):
+        @metrics.timed("test_sync_span")
+        def work(x):
+            return x + 1
+
+        @metrics.timed("test_async_span")
+        async def async_work(x):
+            return x * 2
+
+        before = metrics.SPAN_SECONDS.count("test_sync_span")
+        self.assertEqual(work(1), 2)
+        self.assertEqual(asyncio.run(async_work(2)), 4)
+        self.assertEqual(metrics.SPAN_SECONDS.count("test_sync_span"), before + 1)
+        self.assertEqual(metrics.SPAN_SECONDS.count("test_async_span"), 1)
+
+    def test_span_records_when_block_raises(self):
+        before = metrics.SPAN_SECONDS.count("test_failing_span")
+        with self.assertRaises(KeyError):
+            with metrics.span("test_failing_span"):
+                raise KeyError("missing")
+        self.assertEqual(metrics.SPAN_SECONDS.count("test_failing_span"), before + 1)
+
+    def test_llm_call_tracks_outcome_and_in_flight(self):
+        before = metrics.LLM_REQUEST_SECONDS.count("test", "error")
+        with self.assertRaises(RuntimeError):
+            with metrics.llm_call("test"):
+                self.assertEqual(metrics.LLM_IN_FLIGHT.value(), 1)
+                raise RuntimeError("timeout")
+        self.assertEqual(metrics.LLM_IN_FLIGHT.value(), 0)
+        self.assertEqual(metrics.LLM_REQUEST_SECONDS.count("test", "error"), before + 1)
+
+class TestRequestTimingMiddleware(unittest.TestCase):
+    def test_requests_are_labelled_by_route_template(self):
+        app = FastAPI()
+        app.add_middleware(metrics.RequestTimingMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: str):
+            return {"item_id": item_id}
+
+        client = TestClient(app)
+        before = metrics.HTTP_REQUEST_SECONDS.count("GET", "/items/{item_id}", "200")
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/nowhere")
+
+        self.assertEqual(metrics.HTTP_REQUEST_SECONDS.count("GET", "/items/{item_id}", "200"), before + 2)
+        self.assertGreaterEqual(metrics.HTTP_REQUEST_SECONDS.count("GET", "unmatched", "404"), 1)
+        self.assertEqual(metrics.HTTP_IN_FLIGHT.value(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
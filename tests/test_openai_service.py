@@ -0,0 +1,177 @@
+import unittest
+import asyncio
+from unittest.mock import patch
+from app.services.openai_service import OpenAIService
+from app.models.transaction import DisputeRequest
+from tests import llm_stub
+from tests.llm_stub import start_stub_server
+from tests.test_transaction_repository import make_transaction
+
+class TestOpenAIService(unittest.TestCase):
+
+    def setUp(self):
+        self.server = start_stub_server()
+        self.config_patcher = patch('app.services.openai_service.Config')
+        self.mock_config = self.config_patcher.start()
+        self.mock_config.OPENAI_API_KEY = "test-key"
+        self.mock_config.OPENAI_MODEL = "gpt-4o"
+        self.mock_config.OPENAI_BASE_URL = self.server.base_url
+        self.mock_config.OPENAI_MAX_CONCURRENCY = 4
+        self.mock_config.OPENAI_TIMEOUT_SECONDS = 5.0
+        self.mock_config.OPENAI_MAX_RETRIES = 0
+        self.mock_config.LLM_BATCH_SIZE = 4
+        self.service = OpenAIService()
+        self.dispute_request = DisputeRequest(
+            customer_id="CUST000001",
+            transaction_id="t1",
+            reason="Unauthorized transaction",
+            description="I did not make this purchase"
+        )
+
+    def tearDown(self):
+        self.config_patcher.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_analyze_dispute_async(self):
+        """Test concurrent async analyses against the local stub server."""
+        transactions = [
+            make_transaction(f"t{i}", merchant=f"Merchant {i}", location="Overseas" if i % 2 else "Sydney, NSW")
+            for i in range(8)
+        ]
+
+        async def run():
+            try:
+                return await asyncio.gather(
+                    *(self.service.analyze_dispute_async(t, self.dispute_request) for t in transactions)
+                )
+            finally:
+                await self.service.close()
+
+        results = asyncio.run(run())
+        self.assertEqual([r["fraud_likelihood"] for r in results], ["MEDIUM", "HIGH"] * 4)
+        self.assertEqual(self.server.stats["requests"], 8)
+
+    def test_analyze_disputes_async_batches(self):
+        """Test that bulk analysis groups disputes into batched prompts and keeps results in order."""
+        transactions = [
+            make_transaction(f"t{i}", merchant=f"Merchant {i}", location="Overseas" if i % 3 == 0 else "Sydney, NSW")
+            for i in range(9)
+        ]
+
+        async def run():
+            try:
+                return await self.service.analyze_disputes_async([(t, self.dispute_request) for t in transactions])
+            finally:
+                await self.service.close()
+
+        results = asyncio.run(run())
+        self.assertEqual([r["fraud_likelihood"] for r in results], ["HIGH", "MEDIUM", "MEDIUM"] * 3)
+        self.assertTrue(all("id" not in r for r in results))
+        self.assertEqual(self.server.stats["requests"], 3)  # 4 + 4 + 1
+
+    def test_equivalent_disputes_hit_cache(self):
+        """Test that a dispute differing only in identifiers and exact amount reuses the cached assessment."""
+        first = make_transaction("t1", amount=120.0, location="Overseas")
+        second = make_transaction("t2", customer_id="CUST000002", amount=130.0, location="Overseas",
+                                  date="2024-02-02 10:00:00")
+        second_request = self.dispute_request.copy(update={"customer_id": "CUST000002", "transaction_id": "t2"})
+
+        async def run():
+            try:
+                return [await self.service.analyze_dispute_async(first, self.dispute_request),
+                        await self.service.analyze_dispute_async(second, second_request)]
+            finally:
+                await self.service.close()
+
+        results = asyncio.run(run())
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(self.server.stats["requests"], 1)
+        stats = self.service.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertGreater(stats["tokens_saved"], 0)
+
+    def test_analyze_dispute_async_error(self):
+        """Test that an unreachable API yields the error analysis instead of raising."""
+        self.server.shutdown()
+        self.server.server_close()
+        self.mock_config.OPENAI_TIMEOUT_SECONDS = 0.5
+        result = asyncio.run(self.service.analyze_dispute_async(make_transaction("t1"), self.dispute_request))
+        self.assertEqual(result["fraud_likelihood"], "ERROR")
+        self.server = start_stub_server()
+
+    def test_open_circuit_uses_fallback(self):
+        """Test that the deterministic fallback answers without calling the API while the breaker is open."""
+        fallback = {"analysis": "Automated assessment", "fraud_likelihood": "MEDIUM", "recommended_actions": []}
+        self.service.fallback = lambda transaction: fallback
+        breaker = self.service.llm_client.breaker
+        while breaker.state != breaker.OPEN:
+            breaker.record_failure()
+
+        result = asyncio.run(self.service.analyze_dispute_async(make_transaction("t1"), self.dispute_request))
+        self.assertEqual(result, fallback)
+        self.assertEqual(self.server.stats["requests"], 0)
+
+    def test_server_errors_are_retried(self):
+        """Test that a 500 from the API is retried instead of returned as an error analysis."""
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = start_stub_server(error_rate=0.5, seed=3)
+        self.mock_config.OPENAI_BASE_URL = self.server.base_url
+        self.service = OpenAIService()
+        self.service.llm_client.max_retries = 5
+        self.service.llm_client.backoff_base_seconds = 0.001
+        transactions = [make_transaction(f"t{i}", merchant=f"Merchant {i}") for i in range(4)]
+
+        async def run():
+            try:
+                return [await self.service.analyze_dispute_async(t, self.dispute_request) for t in transactions]
+            finally:
+                await self.service.close()
+
+        results = asyncio.run(run())
+        self.assertEqual([r["fraud_likelihood"] for r in results], ["MEDIUM"] * 4)
+        self.assertGreater(self.server.stats["errors"], 0)
+        self.assertEqual(self.service.llm_client.stats["retries"], self.server.stats["errors"])
+
+    def test_malformed_replies_are_recovered(self):
+        """Test that JSON wrapped in prose, fenced, with trailing commas or cut off is still parsed."""
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = start_stub_server(malformed_rate=1.0, seed=5)
+        self.mock_config.OPENAI_BASE_URL = self.server.base_url
+        self.service = OpenAIService()
+        transactions = [make_transaction(f"t{i}", merchant=f"Merchant {i}", location="Overseas" if i % 2 else "Sydney, NSW")
+                        for i in range(10)]
+
+        async def run():
+            try:
+                return await asyncio.gather(
+                    *(self.service.analyze_dispute_async(t, self.dispute_request) for t in transactions))
+            finally:
+                await self.service.close()
+
+        results = asyncio.run(run())
+        self.assertEqual([r["fraud_likelihood"] for r in results], ["MEDIUM", "HIGH"] * 5)
+        self.assertEqual(self.server.stats["malformed"], 10)
+
+    def test_batched_replies_are_normalised_and_cached(self):
+        """Test that a lower-case fraud_likelihood in a batched reply is normalised like a single reply."""
+        self.server.malformed_rate = 1.0
+        transactions = [make_transaction(f"t{i}", merchant=f"Merchant {i}", location="Overseas" if i % 3 == 0 else "Sydney, NSW")
+                        for i in range(4)]
+
+        async def run():
+            try:
+                return await self.service.analyze_disputes_async([(t, self.dispute_request) for t in transactions])
+            finally:
+                await self.service.close()
+
+        with patch.dict(llm_stub.MALFORMATIONS, {"lowercase": llm_stub.MALFORMATIONS["lowercase"]}, clear=True):
+            results = asyncio.run(run())
+        self.assertEqual([r["fraud_likelihood"] for r in results], ["HIGH", "MEDIUM", "MEDIUM", "HIGH"])
+        self.assertEqual(self.server.stats["requests"], 1)
+        self.assertEqual(self.service.cache.stats()["entries"], 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from app.models.transaction import DisputeRequest
+from app.services.prompt_builder import (
+    SYSTEM_PROMPT, build_batch_prompt, build_dispute_prompt, count_tokens, dispute_section
+)
+from tests.llm_stub import assess_batch
+from tests.test_transaction_repository import make_transaction
+
+PROFILE = {"history_transactions": 30, "amount_zscore": 0.5, "merchant_visits": 2, "location_visits": 5,
+           "hour_share": 0.2, "merchant_location_visits": 2}
+
+class TestPromptBuilder(unittest.TestCase):
+    def setUp(self):
+        self.transaction = dict(make_transaction("t1", location="Overseas"), customer_profile=PROFILE)
+        self.request = DisputeRequest(customer_id="CUST000001", transaction_id="t1", reason="Unauthorized transaction",
+                                      description="I did not make this purchase")
+
+    def test_count_tokens(self):
+        self.assertEqual(count_tokens(""), 0)
+        self.assertLess(count_tokens("one two three"), count_tokens("one two three four five six"))
+        self.assertGreater(count_tokens(SYSTEM_PROMPT), 100)
+
+    def test_prompt_has_every_fact_and_no_indentation(self):
+        prompt = build_dispute_prompt(self.transaction, self.request)
+        for value in ("t1", "Test Merchant", "$100.0", "Overseas", "CUST000001", "I did not make this purchase",
+                      "Merchant history: used before by this customer"):
+            self.assertIn(value, prompt)
+        self.assertFalse(any(line.startswith(" ") for line in prompt.splitlines()))
+
+    def test_long_description_is_trimmed_to_budget(self):
+        request = self.request.copy(update={"description": "The card was stolen from my bag. " * 100})
+        full = build_dispute_prompt(self.transaction, request, budget=0)
+        trimmed = build_dispute_prompt(self.transaction, request, budget=200)
+        self.assertLess(count_tokens(trimmed), count_tokens(full))
+        self.assertLessEqual(count_tokens("\n".join(dispute_section(self.transaction, request, 200))), 200)
+        self.assertIn("[...]", trimmed)
+        self.assertIn("Overseas", trimmed)  # transaction facts are never dropped
+        self.assertIn("Time of day", trimmed)
+
+    def test_tiny_budget_drops_profile_lines(self):
+        prompt = build_dispute_prompt(self.transaction, self.request, budget=60)
+        self.assertIn("Overseas", prompt)
+        self.assertNotIn("Time of day", prompt)
+
+    def test_similar_cases_are_dropped_before_the_description(self):
+        cases = [{"similarity": 0.91, "status": "RESOLVED", "fraud_likelihood": "HIGH",
+                  "summary": "Card used overseas shortly after the customer reported it stolen"}] * 3
+        transaction = dict(self.transaction, similar_cases=cases)
+        prompt = build_dispute_prompt(transaction, self.request, budget=0)
+        self.assertIn("Similar past cases:", prompt)
+        self.assertIn("- 91% similar, resolved: HIGH; Card used overseas", prompt)
+        budget = count_tokens("\n".join(dispute_section(self.transaction, self.request, 0))) + 40
+        lines = dispute_section(transaction, self.request, budget)
+        self.assertEqual(sum(line.startswith("- 91% similar") for line in lines), 1)
+        self.assertIn("Customer description: I did not make this purchase", lines)
+
+    def test_batch_prompt_sections(self):
+        items = [(self.transaction, self.request), (make_transaction("t2"), self.request)]
+        reply = assess_batch(build_batch_prompt(items))
+        self.assertEqual([(r["id"], r["fraud_likelihood"]) for r in reply["results"]], [(0, "HIGH"), (1, "MEDIUM")])
+
+if __name__ == '__main__':
+    unittest.main()
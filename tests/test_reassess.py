@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import app.utils.reassess as reassess
+from app.services.dispute_repository import SQLiteDisputeRepository
+from app.services.transaction_repository import TransactionRepository
+from app.utils.reassess import InlineExecutor, RateLimiter, Reassessment
+from tests.llm_stub import start_stub_server
+from tests.test_dispute_repository import make_dispute
+from tests.test_transaction_repository import make_transaction
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+class TestRateLimiter(unittest.TestCase):
+    def test_long_run_rate_holds_for_any_request_size(self):
+        clock = FakeClock()
+        limiter = RateLimiter(10, clock=clock, sleep=clock.sleep)
+        self.assertEqual(limiter.acquire(10), 0.0)  # one second's burst
+        self.assertAlmostEqual(limiter.acquire(5), 0.5)
+        self.assertAlmostEqual(limiter.acquire(30), 3.0)  # larger than the burst: sleeps off the debt
+        self.assertAlmostEqual(clock.now, 3.5)
+        self.assertEqual(RateLimiter(0).acquire(1000), 0.0)
+
+class TestReassessment(unittest.TestCase):
+    def setUp(self):
+        self.server = start_stub_server()
+        self.config_patcher = patch('app.services.openai_service.Config')
+        config = self.config_patcher.start()
+        config.OPENAI_API_KEY = "test-key"
+        config.OPENAI_MODEL = "gpt-4o"
+        config.OPENAI_BASE_URL = self.server.base_url
+        config.OPENAI_MAX_CONCURRENCY = 4
+        config.OPENAI_TIMEOUT_SECONDS = 5.0
+        config.OPENAI_MAX_RETRIES = 0
+        config.LLM_BATCH_SIZE = 1
+        self.directory = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.directory.name, "checkpoint.json")
+        self.disputes = SQLiteDisputeRepository(os.path.join(self.directory.name, "disputes.sqlite3"),
+                                                commit_interval_ms=0)
+        self.transactions = TransactionRepository([
+            make_transaction(f"t{i}", merchant=f"Merchant {i}", location="Overseas" if i % 2 else "Sydney, NSW")
+            for i in range(6)
+        ])
+        for i in range(6):
+            self.disputes.save(dict(make_dispute(f"d{i}", transaction_id=f"t{i}"), reason="Unauthorized transaction",
+                                    description="I did not make this purchase", fraud_likelihood="UNKNOWN"))
+        self.disputes.save(make_dispute("d6", transaction_id="t1", status="RESOLVED"))
+        self.disputes.save(make_dispute("d7", transaction_id="missing"))
+
+    def tearDown(self):
+        if reassess._worker is not None:
+            service, loop = reassess._worker
+            loop.run_until_complete(service.close())
+            loop.close()
+            reassess._worker = None
+        self.disputes.close()
+        self.directory.cleanup()
+        self.config_patcher.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reassessment(self, **kwargs):
+        options = dict(checkpoint_path=self.checkpoint, chunk_size=2)
+        options.update(kwargs)
+        return Reassessment(self.disputes, self.transactions, **options)
+
+    def test_reassesses_open_disputes_and_writes_back(self):
+        stats = self.reassessment().run(InlineExecutor(), max_in_flight=2)
+        self.assertEqual((stats["disputes"], stats["analysed"], stats["written"], stats["missing_transaction"]),
+                         (7, 6, 6, 1))
+        self.assertEqual(self.server.stats["requests"], 6)
+        self.assertGreater(stats["prompt_tokens"], 0)
+        self.assertEqual(self.disputes.get("d1")["fraud_likelihood"], "HIGH")
+        self.assertEqual(self.disputes.get("d0")["fraud_likelihood"], "MEDIUM")
+        self.assertEqual(self.disputes.get("d0")["assessed_by"], "gpt-4o")
+        self.assertNotIn("reassessed_at", self.disputes.get("d6"))  # closed disputes are left alone
+
+    def test_interrupted_run_resumes_from_checkpoint(self):
+        """Test that a second run continues where a limited one stopped, without repeating analyses."""
+        first = self.reassessment(limit=3)
+        first.run(InlineExecutor(), max_in_flight=2)
+        self.assertEqual(first.stats["disputes"], 3)
+
+        second = self.reassessment()
+        stats = second.run(InlineExecutor(), max_in_flight=2)
+        self.assertEqual(stats["disputes"], 7)
+        self.assertEqual(self.server.stats["requests"], 6)
+        self.assertEqual(second.report()["disputes_per_second"] is not None, True)
+
+        with patch('app.utils.reassess.Config') as config:
+            config.OPENAI_MODEL = "gpt-5"
+            config.LLM_PROMPT_TOKEN_BUDGET = 300
+            with self.assertRaises(ValueError):
+                self.reassessment().run(InlineExecutor(), max_in_flight=2)
+
+    def test_failed_analyses_keep_previous_assessment(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = start_stub_server(error_rate=1.0)
+        reassess_run = self.reassessment(checkpoint_path=None)
+        with patch('app.services.openai_service.Config.OPENAI_BASE_URL', self.server.base_url):
+            stats = reassess_run.run(InlineExecutor(), max_in_flight=2)
+        self.assertEqual((stats["failed"], stats["written"]), (6, 0))
+        self.assertEqual(sorted(reassess_run.failed), [f"d{i}" for i in range(6)])
+        self.assertEqual(self.disputes.get("d0")["fraud_likelihood"], "UNKNOWN")
+
+if __name__ == '__main__':
+    unittest.main()
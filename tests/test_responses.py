@@ -0,0 +1,47 @@
+import unittest
+import json
+from unittest.mock import patch
+from app.api import responses
+from app.api.responses import TrustedJSONResponse, model_fields, project, ndjson_chunks
+from app.models.transaction import Transaction, DisputeResponse
+from tests.test_transaction_repository import make_transaction
+
+class TestTrustedJSONResponse(unittest.TestCase):
+
+    def setUp(self):
+        self.dispute = {
+            "dispute_id": "d1", "transaction_id": "t1", "customer_id": "CUST000001", "status": "UNDER_REVIEW",
+            "created_at": "2024-01-02 10:00:00", "estimated_resolution_time": "2024-01-07",
+            "next_steps": ["Block card"], "reference_number": "DSP-D1", "ai_assessment": "Looks fraudulent",
+            "reason": "Unauthorized transaction", "contact_email": "someone@example.com",
+            "ai_analysis": {"fraud_likelihood": "HIGH"}
+        }
+
+    def test_matches_model_serialisation(self):
+        """Test that projected records serialise exactly as the Pydantic response models would."""
+        transaction = make_transaction("t1", extra_field="internal")
+        body = json.loads(TrustedJSONResponse(project(transaction, model_fields(Transaction))).body)
+        self.assertEqual(body, Transaction(**transaction).dict())
+
+        body = json.loads(TrustedJSONResponse([project(self.dispute, model_fields(DisputeResponse))]).body)
+        self.assertEqual(body, [DisputeResponse(**self.dispute).dict()])
+        self.assertNotIn("contact_email", body[0])
+
+    def test_standard_library_fallback(self):
+        """Test that responses encode the same without orjson installed."""
+        content = [project(self.dispute, model_fields(DisputeResponse))]
+        expected = json.loads(responses.dumps(content))
+        with patch.object(responses, "orjson", None):
+            self.assertEqual(json.loads(responses.dumps(content)), expected)
+
+    def test_ndjson_chunks(self):
+        """Test that NDJSON chunks hold one projected record per line."""
+        rows = [make_transaction(f"t{i}", extra_field="internal") for i in range(5)]
+        chunks = list(ndjson_chunks(rows, model_fields(Transaction), chunk_size=2))
+        self.assertEqual(len(chunks), 3)
+        lines = b"".join(chunks).splitlines()
+        self.assertEqual([json.loads(line)["transaction_id"] for line in lines], [f"t{i}" for i in range(5)])
+        self.assertNotIn("extra_field", json.loads(lines[0]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from app.services.columnar_store import ColumnarTransactionRepository
+from app.services.sharding import ShardAssignment, shard_of
+from app.services.transaction_ingestion import TransactionDeltaIngestor
+from app.services.transaction_repository import load_transaction_repository
+from app.shard_router import ShardRouter
+from tests.test_transaction_ingestion import FakeService
+from tests.test_transaction_repository import make_transaction
+
+def make_request(method, path, query="", headers=None):
+    return Request({"type": "http", "method": method, "path": path, "query_string": query.encode(),
+                    "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]})
+
+class TestShardAssignment(unittest.TestCase):
+    def test_shard_of_is_stable_and_balanced(self):
+        """Test that customers map to the same shard in every process and spread evenly."""
+        self.assertEqual(shard_of("CUST000001", 4), shard_of("CUST000001", 4))
+        self.assertEqual(shard_of("CUST000001", 1), 0)
+        counts = [0] * 4
+        for i in range(4000):
+            counts[shard_of(f"CUST{i:06d}", 4)] += 1
+        self.assertTrue(all(900 < count < 1100 for count in counts), counts)
+
+    def test_invalid_assignment(self):
+        with self.assertRaises(ValueError):
+            ShardAssignment(shard_count=2, shard_index=2)
+
+    def test_shards_partition_a_loaded_dataset(self):
+        """Test that each shard loads only its customers and together they load everything, from JSON Lines and snapshots."""
+        transactions = [make_transaction(f"t{i}", customer_id=f"CUST{i % 10:06d}") for i in range(50)]
+        with tempfile.TemporaryDirectory() as directory:
+            jsonl_path = os.path.join(directory, "transactions.jsonl")
+            with open(jsonl_path, "w") as f:
+                f.writelines(json.dumps(t) + "\n" for t in transactions)
+            snapshot_path = os.path.join(directory, "transactions.snap")
+            ColumnarTransactionRepository(transactions).save_snapshot(snapshot_path)
+
+            for path in (jsonl_path, snapshot_path):
+                loaded = []
+                for index in range(3):
+                    shard = ShardAssignment(shard_count=3, shard_index=index)
+                    repository = load_transaction_repository(path, shard)
+                    self.assertTrue(all(shard.owns(t["customer_id"]) for t in repository))
+                    loaded += [t["transaction_id"] for t in repository]
+                self.assertEqual(sorted(loaded), sorted(t["transaction_id"] for t in transactions))
+
+    def test_ingestor_keeps_only_its_customers(self):
+        shard = ShardAssignment(shard_count=2, shard_index=shard_of("CUST000001", 2))
+        other = next(f"CUST{i:06d}" for i in range(2, 100) if not shard.owns(f"CUST{i:06d}"))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "delta.jsonl")
+            with open(path, "w") as f:
+                f.write(json.dumps(make_transaction("t2")) + "\n")
+                f.write(json.dumps(make_transaction("t3", customer_id=other)) + "\n")
+            service = FakeService([make_transaction("t1")])
+            ingestor = TransactionDeltaIngestor(service, path=path, max_batch_rows=100, compact_rows=1000, shard=shard)
+            self.assertEqual(ingestor.poll(), 1)
+        self.assertIn("t2", service.transactions)
+        self.assertNotIn("t3", service.transactions)
+        self.assertEqual(ingestor.stats["rows_other_shards"], 1)
+
+class ShardWorker:
+    """A uvicorn server on a Unix socket in a background thread, answering with its name and the request."""
+
+    def __init__(self, name, path):
+        async def echo(request):
+            return JSONResponse({"shard": name, "method": request.method, "path": request.url.path,
+                                 "query": request.url.query, "body": (await request.body()).decode(),
+                                 "customer": request.headers.get("x-customer-id")})
+        app = Starlette(routes=[Route("/{path:path}", echo, methods=["GET", "POST"])])
+        self.server = uvicorn.Server(uvicorn.Config(app, uds=path, log_level="error", lifespan="off"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join()
+
+class TestShardRouter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = [os.path.join(self.directory.name, f"shard-{i}.sock") for i in range(2)]
+        self.router = ShardRouter(self.paths, timeout=5)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_customer_is_taken_from_path_query_or_header(self):
+        router = self.router
+        self.assertEqual(router.customer_of(make_request("GET", "/api/transactions/CUST000007/t1")), "CUST000007")
+        self.assertEqual(router.customer_of(make_request("GET", "/api/disputes/CUST000007")), "CUST000007")
+        self.assertEqual(router.customer_of(make_request("POST", "/api/disputes", "customer_id=CUST000008")),
+                         "CUST000008")
+        self.assertEqual(router.customer_of(make_request("POST", "/api/disputes/batch",
+                                                         headers={"X-Customer-Id": "CUST000009"})), "CUST000009")
+        self.assertIsNone(router.customer_of(make_request("GET", "/api/admin/triage")))
+        self.assertEqual(router.shard_for(make_request("GET", "/metrics", headers={"X-Shard": "1"})), 1)
+        with self.assertRaises(ValueError):
+            router.shard_for(make_request("GET", "/metrics", headers={"X-Shard": "2"}))
+
+    def test_requests_are_forwarded_to_the_owning_shard(self):
+        workers = [ShardWorker(f"shard-{i}", path) for i, path in enumerate(self.paths)]
+        customers = {shard_of(f"CUST{i:06d}", 2): f"CUST{i:06d}" for i in range(20)}
+
+        async def exercise():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=self.router.app),
+                                         base_url="http://router") as client:
+                listing = await client.get(f"/api/transactions/{customers[1]}", params={"limit": 5})
+                dispute = await client.post("/api/disputes", params={"customer_id": customers[0]},
+                                            headers={"X-Customer-Id": customers[0]}, json={"reason": "x"})
+                admin = await client.get("/api/admin/triage", headers={"X-Shard": "1"})
+                await self.router.close()
+                return listing, dispute, admin
+
+        try:
+            listing, dispute, admin = asyncio.run(exercise())
+        finally:
+            for worker in workers:
+                worker.stop()
+        self.assertEqual(listing.json()["shard"], "shard-1")
+        self.assertEqual(listing.json()["query"], "limit=5")
+        self.assertEqual(listing.headers["x-shard"], "1")
+        self.assertEqual(dispute.json()["shard"], "shard-0")
+        self.assertEqual(json.loads(dispute.json()["body"]), {"reason": "x"})
+        self.assertEqual(dispute.json()["customer"], customers[0])
+        self.assertEqual(admin.json()["shard"], "shard-1")
+
+    def test_unreachable_shard(self):
+        async def exercise():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=self.router.app),
+                                         base_url="http://router") as client:
+                response = await client.get("/api/disputes/CUST000001", headers={"X-Customer-Id": "CUST000001"})
+                await self.router.close()
+                return response
+
+        self.assertEqual(asyncio.run(exercise()).status_code, 503)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from pydantic import ValidationError
+from app.models.transaction import DisputeRequest
+from app.services.dispute_service import DisputeService
+from app.services.similar_disputes import (SIGNATURE_BITS, SimilarDisputeIndex, dispute_signature, similarity,
+                                             simhash)
+from tests.test_transaction_repository import make_transaction
+
+STOLEN = "My card was stolen while travelling and I did not make this purchase"
+
+class TestSimilarDisputeIndex(unittest.TestCase):
+    def test_signature_distance_follows_shared_features(self):
+        base = dispute_signature(make_transaction("t1"), "Unauthorized transaction", STOLEN)
+        same = dispute_signature(make_transaction("t2", customer_id="CUST000002", amount=120.0),
+                                 "Unauthorized transaction", STOLEN)
+        reworded = dispute_signature(make_transaction("t3"), "Unauthorized transaction",
+                                     "My card was stolen while travelling, I never made this purchase")
+        different = dispute_signature(make_transaction("t4", merchant="Coffee Club", category="Dining",
+                                                       location="Overseas"), "Billing error", "I was charged twice")
+        self.assertEqual(same, base)  # identifiers and amounts within a band do not count
+        self.assertGreater(similarity(base, reworded), 0.8)
+        self.assertLess(similarity(base, different), similarity(base, reworded))
+
+    def test_search_returns_top_k_above_threshold(self):
+        index = SimilarDisputeIndex(tables=8, table_bits=8, max_candidates=64, top_k=2, min_similarity=0.8)
+        signature = 0x0123456789ABCDEF
+        index.add("exact", signature)
+        index.add("close", signature ^ 0b111)  # 3 bits apart
+        index.add("far", signature ^ 0xFFFFFFFF)  # 32 bits apart
+        self.assertEqual(len(index), 3)
+        self.assertEqual([dispute_id for dispute_id, _ in index.search(signature)], ["exact", "close"])
+        self.assertEqual(index.search(signature, k=5)[1], ("close", 1 - 3 / 64))
+        self.assertEqual(index.search(signature ^ (1 << 63), k=5, min_similarity=0.99), [])
+        index.add("exact again", signature)
+        self.assertEqual(index.search(signature, k=1), [("exact again", 1.0)])  # newest first among ties
+        self.assertEqual(index.stats()["searches"], 4)
+
+    def test_long_descriptions_keep_weights_within_the_lanes(self):
+        transaction = make_transaction("t1")
+        repeated = dispute_signature(transaction, "Unauthorized transaction", "b " * 40000)
+        self.assertEqual(repeated, dispute_signature(transaction, "Unauthorized transaction", "b"))
+        distinct = " ".join(f"word{i}" for i in range(40000))
+        self.assertLess(dispute_signature(transaction, "Unauthorized transaction", distinct), 1 << SIGNATURE_BITS)
+        with self.assertRaises(ValueError):
+            simhash({"word:b": 1 << 15})
+
+    def test_table_bits_must_fit_the_signature(self):
+        with self.assertRaises(ValueError):
+            SimilarDisputeIndex(table_bits=65)
+
+class TestSimilarDisputesInDisputeService(unittest.TestCase):
+    def setUp(self):
+        self.openai_patcher = patch('app.services.dispute_service.OpenAIService')
+        self.mock_openai = self.openai_patcher.start()
+        self.mock_openai.return_value.analyze_dispute.return_value = {
+            "analysis": "Transaction t0 by CUST000001 looks fraudulent. The card was used abroad.",
+            "fraud_likelihood": "HIGH",
+            "recommended_actions": ["Block card"]
+        }
+
+        recent = (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d %H:%M:%S")
+        self.temp_dir = tempfile.TemporaryDirectory()
+        data_file = os.path.join(self.temp_dir.name, "transactions.json")
+        with open(data_file, 'w') as f:
+            json.dump([make_transaction(f"t{i}", customer_id=f"CUST00000{i + 1}", date=recent) for i in range(3)], f)
+
+        self.config_patcher = patch('app.services.dispute_service.Config')
+        config = self.config_patcher.start()
+        config.DATA_FILE = data_file
+        config.DISPUTE_TIME_LIMIT_DAYS = 60
+        config.MAX_DISPUTE_AMOUNT = 10000.0
+        self.service = DisputeService()
+
+    def tearDown(self):
+        self.openai_patcher.stop()
+        self.config_patcher.stop()
+        self.temp_dir.cleanup()
+
+    def _request(self, number):
+        return DisputeRequest(customer_id=f"CUST00000{number + 1}", transaction_id=f"t{number}",
+                              reason="Unauthorized transaction", description=STOLEN)
+
+    def test_similar_past_assessments_go_into_the_prompt(self):
+        self.service.create_dispute(self._request(0))
+        self.assertEqual(len(self.service.similar_disputes), 1)
+        self.service.create_dispute(self._request(1))
+
+        transaction, _ = self.mock_openai.return_value.analyze_dispute.call_args.args
+        self.assertNotIn("similar_cases", self.mock_openai.return_value.analyze_dispute.call_args_list[0].args[0])
+        self.assertEqual(transaction["similar_cases"], [{
+            "similarity": 1.0, "status": "UNDER_REVIEW", "fraud_likelihood": "HIGH",
+            "summary": "Transaction this transaction by the customer looks fraudulent"
+        }])
+        self.assertEqual(len(self.service.similar_disputes), 2)
+
+    def test_near_identical_assessment_is_reused(self):
+        self.service.similar_disputes.reuse_similarity = 0.97
+        self.service.create_dispute(self._request(0))
+        result = self.service.create_dispute(self._request(1))
+
+        self.assertEqual(self.mock_openai.return_value.analyze_dispute.call_count, 1)
+        self.assertEqual(result["fraud_likelihood"], "HIGH")
+        self.assertNotIn("CUST000001", result["ai_assessment"])
+        self.assertEqual(self.service.get_dispute(result["dispute_id"])["ai_analysis"]["reused_similarity"], 1.0)
+        self.assertEqual(len(self.service.similar_disputes), 1)  # reused assessments are not indexed again
+        self.assertEqual(self.service.similar_disputes.stats()["reused"], 1)
+
+    def test_long_description_is_assessed_and_indexed(self):
+        request = self._request(0)
+        request.description = "b " * 2500
+        self.assertEqual(len(request.description), 5000)
+        result = self.service.create_dispute(request)
+        self.assertEqual(result["fraud_likelihood"], "HIGH")
+        self.assertEqual(len(self.service.similar_disputes), 1)
+        with self.assertRaises(ValidationError):
+            DisputeRequest(customer_id="CUST000001", transaction_id="t0", reason="Unauthorized transaction",
+                           description="b" * 5001)
+
+    def test_stored_disputes_are_indexed_at_startup(self):
+        self.service.create_dispute(self._request(0))
+        with patch('app.services.dispute_service.create_dispute_repository', return_value=self.service.disputes):
+            restarted = DisputeService()
+        self.assertEqual(len(restarted.similar_disputes), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import json
+import unittest
+from app.utils.structured_output import JSONStreamExtractor, extract_json
+
+ASSESSMENT = {"analysis": "Card used overseas {twice}", "fraud_likelihood": "HIGH",
+              "recommended_actions": ["Block the card", "Issue a \"provisional\" credit"]}
+
+class TestExtractJson(unittest.TestCase):
+    def setUp(self):
+        self.content = json.dumps(ASSESSMENT)
+
+    def test_plain_json(self):
+        self.assertEqual(extract_json(self.content), ASSESSMENT)
+
+    def test_json_in_prose_and_code_fence(self):
+        self.assertEqual(extract_json(f"Sure {{}} here it is:\n```json\n{self.content}\n```\nThanks."), ASSESSMENT)
+
+    def test_trailing_commas(self):
+        text = '{"fraud_likelihood": "LOW", "recommended_actions": ["Call the merchant",],}'
+        self.assertEqual(extract_json(text), {"fraud_likelihood": "LOW", "recommended_actions": ["Call the merchant"]})
+
+    def test_truncated_reply_is_closed(self):
+        text = self.content[:self.content.index("Block the card") + 5]
+        recovered = extract_json(text)
+        self.assertEqual(recovered["fraud_likelihood"], "HIGH")
+        self.assertEqual(recovered["recommended_actions"], ["Block"])
+
+    def test_truncated_key_is_dropped(self):
+        recovered = extract_json('{"fraud_likelihood": "MEDIUM", "analysis": "Looks odd", "recommen')
+        self.assertEqual(recovered, {"fraud_likelihood": "MEDIUM", "analysis": "Looks odd"})
+
+    def test_no_json(self):
+        self.assertIsNone(extract_json("I cannot assess this dispute."))
+        self.assertIsNone(extract_json(""))
+        self.assertIsNone(extract_json("[1, 2, 3]"))
+
+    def test_streamed_chunks(self):
+        extractor = JSONStreamExtractor()
+        text = f"first {self.content} then {json.dumps({'id': 2})}"
+        objects = []
+        for start in range(0, len(text), 7):
+            objects.extend(extractor.feed(text[start:start + 7]))
+        self.assertEqual(objects, [ASSESSMENT, {"id": 2}])
+        self.assertIsNone(extractor.close())
+
+if __name__ == '__main__':
+    unittest.main()
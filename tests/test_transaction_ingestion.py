@@ -0,0 +1,123 @@
+import json
+import os
+import tempfile
+import unittest
+from app.services.columnar_store import ColumnarTransactionRepository
+from app.services.customer_profiles import CustomerProfileIndex
+from app.services.transaction_ingestion import TransactionDeltaIngestor
+from app.services.transaction_repository import LayeredTransactionRepository
+import tests.test_transaction_repository as repository_tests
+from tests.test_transaction_repository import make_transaction
+
+def layered_repository(transactions=()):
+    return LayeredTransactionRepository(ColumnarTransactionRepository(transactions))
+
+class TestLayeredTransactionRepository(repository_tests.TestTransactionRepository):
+    repository_class = staticmethod(layered_repository)
+
+    def test_compact_keeps_contents(self):
+        """Test that folding the delta into the base changes nothing readers can see."""
+        self.repository.add_many([make_transaction("t1", amount=5.0), make_transaction("t9", date="2024-01-02 09:00:00")])
+        before = [t["transaction_id"] for t in self.repository.get_customer_transactions("CUST000001")]
+        columns = sorted(self.repository.customer_columns())
+        self.repository.compact()
+        self.assertEqual((len(self.repository.compacted), len(self.repository.delta)), (2, 0))
+        self.assertEqual(before, ["t1", "t9", "t3"])
+        self.assertEqual([t["transaction_id"] for t in self.repository.get_customer_transactions("CUST000001")], before)
+        self.assertEqual(sorted(self.repository.customer_columns()), columns)
+        self.assertEqual(self.repository.get("t1")["amount"], 5.0)
+        self.assertEqual(len(self.repository), 4)
+
+    def test_compact_leaves_a_snapshot_base_mapped(self):
+        """Test that compaction only merges the delta and never rebuilds a memory-mapped base."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "base.snap")
+            ColumnarTransactionRepository([make_transaction(f"t{i}") for i in range(10)]).save_snapshot(path)
+            snapshot = ColumnarTransactionRepository.open_snapshot(path)
+            repository = LayeredTransactionRepository(snapshot)
+            repository.add_many([make_transaction("t3", amount=5.0), make_transaction("t10")])
+            reading = repository.query_customer_transactions("CUST000001")
+            first = next(reading)
+            repository.compact()
+            repository.add(make_transaction("t11"))
+            repository.compact()
+
+            self.assertIs(repository.base, snapshot)
+            self.assertEqual((len(repository.compacted), len(repository.delta), len(repository)), (3, 0, 12))
+            self.assertEqual(repository.get("t3")["amount"], 5.0)
+            ids = [t["transaction_id"] for t in repository.get_customer_transactions("CUST000001")]
+            self.assertEqual(sorted(ids), sorted(f"t{i}" for i in range(12)))
+            # A reader that started before compaction still sees each row once
+            self.assertEqual(sorted([first["transaction_id"]] + [t["transaction_id"] for t in reading]),
+                             sorted(f"t{i}" for i in range(11)))
+            del reading, first
+
+class FakeService:
+    """The parts of DisputeService the ingestor uses."""
+
+    def __init__(self, transactions):
+        self.transactions = layered_repository(transactions)
+        self.profiles = CustomerProfileIndex.from_repository(self.transactions)
+
+    def add_transactions(self, transactions):
+        replaced = [t for t in map(self.transactions.get, (t['transaction_id'] for t in transactions)) if t]
+        count = self.transactions.add_many(transactions)
+        self.profiles.replace(replaced, transactions)
+        return count
+
+class TestTransactionDeltaIngestor(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "delta.jsonl")
+        self.service = FakeService([make_transaction("t1")])
+        self.ingestor = TransactionDeltaIngestor(self.service, path=self.path, max_batch_rows=100, compact_rows=1000)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _append(self, text, path=None):
+        with open(path or self.path, "a") as f:
+            f.write(text)
+
+    def test_merges_appended_lines(self):
+        """Test that only complete, valid lines are merged and each is read once."""
+        self.assertEqual(self.ingestor.poll(), 0)
+        self._append(json.dumps(make_transaction("t2", date="2024-01-02 09:00:00")) + "\n"
+                     + "not json\n"
+                     + json.dumps({"transaction_id": "t3"}) + "\n"
+                     + json.dumps(make_transaction("t4"))[:20])
+        self.assertEqual(self.ingestor.poll(), 1)
+        self.assertEqual(self.ingestor.stats["invalid_rows"], 2)
+        self.assertIsNotNone(self.service.transactions.get("t2"))
+        self.assertEqual(self.service.profiles.get("CUST000001").count, 2)
+
+        # The writer finishes the partial line
+        self._append(json.dumps(make_transaction("t4"))[20:] + "\n")
+        self.assertEqual(self.ingestor.poll(), 1)
+        self.assertEqual(self.ingestor.poll(), 0)
+        status = self.ingestor.status()
+        self.assertEqual((status["rows_merged"], status["batches"], status["pending_bytes"]), (2, 2, 0))
+        self.assertEqual(status["total_rows"], 3)
+
+    def test_replaced_file_and_directory(self):
+        """Test that a replaced file is re-read from the start and directories are read in name order."""
+        self._append(json.dumps(make_transaction("t2", amount=1.0)) + "\n")
+        self.ingestor.poll()
+        rotated = os.path.join(self.directory.name, "rotated.tmp")
+        with open(rotated, "w") as f:
+            f.write(json.dumps(make_transaction("t2", amount=2.0)) + "\n")
+        os.replace(rotated, self.path)
+        self.assertEqual(self.ingestor.poll(), 1)
+        self.assertEqual(self.service.transactions.get("t2")["amount"], 2.0)
+
+        ingestor = TransactionDeltaIngestor(self.service, path=self.directory.name, max_batch_rows=1, compact_rows=2)
+        self._append(json.dumps(make_transaction("t5")) + "\n", os.path.join(self.directory.name, "events.jsonl"))
+        self.assertEqual(ingestor.poll(), 1)  # delta.jsonl first, one row per batch
+        self.assertEqual(ingestor.poll(), 1)
+        self.assertEqual(ingestor.stats["compactions"], 1)
+        self.assertEqual(len(self.service.transactions.delta), 0)
+        self.assertEqual(len(self.service.transactions), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import json
+import os
+import tempfile
+from app.services.transaction_repository import TransactionRepository
+from app.utils.transaction_loader import iter_transactions, load_transactions
+from tests.test_transaction_repository import make_transaction
+
+class TestTransactionLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.transactions = [
+            make_transaction(f"t{i}", customer_id=f"CUST{i % 3:06d}", amount=i + 0.5, description="x" * i)
+            for i in range(50)
+        ]
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _write(self, name, content):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_json_array_small_chunks(self):
+        """Test that a JSON array is decoded correctly across many chunk boundaries."""
+        path = self._write("transactions.json", json.dumps(self.transactions, indent=2))
+        for chunk_size in (7, 64, 1 << 20):
+            self.assertEqual(list(iter_transactions(path, chunk_size=chunk_size)), self.transactions)
+
+    def test_json_lines(self):
+        """Test JSON Lines input, ignoring blank lines."""
+        path = self._write("transactions.jsonl", "\n".join(json.dumps(t) for t in self.transactions) + "\n\n")
+        self.assertEqual(list(iter_transactions(path)), self.transactions)
+
+    def test_load_into_repository(self):
+        """Test that loading builds the repository indexes and reports stats."""
+        path = self._write("transactions.json", json.dumps(self.transactions))
+        repository = TransactionRepository()
+        stats = load_transactions(path, repository)
+        self.assertEqual(stats.rows, 50)
+        self.assertEqual(len(repository), 50)
+        self.assertEqual(len(repository.get_customer_transactions("CUST000001")), 17)
+        self.assertGreater(stats.rows_per_second, 0)
+
+    def test_malformed_input(self):
+        """Test that truncated or non-array documents raise errors."""
+        truncated = self._write("truncated.json", json.dumps(self.transactions)[:-40])
+        with self.assertRaises(ValueError):
+            list(iter_transactions(truncated, chunk_size=16))
+        not_array = self._write("object.json", json.dumps({"transactions": []}))
+        with self.assertRaises(ValueError):
+            list(iter_transactions(not_array))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from app.services.transaction_query import TransactionQuery, encode_cursor, decode_cursor
+from app.services.transaction_repository import TransactionRepository
+
+def make_transaction(transaction_id, customer_id="CUST000001", date="2024-01-01 12:00:00", **overrides):
+    transaction = {
+        "transaction_id": transaction_id,
+        "customer_id": customer_id,
+        "date": date,
+        "merchant": "Test Merchant",
+        "amount": 100.0,
+        "category": "Retail",
+        "transaction_type": "PURCHASE",
+        "payment_method": "CARD",
+        "card_number": "4111 1111 1111 1111",
+        "account_details": None,
+        "location": "Sydney, NSW",
+        "is_fraudulent": False
+    }
+    transaction.update(overrides)
+    return transaction
+
+class TestTransactionRepository(unittest.TestCase):
+    repository_class = TransactionRepository
+
+    def setUp(self):
+        self.repository = self.repository_class([
+            make_transaction("t3", date="2024-01-03 09:00:00"),
+            make_transaction("t1", date="2024-01-01 09:00:00"),
+            make_transaction("t2", customer_id="CUST000002", date="2024-01-02 09:00:00"),
+        ])
+
+    def test_get(self):
+        """Test point lookups by transaction ID."""
+        self.assertEqual(self.repository.get("t2")["customer_id"], "CUST000002")
+        self.assertIsNone(self.repository.get("missing"))
+        self.assertEqual(len(self.repository), 3)
+
+    def test_customer_transactions_in_date_order(self):
+        """Test that a customer's transactions are returned oldest first."""
+        self.repository.add(make_transaction("t0", date="2023-12-31 09:00:00"))
+        self.repository.add(make_transaction("t4", date="2024-01-02 09:00:00"))
+        ids = [t["transaction_id"] for t in self.repository.get_customer_transactions("CUST000001")]
+        self.assertEqual(ids, ["t0", "t1", "t4", "t3"])
+        self.assertEqual(self.repository.get_customer_transactions("CUST999999"), [])
+
+    def test_add_replaces_existing_transaction(self):
+        """Test that re-adding a transaction ID replaces the old record everywhere."""
+        self.repository.add(make_transaction("t1", customer_id="CUST000002", date="2024-01-05 09:00:00"))
+        self.repository.add_many([make_transaction("t3", amount=5.0), make_transaction("t3", amount=7.0)])
+        self.assertEqual(len(self.repository), 3)
+        self.assertEqual([t["transaction_id"] for t in self.repository.get_customer_transactions("CUST000001")], ["t3"])
+        self.assertEqual(self.repository.get("t3")["amount"], 7.0)
+        self.assertEqual(
+            [t["transaction_id"] for t in self.repository.get_customer_transactions("CUST000002")], ["t2", "t1"]
+        )
+
+    def test_query_customer_transactions(self):
+        """Test date-range seeks, column filters and resuming after a cursor position."""
+        self.repository.add_many([
+            make_transaction("t4", date="2024-01-03 09:00:00", merchant="Coles", amount=250.0),
+            make_transaction("t5", date="2024-01-04 18:00:00", category="Dining", is_fraudulent=True),
+            make_transaction("t6", date="2024-01-05 09:00:00"),
+        ])
+
+        def ids(query=None, after=None):
+            return [t["transaction_id"] for t in self.repository.query_customer_transactions("CUST000001", query, after)]
+
+        self.assertEqual(ids(), ["t1", "t3", "t4", "t5", "t6"])
+        self.assertEqual(ids(TransactionQuery(start_date="2024-01-03", end_date="2024-01-04")), ["t3", "t4", "t5"])
+        self.assertEqual(ids(TransactionQuery(min_amount=200.0)), ["t4"])
+        self.assertEqual(ids(TransactionQuery(merchant="Coles")), ["t4"])
+        self.assertEqual(ids(TransactionQuery(merchant="Nowhere")), [])
+        self.assertEqual(ids(TransactionQuery(category="Dining", is_fraudulent=True)), ["t5"])
+        self.assertEqual(ids(TransactionQuery(max_amount=150.0, is_fraudulent=False)), ["t1", "t3", "t6"])
+        cursor = encode_cursor(self.repository.get("t3"))
+        self.assertEqual(ids(after=decode_cursor(cursor)), ["t4", "t5", "t6"])
+        self.assertEqual(ids(TransactionQuery(end_date="2024-01-04"), decode_cursor(cursor)), ["t4", "t5"])
+        self.assertEqual(list(self.repository.query_customer_transactions("CUST999999")), [])
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+
+if __name__ == '__main__':
+    unittest.main()
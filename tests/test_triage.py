@@ -0,0 +1,53 @@
+import unittest
+from app.services.triage import DisputeTriage
+from app.services.customer_profiles import CustomerProfileIndex
+from tests.test_transaction_repository import make_transaction
+
+class TestDisputeTriage(unittest.TestCase):
+
+    def setUp(self):
+        self.triage = DisputeTriage(enabled=True, high_min_signals=2, amount_zscore=3.0, familiar_merchant_min=3)
+        self.profiles = CustomerProfileIndex()
+        for i in range(6):
+            self.profiles.add(make_transaction(f"h{i}", merchant="Woolworths", amount=80.0 + i * 5))
+
+    def classify(self, transaction):
+        self.profiles.add(transaction)
+        return self.triage.classify(transaction, self.profiles.features(transaction))
+
+    def test_high_risk_signals(self):
+        """Test that a dispute with several risk signals is settled as HIGH."""
+        transaction = make_transaction("t1", merchant="Crypto Trading Platform", location="Unknown Location")
+        result = self.classify(transaction)
+        self.assertEqual(result["fraud_likelihood"], "HIGH")
+        self.assertEqual(len(result["triage_signals"]), 2)
+
+    def test_amount_deviation_is_a_signal(self):
+        """Test that an amount far above the customer's usual spend counts as a risk signal."""
+        transaction = make_transaction("t1", merchant="Overseas Subscription", amount=900.0)
+        self.assertEqual(self.classify(transaction)["fraud_likelihood"], "HIGH")
+        transaction = make_transaction("t2", merchant="Overseas Subscription", amount=95.0)
+        self.assertIsNone(self.classify(transaction))
+
+    def test_low_risk(self):
+        """Test that refunds and familiar merchants at usual amounts are settled as LOW."""
+        refund = make_transaction("t1", transaction_type="REFUND")
+        self.assertEqual(self.classify(refund)["fraud_likelihood"], "LOW")
+        familiar = make_transaction("t2", merchant="Woolworths", amount=90.0)
+        self.assertEqual(self.classify(familiar)["fraud_likelihood"], "LOW")
+
+    def test_ambiguous_escalated(self):
+        """Test that ambiguous disputes are left for the LLM and counted."""
+        transaction = make_transaction("t1", merchant="JB Hi-Fi", amount=120.0)
+        self.assertIsNone(self.classify(transaction))
+        stats = self.triage.stats()
+        self.assertEqual((stats["disputes"], stats["escalated_to_llm"]), (1, 1))
+
+    def test_disabled(self):
+        """Test that disabled triage escalates everything."""
+        self.triage.enabled = False
+        transaction = make_transaction("t1", merchant="Crypto Trading Platform", location="Unknown Location")
+        self.assertIsNone(self.classify(transaction))
+
+if __name__ == '__main__':
+    unittest.main()